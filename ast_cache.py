@@ -0,0 +1,165 @@
+# Cache em disco do AST analisado (e otimizado), no estilo do __pycache__: evita PrePro.filter, tokenizer e
+# Parser.run quando o mesmo .pattern roda de novo. A chave é o hash do código-fonte, das opções que mudam o
+# AST e da versão do interpretador (hash dos módulos que definem os nós), então qualquer mudança cai numa
+# entrada nova; as que ficam sem uso saem pela remoção por tamanho, das usadas há mais tempo para as mais
+# recentes. Cada entrada é um pickle do AST comprimido com zlib (o pickle de nós repete muito a mesma
+# estrutura), precedido de um cabeçalho que repete a chave. Como qualquer pickle, o diretório do cache
+# precisa ser de confiança (assim como o __pycache__).
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+
+CACHE_DIRECTORY = '__patterncache__'
+CACHE_SIZE_LIMIT = 64 * 2 ** 20     # bytes ocupados pelas entradas antes de remover as mais antigas
+CACHE_MAGIC = b'PSAC'
+CACHE_FORMAT = 1
+CACHE_SUFFIX = '.ast'
+CACHE_COMPRESSION = 1               # nível do zlib: descomprimir custa pouco perto de desserializar
+VERSIONED_MODULES = ('main.py', 'optimizer.py', 'compact.py', 'ast_cache.py')
+
+def default_directory(filename):
+    return os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIRECTORY)
+
+def interpreter_version():
+    # Muda com o formato do cache, a versão do Python e o código das classes de nó gravadas no pickle
+    digest = hashlib.sha256(f"{CACHE_FORMAT} {sys.version_info[0]}.{sys.version_info[1]} "
+                            f"{pickle.HIGHEST_PROTOCOL}".encode())
+    base = os.path.dirname(os.path.abspath(__file__))
+    for name in VERSIONED_MODULES:
+        with open(os.path.join(base, name), 'rb') as file:
+            digest.update(file.read())
+    return digest.digest()
+
+class ASTCache:
+    def __init__(self, directory, size_limit=CACHE_SIZE_LIMIT):
+        self.directory = directory
+        self.size_limit = size_limit
+        self.version = interpreter_version()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self.last_path = None
+
+    def key(self, source, options=()):
+        digest = hashlib.sha256(self.version)
+        digest.update(repr(tuple(options)).encode())
+        digest.update(source.encode('utf-8'))
+        return digest.digest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key.hex() + CACHE_SUFFIX)
+
+    def load(self, source, options=()):
+        # Objeto gravado para este código e estas opções, ou None
+        key = self.key(source, options)
+        path = self.last_path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            self.misses += 1
+            return None
+        header = CACHE_MAGIC + key
+        if data[:len(header)] != header:
+            return self.discard(path)
+        # Sem o coletor de ciclos durante a leitura: ele percorreria os milhares de nós recém-criados várias vezes
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            value = pickle.loads(zlib.decompress(memoryview(data)[len(header):]))
+        except Exception:
+            # Entrada truncada ou de classes que não existem mais
+            return self.discard(path)
+        finally:
+            if collecting:
+                gc.enable()
+        try:
+            os.utime(path)  # a data de modificação marca o último uso, para a remoção por tamanho
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def discard(self, path):
+        self.misses += 1
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    def store(self, source, value, options=()):
+        # Grava a entrada (de forma atômica) e aplica o limite de tamanho; False se não foi possível
+        key = self.key(source, options)
+        path = self.last_path = self.path(key)
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), CACHE_COMPRESSION)
+        except (RecursionError, pickle.PicklingError, TypeError, AttributeError):
+            return False
+        finally:
+            if collecting:
+                gc.enable()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as file:
+                    file.write(CACHE_MAGIC + key)
+                    file.write(data)
+                os.replace(temporary, path)
+            except BaseException:
+                os.remove(temporary)
+                raise
+        except OSError:
+            return False
+        self.stored += 1
+        self.evict()
+        return True
+
+    def entries(self):
+        # (último uso, tamanho, caminho) de cada entrada
+        found = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return found
+        for name in names:
+            if name.endswith(CACHE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                found.append((status.st_mtime, status.st_size, path))
+        return found
+
+    def evict(self):
+        # Remove as entradas usadas há mais tempo até caber no limite; a mais recente sempre fica
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:
+            if total <= self.size_limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+
+    def report(self):
+        if self.hits:
+            state = f"acerto em {self.last_path}"
+        elif self.stored:
+            state = f"falta, gravado em {self.last_path}"
+        else:
+            state = "falta, não gravado"
+        removed = f"; {self.evicted} entradas antigas removidas" if self.evicted else ""
+        return f"Cache do AST: {state}{removed}"
@@ -0,0 +1,261 @@
+# Execução em lote (--batch): roda muitos .pattern num conjunto de processos do tamanho do número de
+# núcleos, sem pagar a inicialização do interpretador a cada arquivo. Cada processo recebe um arquivo por
+# vez e executa com estado próprio (buffer de comandos zerado, SymbolTable e interpretador novos) e com a
+# entrada do `scanf` vinda de um texto fixo, nunca do terminal. Um arquivo que passa do tempo limite tem o
+# processo encerrado, que é substituído por outro; o lote segue com os demais. O resultado de cada arquivo
+# (situação, tempo, comandos emitidos, arquivo de saída, erro) é reunido num resumo na ordem dos arquivos.
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+import main
+from main import STITCHES, Parser, SymbolTable, create_interpreter
+from stitches import STITCH_FLUSH_ROWS, TeeSink, create_sink
+
+BATCH_TIMEOUT = 60.0    # segundos por arquivo
+OUTPUT_SUFFIXES = {'text': '.txt', 'jsonl': '.jsonl', 'binary': '.bin'}
+
+OK, FAILED, TIMEOUT, CRASHED = 'ok', 'erro', 'tempo esgotado', 'processo encerrado'
+
+class CountingSink:
+    # Só conta os comandos; usado sozinho quando a saída dos arquivos não é guardada
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, buffer):
+        self.rows += len(buffer)
+
+def collect_files(paths):
+    # Arquivos .pattern dos caminhos dados: diretórios são percorridos recursivamente e padrões glob
+    # (útil quando o shell não os expande) são expandidos; repetidos aparecem uma vez
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, '**', '*.pattern'), recursive=True)))
+        elif any(character in path for character in '*?['):
+            found.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+def output_paths(files, directory, output):
+    # Um arquivo de saída por .pattern, com o mesmo nome; nomes repetidos ganham um número
+    if directory is None:
+        return [None] * len(files)
+    paths = []
+    used = set()
+    for filename in files:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        name = stem
+        count = 1
+        while name in used:
+            count += 1
+            name = f"{stem}-{count}"
+        used.add(name)
+        paths.append(os.path.join(directory, name + OUTPUT_SUFFIXES[output]))
+    return paths
+
+def job_result(filename, output_path, status=OK, error=None, commands=0, seconds=0.0):
+    return {'file': filename, 'status': status, 'seconds': seconds, 'commands': commands,
+            'output': output_path, 'error': error}
+
+def load_ast(code, filename, settings):
+    if settings['no_cache']:
+        return Parser.run(code)
+    from ast_cache import ASTCache, default_directory
+    cache = ASTCache(settings['cache_dir'] or default_directory(filename), settings['cache_size'])
+    cached = cache.load(code)
+    if cached is not None:
+        return cached[0]
+    ast = Parser.run(code)
+    cache.store(code, (ast, None, []))
+    return ast
+
+def run_job(filename, output_path, settings):
+    # Executa um arquivo no processo atual, como `python main.py`, e devolve o resultado dele
+    start = time.perf_counter()
+    result = job_result(filename, output_path)
+    counter = CountingSink()
+    output_file = None
+    try:
+        if not filename.endswith('.pattern'):
+            raise ValueError("Erro: O arquivo deve ter a extensão .pattern")
+        with open(filename, 'r') as file:
+            code = file.read()
+        STITCHES.reset()
+        STITCHES.flush_rows = STITCH_FLUSH_ROWS
+        STITCHES.sink = counter
+        if output_path is not None:
+            binary = settings['output'] == 'binary'
+            output_file = open(output_path, 'wb') if binary else open(output_path, 'w', encoding='utf-8')
+            STITCHES.sink = TeeSink(create_sink(settings['output'], output_file), counter)
+        ast = load_ast(code, filename, settings)
+        if settings['backend'] == 'tree' and settings['memoize']:
+            from memoize import Memoizer
+            ast = Memoizer(settings['memo_size']).memoize(ast)
+        symbol_table = SymbolTable()
+        interpreter = create_interpreter(settings['backend'])
+        sys.stdin = io.StringIO(settings['input'])
+        # Mensagens impressas direto pelos nós não se misturam ao resumo
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                interpreter.execute(ast, symbol_table)
+                interpreter.call_main(symbol_table)
+            finally:
+                # Os comandos executados antes de um erro também vão para a saída, como em main()
+                STITCHES.flush()
+    except FileNotFoundError:
+        result.update(status=FAILED, error=f"Erro: O arquivo {filename} não foi encontrado.")
+    except EOFError:
+        result.update(status=FAILED, error="Erro: `scanf` sem entrada disponível (veja --input).")
+    except Exception as e:
+        result.update(status=FAILED, error=str(e))
+    finally:
+        if output_file is not None:
+            output_file.close()
+    result['commands'] = counter.rows
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def worker(connection, settings):
+    # Laço de um processo do lote: recebe (arquivo, saída) e devolve o resultado, até receber None
+    main.VECTORIZE_LOOPS = settings['vectorize']
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        connection.send(run_job(job[0], job[1], settings))
+
+class BatchRunner:
+    def __init__(self, settings, jobs=None, timeout=BATCH_TIMEOUT):
+        self.settings = settings
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout = timeout
+        self.context = multiprocessing.get_context()
+        self.replaced = 0   # processos substituídos depois de tempo esgotado ou de uma falha
+
+    def start_worker(self):
+        connection, child = self.context.Pipe()
+        process = self.context.Process(target=worker, args=(child, self.settings), daemon=True)
+        process.start()
+        child.close()
+        return process, connection
+
+    def stop_worker(self, process, connection):
+        if process.is_alive():
+            process.kill()
+        process.join()
+        connection.close()
+
+    def run(self, files, output_directory=None, progress=None):
+        # Resultados na ordem de `files`; progress(resultado) é chamado a cada arquivo concluído
+        outputs = output_paths(files, output_directory, self.settings['output'])
+        if output_directory is not None:
+            os.makedirs(output_directory, exist_ok=True)
+        results = [None] * len(files)
+        pending = deque(range(len(files)))
+        idle = [self.start_worker() for _ in range(min(self.jobs, len(files)))]
+        running = {}    # conexão -> (processo, índice do arquivo, início)
+        try:
+            while pending or running:
+                while idle and pending:
+                    process, connection = idle.pop()
+                    index = pending.popleft()
+                    connection.send((files[index], outputs[index]))
+                    running[connection] = (process, index, time.perf_counter())
+
+                wait_time = None
+                if self.timeout is not None:
+                    deadline = min(started for _, _, started in running.values()) + self.timeout
+                    wait_time = max(deadline - time.perf_counter(), 0)
+                for connection in wait(list(running), wait_time):
+                    process, index, started = running.pop(connection)
+                    try:
+                        result = connection.recv()
+                        idle.append((process, connection))
+                    except (EOFError, OSError):
+                        # O processo morreu no meio do arquivo (ex.: falta de memória)
+                        self.stop_worker(process, connection)
+                        result = job_result(files[index], outputs[index], CRASHED,
+                                            f"Erro: o processo terminou com código {process.exitcode}.",
+                                            seconds=time.perf_counter() - started)
+                        idle.append(self.start_worker())
+                        self.replaced += 1
+                    results[index] = result
+                    if progress is not None:
+                        progress(result)
+
+                if self.timeout is not None:
+                    now = time.perf_counter()
+                    for connection, (process, index, started) in list(running.items()):
+                        if now - started >= self.timeout:
+                            del running[connection]
+                            self.stop_worker(process, connection)
+                            result = job_result(files[index], outputs[index], TIMEOUT,
+                                                f"Erro: tempo limite de {self.timeout:g}s esgotado.", seconds=now - started)
+                            results[index] = result
+                            idle.append(self.start_worker())
+                            self.replaced += 1
+                            if progress is not None:
+                                progress(result)
+        finally:
+            for process, connection in idle:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+            for process, connection in idle:
+                process.join(1)
+                self.stop_worker(process, connection)
+            for connection, (process, _, _) in running.items():
+                self.stop_worker(process, connection)
+        return results
+
+def summary(results, seconds):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return {
+        'files': len(results), 'seconds': seconds, 'files_per_second': len(results) / seconds if seconds else 0.0,
+        'commands': sum(result['commands'] for result in results), 'status': counts, 'results': results,
+    }
+
+def report(batch):
+    lines = []
+    for result in batch['results']:
+        line = f"{result['status']:<18} {result['seconds']:8.3f}s {result['commands']:>10} comandos  {result['file']}"
+        if result['output']:
+            line += f" -> {result['output']}"
+        if result['error']:
+            line += f"\n{'':<19}{result['error']}"
+        lines.append(line)
+    counts = ', '.join(f"{count} {status}" for status, count in batch['status'].items())
+    lines.append(f"{batch['files']} arquivos ({counts}) em {batch['seconds']:.2f}s, "
+                 f"{batch['files_per_second']:.1f} arquivos/s, {batch['commands']} comandos")
+    return '\n'.join(lines)
+
+def run_batch(paths, settings, jobs=None, timeout=BATCH_TIMEOUT, output_directory=None, summary_file=None):
+    # Usado por main(): executa o lote, mostra o resumo e devolve False se algum arquivo não terminou bem
+    files = collect_files(paths)
+    if not files:
+        print("Erro: nenhum arquivo .pattern encontrado.", file=sys.stderr)
+        return False
+    runner = BatchRunner(settings, jobs, timeout)
+    start = time.perf_counter()
+    results = runner.run(files, output_directory)
+    batch = summary(results, time.perf_counter() - start)
+    print(report(batch))
+    if summary_file:
+        with open(summary_file, 'w', encoding='utf-8') as file:
+            json.dump(batch, file, ensure_ascii=False, indent=2)
+    return all(result['status'] == OK for result in results)
@@ -0,0 +1,58 @@
+# Execução em lote (batch.py): arquivos por segundo de um catálogo de .pattern pequenos executados como
+# hoje (um `python main.py` por arquivo, em série) e pelo BatchRunner com 1 processo e com um processo por
+# núcleo. A saída gravada pelo lote é conferida com a de `python main.py` para cada arquivo.
+# Uso: python bench_batch.py [número de arquivos] [comandos por arquivo]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from programs import ROOT, large_source
+from batch import BatchRunner
+
+SETTINGS = {
+    'backend': 'tree', 'output': 'text', 'vectorize': True, 'input': '', 'memoize': True, 'memo_size': 4096,
+    'no_cache': True, 'cache_dir': None, 'cache_size': 64 * 2 ** 20,
+}
+
+def serial(files):
+    outputs = []
+    for filename in files:
+        outputs.append(subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), filename, '--no-cache'],
+                                      stdout=subprocess.PIPE, check=True).stdout)
+    return outputs
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    statements = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for k in range(count):
+            filename = os.path.join(directory, f"desenho{k:05}.pattern")
+            with open(filename, 'w') as file:
+                file.write(large_source(statements + 4 * (k % 7)))
+            files.append(filename)
+
+        start = time.perf_counter()
+        expected = serial(files)
+        serial_time = time.perf_counter() - start
+        print(f"{count} arquivos, ~{statements} comandos cada, {cores} núcleos")
+        print(f"  python main.py por arquivo: {count / serial_time:8.1f} arquivos/s ({serial_time:.2f}s)")
+
+        for jobs in sorted({1, cores}):
+            output_directory = os.path.join(directory, f"saida{jobs}")
+            start = time.perf_counter()
+            results = BatchRunner(SETTINGS, jobs).run(files, output_directory)
+            elapsed = time.perf_counter() - start
+            for result, output in zip(results, expected):
+                with open(result['output'], 'rb') as file:
+                    if result['status'] != 'ok' or file.read() != output:
+                        print(f"DIVERGÊNCIA em {result['file']}: {result['error']}", file=sys.stderr)
+                        sys.exit(1)
+            print(f"  --batch --jobs {jobs:<12} {count / elapsed:8.1f} arquivos/s ({elapsed:.2f}s, "
+                  f"{serial_time / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Cache do AST em disco (ast_cache.py): tempo para obter o AST de um .pattern grande analisando o código
+# (PrePro.filter, tokenizer e Parser.run) e lendo a entrada do cache, e o tempo total de `python main.py`
+# sem cache, com o cache vazio (analisa e grava) e com o cache já preenchido. A saída dos comandos é
+# descartada; o AST lido do cache é conferido pela saída em texto antes das medições.
+# Uso: python bench_cache.py [número de comandos]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from programs import ROOT, large_source, run_captured
+from main import Parser, Interpreter
+from ast_cache import ASTCache
+
+def best_of(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def command_time(arguments):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'main.py')] + arguments, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    source = large_source(statements)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'grande.pattern')
+        with open(filename, 'w') as file:
+            file.write(source)
+        cache_directory = os.path.join(directory, 'cache')
+        cache = ASTCache(cache_directory)
+
+        parsed = Parser.run(source)
+        cache.store(source, parsed)
+        loaded = cache.load(source)
+        if run_captured(Interpreter(), loaded, repeat=1)[:2] != run_captured(Interpreter(), parsed, repeat=1)[:2]:
+            print("DIVERGÊNCIA entre o AST analisado e o lido do cache", file=sys.stderr)
+            sys.exit(1)
+        size = os.path.getsize(cache.path(cache.key(source)))
+
+        parse_time = best_of(lambda: Parser.run(source))
+        load_time = best_of(lambda: cache.load(source))
+        print(f"arquivo: {len(source) / 2 ** 20:.1f} MB, {statements} comandos; entrada do cache: {size / 2 ** 20:.1f} MB")
+        print(f"AST analisando o código: {parse_time:8.3f}s")
+        print(f"AST lido do cache:       {load_time:8.3f}s ({parse_time / load_time:.1f}x)")
+
+        uncached = command_time([filename, '--no-cache'])
+        fresh = os.path.join(directory, 'frio')
+        cold = command_time([filename, '--cache-dir', fresh])
+        warm = command_time([filename, '--cache-dir', fresh])
+        print("\npython main.py (análise + execução):")
+        print(f"  sem cache:        {uncached:8.3f}s")
+        print(f"  cache vazio:      {cold:8.3f}s")
+        print(f"  cache preenchido: {warm:8.3f}s ({cold / warm:.1f}x)")
+
+if __name__ == "__main__":
+    main()
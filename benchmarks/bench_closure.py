@@ -0,0 +1,27 @@
+# Compara o backend de closures com o interpretador de árvore: primeiro verifica que a saída
+# (e o erro, se houver) é idêntica para cada programa, depois mede o tempo de execução.
+import sys
+
+from programs import sample_programs, error_program, loop_program, function_program, run_captured
+from main import Interpreter
+from closure_compiler import ClosureCompiler
+
+def main():
+    programs = sample_programs() + [
+        ('erro de tipo', error_program()),
+        ('laço (20k iterações)', loop_program(20000, draw=False)),
+        ('laço + drawLine (20k)', loop_program(20000)),
+        ('funções (20k iterações)', function_program(20000)),
+    ]
+
+    print(f"{'programa':<28}{'árvore (s)':>12}{'closures (s)':>14}{'speedup':>10}")
+    for name, ast in programs:
+        tree_output, tree_error, tree_time = run_captured(Interpreter(), ast)
+        closure_output, closure_error, closure_time = run_captured(ClosureCompiler(), ast)
+        if (tree_output, tree_error) != (closure_output, closure_error):
+            print(f"DIVERGÊNCIA em '{name}'", file=sys.stderr)
+            sys.exit(1)
+        print(f"{name:<28}{tree_time:>12.4f}{closure_time:>14.4f}{tree_time / closure_time:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
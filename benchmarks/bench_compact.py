@@ -0,0 +1,84 @@
+# AST compacto (compact.py): para programas gerados de vários formatos, compara a árvore de objetos do Parser
+# com a NodeTable do CompactParser. Mostra o tempo de análise (do código-fonte ao AST, com a tokenização),
+# a memória que continua alocada depois da análise dividida pelo número de nós (medida numa análise separada
+# com tracemalloc, que deixaria os tempos mais lentos) e o tempo de execução no backend tree, e confere se
+# as duas execuções geram exatamente os mesmos comandos. Com 1000000 declarações a árvore ocupa alguns GB.
+# Uso: python bench_compact.py [declarações] [formatos]   (padrão: 100000 flood,if_tree,concat,mixed)
+import contextlib
+import gc
+import hashlib
+import io
+import sys
+import time
+import tracemalloc
+
+from programs import flood_source, if_tree_source, concat_source, large_source
+from main import STITCHES, Parser, SymbolTable, Interpreter
+from stitches import BinarySink
+from bench_suite import count_nodes
+from compact import CompactParser, CompactInterpreter
+
+SHAPES = {'flood': flood_source, 'if_tree': if_tree_source, 'concat': concat_source, 'mixed': large_source}
+
+class Digest:
+    # Arquivo que só calcula o hash do que é gravado (a saída binária inteira não fica na memória)
+    def __init__(self):
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+
+def retained(parse, code):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        ast = parse(code)
+        return ast, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def run(ast, interpreter):
+    digest = Digest()
+    STITCHES.reset()
+    STITCHES.sink = BinarySink(digest)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        symbol_table = SymbolTable()
+        interpreter.execute(ast, symbol_table)
+        interpreter.call_main(symbol_table)
+        STITCHES.flush()
+    return time.perf_counter() - start, digest.hash.hexdigest()
+
+def measure(parse, code, interpreter, count):
+    gc.collect()
+    start = time.perf_counter()
+    ast = parse(code)
+    parse_seconds = time.perf_counter() - start
+    del ast
+    ast, memory = retained(parse, code)
+    nodes = count(ast)
+    execute_seconds, digest = run(ast, interpreter)
+    return nodes, parse_seconds, memory, execute_seconds, digest
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    shapes = sys.argv[2].split(',') if len(sys.argv) > 2 else list(SHAPES)
+    # Aquecimento: o primeiro laço importa loops.py (e numpy)
+    run(Parser.run(large_source(8)), Interpreter())
+    for shape in shapes:
+        code = SHAPES[shape](statements)
+        print(f"{shape}: {statements} declarações, {len(code) / 2 ** 20:.1f} MB de código-fonte")
+        tree = measure(Parser.run, code, Interpreter(), count_nodes)
+        compact = measure(CompactParser.run, code, CompactInterpreter(), len)
+        for name, (nodes, parse_seconds, memory, execute_seconds, _) in (('árvore', tree), ('compacto', compact)):
+            print(f"  {name:<9} {nodes:>9} nós  análise {parse_seconds:8.2f}s  {memory / 2 ** 20:9.1f} MB "
+                  f"{memory / nodes:7.1f} bytes/nó  execução {execute_seconds:7.2f}s")
+        print(f"  compacto/árvore: análise {compact[1] / tree[1]:.2f}x, memória {compact[2] / tree[2]:.3f}x, "
+              f"execução {compact[3] / tree[3]:.2f}x")
+        if tree[0] != compact[0] or tree[4] != compact[4]:
+            print(f"DIVERGÊNCIA em {shape}: os comandos gerados não são os mesmos", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Vazão do exportador DST (dst.py) em registros por segundo, com verificação de ida e volta: o arquivo
+# lido de volta precisa ter um ponto no fim de cada drawLine e bater com as contagens do cabeçalho.
+# Uso: python bench_dst.py [máximo de segmentos]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stitches import StitchBuffer
+from dst import DstSink, DstReader, STITCH, COLOR_CHANGE
+
+def design(count, seed=0):
+    # Pontos curtos encadeados, saltos ocasionais (linhas longas ou desconectadas) e trocas de cor
+    generator = random.Random(seed)
+    buffer = StitchBuffer(flush_rows=count * 2)
+    buffer.setup(1000, "black")
+    x = y = 0
+    for index in range(count):
+        if index % 5000 == 4999:
+            buffer.change_thread(f"cor{index // 5000}")
+        if generator.random() < 0.01:
+            x, y = generator.randrange(1000), generator.randrange(1000)
+        next_x = min(max(x + generator.randint(-30, 30), 0), 999)
+        next_y = min(max(y + generator.randint(-30, 30), 0), 999)
+        buffer.draw_line(x, y, next_x, next_y)
+        x, y = next_x, next_y
+    return buffer
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    print(f"{'segmentos':>10}{'registros':>11}{'escrita (s)':>13}{'registros/s':>14}{'leitura (s)':>13}{'bytes':>13}")
+    count = 10000
+    while count <= limit:
+        buffer = design(count)
+        endpoints = [(x2 * 2, -y2 * 2) for x1, y1, x2, y2, _ in buffer.segments()]
+        changes = sum(1 for command in buffer.commands() if command[0] == 'changeThread')
+
+        with tempfile.TemporaryFile() as file:
+            start = time.perf_counter()
+            sink = DstSink(file, scale=2)
+            sink.write(buffer)
+            sink.close()
+            write_time = time.perf_counter() - start
+            size = file.tell()
+
+            file.seek(0)
+            start = time.perf_counter()
+            reader = DstReader(file)
+            records = list(reader.records())
+            read_time = time.perf_counter() - start
+
+        # Ida e volta: os fins de linha aparecem em ordem entre os pontos e as contagens conferem
+        stitches = iter((x, y) for x, y, kind in records if kind == STITCH)
+        if not all(endpoint in stitches for endpoint in endpoints):
+            print(f"DIVERGÊNCIA: fins de linha ausentes no DST com {count} segmentos", file=sys.stderr)
+            sys.exit(1)
+        color_records = sum(1 for record in records if record[2] == COLOR_CHANGE)
+        if int(reader.header['ST']) != len(records) + 1 or int(reader.header['CO']) != color_records or color_records != changes:
+            print(f"DIVERGÊNCIA: cabeçalho {reader.header} não confere com {len(records)} registros", file=sys.stderr)
+            sys.exit(1)
+
+        total = len(records) + 1
+        print(f"{count:>10}{total:>11}{write_time:>13.3f}{total / write_time:>14,.0f}{read_time:>13.3f}{size:>13,}")
+        count *= 10
+
+if __name__ == "__main__":
+    main()
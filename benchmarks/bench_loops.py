@@ -0,0 +1,88 @@
+# Laços que só desenham (loops.py): o mesmo motivo escrito com `for`, executado pelo caminho rápido com
+# NumPy e interpretado iteração por iteração (--no-vectorize), e desenrolado em drawLine literais (como os
+# desenhos eram escritos antes do `for`). Os tempos incluem análise e execução, sem formatar a saída;
+# a saída em texto das três formas é conferida antes.
+# Uso: python bench_loops.py [máximo de iterações]
+import sys
+import time
+
+from programs import run_captured
+import main
+from main import STITCHES, Parser, SymbolTable, Interpreter
+
+HEADER = 'setup {\n  frameSize = 2000;\n  threadColor = "red";\n};\n'
+
+class DiscardSink:
+    # Só conta as linhas: o tempo medido é o da execução, não o da formatação do texto
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, buffer):
+        self.rows += len(buffer)
+
+def loop_source(iterations):
+    return HEADER + (
+        f"for (i = 0; i < {iterations}; i = i + 1) {{\n"
+        "  drawLine(i, 0, 2 * i + 1, 100);\n"
+        "  drawLine(0, i, 100, 3 * i - 7);\n"
+        "}\n"
+    )
+
+def unrolled_source(iterations):
+    lines = [HEADER]
+    for i in range(iterations):
+        lines.append(f"drawLine({i}, 0, {2 * i + 1}, 100);\ndrawLine(0, {i}, 100, {3 * i - 7});\n")
+    return ''.join(lines)
+
+def timed(source, vectorize, repeat=3):
+    # Melhor tempo de análise + execução e o número de linhas gravadas
+    main.VECTORIZE_LOOPS = vectorize
+    saved = STITCHES.sink
+    best = None
+    try:
+        for _ in range(repeat):
+            sink = STITCHES.sink = DiscardSink()
+            STITCHES.reset()
+            start = time.perf_counter()
+            Interpreter().execute(Parser.run(source), SymbolTable())
+            STITCHES.flush()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        STITCHES.sink = saved
+        main.VECTORIZE_LOOPS = True
+    return best, sink.rows
+
+def text_output(source, vectorize):
+    main.VECTORIZE_LOOPS = vectorize
+    try:
+        return run_captured(Interpreter(), Parser.run(source), repeat=1)[:2]
+    finally:
+        main.VECTORIZE_LOOPS = True
+
+def main_benchmark():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    print(f"{'iterações':>10}{'linhas':>10}{'vetorizado (s)':>16}{'interpretado (s)':>18}{'desenrolado (s)':>17}"
+          f"{'speedup':>10}")
+    iterations = 1000
+    while iterations <= limit:
+        source = loop_source(iterations)
+        unrolled = unrolled_source(iterations) if iterations <= 10 ** 5 else None
+        if iterations <= 10 ** 4:
+            expected = text_output(source, vectorize=False)
+            if text_output(source, vectorize=True) != expected or text_output(unrolled, vectorize=False) != expected:
+                print(f"DIVERGÊNCIA na saída com {iterations} iterações", file=sys.stderr)
+                sys.exit(1)
+
+        vector_time, rows = timed(source, vectorize=True)
+        loop_time, loop_rows = timed(source, vectorize=False, repeat=1)
+        if rows != loop_rows:
+            print(f"DIVERGÊNCIA: {rows} linhas vetorizadas contra {loop_rows} interpretadas", file=sys.stderr)
+            sys.exit(1)
+        unrolled_column = f"{timed(unrolled, vectorize=False, repeat=1)[0]:>17.3f}" if unrolled else f"{'-':>17}"
+        print(f"{iterations:>10}{rows:>10}{vector_time:>16.4f}{loop_time:>18.3f}{unrolled_column}"
+              f"{loop_time / vector_time:>9.0f}x")
+        iterations *= 10
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,32 @@
+# Memoização das funções puras (memoize.py): mesma saída com e sem cache, tempo no interpretador de árvore
+# e contadores de acertos, faltas e descartes, inclusive com um cache pequeno que precisa descartar.
+import sys
+
+from programs import sample_programs, dynamic_scope_program, function_program, pure_program, run_captured
+from main import Interpreter
+from memoize import Memoizer
+
+def main():
+    programs = sample_programs() + [
+        ('escopo dinâmico', dynamic_scope_program()),
+        ('funções (5k iterações)', function_program(5000)),
+        ('fib(22) + 20k linhas', pure_program(22, 20000)),
+    ]
+    print(f"{'programa':<26}{'cache':>7}{'puras':>20}{'sem cache (s)':>15}{'com cache (s)':>15}{'speedup':>10}"
+          f"{'acertos':>10}{'faltas':>9}{'descartes':>11}")
+    for name, ast in programs:
+        plain_output, plain_error, plain_time = run_captured(Interpreter(), ast, repeat=1)
+        for capacity in (4096, 8):
+            memoizer = Memoizer(capacity)
+            memoized = memoizer.memoize(ast)
+            output, error, memo_time = run_captured(Interpreter(), memoized, repeat=1)
+            if (output, error) != (plain_output, plain_error):
+                print(f"DIVERGÊNCIA em '{name}' com cache de {capacity} entradas", file=sys.stderr)
+                sys.exit(1)
+            stats = memoizer.stats()
+            pure = ','.join(stats['pure_functions']) or '-'
+            print(f"{name:<26}{capacity:>7}{pure:>20}{plain_time:>15.4f}{memo_time:>15.4f}"
+                  f"{plain_time / memo_time:>9.1f}x{stats['hits']:>10}{stats['misses']:>9}{stats['evictions']:>11}")
+
+if __name__ == "__main__":
+    main()
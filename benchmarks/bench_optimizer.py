@@ -0,0 +1,47 @@
+# Mede o passo de otimização (optimizer.py): quantos nós ele remove, se a saída continua idêntica em
+# cada backend e quanto tempo de execução ele economiza no interpretador de árvore.
+import sys
+
+from programs import (
+    sample_programs, error_program, loop_program, function_program, constant_program, run_captured
+)
+from main import Interpreter
+from closure_compiler import ClosureCompiler
+from vm import VirtualMachine
+from optimizer import Optimizer
+
+def main():
+    programs = sample_programs() + [
+        ('constantes (20k iterações)', constant_program(20000)),
+        ('laço (20k iterações)', loop_program(20000, draw=False)),
+        ('funções (20k iterações)', function_program(20000)),
+    ]
+
+    print(f"{'programa':<28}{'nós antes':>10}{'depois':>8}{'árvore (s)':>12}{'otimizado (s)':>15}{'speedup':>10}")
+    for name, ast in programs:
+        optimizer = Optimizer()
+        optimized = optimizer.optimize(ast)
+        if optimizer.errors:
+            print(f"Erros de tipo inesperados em '{name}': {optimizer.errors}", file=sys.stderr)
+            sys.exit(1)
+
+        tree_output, tree_error, tree_time = run_captured(Interpreter(), ast)
+        optimized_output, optimized_error, optimized_time = run_captured(Interpreter(), optimized)
+        for backend in (ClosureCompiler, VirtualMachine):
+            output, error, _ = run_captured(backend(), optimized, repeat=1)
+            if (output, error) != (tree_output, tree_error):
+                print(f"DIVERGÊNCIA em '{name}' ({backend.__name__})", file=sys.stderr)
+                sys.exit(1)
+        if (optimized_output, optimized_error) != (tree_output, tree_error):
+            print(f"DIVERGÊNCIA em '{name}'", file=sys.stderr)
+            sys.exit(1)
+        print(f"{name:<28}{optimizer.nodes_before:>10}{optimizer.nodes_after:>8}"
+              f"{tree_time:>12.4f}{optimized_time:>15.4f}{tree_time / optimized_time:>9.1f}x")
+
+    # Erros de tipo aparecem antes de qualquer execução
+    optimizer = Optimizer()
+    optimizer.optimize(error_program())
+    print(f"\nerro de tipo detectado estaticamente: {optimizer.errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Otimizador de caminho (path_optimizer.py): distância de saltos e trocas de cor antes/depois e tempo de
+# otimização, com verificação de que a saída tem exatamente as mesmas linhas (possivelmente invertidas).
+# Uso: python bench_path.py [máximo de segmentos]
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stitches import StitchBuffer
+from path_optimizer import PathOptimizerSink, path_metrics
+
+COLORS = ("black", "red", "blue", "green", "gold")
+
+def design(count, seed=0):
+    # Traços curtos espalhados pelo bastidor, com a cor trocada a cada poucos traços (como num programa
+    # que desenha cada motivo inteiro antes do próximo)
+    generator = random.Random(seed)
+    buffer = StitchBuffer(flush_rows=count * 2)
+    buffer.setup(2000, COLORS[0])
+    for index in range(count):
+        if index % 40 == 0:
+            buffer.change_thread(generator.choice(COLORS))
+            x, y = generator.randrange(2000), generator.randrange(2000)
+        next_x = min(max(x + generator.randint(-15, 15), 0), 1999)
+        next_y = min(max(y + generator.randint(-15, 15), 0), 1999)
+        if generator.random() < 0.3:
+            # Traço desconectado dentro do mesmo motivo
+            x, y = min(max(x + generator.randint(-40, 40), 0), 1999), min(max(y + generator.randint(-40, 40), 0), 1999)
+        buffer.draw_line(x, y, next_x, next_y)
+        x, y = next_x, next_y
+    return buffer
+
+class SegmentCollector:
+    def __init__(self):
+        self.segments = []
+
+    def write(self, buffer):
+        self.segments.extend(buffer.segments())
+
+def normalized(segments):
+    # Multiconjunto de linhas com a cor, sem importar o sentido
+    return Counter((min((x1, y1), (x2, y2)), max((x1, y1), (x2, y2)), color) for x1, y1, x2, y2, color in segments)
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{'segmentos':>10}{'saltos antes':>15}{'saltos depois':>15}{'cores antes':>13}{'cores depois':>14}"
+          f"{'tempo (s)':>11}{'segmentos/s':>13}")
+    count = 2000
+    while count <= limit:
+        buffer = design(count)
+        original = list(buffer.segments())
+        result = SegmentCollector()
+        start = time.perf_counter()
+        sink = PathOptimizerSink(result)
+        sink.write(buffer)
+        sink.close()
+        elapsed = time.perf_counter() - start
+
+        optimized = result.segments
+        if normalized(optimized) != normalized(original):
+            print(f"DIVERGÊNCIA: linhas diferentes depois de otimizar {count} segmentos", file=sys.stderr)
+            sys.exit(1)
+        (jump_before, changes_before), (jump_after, changes_after) = path_metrics(original), path_metrics(optimized)
+        if jump_after > jump_before or changes_after > changes_before:
+            print(f"DIVERGÊNCIA: caminho pior depois de otimizar {count} segmentos", file=sys.stderr)
+            sys.exit(1)
+        print(f"{count:>10}{jump_before:>15,.0f}{jump_after:>15,.0f}{changes_before:>13}{changes_after:>14}"
+              f"{elapsed:>11.3f}{count / elapsed:>13,.0f}")
+        count *= 10
+
+if __name__ == "__main__":
+    main()
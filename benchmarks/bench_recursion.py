@@ -0,0 +1,71 @@
+# Recursão profunda: o interpretador de árvore usa a pilha do Python e esbarra no limite de recursão; a VM
+# guarda os quadros numa lista e descarta o quadro de quem chama nas chamadas de cauda (`return f(...)`).
+# Mede a profundidade alcançada, chamadas por segundo e o pico de memória da recursão comum
+# (recursive_program, um quadro vivo por nível) e da recursão só por chamadas de cauda (tail_call_program).
+# Uso: python bench_recursion.py [profundidade máxima]
+import sys
+import tracemalloc
+
+from programs import recursive_program, tail_call_program, run_captured
+from main import Interpreter
+from vm import VirtualMachine
+
+MEMORY_DEPTH_LIMIT = 10 ** 5   # o tracemalloc deixa a execução bem mais lenta
+
+PROGRAMS = (
+    # (nome, programa, chamadas para a profundidade d)
+    ('recursão comum', recursive_program, lambda depth: depth + 1),
+    ('chamadas de cauda', tail_call_program, lambda depth: 2 * depth + 2),
+)
+
+def peak_memory(ast):
+    tracemalloc.start()
+    try:
+        run_captured(VirtualMachine(), ast, repeat=1)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def tree_status(ast):
+    _, error, elapsed = run_captured(Interpreter(), ast, repeat=1)
+    return error[0] if error else f"{elapsed:.3f}s"
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+
+    # Mesma saída nas profundidades em que a árvore ainda funciona
+    for name, program, _ in PROGRAMS:
+        ast = program(100)
+        if run_captured(Interpreter(), ast, repeat=1)[:2] != run_captured(VirtualMachine(), ast, repeat=1)[:2]:
+            print(f"DIVERGÊNCIA em '{name}'", file=sys.stderr)
+            sys.exit(1)
+
+    print("chamadas/s em profundidade 200 (melhor de 3):")
+    for name, program, calls in PROGRAMS:
+        ast = program(200)
+        _, _, tree_time = run_captured(Interpreter(), ast)
+        _, _, vm_time = run_captured(VirtualMachine(), ast)
+        print(f"  {name:<20} árvore {calls(200) / tree_time:>10,.0f}   vm {calls(200) / vm_time:>10,.0f}")
+
+    for name, program, calls in PROGRAMS:
+        print(f"\n{name}:")
+        print(f"{'profundidade':>14}{'chamadas':>11}{'árvore':>17}{'vm (s)':>9}{'chamadas/s':>13}{'pico de memória':>17}"
+              f"{'bytes/nível':>13}")
+        depth = 1000
+        while depth <= limit:
+            ast = program(depth)
+            tree = tree_status(ast) if depth <= 10 ** 4 else '-'
+            output, error, vm_time = run_captured(VirtualMachine(), ast, repeat=1)
+            if error or output.split()[3] != f"({depth + 1},":
+                print(f"ERRO na VM com profundidade {depth}: {error or output.strip()}", file=sys.stderr)
+                sys.exit(1)
+            if depth <= MEMORY_DEPTH_LIMIT:
+                peak = peak_memory(ast)
+                memory = f"{peak / 2 ** 20:>15.1f}MB{peak / depth:>13,.0f}"
+            else:
+                memory = f"{'-':>17}{'-':>13}"
+            print(f"{depth:>14,}{calls(depth):>11,}{tree:>17}{vm_time:>9.3f}{calls(depth) / vm_time:>13,.0f}{memory}")
+            depth *= 10
+
+if __name__ == "__main__":
+    main()
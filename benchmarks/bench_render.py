@@ -0,0 +1,52 @@
+# Vazão do rasterizador (renderer.py) em segmentos por segundo, para desenhos de 10^3 a 10^6 linhas.
+# Os segmentos imitam pontos de bordado: curtos (até 12 px), encadeados e com trocas de cor.
+# Uso: python bench_render.py [máximo de segmentos] [escala]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stitches import StitchBuffer
+from renderer import RasterSink
+
+FRAME_SIZE = 1000
+
+def stitch_design(count, seed=0):
+    # Caminho aleatório dentro do bastidor, com uma troca de cor a cada 5000 pontos
+    random = np.random.default_rng(seed)
+    steps = random.integers(-12, 13, size=(count, 2))
+    path = np.cumsum(steps, axis=0) % FRAME_SIZE
+    starts = np.vstack([path[:1], path[:-1]])
+    buffer = StitchBuffer(flush_rows=count * 2)
+    raster = RasterSink()
+    buffer.sink = raster
+    buffer.setup(FRAME_SIZE, "black")
+    colors = ["red", "green", "blue", "gold", "navy"]
+    for index, ((x1, y1), (x2, y2)) in enumerate(zip(starts.tolist(), path.tolist())):
+        if index % 5000 == 0:
+            buffer.change_thread(colors[index // 5000 % len(colors)])
+        buffer.draw_line(x1, y1, x2, y2)
+    buffer.flush()
+    return raster
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    scale = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    print(f"bastidor {FRAME_SIZE}x{FRAME_SIZE}, escala {scale}")
+    print(f"{'segmentos':>10}{'antialias':>11}{'tempo (s)':>11}{'segmentos/s':>14}{'pixels pintados':>17}")
+    count = 1000
+    while count <= limit:
+        raster = stitch_design(count)
+        for antialias in (False, True):
+            start = time.perf_counter()
+            image = raster.render(scale, antialias)
+            elapsed = time.perf_counter() - start
+            painted = int((image != 255).any(axis=2).sum())
+            print(f"{count:>10}{'sim' if antialias else 'não':>11}{elapsed:>11.3f}{count / elapsed:>14,.0f}{painted:>17,}")
+        count *= 10
+
+if __name__ == "__main__":
+    main()
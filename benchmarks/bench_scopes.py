@@ -0,0 +1,77 @@
+# Compara os dois modelos de escopo: a SymbolTable encadeada (busca por nome subindo pelos pais, um
+# dicionário por chamada) e os quadros de resolver.py (endereços (profundidade, slot) resolvidos antes
+# da execução). Primeiro verifica que a saída é idêntica, depois mede programas e operações isoladas.
+import sys
+import timeit
+
+from programs import (
+    sample_programs, error_program, loop_program, function_program, recursive_program,
+    dynamic_scope_program, run_captured
+)
+from main import Interpreter, SymbolTable
+from resolver import FrameInterpreter, FrameLayout, Frame
+
+def compare_programs():
+    programs = sample_programs() + [
+        ('erro de tipo', error_program()),
+        ('escopo dinâmico', dynamic_scope_program()),
+        ('variáveis (20k iterações)', loop_program(20000, draw=False)),
+        ('chamadas (20k iterações)', function_program(20000)),
+        ('recursão (profundidade 300)', recursive_program(300)),
+    ]
+    print(f"{'programa':<30}{'SymbolTable (s)':>16}{'quadros (s)':>13}{'speedup':>10}")
+    for name, ast in programs:
+        tree_output, tree_error, tree_time = run_captured(Interpreter(), ast)
+        frame_output, frame_error, frame_time = run_captured(FrameInterpreter(), ast)
+        if (tree_output, tree_error) != (frame_output, frame_error):
+            print(f"DIVERGÊNCIA em '{name}'", file=sys.stderr)
+            sys.exit(1)
+        print(f"{name:<30}{tree_time:>16.4f}{frame_time:>13.4f}{tree_time / frame_time:>9.1f}x")
+
+def compare_operations(number=200000):
+    # Leitura de uma global a 8 escopos de distância, escrita local e criação do escopo de uma chamada
+    table = SymbolTable()
+    table.set_variable('g', 1, 'int', is_declaration=True)
+    for _ in range(8):
+        table = SymbolTable(parent=table)
+    table.set_variable('x', 0, 'int', is_declaration=True)
+
+    global_layout = FrameLayout()
+    global_slot = global_layout.slot('g')
+    frame = Frame(global_layout)
+    frame.values[global_slot] = (1, 'int')
+    local_layout = FrameLayout()
+    local_slot = local_layout.slot('x')
+    for _ in range(8):
+        frame = Frame(local_layout, frame, frame.root)
+    frame.values[local_slot] = (0, 'int')
+
+    call_layout = FrameLayout()
+    call_layout.slot('a')
+    call_layout.slot('b')
+
+    def symbol_table_call():
+        local_table = SymbolTable(parent=table)
+        local_table.set_variable('a', 1, 'int', is_declaration=True)
+        local_table.set_variable('b', 2, 'int', is_declaration=True)
+
+    def frame_call():
+        values = Frame(call_layout, frame, frame.root).values
+        values[0] = (1, 'int')
+        values[1] = (2, 'int')
+
+    operations = [
+        ('ler global (8 níveis)', lambda: table.get_variable('g'), lambda: frame.root.values[global_slot]),
+        ('escrever local', lambda: table.set_variable('x', 1, 'int'),
+         lambda: frame.values.__setitem__(local_slot, (1, 'int'))),
+        ('escopo de chamada', symbol_table_call, frame_call),
+    ]
+    print(f"\n{'operação':<30}{'SymbolTable (ns)':>17}{'quadros (ns)':>14}{'speedup':>10}")
+    for name, old, new in operations:
+        old_time = min(timeit.repeat(old, number=number, repeat=3)) / number * 1e9
+        new_time = min(timeit.repeat(new, number=number, repeat=3)) / number * 1e9
+        print(f"{name:<30}{old_time:>17.0f}{new_time:>14.0f}{old_time / new_time:>9.1f}x")
+
+if __name__ == "__main__":
+    compare_programs()
+    compare_operations()
@@ -0,0 +1,121 @@
+# Serviço de execução (service.py): gerador de carga local. Sobe o serviço no mesmo processo, abre
+# vários clientes com conexões persistentes e envia pedidos com uma mistura de programas repetidos (acertos
+# do cache) e inéditos (faltas). Mostra pedidos por segundo e percentis de latência vistos pelos clientes,
+# as estatísticas do próprio serviço (GET /stats) e, para comparação, um `python main.py` por pedido. Os
+# comandos devolvidos são conferidos com os de `python main.py --output jsonl`.
+# Uso: python bench_service.py [pedidos] [clientes] [fração de programas inéditos]
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from programs import ROOT, large_source
+from service import RenderService, percentile
+
+DISTINCT_PROGRAMS = 20
+STATEMENTS = 200
+BASELINE_REQUESTS = 10
+
+def program(k):
+    # Mesmo tamanho para todos; o último comando distingue os programas
+    return large_source(STATEMENTS) + f"drawLine({k}, {k}, 0, 0);\n"
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def client(port, sources, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for source in sources:
+        start = time.perf_counter()
+        status, response = await request(reader, writer, 'POST', '/run', {'source': source})
+        if status != 200 or response['status'] != 'ok':
+            raise RuntimeError(f"pedido falhou: {status} {response.get('error')}")
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+def expected_commands(source, directory):
+    filename = os.path.join(directory, 'pedido.pattern')
+    with open(filename, 'w') as file:
+        file.write(source)
+    output = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), filename, '--no-cache', '--output', 'jsonl'],
+                            stdout=subprocess.PIPE, check=True).stdout
+    return [json.loads(line) for line in output.splitlines()]
+
+def show(name, count, elapsed, latencies):
+    ordered = sorted(latencies)
+    print(f"  {name:<24} {count / elapsed:8.1f} pedidos/s   p50 {1000 * percentile(ordered, 0.5):7.1f}ms   "
+          f"p90 {1000 * percentile(ordered, 0.9):7.1f}ms   p99 {1000 * percentile(ordered, 0.99):7.1f}ms")
+
+async def load(total, clients, unique_fraction, directory):
+    service = RenderService()
+    server = await service.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        # Os comandos do serviço são os mesmos de main.py
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for k in range(3):
+            _, response = await request(reader, writer, 'POST', '/run', {'source': program(k)})
+            if response['commands'] != expected_commands(program(k), directory):
+                print(f"DIVERGÊNCIA no programa {k}", file=sys.stderr)
+                sys.exit(1)
+        writer.close()
+
+        generator = random.Random(1)
+        sources = []
+        for k in range(total):
+            if generator.random() < unique_fraction:
+                sources.append(program(DISTINCT_PROGRAMS + k))
+            else:
+                sources.append(program(generator.randrange(DISTINCT_PROGRAMS)))
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(client(port, sources[index::clients], latencies) for index in range(clients)))
+        elapsed = time.perf_counter() - start
+        show(f"serviço ({clients} clientes)", total, elapsed, latencies)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        _, stats = await request(reader, writer, 'GET', '/stats')
+        writer.close()
+        cache = stats['cache']
+        latency = stats['latency_ms']
+        print(f"  /stats: {stats['requests']} pedidos, {stats['workers']} processos, cache {cache['hits']} acertos / "
+              f"{cache['misses']} faltas ({100 * cache['hit_rate']:.0f}%), latência no serviço p50 {latency['p50']:.1f}ms "
+              f"p99 {latency['p99']:.1f}ms")
+    finally:
+        await service.close()
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    unique_fraction = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    print(f"{total} pedidos, {DISTINCT_PROGRAMS} programas repetidos (~{STATEMENTS} comandos) e "
+          f"{100 * unique_fraction:.0f}% inéditos")
+    with tempfile.TemporaryDirectory() as directory:
+        latencies = []
+        start = time.perf_counter()
+        for k in range(BASELINE_REQUESTS):
+            request_start = time.perf_counter()
+            expected_commands(program(k % DISTINCT_PROGRAMS), directory)
+            latencies.append(time.perf_counter() - request_start)
+        show("python main.py por pedido", BASELINE_REQUESTS, time.perf_counter() - start, latencies)
+        asyncio.run(load(total, clients, unique_fraction, directory))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Índice espacial e limpeza (spatial.py): tempo de construção da grade, consultas por retângulo contra a
+# varredura linear (conferindo que as respostas são iguais) e vazão do SegmentCleaner num desenho com
+# linhas fora do bastidor, repetidas e sobrepostas.
+# Uso: python bench_spatial.py [máximo de segmentos]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stitches import StitchBuffer
+from spatial import SegmentIndex, SegmentCleaner, clip_segment
+
+FRAME_SIZE = 4000
+QUERIES = 200
+
+class CountingSink:
+    def __init__(self):
+        self.lines = 0
+
+    def write(self, buffer):
+        self.lines += len(buffer)
+
+def design(count, seed=0):
+    # Traços curtos; parte deles repete um traço anterior (igual, invertido ou um pedaço colinear) e parte
+    # passa da borda do bastidor
+    generator = random.Random(seed)
+    segments = []
+    for _ in range(count):
+        roll = generator.random()
+        if segments and roll < 0.1:
+            segments.append(generator.choice(segments))
+        elif segments and roll < 0.15:
+            x1, y1, x2, y2 = generator.choice(segments)
+            segments.append((x2, y2, x1, y1))
+        elif segments and roll < 0.2:
+            x1, y1, x2, y2 = generator.choice(segments)
+            segments.append((x1, y1, 2 * x2 - x1, 2 * y2 - y1))
+        else:
+            x, y = generator.randrange(-50, FRAME_SIZE + 50), generator.randrange(-50, FRAME_SIZE + 50)
+            segments.append((x, y, x + generator.randint(-40, 40), y + generator.randint(-40, 40)))
+    return segments
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    generator = random.Random(1)
+    print(f"{'segmentos':>10}{'índice (s)':>12}{'consulta (ms)':>15}{'varredura (ms)':>16}{'limpeza (s)':>13}"
+          f"{'linhas/s':>11}{'restantes':>11}")
+    count = 10 ** 5
+    while count <= limit:
+        segments = design(count)
+
+        start = time.perf_counter()
+        index = SegmentIndex()
+        for segment in segments:
+            index.insert(*segment)
+        build_time = time.perf_counter() - start
+
+        regions = []
+        for _ in range(QUERIES):
+            x, y = generator.randrange(FRAME_SIZE), generator.randrange(FRAME_SIZE)
+            regions.append((x, y, x + 100, y + 100))
+        start = time.perf_counter()
+        answers = [index.query(*region) for region in regions]
+        query_time = (time.perf_counter() - start) / QUERIES
+        start = time.perf_counter()
+        scans = [[segment_id for segment_id, segment in enumerate(segments) if clip_segment(*segment, *region) is not None]
+                 for region in regions[:5]]
+        scan_time = (time.perf_counter() - start) / 5
+        if answers[:5] != scans:
+            print(f"DIVERGÊNCIA: consulta do índice difere da varredura com {count} segmentos", file=sys.stderr)
+            sys.exit(1)
+
+        buffer = StitchBuffer(flush_rows=count * 2)
+        buffer.setup(FRAME_SIZE, "black")
+        for segment in segments:
+            buffer.draw_line(*segment)
+        sink = CountingSink()
+        start = time.perf_counter()
+        cleaner = SegmentCleaner(sink)
+        cleaner.write(buffer)
+        cleaner.close()
+        clean_time = time.perf_counter() - start
+
+        print(f"{count:>10}{build_time:>12.3f}{query_time * 1000:>15.3f}{scan_time * 1000:>16.1f}{clean_time:>13.3f}"
+              f"{count / clean_time:>11,.0f}{sink.lines - 1:>11}")
+        print(f"{'':>10}{cleaner.report()}")
+        count *= 10
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Vazão do gerador de pontos de agulha (stitch_engine.py) em pontos por segundo, nos modos running, triple e
+# satin, para desenhos com linhas de vários comprimentos, saltos e trocas de cor. O modo running também é
+# calculado ponto a ponto em Python puro (a mesma conta, um segmento por vez) para conferir o resultado e
+# comparar a vazão.
+# Uso: python bench_stitch_engine.py [máximo de segmentos]
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stitches import StitchBuffer
+from stitch_engine import StitchSink, STITCH_MODES, JUMP, COLOR_CHANGE
+
+LENGTH = 30
+SPACING = 4
+REFERENCE_LIMIT = 100000   # segmentos conferidos com a versão em Python puro
+
+def design(count, seed=0):
+    # Linhas de até 200 unidades, metade encadeadas, com saltos e uma troca de cor a cada 5000 linhas
+    generator = random.Random(seed)
+    buffer = StitchBuffer(flush_rows=count * 2)
+    buffer.setup(4000, "black")
+    x = y = 0
+    for index in range(count):
+        if index % 5000 == 4999:
+            buffer.change_thread(f"cor{index // 5000}")
+        if generator.random() < 0.5:
+            x, y = generator.randrange(4000), generator.randrange(4000)
+        next_x = min(max(x + generator.randint(-200, 200), 0), 3999)
+        next_y = min(max(y + generator.randint(-200, 200), 0), 3999)
+        buffer.draw_line(x, y, next_x, next_y)
+        x, y = next_x, next_y
+    return buffer
+
+def reference(buffer, length):
+    # Ponto corrido calculado segmento por segmento, ponto por ponto
+    x_points, y_points, colors, flags = [], [], [], []
+    position = None
+    current = None
+    for x1, y1, x2, y2, color in buffer.segments():
+        steps = max(math.ceil(math.hypot(x2 - x1, y2 - y1) / length), 1)
+        for k in range(steps + 1):
+            t = k / steps
+            point = (round(x1 + (x2 - x1) * t), round(y1 + (y2 - y1) * t))
+            flag = 0
+            if k == 0:
+                if point == position:
+                    continue
+                flag = JUMP
+            if current is not None and color != current:
+                flag |= COLOR_CHANGE
+            current = color
+            x_points.append(point[0])
+            y_points.append(point[1])
+            colors.append(color)
+            flags.append(flag)
+            position = point
+    return x_points, y_points, flags
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    print(f"{'segmentos':>10} {'modo':<8}{'pontos':>11}{'tempo (s)':>11}{'pontos/s':>14}{'Python (s)':>12}{'ganho':>8}")
+    count = 10000
+    while count <= limit:
+        buffer = design(count)
+        for mode in STITCH_MODES:
+            start = time.perf_counter()
+            sink = StitchSink(mode, LENGTH, SPACING)
+            sink.write(buffer)
+            sink.close()
+            elapsed = time.perf_counter() - start
+            x, y, _, flags = sink.points.arrays()
+            line = f"{count:>10} {mode:<8}{len(x):>11}{elapsed:>11.3f}{len(x) / elapsed:>14,.0f}"
+            if mode == 'running' and count <= REFERENCE_LIMIT:
+                start = time.perf_counter()
+                expected = reference(buffer, LENGTH)
+                python_time = time.perf_counter() - start
+                if (x.tolist(), y.tolist(), flags.tolist()) != expected:
+                    print(f"DIVERGÊNCIA: pontos diferentes da versão em Python com {count} segmentos", file=sys.stderr)
+                    sys.exit(1)
+                line += f"{python_time:>12.3f}{python_time / elapsed:>7.1f}x"
+            print(line)
+        count *= 10
+
+if __name__ == "__main__":
+    main()
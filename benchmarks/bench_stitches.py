@@ -0,0 +1,54 @@
+# Mede a gravação de comandos no StitchBuffer e a escrita por cada sink, comparando com o print()
+# por comando usado antes. Uso: python bench_stitches.py [segmentos]
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stitches import StitchBuffer, TextSink, JsonLinesSink, BinarySink
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    coordinates = [(i % 500, (i * 7) % 500, (i * 13) % 500, (i * 3) % 500) for i in range(count)]
+
+    with open(os.devnull, 'w') as devnull:
+        def print_per_command():
+            for index, (x1, y1, x2, y2) in enumerate(coordinates):
+                if index % 1000 == 0:
+                    print(f"Mudando cor do fio para cor{index // 1000 % 8}", file=devnull)
+                print(f"Desenhando linha de ({x1}, {y1}) para ({x2}, {y2})", file=devnull)
+        baseline = timed(print_per_command)
+
+    buffer = StitchBuffer(flush_rows=count * 2)
+    def record():
+        for index, (x1, y1, x2, y2) in enumerate(coordinates):
+            if index % 1000 == 0:
+                buffer.change_thread(f"cor{index // 1000 % 8}")
+            buffer.draw_line(x1, y1, x2, y2)
+    record_time = timed(record)
+
+    print(f"{count} segmentos")
+    print(f"{'etapa':<34}{'tempo (s)':>10}{'segmentos/s':>14}{'bytes':>12}")
+    print(f"{'print() por comando':<34}{baseline:>10.3f}{count / baseline:>14,.0f}{'':>12}")
+    print(f"{'gravar no buffer':<34}{record_time:>10.3f}{count / record_time:>14,.0f}{'':>12}")
+    for name, sink_class, output in (('sink de texto', TextSink, io.StringIO()),
+                                     ('sink JSON Lines', JsonLinesSink, io.StringIO()),
+                                     ('sink binário', BinarySink, io.BytesIO())):
+        elapsed = timed(lambda: sink_class(output).write(buffer))
+        size = len(output.getvalue().encode('utf-8') if isinstance(output, io.StringIO) else output.getvalue())
+        print(f"{name:<34}{elapsed:>10.3f}{count / elapsed:>14,.0f}{size:>12,}")
+        if sink_class is BinarySink:
+            output.seek(0)
+            load_time = timed(lambda: StitchBuffer.load(output))
+            print(f"{'ler dump binário':<34}{load_time:>10.3f}{count / load_time:>14,.0f}{'':>12}")
+    print(f"\nmemória das colunas: {sum(column.itemsize * len(column) for column in (buffer.kinds, buffer.x1, buffer.y1, buffer.x2, buffer.y2, buffer.colors)):,} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# Conjunto de benchmarks de escala: programas sintéticos de formatos diferentes (drawLine em sequência,
+# árvores de if/else, cadeias de chamadas de função, concatenações longas de strings e a mistura de
+# large_source) em vários tamanhos, com o tempo de cada fase (tokenização, análise e execução no backend
+# tree) e o pico de memória alocada em cada uma. Os tempos são o melhor de algumas repetições; a memória
+# é medida numa execução separada com tracemalloc, que deixaria os tempos mais lentos. O coletor de ciclos
+# fica ligado, como numa execução normal. O tamanho é o número de declarações (de chamadas, em `calls`), e
+# `µs/decl.` (tempo dividido pelo tamanho) mostra como cada fase escala: fica constante quando a fase é
+# linear no tamanho do programa.
+#
+# `compare` executa o conjunto (ou lê resultados gravados com `run --save`) e compara com a linha de base
+# em JSON, acusando as fases que ficaram mais lentas ou alocaram mais que o limite; termina com código 1
+# se houver regressão. A linha de base depende da máquina: grave a sua com `baseline` antes de comparar.
+# Uso: python bench_suite.py run [--sizes 1000,4000,16000] [--shapes flood,...] [--repeat 3] [--save ARQUIVO]
+#      python bench_suite.py baseline [--baseline ARQUIVO] [opções de run]
+#      python bench_suite.py compare [--results ARQUIVO] [--baseline ARQUIVO] [--threshold 0.2] [opções de run]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from programs import ROOT, flood_source, if_tree_source, concat_source, call_chain_program, large_source
+from main import STITCHES, ArrayTokenizer, TokenArrays, Parser, BlockNode, SymbolTable, Interpreter
+from batch import CountingSink
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+SIZES = (1000, 4000, 16000)
+REPEAT = 3
+THRESHOLD = 0.2
+# Diferenças menores que estas não contam como regressão, por mais que o percentual seja alto
+MIN_SECONDS = 0.002
+MIN_BYTES = 256 * 1024
+
+PHASES = ('tokenize', 'parse', 'execute')
+PHASE_NAMES = {'tokenize': 'tokenização', 'parse': 'análise', 'execute': 'execução'}
+
+# formato -> (gera código-fonte?, gerador(tamanho))
+SHAPES = {
+    'flood': (True, flood_source),
+    'if_tree': (True, if_tree_source),
+    'calls': (False, call_chain_program),
+    'concat': (True, concat_source),
+    'mixed': (True, large_source),
+}
+
+def parse(arrays):
+    # Mesmo laço de Parser.run, sobre tokens já gerados
+    tokenizer = ArrayTokenizer(arrays)
+    parser = Parser(tokenizer)
+    statements = []
+    while tokenizer.current_token.type != 'EOF':
+        statements.append(parser.parse_statement())
+    return BlockNode(statements)
+
+def execute(ast):
+    counter = CountingSink()
+    STITCHES.reset()
+    STITCHES.sink = counter
+    symbol_table = SymbolTable()
+    interpreter = Interpreter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.execute(ast, symbol_table)
+        interpreter.call_main(symbol_table)
+        STITCHES.flush()
+    return counter.rows
+
+def count_nodes(node):
+    count = 0
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if node is not None:
+            count += 1
+            pending.extend(node.children)
+    return count
+
+def timed(function, argument, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def peak_memory(function, argument):
+    tracemalloc.start()
+    try:
+        function(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(shape, size, repeat):
+    from_source, generate = SHAPES[shape]
+    program = generate(size)
+    seconds = {}
+    memory = {}
+    result = {'shape': shape, 'size': size}
+    if from_source:
+        arrays, seconds['tokenize'] = timed(TokenArrays.tokenize, program, repeat)
+        memory['tokenize'] = peak_memory(TokenArrays.tokenize, program)
+        ast, seconds['parse'] = timed(parse, arrays, repeat)
+        memory['parse'] = peak_memory(parse, arrays)
+        result.update(source_bytes=len(program.encode('utf-8')), tokens=len(arrays))
+    else:
+        ast = program
+    result.update(statements=len(ast.children), nodes=count_nodes(ast))
+    result['commands'], seconds['execute'] = timed(execute, ast, repeat)
+    memory['execute'] = peak_memory(execute, ast)
+    result.update(seconds=seconds, memory=memory)
+    return result
+
+def run_suite(shapes, sizes, repeat):
+    # Aquecimento: o primeiro laço importa loops.py (e numpy), o que não deve entrar na primeira medida
+    execute(call_chain_program(1, 1))
+    results = {}
+    for shape in shapes:
+        for size in sizes:
+            result = measure(shape, size, repeat)
+            results[f"{shape}/{size}"] = result
+            show(result)
+    return {
+        'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': repeat, 'results': results,
+    }
+
+def show(result):
+    case = f"{result['shape']}/{result['size']}"
+    nodes = f"{result['nodes']} nós"
+    for phase in PHASES:
+        if phase in result['seconds']:
+            seconds = result['seconds'][phase]
+            print(f"{case:<14} {nodes:>11}  {PHASE_NAMES[phase]:<12} {1000 * seconds:10.2f}ms "
+                  f"{1e6 * seconds / result['size']:8.2f}µs/decl. {result['memory'][phase] / 2 ** 20:8.2f}MB")
+            case = nodes = ''
+    sys.stdout.flush()
+
+def compare(current, baseline, threshold):
+    # Lista de (caso, fase, métrica, base, atual, situação) e se houve regressão
+    for key in ('python', 'machine', 'system'):
+        if current.get(key) != baseline.get(key):
+            print(f"Aviso: linha de base gravada com {key} {baseline.get(key)} e execução atual com {current.get(key)}",
+                  file=sys.stderr)
+    regressed = False
+    rows = []
+    for case, result in current['results'].items():
+        base = baseline['results'].get(case)
+        if base is None:
+            rows.append((case, '-', '-', None, None, 'novo'))
+            continue
+        for metric, minimum in (('seconds', MIN_SECONDS), ('memory', MIN_BYTES)):
+            for phase, value in result[metric].items():
+                before = base[metric].get(phase)
+                if before is None:
+                    continue
+                change = (value - before) / before if before else 0.0
+                if change > threshold and value - before > minimum:
+                    status = 'REGRESSÃO'
+                    regressed = True
+                elif change < -threshold and before - value > minimum:
+                    status = 'melhora'
+                else:
+                    status = 'ok'
+                rows.append((case, phase, metric, before, value, status))
+    missing = sorted(baseline['results'].keys() - current['results'].keys())
+    return rows, missing, regressed
+
+def show_comparison(rows, missing, threshold):
+    print(f"\nComparação com a linha de base (limite {100 * threshold:.0f}%):")
+    for case, phase, metric, before, value, status in rows:
+        if before is None:
+            print(f"  {case:<14} sem medida na linha de base")
+            continue
+        if metric == 'seconds':
+            values = f"{1000 * before:10.2f}ms -> {1000 * value:10.2f}ms"
+        else:
+            values = f"{before / 2 ** 20:10.2f}MB -> {value / 2 ** 20:10.2f}MB"
+        change = 100 * (value - before) / before if before else 0.0
+        label = f"{PHASE_NAMES[phase]} ({'tempo' if metric == 'seconds' else 'memória'})"
+        print(f"  {case:<14} {label:<24} {values} {change:+7.1f}%  {status}")
+    for case in missing:
+        print(f"  {case:<14} não executado (só na linha de base)")
+
+def load(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def save(data, filename):
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmarks de escala do interpretador com linha de base.")
+    arg_parser.add_argument('command', choices=['run', 'baseline', 'compare'])
+    arg_parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                            help="tamanhos dos programas, em declarações (padrão %(default)s)")
+    arg_parser.add_argument('--shapes', default=','.join(SHAPES), help="formatos executados (padrão %(default)s)")
+    arg_parser.add_argument('--repeat', type=int, default=REPEAT, help="repetições de cada fase (vale a melhor)")
+    arg_parser.add_argument('--save', metavar='ARQUIVO', help="grava os resultados de run neste arquivo JSON")
+    arg_parser.add_argument('--results', metavar='ARQUIVO', help="compare usa estes resultados em vez de executar")
+    arg_parser.add_argument('--baseline', metavar='ARQUIVO', default=BASELINE, help="linha de base (padrão %(default)s)")
+    arg_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                            help="aumento relativo acusado como regressão (padrão %(default)s = 20%%)")
+    args = arg_parser.parse_args()
+    try:
+        sizes = [int(size) for size in args.sizes.split(',')]
+    except ValueError:
+        arg_parser.error("--sizes espera inteiros separados por vírgula")
+    shapes = args.shapes.split(',')
+    unknown = [shape for shape in shapes if shape not in SHAPES]
+    if unknown:
+        arg_parser.error(f"formatos desconhecidos: {', '.join(unknown)} (disponíveis: {', '.join(SHAPES)})")
+    if args.repeat < 1 or min(sizes) < 1:
+        arg_parser.error("--repeat e --sizes devem ser inteiros positivos")
+
+    if args.command == 'compare' and args.results:
+        current = load(args.results)
+    else:
+        current = run_suite(shapes, sizes, args.repeat)
+    if args.command == 'run' and args.save:
+        save(current, args.save)
+    elif args.command == 'baseline':
+        save(current, args.baseline)
+        print(f"Linha de base gravada em {args.baseline}")
+    elif args.command == 'compare':
+        rows, missing, regressed = compare(current, load(args.baseline), args.threshold)
+        show_comparison(rows, missing, args.threshold)
+        if regressed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Varredura de parâmetros (sweep.py): variantes por segundo de um motivo parametrizado (tamanho da célula e
+# posição) executado como hoje, analisando e executando o programa de novo para cada variante, e pela
+# varredura, que analisa uma vez e executa as variantes juntas. O motivo tem laços com o mesmo número de
+# iterações em todas as variantes, um laço cujo número de iterações depende do tamanho e ramos que só parte
+# das variantes segue. O buffer de cada variante é conferido com o da execução separada.
+# Uso: python bench_sweep.py [variantes]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Parser
+from sweep import Sweep, expand_parameters, run_variant
+
+SOURCE = """
+setup { frameSize = 4000; threadColor = "red"; };
+for (row = 0; row < 8; row = row + 1) {
+  for (col = 0; col < 8; col = col + 1) {
+    drawLine(x0 + col * size, y0 + row * size, x0 + col * size + size, y0 + row * size);
+    drawLine(x0 + col * size, y0 + row * size, x0 + col * size, y0 + row * size + size);
+    if (col - (col / 2) * 2 == row - (row / 2) * 2) {
+      drawLine(x0 + col * size, y0 + row * size, x0 + (col + 1) * size, y0 + (row + 1) * size);
+    }
+  }
+}
+changeThread("blue");
+for (k = 0; k < size / 4; k = k + 1) {
+  drawLine(x0 + k * 3, y0 - 5, x0 + k * 3 + 2, y0 - 5);
+}
+if (size > 30) {
+  changeThread("gold");
+  repeat (4) { drawLine(x0, y0, x0 + size * 8, y0 + size * 8); }
+} else {
+  drawLine(x0 + size * 8, y0, x0, y0 + size * 8);
+}
+"""
+
+def columns(buffer):
+    return (buffer.kinds, buffer.x1, buffer.y1, buffer.x2, buffer.y2, buffer.colors, buffer.objects, buffer.color_table)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sizes = 50
+    positions = max(count // sizes, 1)
+    variants = expand_parameters([f"size=10:{10 + sizes - 1}", f"x0=0:{10 * (positions - 1)}:10", "y0=100"])
+    print(f"{len(variants)} variantes (size, x0, y0)")
+
+    start = time.perf_counter()
+    expected = []
+    for parameters in variants:
+        expected.append(run_variant(Parser.run(SOURCE), parameters))
+    separate = time.perf_counter() - start
+    rows = sum(len(buffer) for buffer, _ in expected)
+    print(f"  análise e execução por variante: {len(variants) / separate:9.1f} variantes/s ({separate:.2f}s, {rows} comandos)")
+
+    start = time.perf_counter()
+    sweep = Sweep(Parser.run(SOURCE), variants)
+    results = sweep.run()
+    elapsed = time.perf_counter() - start
+    for parameters, result, (buffer, error) in zip(variants, results, expected):
+        if result['error'] != error or columns(result['buffer']) != columns(buffer):
+            print(f"DIVERGÊNCIA na variante {parameters}: {result['error']}", file=sys.stderr)
+            sys.exit(1)
+    print(f"  varredura:                       {len(variants) / elapsed:9.1f} variantes/s ({elapsed:.2f}s, "
+          f"{separate / elapsed:.1f}x, {sweep.groups} grupos, {sweep.splits} divisões)")
+
+if __name__ == "__main__":
+    main()
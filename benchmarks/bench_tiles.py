@@ -0,0 +1,49 @@
+# Renderização em blocos (tiles.py): tempo para rasterizar um desenho de pontos de bordado numa imagem grande
+# (bastidor de 1000 x 1000 na escala dada: escala 6 são 36 megapixels) pela tela única de renderer.py e
+# pelos blocos com 1, 2, 4, ... processos até o número de núcleos (ou o máximo dado), com o ganho de cada
+# um sobre 1 processo. Cada imagem é conferida byte a byte com a da tela única.
+# Uso: python bench_tiles.py [segmentos] [escala] [máximo de processos]
+import os
+import sys
+import time
+
+import numpy as np
+
+from bench_render import stitch_design
+from tiles import TILE_SIZE, render_tiled
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    scale = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    raster = stitch_design(count)
+    coordinates, colors = raster.segments()
+    size = raster.frame_size * scale
+    print(f"{count} segmentos, imagem {size}x{size} ({size * size / 1e6:.0f} megapixels), blocos de {TILE_SIZE} px, "
+          f"{os.cpu_count()} núcleos")
+    workers = [1]
+    while workers[-1] * 2 <= limit:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != limit:
+        workers.append(limit)
+
+    for antialias in (False, True):
+        start = time.perf_counter()
+        expected = raster.render(scale, antialias)
+        single = time.perf_counter() - start
+        print(f"antialias {'sim' if antialias else 'não'}: tela única {single:.2f}s")
+        base = None
+        for processes in workers:
+            start = time.perf_counter()
+            image = render_tiled(coordinates, colors, raster.color_table, raster.frame_size, scale, antialias, processes)
+            elapsed = time.perf_counter() - start
+            if not np.array_equal(image, expected):
+                print(f"DIVERGÊNCIA com {processes} processos: a imagem em blocos não é igual à da tela única",
+                      file=sys.stderr)
+                sys.exit(1)
+            base = base or elapsed
+            print(f"  {processes:>3} processos {elapsed:8.2f}s  {base / elapsed:5.2f}x sobre 1 processo, "
+                  f"{single / elapsed:5.2f}x sobre a tela única")
+
+if __name__ == "__main__":
+    main()
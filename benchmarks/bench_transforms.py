@@ -0,0 +1,73 @@
+# Blocos de transformação (transforms.py): `repeat (n) rotate/translate/mirror(...) { corpo }` contra o mesmo
+# desenho escrito desenrolado, com as n cópias do corpo já calculadas no código-fonte (pela mesma conta e o
+# mesmo arredondamento de transforms.py). Mede análise e execução juntas e confere se os dois programas geram
+# exatamente os mesmos comandos.
+# Uso: python bench_transforms.py [linhas do corpo] [máximo de cópias]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import STITCHES, Parser, SymbolTable, Interpreter
+from transforms import copy_matrix, transform_point
+
+# Nome -> (argumentos do bloco, valores já avaliados)
+SHAPES = {
+    'rotate': ('7, 2000, 2000', [7, 2000, 2000]),
+    'translate': ('13, -5', [13, -5]),
+    'mirror': ('"x", 2000', ['x', 2000]),
+}
+
+def body_lines(count, seed=0):
+    generator = random.Random(seed)
+    return [tuple(generator.randrange(4000) for _ in range(4)) for _ in range(count)]
+
+def header():
+    return 'setup { frameSize = 4000; threadColor = "black"; };\n'
+
+def transform_source(operation, arguments, lines, copies):
+    body = ''.join(f"    drawLine({x1}, {y1}, {x2}, {y2});\n" for x1, y1, x2, y2 in lines)
+    return f"{header()}repeat ({copies}) {operation}({arguments}) {{\n{body}}}\n"
+
+def unrolled_source(operation, values, lines, copies):
+    statements = []
+    for k in range(copies):
+        matrix = copy_matrix(operation, values, k)
+        for x1, y1, x2, y2 in lines:
+            (x1, y1), (x2, y2) = transform_point(matrix, x1, y1), transform_point(matrix, x2, y2)
+            statements.append(f"drawLine({x1}, {y1}, {x2}, {y2});\n")
+    return header() + ''.join(statements)
+
+def run(code):
+    STITCHES.reset()
+    STITCHES.sink = None
+    STITCHES.flush_rows = sys.maxsize
+    start = time.perf_counter()
+    Interpreter().execute(Parser.run(code), SymbolTable())
+    elapsed = time.perf_counter() - start
+    columns = (STITCHES.kinds, STITCHES.x1, STITCHES.y1, STITCHES.x2, STITCHES.y2, STITCHES.colors)
+    return elapsed, tuple(column.tobytes() for column in columns)
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    lines = body_lines(line_count)
+    run(transform_source('translate', '1, 1', lines[:1], 2))   # aquecimento: importa transforms.py e numpy
+    print(f"{'bloco':<10}{'cópias':>8}{'linhas':>10}{'bloco (s)':>12}{'desenrolado (s)':>17}{'ganho':>9}")
+    for operation, (arguments, values) in SHAPES.items():
+        copies = 10
+        while copies <= limit:
+            transformed, transformed_rows = run(transform_source(operation, arguments, lines, copies))
+            unrolled, unrolled_rows = run(unrolled_source(operation, values, lines, copies))
+            if transformed_rows != unrolled_rows:
+                print(f"DIVERGÊNCIA em {operation} com {copies} cópias: os comandos gerados não são os mesmos",
+                      file=sys.stderr)
+                sys.exit(1)
+            print(f"{operation:<10}{copies:>8}{copies * line_count:>10}{transformed:>12.4f}{unrolled:>17.4f}"
+                  f"{unrolled / transformed:>8.1f}x")
+            copies *= 10
+
+if __name__ == "__main__":
+    main()
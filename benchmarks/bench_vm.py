@@ -0,0 +1,43 @@
+# Benchmark da máquina virtual de bytecode contra o interpretador de árvore. A saída de cada programa é
+# comparada antes da medição; a carga de cada programa é o número de instruções de bytecode executadas,
+# e "ops/s" é essa carga dividida pelo tempo de cada backend.
+import sys
+
+from programs import (
+    sample_programs, error_program, loop_program, function_program, recursive_program, run_captured
+)
+from main import Interpreter
+from vm import VirtualMachine
+
+def main():
+    programs = sample_programs() + [
+        ('erro de tipo', error_program()),
+        ('laço (20k iterações)', loop_program(20000, draw=False)),
+        ('laço + drawLine (20k)', loop_program(20000)),
+        ('funções (20k iterações)', function_program(20000)),
+        ('recursão (profundidade 150)', recursive_program(150)),
+    ]
+
+    print(f"{'programa':<30}{'instruções':>12}{'árvore (ops/s)':>16}{'vm (ops/s)':>14}{'speedup':>10}")
+    for name, ast in programs:
+        machine = VirtualMachine()
+        tree_output, tree_error, tree_time = run_captured(Interpreter(), ast)
+        vm_output, vm_error, vm_time = run_captured(machine, ast)
+        if (tree_output, tree_error) != (vm_output, vm_error):
+            print(f"DIVERGÊNCIA em '{name}'", file=sys.stderr)
+            sys.exit(1)
+        operations = machine.executed
+        print(f"{name:<30}{operations:>12}{operations / tree_time:>16,.0f}{operations / vm_time:>14,.0f}"
+              f"{tree_time / vm_time:>9.1f}x")
+
+    # Profundidade de recursão: o interpretador de árvore esbarra no limite de recursão do Python
+    depth = 3000
+    ast = recursive_program(depth)
+    _, tree_error, _ = run_captured(Interpreter(), ast, repeat=1)
+    vm_output, vm_error, vm_time = run_captured(VirtualMachine(), ast, repeat=1)
+    print(f"\nrecursão com profundidade {depth}:")
+    print(f"  árvore: {tree_error[0] if tree_error else 'ok'}")
+    print(f"  vm:     {vm_error[0] if vm_error else 'ok'} em {vm_time:.3f}s -> {vm_output.strip()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Modo de observação (watch.py): tempo de uma execução completa de um .pattern grande e de cada nova
+# execução depois de editar o fim, o meio e o começo do arquivo, com a saída guardada na sessão. Depois de
+# cada edição, a saída acumulada é conferida com a de `python main.py` sobre o código editado.
+# Uso: python bench_watch.py [número de comandos]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from programs import ROOT, large_source
+from watch import WatchSession
+
+EDITS = (
+    # (nome, posição relativa da linha editada)
+    ('fim', 1.0),
+    ('meio', 0.5),
+    ('começo', 0.0),
+)
+
+def edit(source, where):
+    # No fim, acrescenta um drawLine; nas outras posições, muda a coordenada do drawLine mais próximo
+    if where == 1.0:
+        return source + 'drawLine(1, 2, 3, 4);\n'
+    lines = source.split('\n')
+    index = int(where * len(lines))
+    while not lines[index].startswith('drawLine('):
+        index += 1
+    lines[index] = lines[index].replace('drawLine(', 'drawLine(1 + ', 1)
+    return '\n'.join(lines)
+
+def full_output(source):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'editado.pattern')
+        with open(filename, 'w') as file:
+            file.write(source)
+        return subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), filename, '--no-cache'],
+                              stdout=subprocess.PIPE, check=True).stdout
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    source = large_source(statements)
+    for backend in ('tree', 'vm'):
+        session = WatchSession(backend)
+        start = time.perf_counter()
+        summary = session.update(source)
+        print(f"\n{backend}: {summary['statements']} declarações, {summary['rows']} comandos")
+        print(f"  execução completa:    {time.perf_counter() - start:8.3f}s")
+        edited = source
+        for name, where in EDITS:
+            edited = edit(edited, where)
+            summary = session.update(edited)
+            if summary['error'] or session.output() != full_output(edited):
+                print(f"DIVERGÊNCIA depois da edição no {name}: {summary['error']}", file=sys.stderr)
+                sys.exit(1)
+            print(f"  edição no {name + ':':<11} {summary['seconds'] * 1000:8.1f}ms ({summary['executed']} declarações "
+                  f"executadas, {summary['ast_from_suffix']} com o AST reaproveitado)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# Programas sintéticos usados pelos benchmarks. O Parser ainda não produz declarações de variáveis nem
+# de funções, então os programas com funções são montados diretamente com as classes de nó do AST; os
+# demais são gerados como código-fonte, para medir também o tokenizer e o Parser. Os geradores são
+# determinísticos: o mesmo tamanho e a mesma semente dão sempre o mesmo programa.
+import contextlib
+import glob
+import io
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from main import (
+    STITCHES, Parser, SymbolTable, IntVal, StringVal, BinOp, RelOp, VarNode, AssignNode, BlockNode, IfNode, WhileNode,
+    FuncDec, FuncCall, ReturnNode, DrawLineNode, ChangeThreadNode
+)
+
+def declare(name, var_type='int'):
+    return AssignNode(name, None, var_type, is_declaration=True)
+
+def assign(name, expression):
+    return AssignNode(name, expression)
+
+def counted_loop(counter, limit, body):
+    # int counter; counter = 0; while (counter < limit) { body; counter = counter + 1; }
+    return [
+        declare(counter),
+        assign(counter, IntVal(0)),
+        WhileNode(RelOp('<', VarNode(counter), IntVal(limit)),
+                  BlockNode(body + [assign(counter, BinOp('+', VarNode(counter), IntVal(1)))])),
+    ]
+
+def loop_program(iterations, draw=True):
+    # Laço aritmético com desvio condicional e, opcionalmente, um drawLine por iteração
+    body = [
+        assign('acc', BinOp('+', VarNode('acc'), BinOp('*', VarNode('i'), IntVal(2)))),
+        IfNode(RelOp('>', VarNode('acc'), IntVal(1000)),
+               BlockNode([assign('acc', BinOp('-', VarNode('acc'), IntVal(1000)))]),
+               BlockNode([assign('acc', BinOp('+', VarNode('acc'), IntVal(7)))])),
+    ]
+    if draw:
+        body.append(DrawLineNode(VarNode('i'), VarNode('acc'), BinOp('/', VarNode('acc'), IntVal(3)), IntVal(0)))
+    return BlockNode([declare('acc'), assign('acc', IntVal(0))] + counted_loop('i', iterations, body)
+                     + [DrawLineNode(VarNode('acc'), IntVal(0), IntVal(0), IntVal(0))])
+
+def function_program(iterations):
+    # Funções chamadas dentro de um laço, inclusive aninhadas e com strings
+    scale = FuncDec('INT_TYPE', 'scale', [('a', 'int'), ('b', 'int')],
+                    BlockNode([ReturnNode(BinOp('+', BinOp('*', VarNode('a'), VarNode('b')), VarNode('a')))]))
+    offset = FuncDec('INT_TYPE', 'offset', [('a', 'int')],
+                     BlockNode([ReturnNode(FuncCall('scale', [VarNode('a'), IntVal(3)]))]))
+    label = FuncDec('STRING_TYPE', 'label', [('n', 'int')],
+                    BlockNode([ReturnNode(BinOp('+', StringVal('cor'), VarNode('n')))]))
+    body = [
+        assign('total', BinOp('+', VarNode('total'), FuncCall('offset', [VarNode('k')]))),
+        IfNode(RelOp('==', BinOp('-', VarNode('k'), BinOp('*', BinOp('/', VarNode('k'), IntVal(100)), IntVal(100))), IntVal(0)),
+               BlockNode([ChangeThreadNode(FuncCall('label', [VarNode('k')]))])),
+    ]
+    return BlockNode([scale, offset, label, declare('total'), assign('total', IntVal(0))]
+                     + counted_loop('k', iterations, body)
+                     + [DrawLineNode(VarNode('total'), IntVal(0), IntVal(0), IntVal(0))])
+
+def constant_program(iterations):
+    # Laço com subexpressões constantes e ramos de depuração desligados por `if (0)` / `if (1)`
+    debug = IntVal(0)
+    body = [
+        assign('acc', BinOp('+', VarNode('acc'), BinOp('-', BinOp('*', IntVal(4), IntVal(8)), IntVal(2)))),
+        IfNode(debug, BlockNode([DrawLineNode(VarNode('j'), VarNode('acc'), IntVal(0), IntVal(0))])),
+        IfNode(RelOp('<', BinOp('*', IntVal(2), IntVal(3)), IntVal(10)),
+               BlockNode([assign('acc', BinOp('-', VarNode('acc'), BinOp('/', IntVal(60), IntVal(2))))]),
+               BlockNode([assign('acc', IntVal(0))])),
+        WhileNode(debug, BlockNode([assign('acc', IntVal(0))])),
+    ]
+    return BlockNode([declare('acc'), assign('acc', IntVal(0))] + counted_loop('j', iterations, body)
+                     + [DrawLineNode(VarNode('acc'), IntVal(0), IntVal(0), IntVal(0))])
+
+def error_program():
+    # Erros devem surgir no mesmo ponto e com a mesma mensagem
+    return BlockNode([DrawLineNode(IntVal(1), IntVal(1), IntVal(1), IntVal(1)),
+                      ChangeThreadNode(BinOp('-', StringVal('a'), IntVal(1)))])
+
+def recursive_program(depth):
+    # int depth(int n) { int r; if (n > 0) { r = depth(n - 1); } return r + 1; }
+    function = FuncDec('INT_TYPE', 'depth', [('n', 'int')], BlockNode([
+        declare('r'),
+        IfNode(RelOp('>', VarNode('n'), IntVal(0)),
+               BlockNode([assign('r', FuncCall('depth', [BinOp('-', VarNode('n'), IntVal(1))]))])),
+        ReturnNode(BinOp('+', VarNode('r'), IntVal(1))),
+    ]))
+    return BlockNode([function, DrawLineNode(FuncCall('depth', [IntVal(depth)]), IntVal(0), IntVal(0), IntVal(0))])
+
+def tail_call_program(depth):
+    # Recursão só por chamadas de cauda. Como um `return` dentro do `if` não encerra a função, o caso base
+    # declara um `next` local que esconde o global (escopo dinâmico):
+    #   int next(int n, int acc) { return walk(n, acc); }
+    #   int walk(int n, int acc) { if (n == 0) { int next(int n, int acc) { return acc; } } return next(n - 1, acc + 1); }
+    params = [('n', 'int'), ('acc', 'int')]
+    step = FuncDec('INT_TYPE', 'next', params, BlockNode([ReturnNode(FuncCall('walk', [VarNode('n'), VarNode('acc')]))]))
+    base = FuncDec('INT_TYPE', 'next', params, BlockNode([ReturnNode(VarNode('acc'))]))
+    walk = FuncDec('INT_TYPE', 'walk', params, BlockNode([
+        IfNode(RelOp('==', VarNode('n'), IntVal(0)), BlockNode([base])),
+        ReturnNode(FuncCall('next', [BinOp('-', VarNode('n'), IntVal(1)), BinOp('+', VarNode('acc'), IntVal(1))])),
+    ]))
+    return BlockNode([step, walk, DrawLineNode(FuncCall('walk', [IntVal(depth), IntVal(0)]), IntVal(0), IntVal(0), IntVal(0))])
+
+def pure_program(depth, iterations):
+    # Funções puras chamadas repetidamente com os mesmos argumentos: fib recursiva e um deslocamento
+    # periódico usado nas coordenadas; `shifted` lê uma global e não é pura
+    fib = FuncDec('INT_TYPE', 'fib', [('n', 'int')], BlockNode([
+        declare('r'),
+        assign('r', VarNode('n')),
+        IfNode(RelOp('>', VarNode('n'), IntVal(1)),
+               BlockNode([assign('r', BinOp('+', FuncCall('fib', [BinOp('-', VarNode('n'), IntVal(1))]),
+                                            FuncCall('fib', [BinOp('-', VarNode('n'), IntVal(2))])))])),
+        ReturnNode(VarNode('r')),
+    ]))
+    wave = FuncDec('INT_TYPE', 'wave', [('k', 'int')], BlockNode([
+        declare('v'),
+        assign('v', BinOp('-', BinOp('*', VarNode('k'), IntVal(7)), BinOp('*', BinOp('/', VarNode('k'), IntVal(5)), IntVal(3)))),
+        ReturnNode(BinOp('+', VarNode('v'), FuncCall('fib', [BinOp('/', VarNode('k'), IntVal(2))]))),
+    ]))
+    shifted = FuncDec('INT_TYPE', 'shifted', [('a', 'int')],
+                      BlockNode([ReturnNode(BinOp('+', VarNode('a'), VarNode('offset')))]))
+    phase = BinOp('-', VarNode('i'), BinOp('*', BinOp('/', VarNode('i'), IntVal(16)), IntVal(16)))
+    body = [DrawLineNode(VarNode('i'), FuncCall('wave', [phase]), FuncCall('shifted', [VarNode('i')]), IntVal(0))]
+    return BlockNode([fib, wave, shifted, declare('offset'), assign('offset', IntVal(3)),
+                      DrawLineNode(FuncCall('fib', [IntVal(depth)]), IntVal(0), IntVal(0), IntVal(0))]
+                     + counted_loop('i', iterations, body))
+
+def dynamic_scope_program():
+    # Escopo dinâmico: `shift` lê `offset`, declarada por quem a chama (ou a global, se chamada do topo)
+    shift = FuncDec('INT_TYPE', 'shift', [('v', 'int')],
+                    BlockNode([ReturnNode(BinOp('+', VarNode('v'), VarNode('offset')))]))
+    local_offset = FuncDec('INT_TYPE', 'localOffset', [('v', 'int')], BlockNode([
+        declare('offset'),
+        assign('offset', IntVal(100)),
+        ReturnNode(FuncCall('shift', [VarNode('v')])),
+    ]))
+    return BlockNode([
+        shift, local_offset, declare('offset'), assign('offset', IntVal(1)),
+        DrawLineNode(FuncCall('shift', [IntVal(5)]), FuncCall('localOffset', [IntVal(5)]),
+                     FuncCall('shift', [IntVal(7)]), VarNode('offset')),
+    ])
+
+def large_source(statements):
+    # Mistura de drawLine, if/else, for e trocas de cor, como um motivo desenrolado à mão
+    lines = ['setup {\n  frameSize = 4000;\n  threadColor = "red";\n};\n']
+    for k in range(statements // 4):
+        lines.append(f"drawLine({k % 997}, {k % 991} + 3, {(k * 7) % 983}, {(k * 13) % 977} - 2);\n")
+        lines.append(f"for (i{k % 5} = 0; i{k % 5} < 3; i{k % 5} = i{k % 5} + 1) {{ drawLine(i{k % 5}, {k % 89}, i{k % 5} * 2, 1); }}\n")
+        lines.append(f"if (({k} - {k // 7} * 7) == 0) {{ changeThread(\"cor{k % 11}\"); }} else {{ drawLine({k % 53}, 0, 0, {k % 59}); }}\n")
+        lines.append(f"drawLine(({k % 31} + 4) * 2, {k % 29} / 3, {k % 23} - 1, {k % 19});\n")
+    return ''.join(lines)
+
+SETUP_SOURCE = 'setup {\n  frameSize = 4000;\n  threadColor = "red";\n};\n'
+
+def flood_source(statements, seed=1):
+    # Só drawLine com coordenadas literais, um por linha
+    generator = random.Random(seed)
+    lines = [SETUP_SOURCE]
+    for _ in range(statements):
+        x1, y1, x2, y2 = (generator.randrange(4000) for _ in range(4))
+        lines.append(f"drawLine({x1}, {y1}, {x2}, {y2});\n")
+    return ''.join(lines)
+
+def if_tree_source(statements, depth=6, seed=1):
+    # Árvores de if/else completas com `depth` níveis e um drawLine em cada folha, repetidas até somar
+    # `statements` declarações; a execução segue um único caminho de cada árvore
+    generator = random.Random(seed)
+    lines = [SETUP_SOURCE]
+
+    def tree(level, indent):
+        pad = '  ' * indent
+        if level == 0:
+            x1, y1, x2, y2 = (generator.randrange(4000) for _ in range(4))
+            lines.append(f"{pad}drawLine({x1}, {y1}, {x2}, {y2});\n")
+            return 1
+        a, b, c = generator.randrange(100), generator.randrange(100), generator.randrange(200)
+        lines.append(f"{pad}if ({a} * 3 - {b} > {c}) {{\n")
+        count = 1 + tree(level - 1, indent + 1)
+        lines.append(f"{pad}}} else {{\n")
+        count += tree(level - 1, indent + 1)
+        lines.append(f"{pad}}}\n")
+        return count
+
+    count = 0
+    while count < statements:
+        count += tree(depth, 0)
+    return ''.join(lines)
+
+def concat_source(statements, terms=16, seed=1):
+    # changeThread com a concatenação de `terms` strings e inteiros em cada declaração
+    generator = random.Random(seed)
+    lines = [SETUP_SOURCE]
+    for _ in range(statements):
+        pieces = [f'"fio{generator.randrange(100)}"' if k % 2 == 0 else str(generator.randrange(1000))
+                  for k in range(terms)]
+        lines.append(f"changeThread({' + '.join(pieces)});\n")
+    return ''.join(lines)
+
+def call_chain_program(calls, depth=40):
+    # Cadeia de funções f0 -> f1 -> ... -> f{depth-1}, cada uma somando 1 ao argumento, chamada num laço
+    # até somar `calls` chamadas
+    functions = []
+    for k in range(depth):
+        if k + 1 < depth:
+            result = FuncCall(f"f{k + 1}", [BinOp('+', VarNode('n'), IntVal(1))])
+        else:
+            result = BinOp('*', VarNode('n'), IntVal(2))
+        functions.append(FuncDec('INT_TYPE', f"f{k}", [('n', 'int')], BlockNode([ReturnNode(result)])))
+    body = [DrawLineNode(FuncCall('f0', [VarNode('c')]), VarNode('c'), IntVal(0), IntVal(0))]
+    return BlockNode(functions + counted_loop('c', max(calls // depth, 1), body))
+
+def run_captured(interpreter, ast, repeat=3):
+    # Devolve (saída, erro, melhor tempo entre `repeat` execuções)
+    best = None
+    for _ in range(repeat):
+        output = io.StringIO()
+        error = None
+        with contextlib.redirect_stdout(output):
+            symbol_table = SymbolTable()
+            STITCHES.reset()
+            start = time.perf_counter()
+            try:
+                interpreter.execute(ast, symbol_table)
+                interpreter.call_main(symbol_table)
+            except Exception as e:
+                error = (type(e).__name__, str(e))
+            STITCHES.flush()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return output.getvalue(), error, best
+
+def sample_programs():
+    # Exemplos .pattern do repositório, já analisados
+    programs = []
+    for filename in sorted(glob.glob(os.path.join(ROOT, '*.pattern'))):
+        with open(filename) as file:
+            programs.append((os.path.basename(filename), Parser.run(file.read())))
+    return programs
@@ -0,0 +1,504 @@
+# Backend de closures: converte o AST produzido por Parser.run em uma árvore de funções Python
+# especializadas. A escolha de operador/tipo é feita uma única vez, na compilação, e não a cada execução.
+import operator as py_operator
+
+from main import (
+    STITCHES, Interpreter, SymbolTable, normalize_type, node_class, BinOp, UnOp, IntVal, NoOp, BoolOp, RelOp, StringVal, AssignNode, VarNode,
+    BlockNode, IfNode, WhileNode, ScanNode, ReturnNode, FuncDec, FuncCall, PrintNode, SetupNode,
+    DrawLineNode, ChangeThreadNode
+)
+
+def _int_add(left, right):
+    return lambda scope: left(scope) + right(scope)
+
+def _int_sub(left, right):
+    return lambda scope: left(scope) - right(scope)
+
+def _int_mul(left, right):
+    return lambda scope: left(scope) * right(scope)
+
+def _int_div(left, right):
+    def div(scope):
+        left_value = left(scope)
+        right_value = right(scope)
+        if right_value == 0:
+            raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
+        return left_value // right_value
+    return div
+
+def _str_concat(left, right):
+    return lambda scope: left(scope) + right(scope)
+
+def _str_int_concat(left, right):
+    return lambda scope: left(scope) + str(right(scope))
+
+def _int_str_concat(left, right):
+    return lambda scope: str(left(scope)) + right(scope)
+
+def _eq(left, right):
+    return lambda scope: 1 if left(scope) == right(scope) else 0
+
+def _ne(left, right):
+    return lambda scope: 1 if left(scope) != right(scope) else 0
+
+def _lt(left, right):
+    return lambda scope: 1 if left(scope) < right(scope) else 0
+
+def _gt(left, right):
+    return lambda scope: 1 if left(scope) > right(scope) else 0
+
+def _le(left, right):
+    return lambda scope: 1 if left(scope) <= right(scope) else 0
+
+def _ge(left, right):
+    return lambda scope: 1 if left(scope) >= right(scope) else 0
+
+# (operador, tipo esquerdo, tipo direito) -> (fábrica da closure, tipo do resultado)
+SPECIALIZED_OPS = {
+    ('+', 'int', 'int'): (_int_add, 'int'),
+    ('-', 'int', 'int'): (_int_sub, 'int'),
+    ('*', 'int', 'int'): (_int_mul, 'int'),
+    ('/', 'int', 'int'): (_int_div, 'int'),
+    ('+', 'char*', 'char*'): (_str_concat, 'char*'),
+    ('+', 'char*', 'int'): (_str_int_concat, 'char*'),
+    ('+', 'int', 'char*'): (_int_str_concat, 'char*'),
+    ('==', 'int', 'int'): (_eq, 'int'),
+    ('!=', 'int', 'int'): (_ne, 'int'),
+    ('<', 'int', 'int'): (_lt, 'int'),
+    ('>', 'int', 'int'): (_gt, 'int'),
+    ('<=', 'int', 'int'): (_le, 'int'),
+    ('>=', 'int', 'int'): (_ge, 'int'),
+    ('==', 'char*', 'char*'): (_eq, 'int'),
+    ('!=', 'char*', 'char*'): (_ne, 'int'),
+    ('<', 'char*', 'char*'): (_lt, 'int'),
+    ('>', 'char*', 'char*'): (_gt, 'int'),
+}
+
+# Caminho rápido int x int para expressões cujos tipos só são conhecidos em execução (variáveis, chamadas)
+INT_ARITHMETIC = {'+': py_operator.add, '-': py_operator.sub, '*': py_operator.mul}
+INT_COMPARISONS = {
+    '==': lambda left, right: 1 if left == right else 0,
+    '!=': lambda left, right: 1 if left != right else 0,
+    '<': lambda left, right: 1 if left < right else 0,
+    '>': lambda left, right: 1 if left > right else 0,
+    '<=': lambda left, right: 1 if left <= right else 0,
+    '>=': lambda left, right: 1 if left >= right else 0,
+}
+
+def _lookup(scope, name):
+    # Mesma busca de SymbolTable.get_variable (e mesma mensagem de VarNode) sem recursão
+    table = scope
+    while table is not None:
+        variables = table.variables
+        if name in variables:
+            return variables[name]
+        table = table.parent
+    error = ValueError(f"Variável '{name}' não definida.")
+    STITCHES.flush()
+    print(f"Erro ao acessar '{name}': {error}")
+    raise error
+
+def _typed(value_closure, value_type):
+    # Adapta uma closure de valor cru para a convenção (valor, tipo) do interpretador
+    return lambda scope: (value_closure(scope), value_type)
+
+def _untyped(typed_closure):
+    # Extrai só o valor de uma closure (valor, tipo), preservando o erro de desempacotamento
+    def value(scope):
+        result, _ = typed_closure(scope)
+        return result
+    return value
+
+class ClosureCompiler(Interpreter):
+    def __init__(self):
+        self.bodies = {}    # id(FuncDec) -> (FuncDec, corpo compilado)
+        self.statement_compilers = {
+            BlockNode: self.compile_block,
+            IfNode: self.compile_if,
+            WhileNode: self.compile_while,
+            AssignNode: self.compile_assign,
+            FuncDec: self.compile_func_dec,
+            ReturnNode: self.compile_return,
+            SetupNode: self.compile_setup,
+            DrawLineNode: self.compile_draw_line,
+            ChangeThreadNode: self.compile_change_thread,
+            NoOp: self.compile_no_op,
+        }
+        self.expression_compilers = {
+            IntVal: self.compile_int,
+            StringVal: self.compile_string,
+            BinOp: self.compile_bin_op,
+            RelOp: self.compile_bin_op,
+            UnOp: self.compile_un_op,
+            BoolOp: self.compile_bool_op,
+            VarNode: self.compile_var,
+            ScanNode: self.compile_scan,
+            FuncCall: self.compile_func_call,
+            PrintNode: self.compile_print,
+        }
+
+    def execute(self, node, symbol_table):
+        return self.compile(node)(symbol_table)
+
+    def call_main(self, symbol_table):
+        try:
+            symbol_table.get_function("main")
+            self.compile(FuncCall("main", []))(symbol_table)
+        except ValueError:
+            pass
+
+    def compile(self, node):
+        # Devolve uma closure `f(scope)` com o mesmo retorno de `node.evaluate(scope)`
+        compiler = self.statement_compilers.get(node_class(node))
+        if compiler is not None:
+            closure = compiler(node)
+        elif node_class(node) in self.expression_compilers:
+            closure, value_type = self.compile_expression(node)
+            if value_type is not None:
+                closure = _typed(closure, value_type)
+        else:
+            # Nós desconhecidos continuam sendo interpretados
+            closure = node.evaluate
+        return closure
+
+    def compile_expression(self, node):
+        # Devolve (closure, tipo): com tipo conhecido a closure devolve o valor cru,
+        # com tipo None ela devolve a tupla (valor, tipo) como o evaluate()
+        compiler = self.expression_compilers.get(node_class(node))
+        if compiler is None:
+            return self.compile(node), None
+        return compiler(node)
+
+    def compile_value(self, node):
+        # Closure que devolve apenas o valor, qualquer que seja o tipo
+        closure, value_type = self.compile_expression(node)
+        return closure if value_type is not None else _untyped(closure)
+
+    def compile_typed(self, node):
+        closure, value_type = self.compile_expression(node)
+        return _typed(closure, value_type) if value_type is not None else closure
+
+    # Expressões
+
+    def compile_int(self, node):
+        value = node.value
+        return (lambda scope: value), 'int'
+
+    def compile_string(self, node):
+        value = node.value
+        return (lambda scope: value), 'char*'
+
+    def compile_bin_op(self, node):
+        left, left_type = self.compile_expression(node.children[0])
+        right, right_type = self.compile_expression(node.children[1])
+        specialized = SPECIALIZED_OPS.get((node.value, left_type, right_type))
+        if specialized is not None:
+            factory, result_type = specialized
+            return factory(left, right), result_type
+
+        # Tipos só conhecidos em execução: caminho rápido para int x int e, nos demais casos,
+        # as mesmas regras do nó original
+        apply = type(node).apply
+        operator = node.value
+        left_node, right_node = node.children
+        fast = (INT_ARITHMETIC if isinstance(node, BinOp) else INT_COMPARISONS).get(operator)
+
+        if fast is not None and type(left_node) is VarNode and type(right_node) in (VarNode, IntVal):
+            # Operandos simples (variável e variável/constante) são lidos direto da tabela de símbolos
+            left_name = left_node.identifier
+            if type(right_node) is IntVal:
+                constant = right_node.value
+
+                def var_const(scope):
+                    left_value, left_value_type = scope.variables.get(left_name) or _lookup(scope, left_name)
+                    if left_value_type == 'int':
+                        return fast(left_value, constant), 'int'
+                    return apply(operator, left_value, left_value_type, constant, 'int')
+                return var_const, None
+
+            right_name = right_node.identifier
+
+            def var_var(scope):
+                left_value, left_value_type = scope.variables.get(left_name) or _lookup(scope, left_name)
+                right_value, right_value_type = scope.variables.get(right_name) or _lookup(scope, right_name)
+                if left_value_type == 'int' and right_value_type == 'int':
+                    return fast(left_value, right_value), 'int'
+                return apply(operator, left_value, left_value_type, right_value, right_value_type)
+            return var_var, None
+
+        left = _typed(left, left_type) if left_type is not None else left
+        right = _typed(right, right_type) if right_type is not None else right
+
+        if fast is not None:
+            def dynamic_int(scope):
+                left_value, left_value_type = left(scope)
+                right_value, right_value_type = right(scope)
+                if left_value_type == 'int' and right_value_type == 'int':
+                    return fast(left_value, right_value), 'int'
+                return apply(operator, left_value, left_value_type, right_value, right_value_type)
+            return dynamic_int, None
+
+        def dynamic(scope):
+            left_value, left_value_type = left(scope)
+            right_value, right_value_type = right(scope)
+            return apply(operator, left_value, left_value_type, right_value, right_value_type)
+        return dynamic, None
+
+    def compile_un_op(self, node):
+        child, child_type = self.compile_expression(node.children[0])
+        if child_type == 'int':
+            if node.value == '!':
+                return (lambda scope: 0 if child(scope) else 1), 'int'
+            elif node.value == '-':
+                return (lambda scope: -child(scope)), 'int'
+            elif node.value == '+':
+                return (lambda scope: +child(scope)), 'int'
+        typed_child = _typed(child, child_type) if child_type is not None else child
+        operator = node.value
+
+        def dynamic(scope):
+            child_value, value_type = typed_child(scope)
+            return UnOp.apply(operator, child_value, value_type)
+        return dynamic, None
+
+    def compile_bool_op(self, node):
+        if len(node.children) != 2:
+            return node.evaluate, None
+        left = self.compile_value(node.children[0])
+        right = self.compile_value(node.children[1])
+        if node.value == '&&':
+            def and_op(scope):
+                left_value = left(scope)
+                right_value = right(scope)
+                return 1 if left_value and right_value else 0
+            return and_op, 'int'
+        elif node.value == '||':
+            def or_op(scope):
+                left_value = left(scope)
+                right_value = right(scope)
+                return 1 if left_value or right_value else 0
+            return or_op, 'int'
+        return node.evaluate, None
+
+    def compile_var(self, node):
+        name = node.identifier
+
+        def load(scope):
+            return scope.variables.get(name) or _lookup(scope, name)
+        return load, None
+
+    def compile_scan(self, node):
+        def scan(scope):
+            STITCHES.flush()
+            user_input = input("")
+            try:
+                return int(user_input)
+            except ValueError:
+                raise TypeError("Erro de tipo: `scanf` esperava um valor `int`, mas recebeu uma string.")
+        return scan, 'int'
+
+    def compile_print(self, node):
+        child, child_type = self.compile_expression(node.children[0])
+        if child_type is not None:
+            def print_value(scope):
+                value = child(scope)
+                STITCHES.print_value(value)
+                return value
+            return print_value, child_type
+
+        def print_typed(scope):
+            value, var_type = child(scope)
+            STITCHES.print_value(value)
+            return value, var_type
+        return print_typed, None
+
+    def compile_func_call(self, node):
+        name = node.name
+        arguments = [self.compile_typed(argument) for argument in node.children]
+        argument_count = len(arguments)
+        function_body = self.function_body
+        # Cache do ponto de chamada: a última função resolvida e seu corpo compilado
+        cache = [None, None]
+
+        def call(scope):
+            # Mesma busca de SymbolTable.get_function, sem recursão
+            table = scope
+            while name not in table.functions:
+                if table.parent is None:
+                    table.get_function(name)
+                table = table.parent
+            func_dec = table.functions[name]
+            params = func_dec.params
+            if argument_count != len(params):
+                raise ValueError(f"Erro: Função '{name}' esperava {len(params)} argumentos, mas {argument_count} foram fornecidos.")
+
+            local_table = SymbolTable(parent=scope)
+            local_variables = local_table.variables
+            for (param_name, param_type), argument in zip(params, arguments):
+                arg_value, arg_type = argument(scope)
+                if arg_type != param_type:
+                    raise TypeError(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+                if param_name in local_variables:
+                    local_table.set_variable(param_name, arg_value, param_type, is_declaration=True)
+                local_variables[param_name] = (arg_value, normalize_type(param_type))
+
+            if cache[0] is not func_dec:
+                cache[0] = func_dec
+                cache[1] = function_body(func_dec)
+            result = None
+            for statement, is_return in cache[1]:
+                result = statement(local_table)
+                if is_return:
+                    break
+
+            func_type = func_dec.func_type
+            if func_type == 'void':
+                return None
+            elif func_type == 'int' and result is None:
+                result = (0, 'int')
+            elif result is not None and result[1] != func_type:
+                raise TypeError(f"Erro de tipo: Função '{name}' esperava retornar '{func_type}' mas retornou '{result[1]}'")
+            return result
+        return call, None
+
+    def function_body(self, func_dec):
+        # O corpo é compilado na primeira chamada e reaproveitado nas seguintes
+        entry = self.bodies.get(id(func_dec))
+        if entry is None:
+            body = [(self.compile(statement), isinstance(statement, ReturnNode)) for statement in func_dec.children[0].children]
+            entry = self.bodies[id(func_dec)] = (func_dec, body)
+        return entry[1]
+
+    # Comandos
+
+    def compile_block(self, node):
+        statements = [self.compile(statement) for statement in node.children]
+
+        def block(scope):
+            for statement in statements:
+                statement(scope)
+        return block
+
+    def compile_no_op(self, node):
+        return lambda scope: None
+
+    def compile_if(self, node):
+        condition, condition_type = self.compile_expression(node.children[0])
+        true_block = self.compile(node.children[1])
+        false_block = self.compile(node.children[2]) if len(node.children) > 2 else None
+
+        if condition_type == 'int':
+            if false_block is None:
+                def if_int(scope):
+                    if condition(scope):
+                        true_block(scope)
+                return if_int
+
+            def if_else_int(scope):
+                if condition(scope):
+                    true_block(scope)
+                else:
+                    false_block(scope)
+            return if_else_int
+
+        typed_condition = _typed(condition, condition_type) if condition_type is not None else condition
+
+        def if_dynamic(scope):
+            condition_value, value_type = typed_condition(scope)
+            if value_type != 'int':
+                raise TypeError("Erro de semântica: Condição do 'if' deve ser do tipo 'int'")
+            if condition_value:
+                true_block(scope)
+            elif false_block is not None:
+                false_block(scope)
+        return if_dynamic
+
+    def compile_while(self, node):
+        condition, condition_type = self.compile_expression(node.children[0])
+        block = self.compile(node.children[1])
+
+        if condition_type == 'int':
+            def while_int(scope):
+                while condition(scope):
+                    block(scope)
+            return while_int
+
+        typed_condition = _typed(condition, condition_type) if condition_type is not None else condition
+
+        def while_dynamic(scope):
+            condition_value, value_type = typed_condition(scope)
+            if value_type != 'int':
+                raise TypeError("Erro de semântica: Condição do 'while' deve ser do tipo 'int'")
+            while condition_value:
+                block(scope)
+                condition_value, value_type = typed_condition(scope)
+        return while_dynamic
+
+    def compile_assign(self, node):
+        name = node.identifier
+        var_type = node.var_type
+
+        if node.is_declaration:
+            default_value = 0 if var_type == 'int' else ""
+
+            def declare(scope):
+                scope.set_variable(name, default_value, var_type, is_declaration=True)
+                return default_value, var_type
+            return declare
+
+        expression = self.compile_typed(node.children[0])
+
+        if isinstance(node.children[0], ScanNode):
+            def assign_scan(scope):
+                value, expression_type = expression(scope)
+                if scope.get_variable(name)[1] != 'int':
+                    raise TypeError(f"Erro de tipo: `scanf` só pode ser atribuído a variáveis do tipo `int`, mas '{name}' é do tipo '{var_type}'.")
+                scope.set_variable(name, value, expression_type)
+                return value, expression_type
+            return assign_scan
+
+        def assign(scope):
+            value, expression_type = expression(scope)
+            # Mesma busca de SymbolTable.set_variable, sem recursão
+            table = scope
+            while name not in table.variables:
+                if table.parent is None:
+                    table.set_variable(name, value, expression_type)
+                table = table.parent
+            table.variables[name] = (value, normalize_type(expression_type))
+            return value, expression_type
+        return assign
+
+    def compile_func_dec(self, node):
+        def declare_function(scope):
+            scope.set_function(node.name, node)
+        return declare_function
+
+    def compile_return(self, node):
+        return self.compile_typed(node.children[0])
+
+    def compile_setup(self, node):
+        frame_size = self.compile_value(node.children[0])
+        thread_color = self.compile_value(node.children[1])
+
+        def setup(scope):
+            frame_size_value = frame_size(scope)
+            thread_color_value = thread_color(scope)
+            STITCHES.setup(frame_size_value, thread_color_value)
+        return setup
+
+    def compile_draw_line(self, node):
+        x1, y1, x2, y2 = [self.compile_value(child) for child in node.children]
+
+        record = STITCHES.draw_line
+
+        def draw_line(scope):
+            record(x1(scope), y1(scope), x2(scope), y2(scope))
+        return draw_line
+
+    def compile_change_thread(self, node):
+        color = self.compile_value(node.children[0])
+
+        def change_thread(scope):
+            STITCHES.change_thread(color(scope))
+        return change_thread
@@ -0,0 +1,728 @@
+# AST compacto (--compact-ast): em vez de um objeto Python por nó (com __dict__ e lista de filhos), o
+# programa fica numa tabela de arrays paralelos, no estilo do TokenArrays. Cada nó i tem um código de tipo
+# (kinds[i]), um valor (values[i]: índice no conjunto de literais, no de nomes ou no de operadores) e a
+# posição dos seus filhos em `edges` (de operands[i] até operands[i + 1]): os filhos de um nó são gravados
+# juntos quando ele é criado, e os nós são numerados na ordem de criação, então o fim de um é o começo do
+# próximo. Literais e nomes repetidos são guardados uma vez só. A tabela é montada direto pelo
+# CompactParser a partir dos códigos dos tokens, sem criar Token nem nós, e executada pelo TableEvaluator,
+# que percorre os índices com a mesma semântica (e as mesmas mensagens de erro) do evaluate de cada nó.
+# NodeView dá acesso por objeto a um nó da tabela, e `tree()` converte a tabela (ou um trecho) nas classes
+# de main.py, para quem precisa delas.
+from array import array
+
+import main
+from main import (
+    STITCHES, TOKEN_CODES, TOKEN_TYPES, EOF_CODE, TokenArrays, SymbolTable, Interpreter, BinOp, UnOp, IntVal,
+    BoolOp, RelOp, StringVal, AssignNode, VarNode, BlockNode, IfNode, WhileNode, ForNode, RepeatNode, ScanNode,
+    ReturnNode, FuncCall, SetupNode, DrawLineNode, ChangeThreadNode, TransformNode, TRANSFORMS
+)
+
+# Códigos dos tipos de nó
+(INT, STRING, VAR, BINOP, UNOP, BOOLOP, RELOP, ASSIGN, BLOCK, IF, WHILE, FOR, REPEAT, SCAN, CALL, SETUP,
+ DRAWLINE, CHANGETHREAD, TRANSFORM, REPEAT_TRANSFORM) = range(20)
+KIND_NAMES = ('int', 'string', 'var', 'binop', 'unop', 'boolop', 'relop', 'assign', 'block', 'if', 'while',
+              'for', 'repeat', 'scan', 'call', 'setup', 'drawLine', 'changeThread', 'transform', 'repeatTransform')
+
+OPERATORS = ('+', '-', '*', '/', '&&', '||', '==', '!=', '<', '>', '<=', '>=', '!')
+OPERATOR_CODES = {operator: code for code, operator in enumerate(OPERATORS)}
+
+# Blocos de transformação: código do token -> (nome, números de argumentos aceitos)
+TRANSFORM_CODES = {TOKEN_CODES[token_type]: transform for token_type, transform in TRANSFORMS.items()}
+
+# Tokens de operador binário do Parser -> (tipo de nó, código do operador)
+EXPRESSION_OPERATORS = {
+    TOKEN_CODES['+']: (BINOP, OPERATOR_CODES['+']), TOKEN_CODES['-']: (BINOP, OPERATOR_CODES['-']),
+    TOKEN_CODES['AND']: (BOOLOP, OPERATOR_CODES['&&']), TOKEN_CODES['OR']: (BOOLOP, OPERATOR_CODES['||']),
+    TOKEN_CODES['EQUAL']: (RELOP, OPERATOR_CODES['==']), TOKEN_CODES['NOT_EQUAL']: (RELOP, OPERATOR_CODES['!=']),
+    TOKEN_CODES['LESS']: (RELOP, OPERATOR_CODES['<']), TOKEN_CODES['GREATER']: (RELOP, OPERATOR_CODES['>']),
+    TOKEN_CODES['LESS_EQUAL']: (RELOP, OPERATOR_CODES['<=']), TOKEN_CODES['GREATER_EQUAL']: (RELOP, OPERATOR_CODES['>=']),
+}
+TERM_OPERATORS = {TOKEN_CODES['*']: OPERATOR_CODES['*'], TOKEN_CODES['/']: OPERATOR_CODES['/']}
+
+(T_SETUP, T_IF, T_ELSE, T_WHILE, T_REPEAT, T_FOR, T_IDENTIFIER, T_DRAWLINE, T_CHANGETHREAD, T_LBRACE, T_RBRACE,
+ T_LPAREN, T_RPAREN, T_COMMA, T_SEMICOLON, T_ASSIGN, T_NUMBER, T_STRING, T_NOT, T_SCANF, T_PLUS, T_MINUS,
+ T_FRAMESIZE, T_THREADCOLOR) = (TOKEN_CODES[name] for name in (
+    'SETUP', 'IF', 'ELSE', 'WHILE', 'REPEAT', 'FOR', 'IDENTIFIER', 'DRAWLINE', 'CHANGETHREAD', 'LBRACE', 'RBRACE',
+    'LPAREN', 'RPAREN', 'COMMA', 'SEMICOLON', 'ASSIGN', 'NUMBER', 'STRING_LITERAL', 'NOT', 'SCANF', '+', '-',
+    'FRAMESIZE', 'THREADCOLOR'))
+
+class NodeTable:
+    __slots__ = ('kinds', 'values', 'operands', 'edges', 'literals', 'names', 'root')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.values = array('i')
+        self.operands = array('i')
+        self.edges = array('i')
+        self.literals = []   # valores de IntVal e StringVal, sem repetição
+        self.names = []      # nomes de variáveis, contadores e funções, sem repetição
+        self.root = -1
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def children(self, index):
+        return self.edges[self.operands[index]:self.operands[index + 1]]
+
+    def view(self, index=None):
+        return NodeView(self, self.root if index is None else index)
+
+    def value(self, index):
+        # Valor do nó como no atributo `value` (ou `identifier`, `counter`, `name`) da classe correspondente
+        kind = self.kinds[index]
+        if kind in (INT, STRING):
+            return self.literals[self.values[index]]
+        if kind in (VAR, ASSIGN, FOR, CALL, TRANSFORM, REPEAT_TRANSFORM):
+            return self.names[self.values[index]]
+        if kind in (BINOP, UNOP, BOOLOP, RELOP):
+            return OPERATORS[self.values[index]]
+        return None
+
+    def tree(self, index=None):
+        # Mesmo programa (ou só o nó `index`) com as classes de nó de main.py
+        index = self.root if index is None else index
+        children = [self.tree(child) for child in self.edges[self.operands[index]:self.operands[index + 1]]]
+        return BUILDERS[self.kinds[index]](self.value(index), children)
+
+# Tipo de nó -> construtor da classe de main.py a partir de (valor, filhos)
+BUILDERS = (
+    lambda value, children: IntVal(value),
+    lambda value, children: StringVal(value),
+    lambda value, children: VarNode(value),
+    lambda value, children: BinOp(value, *children),
+    lambda value, children: UnOp(value, *children),
+    lambda value, children: BoolOp(value, *children),
+    lambda value, children: RelOp(value, *children),
+    lambda value, children: AssignNode(value, children[0], None, is_declaration=False),
+    lambda value, children: BlockNode(children),
+    lambda value, children: IfNode(*children),
+    lambda value, children: WhileNode(*children),
+    lambda value, children: ForNode(value, *children),
+    lambda value, children: RepeatNode(*children),
+    lambda value, children: ScanNode(),
+    lambda value, children: FuncCall(value, children),
+    lambda value, children: SetupNode(*children),
+    lambda value, children: DrawLineNode(*children),
+    lambda value, children: ChangeThreadNode(*children),
+    lambda value, children: TransformNode(value, children[1:-1], children[-1]),
+    lambda value, children: TransformNode(value, children[1:-1], children[-1], children[0]),
+)
+
+class NodeView:
+    # Acesso por objeto a um nó da tabela, sem cópia: só guarda a tabela e o índice
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def kind(self):
+        return KIND_NAMES[self.table.kinds[self.index]]
+
+    @property
+    def value(self):
+        return self.table.value(self.index)
+
+    @property
+    def children(self):
+        return [NodeView(self.table, child) for child in self.table.children(self.index)]
+
+    def evaluate(self, symbol_table, global_table=None):
+        return TableEvaluator(self.table).evaluate(self.index, symbol_table, global_table)
+
+    def __repr__(self):
+        value = self.value
+        return f"NodeView({self.index}, {self.kind}{'' if value is None else ', ' + repr(value)})"
+
+class CompactParser:
+    # Mesma gramática e mesmas mensagens de erro do Parser, lendo direto os arrays do TokenArrays
+    def __init__(self, arrays):
+        self.types = arrays.types
+        self.tokens = arrays.values
+        self.last = len(arrays) - 1
+        self.index = 0
+        self.code = self.types[0]
+        self.table = NodeTable()
+        self.literal_codes = {}
+        self.name_codes = {}
+
+    def select_next(self):
+        if self.index < self.last:
+            self.index += 1
+        self.code = self.types[self.index]
+
+    def token_type(self):
+        return TOKEN_TYPES[self.code]
+
+    def add(self, kind, value, *children):
+        table = self.table
+        index = len(table.kinds)
+        table.kinds.append(kind)
+        table.values.append(value)
+        table.operands.append(len(table.edges))
+        table.edges.extend(children)
+        return index
+
+    def literal(self, value):
+        code = self.literal_codes.get(value)
+        if code is None:
+            code = self.literal_codes[value] = len(self.table.literals)
+            self.table.literals.append(value)
+        return code
+
+    def name(self, value):
+        code = self.name_codes.get(value)
+        if code is None:
+            code = self.name_codes[value] = len(self.table.names)
+            self.table.names.append(value)
+        return code
+
+    def expect(self, code, message):
+        if self.code != code:
+            raise Exception(message)
+        self.select_next()
+
+    @staticmethod
+    def run(code):
+        if code == "" or code.isspace():
+            raise Exception("Erro de sintaxe: A expressão não pode ser vazia ou consistir apenas de espaços em branco.")
+        parser = CompactParser(TokenArrays.tokenize(code))
+        statements = []
+        while parser.code != EOF_CODE:
+            statements.append(parser.parse_statement())
+        table = parser.table
+        table.root = parser.add(BLOCK, 0, *statements)
+        table.operands.append(len(table.edges))  # fim dos filhos do último nó
+        return table
+
+    def parse_statement(self):
+        code = self.code
+        if code == T_SETUP:
+            self.select_next()
+            if self.code != T_LBRACE:
+                raise Exception("Erro de sintaxe: '{' esperado após 'setup'")
+            self.select_next()
+            frame_size = self.parse_assignment('FRAMESIZE', T_FRAMESIZE)
+            thread_color = self.parse_assignment('THREADCOLOR', T_THREADCOLOR)
+            self.expect(T_RBRACE, "Erro de sintaxe: '}' esperado após configurações")
+            self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após '}'")
+            return self.add(SETUP, 0, frame_size, thread_color)
+
+        if code == T_IF:
+            self.select_next()
+            self.expect(T_LPAREN, "Erro de sintaxe: '(' esperado após 'if'")
+            condition = self.parse_expression()
+            self.expect(T_RPAREN, "Erro de sintaxe: ')' esperado após a expressão do if")
+            if self.code != T_LBRACE:
+                raise Exception("Erro de sintaxe: '{' esperado após a condição do if")
+            true_block = self.parse_block()
+            if self.code == T_ELSE:
+                self.select_next()
+                if self.code != T_LBRACE:
+                    raise Exception("Erro de sintaxe: '{' esperado após else")
+                return self.add(IF, 0, condition, true_block, self.parse_block())
+            return self.add(IF, 0, condition, true_block)
+
+        if code == T_WHILE:
+            self.select_next()
+            condition = self.parse_condition('while')
+            if self.code != T_LBRACE:
+                raise Exception("Erro de sintaxe: '{' esperado após a condição do while")
+            return self.add(WHILE, 0, condition, self.parse_block())
+
+        if code == T_REPEAT:
+            self.select_next()
+            count = self.parse_condition('repeat')
+            if self.code in TRANSFORM_CODES:
+                return self.parse_transform(count)
+            if self.code != T_LBRACE:
+                raise Exception("Erro de sintaxe: '{' esperado após o número de repetições do repeat")
+            return self.add(REPEAT, 0, count, self.parse_block())
+
+        if code in TRANSFORM_CODES:
+            return self.parse_transform()
+
+        if code == T_FOR:
+            self.select_next()
+            self.expect(T_LPAREN, "Erro de sintaxe: '(' esperado após 'for'")
+            counter, start = self.parse_loop_assignment()
+            self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após o valor inicial do for")
+            condition = self.parse_expression()
+            self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após a condição do for")
+            identifier, expression = self.parse_loop_assignment()
+            self.expect(T_RPAREN, "Erro de sintaxe: ')' esperado após a atualização do for")
+            if self.code != T_LBRACE:
+                raise Exception("Erro de sintaxe: '{' esperado após ')' do for")
+            update = self.add(ASSIGN, self.name(identifier), expression)
+            return self.add(FOR, self.name(counter), start, condition, update, self.parse_block())
+
+        if code == T_IDENTIFIER:
+            identifier = self.tokens[self.index]
+            self.select_next()
+            if self.code == T_ASSIGN:
+                self.select_next()
+                expression = self.parse_expression()
+                self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após a expressão")
+                return self.add(ASSIGN, self.name(identifier), expression)
+            if self.code == T_LPAREN:
+                args = self.parse_arguments()
+                self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após a chamada da função")
+                return self.add(CALL, self.name(identifier), *args)
+            raise Exception("Erro de sintaxe: '=' ou '(' esperado após o identificador")
+
+        if code == T_DRAWLINE:
+            self.select_next()
+            if self.code != T_LPAREN:
+                raise Exception("Erro de sintaxe: '(' esperado após 'drawLine'")
+            self.select_next()
+            x1 = self.parse_expression()
+            self.expect(T_COMMA, "Erro de sintaxe: ',' esperado após o primeiro argumento de drawLine")
+            y1 = self.parse_expression()
+            self.expect(T_COMMA, "Erro de sintaxe: ',' esperado após o segundo argumento de drawLine")
+            x2 = self.parse_expression()
+            self.expect(T_COMMA, "Erro de sintaxe: ',' esperado após o terceiro argumento de drawLine")
+            y2 = self.parse_expression()
+            self.expect(T_RPAREN, "Erro de sintaxe: ')' esperado após o quarto argumento de drawLine")
+            self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após drawLine")
+            return self.add(DRAWLINE, 0, x1, y1, x2, y2)
+
+        if code == T_CHANGETHREAD:
+            self.select_next()
+            if self.code != T_LPAREN:
+                raise Exception("Erro de sintaxe: '(' esperado após 'changeThread'")
+            self.select_next()
+            color = self.parse_expression()
+            self.expect(T_RPAREN, "Erro de sintaxe: ')' esperado após o argumento de changeThread")
+            self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após changeThread")
+            return self.add(CHANGETHREAD, 0, color)
+
+        raise Exception(f"Erro de sintaxe: Declaração inválida, token atual: {self.token_type()}")
+
+    def parse_block(self):
+        if self.code != T_LBRACE:
+            raise Exception(f"Erro de sintaxe: '{{' esperado no início do bloco, token atual: {self.token_type()}")
+        self.select_next()
+        statements = []
+        while self.code != T_RBRACE and self.code != EOF_CODE:
+            statements.append(self.parse_statement())
+        if self.code != T_RBRACE:
+            raise Exception(f"Erro de sintaxe: '}}' esperado ao final do bloco, token atual: {self.token_type()}")
+        self.select_next()
+        return self.add(BLOCK, 0, *statements)
+
+    def parse_condition(self, keyword):
+        self.expect(T_LPAREN, f"Erro de sintaxe: '(' esperado após '{keyword}'")
+        expression = self.parse_expression()
+        self.expect(T_RPAREN, f"Erro de sintaxe: ')' esperado após a expressão do {keyword}")
+        return expression
+
+    def parse_transform(self, count=None):
+        # Um bloco sozinho guarda o número de cópias 1 no lugar do count, como o TransformNode
+        operation, counts = TRANSFORM_CODES[self.code]
+        self.select_next()
+        self.expect(T_LPAREN, f"Erro de sintaxe: '(' esperado após '{operation}'")
+        arguments = [self.parse_expression()]
+        while self.code == T_COMMA:
+            self.select_next()
+            arguments.append(self.parse_expression())
+        if self.code != T_RPAREN:
+            raise Exception(f"Erro de sintaxe: ')' esperado após os argumentos de {operation}")
+        if len(arguments) not in counts:
+            expected = ' ou '.join(str(count) for count in counts)
+            raise Exception(f"Erro de sintaxe: {operation} espera {expected} argumentos, mas recebeu {len(arguments)}")
+        self.select_next()
+        if self.code != T_LBRACE:
+            raise Exception(f"Erro de sintaxe: '{{' esperado após os argumentos de {operation}")
+        if count is None:
+            kind, count = TRANSFORM, self.add(INT, self.literal(1))
+        else:
+            kind = REPEAT_TRANSFORM
+        return self.add(kind, self.name(operation), count, *arguments, self.parse_block())
+
+    def parse_loop_assignment(self):
+        if self.code != T_IDENTIFIER:
+            raise Exception("Erro de sintaxe: Identificador esperado no for")
+        identifier = self.tokens[self.index]
+        self.select_next()
+        self.expect(T_ASSIGN, "Erro de sintaxe: '=' esperado após o identificador")
+        return identifier, self.parse_expression()
+
+    def parse_assignment(self, expected_identifier, expected_code):
+        if self.code != expected_code:
+            raise Exception(f"Erro de sintaxe: Esperado '{expected_identifier}', mas encontrado '{self.token_type()}'")
+        self.select_next()
+        self.expect(T_ASSIGN, "Erro de sintaxe: '=' esperado após o identificador")
+        if self.code == T_NUMBER:
+            value = self.add(INT, self.literal(self.tokens[self.index]))
+        elif self.code == T_STRING:
+            value = self.add(STRING, self.literal(self.tokens[self.index]))
+        else:
+            raise Exception("Erro de sintaxe: Valor esperado após '='")
+        self.select_next()
+        self.expect(T_SEMICOLON, "Erro de sintaxe: ';' esperado após a atribuição")
+        return value
+
+    def parse_arguments(self):
+        # Depois do identificador: '(' argumentos ')'
+        args = []
+        self.select_next()
+        while self.code != T_RPAREN:
+            args.append(self.parse_expression())
+            if self.code == T_COMMA:
+                self.select_next()
+        self.select_next()
+        return args
+
+    def parse_expression(self):
+        result = self.parse_term()
+        operator = EXPRESSION_OPERATORS.get(self.code)
+        while operator is not None:
+            self.select_next()
+            result = self.add(operator[0], operator[1], result, self.parse_term())
+            operator = EXPRESSION_OPERATORS.get(self.code)
+        return result
+
+    def parse_term(self):
+        result = self.parse_factor()
+        operator = TERM_OPERATORS.get(self.code)
+        while operator is not None:
+            self.select_next()
+            result = self.add(BINOP, operator, result, self.parse_factor())
+            operator = TERM_OPERATORS.get(self.code)
+        return result
+
+    def parse_factor(self):
+        code = self.code
+        if code == T_NUMBER:
+            result = self.add(INT, self.literal(self.tokens[self.index]))
+            self.select_next()
+            return result
+        if code == T_IDENTIFIER:
+            identifier = self.tokens[self.index]
+            self.select_next()
+            if self.code == T_LPAREN:
+                return self.add(CALL, self.name(identifier), *self.parse_arguments())
+            return self.add(VAR, self.name(identifier))
+        if code == T_STRING:
+            result = self.add(STRING, self.literal(self.tokens[self.index]))
+            self.select_next()
+            return result
+        if code == T_NOT:
+            self.select_next()
+            return self.add(UNOP, OPERATOR_CODES['!'], self.parse_factor())
+        if code == T_SCANF:
+            # O Parser devolve um nó vazio para `scanf` sem parênteses; aqui é um erro de sintaxe
+            self.select_next()
+            self.expect(T_LPAREN, "Erro de sintaxe: '(' esperado após 'scanf'")
+            self.expect(T_RPAREN, "Erro de sintaxe: ')' esperado após 'scanf'")
+            return self.add(SCAN, 0)
+        if code == T_LPAREN:
+            self.select_next()
+            result = self.parse_expression()
+            self.expect(T_RPAREN, "Erro de sintaxe: ')' esperado após a expressão")
+            return result
+        if code == T_PLUS or code == T_MINUS:
+            self.select_next()
+            return self.add(UNOP, OPERATOR_CODES['+' if code == T_PLUS else '-'], self.parse_factor())
+        raise Exception("Erro de sintaxe: Fator inválido")
+
+class TableEvaluator:
+    # Executa uma NodeTable percorrendo os índices; cada tipo de nó tem uma função com a semântica do
+    # evaluate da classe correspondente (inclusive quais filhos recebem global_table)
+    def __init__(self, table):
+        kinds = table.kinds
+        values = table.values
+        operands = table.operands
+        edges = table.edges
+        literals = table.literals
+        names = table.names
+        self.table = table
+        self.loops = {}   # índice do laço -> nó de main.py usado pelo caminho vetorizado (ou False)
+        self.lines = {}   # índice do corpo de um laço -> número de drawLine nele
+
+        # Ponto de entrada; dentro das funções, os filhos são despachados direto por handlers[kinds[filho]],
+        # sem passar por aqui
+        def evaluate(index, symbol_table, global_table=None):
+            return handlers[kinds[index]](index, symbol_table, global_table)
+
+        def integer(index, symbol_table, global_table):
+            return literals[values[index]], 'int'
+
+        def string(index, symbol_table, global_table):
+            return literals[values[index]], 'char*'
+
+        def variable(index, symbol_table, global_table):
+            identifier = names[values[index]]
+            try:
+                return symbol_table.get_variable(identifier)
+            except ValueError as e:
+                if global_table and global_table != symbol_table:
+                    try:
+                        return global_table.get_variable(identifier)
+                    except ValueError:
+                        pass
+                STITCHES.flush()
+                print(f"Erro ao acessar '{identifier}': {e}")
+                raise
+
+        def binary(index, symbol_table, global_table):
+            # Literais (INT e STRING, os dois primeiros códigos) são lidos direto, sem chamar o handler
+            first = operands[index]
+            child = edges[first]
+            kind = kinds[child]
+            if kind <= STRING:
+                left_value, left_type = literals[values[child]], LITERAL_TYPES[kind]
+            else:
+                left_value, left_type = handlers[kind](child, symbol_table, None)
+            child = edges[first + 1]
+            kind = kinds[child]
+            if kind <= STRING:
+                right_value, right_type = literals[values[child]], LITERAL_TYPES[kind]
+            else:
+                right_value, right_type = handlers[kind](child, symbol_table, None)
+            return BinOp.apply(OPERATORS[values[index]], left_value, left_type, right_value, right_type)
+
+        def unary(index, symbol_table, global_table):
+            child = edges[operands[index]]
+            child_value, child_type = handlers[kinds[child]](child, symbol_table, global_table)
+            return UnOp.apply(OPERATORS[values[index]], child_value, child_type)
+
+        def boolean(index, symbol_table, global_table):
+            first = operands[index]
+            child = edges[first]
+            left_value, _ = handlers[kinds[child]](child, symbol_table, global_table)
+            child = edges[first + 1]
+            right_value, _ = handlers[kinds[child]](child, symbol_table, global_table)
+            if values[index] == AND:
+                return (1 if left_value and right_value else 0), 'int'
+            return (1 if left_value or right_value else 0), 'int'
+
+        def relational(index, symbol_table, global_table):
+            first = operands[index]
+            child = edges[first]
+            left_value, left_type = handlers[kinds[child]](child, symbol_table, global_table)
+            child = edges[first + 1]
+            right_value, right_type = handlers[kinds[child]](child, symbol_table, global_table)
+            return RelOp.apply(OPERATORS[values[index]], left_value, left_type, right_value, right_type)
+
+        def assign(index, symbol_table, global_table):
+            identifier = names[values[index]]
+            expression = edges[operands[index]]
+            value, expression_type = handlers[kinds[expression]](expression, symbol_table, global_table)
+            if kinds[expression] == SCAN and symbol_table.get_variable(identifier)[1] != 'int':
+                raise TypeError(f"Erro de tipo: `scanf` só pode ser atribuído a variáveis do tipo `int`, mas '{identifier}' é do tipo 'None'.")
+            symbol_table.set_variable(identifier, value, expression_type)
+            return value, expression_type
+
+        def block(index, symbol_table, global_table):
+            for statement in edges[operands[index]:operands[index + 1]]:
+                # Como no BlockNode, só chamadas, variáveis e BinOp recebem global_table
+                kind = kinds[statement]
+                handlers[kind](statement, symbol_table, global_table if kind in PASS_GLOBAL else None)
+
+        def branch(index, symbol_table, global_table):
+            first = operands[index]
+            child = edges[first]
+            condition_value, condition_type = handlers[kinds[child]](child, symbol_table, None)
+            if condition_type != 'int':
+                raise TypeError("Erro de semântica: Condição do 'if' deve ser do tipo 'int'")
+            if condition_value:
+                child = edges[first + 1]
+                handlers[kinds[child]](child, symbol_table, global_table)
+            elif operands[index + 1] - first > 2:
+                child = edges[first + 2]
+                handlers[kinds[child]](child, symbol_table, global_table)
+
+        def while_loop(index, symbol_table, global_table):
+            first = operands[index]
+            condition, body = edges[first], edges[first + 1]
+            condition_value, condition_type = handlers[kinds[condition]](condition, symbol_table, None)
+            if condition_type != 'int':
+                raise TypeError("Erro de semântica: Condição do 'while' deve ser do tipo 'int'")
+            if condition_value and vectorized(index, symbol_table):
+                return
+            while condition_value:
+                handlers[kinds[body]](body, symbol_table, global_table)
+                condition_value, condition_type = handlers[kinds[condition]](condition, symbol_table, None)
+
+        def for_loop(index, symbol_table, global_table):
+            first = operands[index]
+            start_index, condition, update, body = edges[first:first + 4]
+            start, start_type = handlers[kinds[start_index]](start_index, symbol_table, None)
+            if start_type != 'int':
+                raise TypeError("Erro de semântica: Valor inicial do 'for' deve ser do tipo 'int'")
+            counter = names[values[index]]
+            try:
+                symbol_table.set_variable(counter, start, 'int', is_declaration=True)
+            except ValueError:
+                symbol_table.set_variable(counter, start, 'int')
+            condition_value, condition_type = handlers[kinds[condition]](condition, symbol_table, None)
+            if condition_type != 'int':
+                raise TypeError("Erro de semântica: Condição do 'for' deve ser do tipo 'int'")
+            if condition_value and vectorized(index, symbol_table):
+                return
+            while condition_value:
+                handlers[kinds[body]](body, symbol_table, global_table)
+                handlers[kinds[update]](update, symbol_table, None)
+                condition_value, _ = handlers[kinds[condition]](condition, symbol_table, None)
+
+        def repeat_loop(index, symbol_table, global_table):
+            first = operands[index]
+            child = edges[first]
+            count, count_type = handlers[kinds[child]](child, symbol_table, None)
+            if count_type != 'int':
+                raise TypeError("Erro de semântica: Número de repetições do 'repeat' deve ser do tipo 'int'")
+            if count > 0 and vectorized(index, symbol_table, count):
+                return
+            body = edges[first + 1]
+            for _ in range(count):
+                handlers[kinds[body]](body, symbol_table, global_table)
+
+        def vectorized(index, symbol_table, count=None):
+            # O caminho rápido de loops.py trabalha sobre nós de main.py: cada laço é convertido uma única
+            # vez, e a conversão é descartada quando o formato dele não serve
+            if not main.VECTORIZE_LOOPS:
+                return False
+            loop = self.loops.get(index)
+            if loop is False:
+                return False
+            from loops import vectorize_loop
+            if loop is None:
+                if short_loop(index, symbol_table, count):
+                    return False
+                loop = self.loops[index] = table.tree(index)
+            done = vectorize_loop(loop, symbol_table, count)
+            if getattr(loop, 'vector_plan', None) is False:
+                self.loops[index] = False
+            return done
+
+        def short_loop(index, symbol_table, count):
+            # True quando vectorize_loop certamente recusaria o laço por ter poucas linhas (repeat, ou for
+            # com limite e passo literais), o que evita converter laços curtos que só executam uma vez
+            from loops import FLIPPED, VECTOR_MIN_SEGMENTS, iteration_count
+            first = operands[index]
+            if kinds[index] == REPEAT:
+                iterations, body = count, edges[first + 1]
+            elif kinds[index] == FOR:
+                counter = values[index]
+                condition, update, body = edges[first + 1:first + 4]
+                left, right = edges[operands[condition]:operands[condition] + 2]
+                operator = OPERATORS[values[condition]]
+                if kinds[left] == VAR and values[left] == counter and kinds[right] == INT:
+                    bound = literals[values[right]]
+                elif kinds[right] == VAR and values[right] == counter and kinds[left] == INT:
+                    operator, bound = FLIPPED[operator], literals[values[left]]
+                else:
+                    return False
+                expression = edges[operands[update]]
+                if values[update] != counter or kinds[expression] != BINOP:
+                    return False
+                left, right = edges[operands[expression]:operands[expression] + 2]
+                if kinds[left] == VAR and values[left] == counter and kinds[right] == INT:
+                    step = literals[values[right]]
+                    if OPERATORS[values[expression]] == '-':
+                        step = -step
+                    elif OPERATORS[values[expression]] != '+':
+                        return False
+                elif (OPERATORS[values[expression]] == '+' and kinds[right] == VAR and values[right] == counter
+                      and kinds[left] == INT):
+                    step = literals[values[left]]
+                else:
+                    return False
+                start, start_type = symbol_table.get_variable(names[counter])
+                iterations = iteration_count(operator, start, step, bound)
+            else:
+                return False
+            if body not in self.lines:
+                self.lines[body] = draw_line_count(body)
+            return iterations is None or iterations * self.lines[body] < VECTOR_MIN_SEGMENTS
+
+        def draw_line_count(index):
+            total = 0
+            for statement in edges[operands[index]:operands[index + 1]]:
+                if kinds[statement] == DRAWLINE:
+                    total += 1
+                elif kinds[statement] == BLOCK:
+                    total += draw_line_count(statement)
+            return total
+
+        def scan(index, symbol_table, global_table):
+            STITCHES.flush()
+            user_input = input("")
+            try:
+                return int(user_input), 'int'
+            except ValueError:
+                raise TypeError("Erro de tipo: `scanf` esperava um valor `int`, mas recebeu uma string.")
+
+        def call(index, symbol_table, global_table):
+            # Mesmas verificações do FuncCall; a função declarada (um nó de main.py) executa o próprio corpo
+            name = names[values[index]]
+            function_scope = global_table if global_table else symbol_table
+            func_dec = function_scope.get_function(name)
+            args = edges[operands[index]:operands[index + 1]]
+            if len(args) != len(func_dec.params):
+                raise ValueError(f"Erro: Função '{name}' esperava {len(func_dec.params)} argumentos, mas {len(args)} foram fornecidos.")
+            local_table = SymbolTable(parent=function_scope)
+            for (param_name, param_type), arg in zip(func_dec.params, args):
+                arg_value, arg_type = handlers[kinds[arg]](arg, symbol_table, None)
+                if arg_type != param_type:
+                    raise TypeError(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+                local_table.set_variable(param_name, arg_value, param_type, is_declaration=True)
+            result = None
+            for statement in func_dec.children[0].children:
+                result = statement.evaluate(local_table)
+                if isinstance(statement, ReturnNode):
+                    break
+            if func_dec.func_type == 'void':
+                return None
+            elif func_dec.func_type == 'int' and result is None:
+                result = (0, 'int')
+            elif result is not None and result[1] != func_dec.func_type:
+                raise TypeError(f"Erro de tipo: Função '{name}' esperava retornar '{func_dec.func_type}' mas retornou '{result[1]}'")
+            return result
+
+        def setup(index, symbol_table, global_table):
+            first = operands[index]
+            child = edges[first]
+            frame_size, _ = handlers[kinds[child]](child, symbol_table, None)
+            child = edges[first + 1]
+            thread_color, _ = handlers[kinds[child]](child, symbol_table, None)
+            STITCHES.setup(frame_size, thread_color)
+
+        def draw_line(index, symbol_table, global_table):
+            coordinates = []
+            for child in edges[operands[index]:operands[index] + 4]:
+                kind = kinds[child]
+                coordinates.append(literals[values[child]] if kind <= STRING else handlers[kind](child, symbol_table, None)[0])
+            STITCHES.draw_line(*coordinates)
+
+        def change_thread(index, symbol_table, global_table):
+            child = edges[operands[index]]
+            color, _ = handlers[kinds[child]](child, symbol_table, None)
+            STITCHES.change_thread(color)
+
+        def transform(index, symbol_table, global_table):
+            children = edges[operands[index]:operands[index + 1]]
+            count, count_type = handlers[kinds[children[0]]](children[0], symbol_table, None)
+            if count_type != 'int':
+                raise TypeError("Erro de semântica: Número de repetições do 'repeat' deve ser do tipo 'int'")
+            arguments = [handlers[kinds[child]](child, symbol_table, None) for child in children[1:-1]]
+            body = children[-1]
+            from transforms import replicate
+            replicate(names[values[index]], arguments, count if kinds[index] == REPEAT_TRANSFORM else None,
+                      lambda: handlers[kinds[body]](body, symbol_table, global_table))
+
+        handlers = (integer, string, variable, binary, unary, boolean, relational, assign, block, branch,
+                    while_loop, for_loop, repeat_loop, scan, call, setup, draw_line, change_thread, transform,
+                    transform)
+        self.evaluate = evaluate
+
+AND = OPERATOR_CODES['&&']
+LITERAL_TYPES = ('int', 'char*')
+PASS_GLOBAL = (CALL, VAR, BINOP)
+
+class CompactInterpreter(Interpreter):
+    # Backend tree sobre a NodeTable; a chamada de `main` continua com o FuncCall de Interpreter
+    def execute(self, table, symbol_table):
+        return TableEvaluator(table).evaluate(table.root, symbol_table)
@@ -0,0 +1,198 @@
+# Exportação para o formato Tajima DST das máquinas de bordado. Cada drawLine vira pontos relativos
+# (divididos no passo máximo do formato, 121 unidades de 0,1 mm), com saltos quando a linha não começa
+# onde a agulha está e uma troca de cor a cada changeThread. Os registros são escritos em blocos por um
+# writer com buffer; o cabeçalho (extensões e contagens) é regravado no início do arquivo ao fechar.
+import os
+
+from stitches import DRAW_LINE, CHANGE_THREAD
+
+HEADER_SIZE = 512
+MAX_STEP = 121
+RECORD_SIZE = 3
+
+STITCH, JUMP, COLOR_CHANGE, END = 'stitch', 'jump', 'color', 'end'
+FLAGS = {STITCH: 0x03, JUMP: 0x83, COLOR_CHANGE: 0xC3, END: 0xF3}
+WRITE_CHUNK_SIZE = 1 << 16
+
+# Bits de cada dígito ternário balanceado: (byte, bit do +, bit do -) para 1, 3, 9, 27 e 81
+X_BITS = ((0, 0x01, 0x02), (1, 0x01, 0x02), (0, 0x04, 0x08), (1, 0x04, 0x08), (2, 0x04, 0x08))
+Y_BITS = ((0, 0x80, 0x40), (1, 0x80, 0x40), (0, 0x20, 0x10), (1, 0x20, 0x10), (2, 0x20, 0x10))
+
+def encode_axis(value, bits):
+    # Deslocamento em [-121, 121] -> contribuição (byte0, byte1, byte2) em ternário balanceado
+    encoded = [0, 0, 0]
+    for byte, plus, minus in bits:
+        digit = (value + 1) % 3 - 1
+        value = (value - digit) // 3
+        if digit == 1:
+            encoded[byte] |= plus
+        elif digit == -1:
+            encoded[byte] |= minus
+    return tuple(encoded)
+
+X_ENCODING = {value: encode_axis(value, X_BITS) for value in range(-MAX_STEP, MAX_STEP + 1)}
+Y_ENCODING = {value: encode_axis(value, Y_BITS) for value in range(-MAX_STEP, MAX_STEP + 1)}
+
+def decode_axis(byte0, byte1, byte2, bits):
+    value = 0
+    weight = 1
+    encoded = (byte0, byte1, byte2)
+    for byte, plus, minus in bits:
+        if encoded[byte] & plus:
+            value += weight
+        if encoded[byte] & minus:
+            value -= weight
+        weight *= 3
+    return value
+
+def decode_record(record):
+    byte0, byte1, byte2 = record
+    if byte2 & 0xF3 == 0xF3:
+        kind = END
+    elif byte2 & 0xC0 == 0xC0:
+        kind = COLOR_CHANGE
+    elif byte2 & 0x80:
+        kind = JUMP
+    else:
+        kind = STITCH
+    return decode_axis(byte0, byte1, byte2, X_BITS), decode_axis(byte0, byte1, byte2, Y_BITS), kind
+
+def signed(value):
+    return f"{'+' if value >= 0 else '-'}{abs(value):>5}"
+
+class DstWriter:
+    # Posições absolutas em unidades DST (0,1 mm, y para cima); o arquivo precisa permitir seek
+    def __init__(self, file, label="PatternScript", chunk_size=WRITE_CHUNK_SIZE):
+        self.file = file
+        self.label = label
+        self.chunk_size = chunk_size
+        self.chunk = bytearray()
+        self.x = 0
+        self.y = 0
+        self.records = 0
+        self.color_changes = 0
+        self.min_x = self.max_x = self.min_y = self.max_y = 0
+        self.file.write(b' ' * HEADER_SIZE)
+
+    def _record(self, dx, dy, kind):
+        x0, x1, x2 = X_ENCODING[dx]
+        y0, y1, y2 = Y_ENCODING[dy]
+        self.chunk += bytes((x0 | y0, x1 | y1, x2 | y2 | FLAGS[kind]))
+        self.records += 1
+        if len(self.chunk) >= self.chunk_size:
+            self.file.write(self.chunk)
+            self.chunk = bytearray()
+
+    def move(self, x, y, kind=STITCH):
+        # Vai até (x, y) em passos iguais de no máximo MAX_STEP por eixo
+        dx = x - self.x
+        dy = y - self.y
+        if -MAX_STEP <= dx <= MAX_STEP and -MAX_STEP <= dy <= MAX_STEP:
+            self._record(dx, dy, kind)
+        else:
+            steps = max(-(-abs(dx) // MAX_STEP), -(-abs(dy) // MAX_STEP))
+            previous_x, previous_y = self.x, self.y
+            for step in range(1, steps + 1):
+                next_x = self.x + dx * step // steps
+                next_y = self.y + dy * step // steps
+                self._record(next_x - previous_x, next_y - previous_y, kind)
+                previous_x, previous_y = next_x, next_y
+        self.x, self.y = x, y
+        if x < self.min_x:
+            self.min_x = x
+        elif x > self.max_x:
+            self.max_x = x
+        if y < self.min_y:
+            self.min_y = y
+        elif y > self.max_y:
+            self.max_y = y
+
+    def change_color(self):
+        self._record(0, 0, COLOR_CHANGE)
+        self.color_changes += 1
+
+    def header(self):
+        lines = [
+            f"LA:{self.label[:16]:<16}", f"ST:{self.records:>7}", f"CO:{self.color_changes:>3}",
+            f"+X:{self.max_x:>5}", f"-X:{-self.min_x:>5}", f"+Y:{self.max_y:>5}", f"-Y:{-self.min_y:>5}",
+            f"AX:{signed(self.x)}", f"AY:{signed(self.y)}", f"MX:{signed(0)}", f"MY:{signed(0)}", "PD:******",
+        ]
+        header = ('\r'.join(lines) + '\r').encode('ascii', 'replace') + b'\x1a'
+        return header.ljust(HEADER_SIZE, b' ')
+
+    def close(self):
+        # Registro de fim, resto do buffer e cabeçalho com as contagens finais
+        self._record(0, 0, END)
+        self.file.write(self.chunk)
+        self.chunk = bytearray()
+        end = self.file.tell()
+        self.file.seek(0)
+        self.file.write(self.header())
+        self.file.seek(end)
+        self.file.flush()
+
+class DstSink:
+    # Sink do StitchBuffer: converte cada bloco de comandos em registros DST, sem guardar a lista toda.
+    # `scale` é o número de unidades DST (0,1 mm) por unidade de coordenada da PatternScript.
+    def __init__(self, file, scale=1, label="PatternScript"):
+        self.writer = DstWriter(file, label)
+        self.scale = scale
+        self.stitched = False        # algum ponto desde a última troca de cor
+        self.pending_color = False
+
+    def write(self, buffer):
+        writer = self.writer
+        scale = self.scale
+        for kind, x1, y1, x2, y2, _ in buffer.rows():
+            if kind == DRAW_LINE:
+                if type(x1) is not int or type(y1) is not int or type(x2) is not int or type(y2) is not int:
+                    raise TypeError(f"Erro: drawLine({x1}, {y1}, {x2}, {y2}) não tem coordenadas inteiras e não pode ser exportado para DST.")
+                if self.pending_color:
+                    writer.change_color()
+                    self.pending_color = False
+                # O eixo y do DST aponta para cima
+                start_x, start_y = x1 * scale, -y1 * scale
+                if (start_x, start_y) != (writer.x, writer.y):
+                    writer.move(start_x, start_y, JUMP)
+                writer.move(x2 * scale, -y2 * scale, STITCH)
+                self.stitched = True
+            elif kind == CHANGE_THREAD and self.stitched:
+                # Trocas seguidas sem pontos entre elas viram uma só
+                self.pending_color = True
+                self.stitched = False
+
+    def close(self):
+        self.writer.close()
+
+class DstReader:
+    def __init__(self, file):
+        self.file = file
+        self.header = self.parse_header(file.read(HEADER_SIZE))
+
+    @staticmethod
+    def parse_header(data):
+        header = {}
+        for field in data.split(b'\x1a')[0].decode('ascii', 'replace').split('\r'):
+            if ':' in field:
+                key, value = field.split(':', 1)
+                header[key] = value.strip()
+        return header
+
+    def records(self, chunk_size=WRITE_CHUNK_SIZE):
+        # Gerador de (x, y, tipo) com posições absolutas; para no registro de fim
+        x = y = 0
+        chunk_size -= chunk_size % RECORD_SIZE
+        while True:
+            data = self.file.read(chunk_size)
+            if not data:
+                return
+            for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+                dx, dy, kind = decode_record(data[offset:offset + RECORD_SIZE])
+                if kind == END:
+                    return
+                x += dx
+                y += dy
+                yield x, y, kind
+
+def default_label(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
@@ -0,0 +1,210 @@
+# Caminho rápido dos laços que só desenham. Um for/while/repeat cujo corpo tem apenas drawLine com
+# argumentos afins no contador (a * i + b, com a e b fixos durante o laço) e cujo contador anda um passo
+# fixo até um limite fixo tem o número de iterações calculado de antemão: todas as linhas são geradas de
+# uma vez com NumPy e copiadas em bloco para o StitchBuffer. Como o corpo não atribui nada, as outras
+# variáveis não mudam durante o laço. Fora desse formato (ou com algum valor que não seja int) o laço é
+# interpretado normalmente, iteração por iteração.
+from main import (
+    STITCHES, node_class, IntVal, VarNode, BinOp, UnOp, RelOp, AssignNode, BlockNode, DrawLineNode,
+    WhileNode, ForNode, RepeatNode
+)
+
+VECTOR_MIN_SEGMENTS = 64        # abaixo disso o NumPy não compensa
+VECTOR_CHUNK_ROWS = 1 << 16     # linhas geradas por vez
+COORDINATE_LIMIT = 1 << 62      # valores maiores ficam com a interpretação (inteiros sem limite)
+
+FLIPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '==': '==', '!=': '!='}
+
+class NotAffine(Exception):
+    pass
+
+class LoopPlan:
+    # Formato do laço, extraído uma vez por nó: contador (None no repeat), operador e limite da condição,
+    # passo (expressão e sinal) e os quatro argumentos de cada drawLine
+    __slots__ = ('counter', 'operator', 'bound', 'step', 'step_sign', 'lines')
+
+    def __init__(self, counter, operator, bound, step, step_sign, lines):
+        self.counter = counter
+        self.operator = operator
+        self.bound = bound
+        self.step = step
+        self.step_sign = step_sign
+        self.lines = lines
+
+def draw_line_arguments(block):
+    # Argumentos de cada drawLine do bloco (blocos aninhados incluídos), ou None se houver outro comando
+    lines = []
+    for statement in block.children:
+        statement_type = node_class(statement)
+        if statement_type is DrawLineNode:
+            lines.append(statement.children)
+        elif statement_type is BlockNode:
+            nested = draw_line_arguments(statement)
+            if nested is None:
+                return None
+            lines.extend(nested)
+        else:
+            return None
+    return lines
+
+def counter_step(update, counter):
+    # (expressão do passo, sinal) de `contador = contador + e`, `contador = e + contador` ou `contador = contador - e`
+    if node_class(update) is not AssignNode or update.is_declaration or update.identifier != counter:
+        return None
+    expression = update.children[0]
+    if node_class(expression) is not BinOp or expression.value not in ('+', '-'):
+        return None
+    left, right = expression.children
+    if node_class(left) is VarNode and left.identifier == counter:
+        return right, (1 if expression.value == '+' else -1)
+    if expression.value == '+' and node_class(right) is VarNode and right.identifier == counter:
+        return left, 1
+    return None
+
+def loop_plan(loop):
+    loop_type = node_class(loop)
+    if loop_type is RepeatNode:
+        lines = draw_line_arguments(loop.children[1])
+        return LoopPlan(None, None, None, None, 0, lines) if lines else None
+    if loop_type is ForNode:
+        counter, condition, update, block = loop.counter, loop.children[1], loop.children[2], loop.children[3]
+        lines = draw_line_arguments(block)
+    elif loop_type is WhileNode:
+        condition, block = loop.children
+        if node_class(block) is not BlockNode or not block.children:
+            return None
+        update = block.children[-1]
+        if node_class(update) is not AssignNode:
+            return None
+        counter = update.identifier
+        lines = draw_line_arguments(BlockNode(block.children[:-1]))
+    else:
+        return None
+    step = counter_step(update, counter)
+    if not lines or step is None or node_class(condition) is not RelOp:
+        return None
+    left, right = condition.children
+    if node_class(left) is VarNode and left.identifier == counter:
+        operator, bound = condition.value, right
+    elif node_class(right) is VarNode and right.identifier == counter:
+        operator, bound = FLIPPED[condition.value], left
+    else:
+        return None
+    return LoopPlan(counter, operator, bound, step[0], step[1], lines)
+
+def affine(node, counter, scope):
+    # (coeficiente, termo independente) de uma expressão em função do contador
+    node_type = node_class(node)
+    if node_type is IntVal:
+        if type(node.value) is not int:
+            raise NotAffine
+        return 0, node.value
+    if node_type is VarNode:
+        if node.identifier == counter:
+            return 1, 0
+        try:
+            value, value_type = scope.get_variable(node.identifier)
+        except ValueError:
+            raise NotAffine
+        if value_type != 'int' or type(value) is not int:
+            raise NotAffine
+        return 0, value
+    if node_type is BinOp:
+        left_coefficient, left_constant = affine(node.children[0], counter, scope)
+        right_coefficient, right_constant = affine(node.children[1], counter, scope)
+        if node.value == '+':
+            return left_coefficient + right_coefficient, left_constant + right_constant
+        if node.value == '-':
+            return left_coefficient - right_coefficient, left_constant - right_constant
+        if node.value == '*':
+            if left_coefficient == 0:
+                return right_coefficient * left_constant, right_constant * left_constant
+            if right_coefficient == 0:
+                return left_coefficient * right_constant, left_constant * right_constant
+        elif node.value == '/' and left_coefficient == 0 and right_coefficient == 0 and right_constant != 0:
+            return 0, left_constant // right_constant
+        raise NotAffine
+    if node_type is UnOp and node.value in ('+', '-'):
+        coefficient, constant = affine(node.children[0], counter, scope)
+        return (coefficient, constant) if node.value == '+' else (-coefficient, -constant)
+    raise NotAffine
+
+def invariant(node, counter, scope):
+    coefficient, constant = affine(node, counter, scope)
+    if coefficient:
+        raise NotAffine
+    return constant
+
+def iteration_count(operator, start, step, bound):
+    # Iterações de i = start, start + step, ... enquanto `i operator bound`; None se o laço não termina
+    holds = {'<': start < bound, '>': start > bound, '<=': start <= bound, '>=': start >= bound,
+             '==': start == bound, '!=': start != bound}[operator]
+    if not holds:
+        return 0
+    if operator == '<' and step > 0:
+        return (bound - start + step - 1) // step
+    if operator == '<=' and step > 0:
+        return (bound - start) // step + 1
+    if operator == '>' and step < 0:
+        return (start - bound - step - 1) // -step
+    if operator == '>=' and step < 0:
+        return (start - bound) // -step + 1
+    if operator == '==' and step != 0:
+        return 1
+    if operator == '!=' and step != 0 and (bound - start) % step == 0 and (bound - start) // step > 0:
+        return (bound - start) // step
+    return None
+
+def vectorize_loop(loop, scope, count=None):
+    # Executa o laço (já com a condição inicial verdadeira) pelo caminho rápido; False se não for possível.
+    # `count` é o número de repetições já avaliado de um repeat.
+    plan = getattr(loop, 'vector_plan', None)
+    if plan is None:
+        plan = loop.vector_plan = loop_plan(loop) or False
+    if plan is False:
+        return False
+
+    counter = plan.counter
+    try:
+        if counter is None:
+            start, step, iterations = 0, 1, count
+        else:
+            start, start_type = scope.get_variable(counter)
+            if start_type != 'int' or type(start) is not int:
+                return False
+            step = plan.step_sign * invariant(plan.step, counter, scope)
+            iterations = iteration_count(plan.operator, start, step, invariant(plan.bound, counter, scope))
+        lines = [[affine(argument, counter, scope) for argument in arguments] for arguments in plan.lines]
+    except NotAffine:
+        return False
+    if iterations is None or iterations * len(lines) < VECTOR_MIN_SEGMENTS:
+        return False
+
+    # Cada argumento vira base + inclinação * k, para a k-ésima iteração
+    columns = []
+    for arguments in lines:
+        for coefficient, constant in arguments:
+            base = constant + coefficient * start
+            slope = coefficient * step
+            if (abs(base) >= COORDINATE_LIMIT or abs(slope) >= COORDINATE_LIMIT
+                    or abs(base + slope * (iterations - 1)) >= COORDINATE_LIMIT):
+                return False
+            columns.append((base, slope))
+    # Só agora: laços curtos não pagam a importação do NumPy
+    try:
+        import numpy as np
+    except ImportError:
+        return False
+
+    per_chunk = max(VECTOR_CHUNK_ROWS // len(lines), 1)
+    for first in range(0, iterations, per_chunk):
+        k = np.arange(first, min(first + per_chunk, iterations), dtype=np.int64)
+        # Linhas na ordem da execução: iteração por iteração, drawLine por drawLine
+        coordinates = np.empty((4, len(k), len(lines)), dtype=np.int64)
+        for index, (base, slope) in enumerate(columns):
+            line, position = divmod(index, 4)
+            coordinates[position, :, line] = base + slope * k
+        STITCHES.draw_lines(*coordinates.reshape(4, -1))
+    if counter is not None:
+        scope.set_variable(counter, start + step * iterations, 'int')
+    return True
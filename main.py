@@ -1,108 +1,262 @@
 import sys
 import re
+import argparse
+from array import array
+from itertools import accumulate, chain, islice
+
+from stitches import StitchBuffer, TextSink, TeeSink, create_sink
+
+# Palavras-chave da linguagem (montadas uma única vez, não a cada token)
+KEYWORDS = {
+    'setup': 'SETUP',
+    'frameSize': 'FRAMESIZE',
+    'threadColor': 'THREADCOLOR',
+    'drawLine': 'DRAWLINE',
+    'changeThread': 'CHANGETHREAD',
+    'if': 'IF',
+    'else': 'ELSE',
+    'while': 'WHILE',
+    'for': 'FOR',
+    'repeat': 'REPEAT',
+    'translate': 'TRANSLATE',
+    'rotate': 'ROTATE',
+    'mirror': 'MIRROR',
+    'scanf': 'SCANF'
+}
+
+# Blocos de transformação: token -> (nome, números de argumentos aceitos)
+TRANSFORMS = {
+    'TRANSLATE': ('translate', (2,)),
+    'ROTATE': ('rotate', (1, 3)),
+    'MIRROR': ('mirror', (1, 2))
+}
+
+# Operadores e pontuação -> tipo de token esperado pelo Parser
+SYMBOLS = {
+    '{': 'LBRACE',
+    '}': 'RBRACE',
+    '(': 'LPAREN',
+    ')': 'RPAREN',
+    ',': 'COMMA',
+    ';': 'SEMICOLON',
+    '=': 'ASSIGN',
+    '+': '+',
+    '-': '-',
+    '*': '*',
+    '/': '/',
+    '==': 'EQUAL',
+    '!=': 'NOT_EQUAL',
+    '<': 'LESS',
+    '>': 'GREATER',
+    '<=': 'LESS_EQUAL',
+    '>=': 'GREATER_EQUAL',
+    '&&': 'AND',
+    '||': 'OR',
+    '!': 'NOT'
+}
+
+# Padrão mestre: um único regex compilado consome espaços e comentários (grupo 1) e o próximo token (grupo 2).
+# A ordem importa: comentários antes de '/', operadores de dois caracteres antes dos de um.
+# O grupo 1 é possessivo (não devolve um comentário para virar '/'), e o grupo 2 só fica vazio no fim do código.
+TOKEN_REGEX = re.compile(r"""
+    ((?:\s+|//[^\n]*|/\*.*?\*/)*+)
+    (\d+|[^\W\d_][^\W_]*|"[^"]*"|"|/\*|==|!=|<=|>=|&&|\|\||\S)?
+""", re.DOTALL | re.VERBOSE)
+
+# Códigos numéricos dos tipos de token, usados na forma pré-tokenizada (TokenArrays)
+TOKEN_TYPES = ('EOF', 'NUMBER', 'IDENTIFIER', 'STRING_LITERAL') + tuple(KEYWORDS.values()) + tuple(dict.fromkeys(SYMBOLS.values()))
+TOKEN_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+EOF_CODE = TOKEN_CODES['EOF']
+
+# Tamanho do bloco lido por vez no modo streaming
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Comandos de bordado gravados pelos nós; o sink padrão escreve o texto no sys.stdout atual, em blocos
+STITCHES = StitchBuffer(TextSink())
+
+# Laços que só desenham linhas afins no contador são gerados em bloco por loops.py (desligado com --no-vectorize)
+VECTORIZE_LOOPS = True
 
 class Token:
+    __slots__ = ('type', 'value')
+
     def __init__(self, type, value=None):
         self.type = type
         self.value = value
 
+# Tokens de palavras-chave e símbolos são compartilhados em vez de alocados a cada ocorrência
+EOF_TOKEN = Token('EOF')
+FIXED_TOKENS = {word: Token(token_type) for word, token_type in KEYWORDS.items()}
+FIXED_TOKENS.update({symbol: Token(token_type, symbol) for symbol, token_type in SYMBOLS.items()})
+SHARED_TOKENS = [None] * len(TOKEN_TYPES)
+SHARED_TOKENS[EOF_CODE] = EOF_TOKEN
+for _token in FIXED_TOKENS.values():
+    SHARED_TOKENS[TOKEN_CODES[_token.type]] = _token
+
+def classify_token(text):
+    # Converte o texto de um token em (código do tipo, valor)
+    fixed = FIXED_TOKENS.get(text)
+    if fixed is not None:
+        return TOKEN_CODES[fixed.type], fixed.value
+    first = text[0]
+    if first.isdigit():
+        return TOKEN_CODES['NUMBER'], int(text)
+    if first.isalpha():
+        return TOKEN_CODES['IDENTIFIER'], text
+    if first == '"':
+        if len(text) == 1:
+            raise Exception("Erro de sintaxe: String não terminada.")
+        return TOKEN_CODES['STRING_LITERAL'], text[1:-1]
+    if text == '/*':
+        raise Exception("Erro de sintaxe: Comentário não terminado.")
+    raise Exception(f"Token desconhecido: {first}")
+
 class Tokenizer:
+    cache_literals = True
+
     def __init__(self, source):
         self.source = source
         self.position = 0
         self.current_token = None
+        self._match = TOKEN_REGEX.match
+        self._tokens = {}  # Cache texto -> Token: literais repetidos compartilham o mesmo objeto
         self.select_next()
 
     def select_next(self):
-        while self.position < len(self.source) and self.source[self.position].isspace():
-            self.position += 1
+        match = self._match(self.source, self.position)
+        self.position = match.end()
+        text = match.group(2)
+        if text is None:
+            self.current_token = EOF_TOKEN
+            return
+        token = self._tokens.get(text)
+        if token is None:
+            code, value = classify_token(text)
+            token = SHARED_TOKENS[code]
+            if token is None:
+                token = Token(TOKEN_TYPES[code], value)
+                if not self.cache_literals:
+                    self.current_token = token
+                    return
+            self._tokens[text] = token
+        self.current_token = token
+
+class TokenArrays:
+    # Fluxo completo de tokens em arrays paralelos (código do tipo, valor, posição no código-fonte),
+    # sempre terminado por um token EOF
+    __slots__ = ('types', 'values', 'offsets')
+
+    def __init__(self, types, values, offsets):
+        self.types = types
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.types)
+
+    def token(self, index):
+        code = self.types[index]
+        return SHARED_TOKENS[code] or Token(TOKEN_TYPES[code], self.values[index])
 
-        if self.position >= len(self.source):
-            self.current_token = Token('EOF')
-        else:
-            char = self.source[self.position]
-
-            # Palavras-chave
-            keywords = {
-                'setup': 'SETUP',
-                'frameSize': 'FRAMESIZE',
-                'threadColor': 'THREADCOLOR',
-                'drawLine': 'DRAWLINE',
-                'changeThread': 'CHANGETHREAD',
-                'if': 'IF',
-                'else': 'ELSE',
-                'while': 'WHILE'
-            }
-
-            if char.isalpha():
-                identifier = ''
-                while self.position < len(self.source) and self.source[self.position].isalnum():
-                    identifier += self.source[self.position]
-                    self.position += 1
-
-                if identifier in keywords:
-                    self.current_token = Token(keywords[identifier])
-                else:
-                    self.current_token = Token('IDENTIFIER', identifier)
-            elif char == '{':
-                self.current_token = Token('LBRACE', '{')
-                self.position += 1
-            elif char == '}':
-                self.current_token = Token('RBRACE', '}')
-                self.position += 1
-            elif char == '(':
-                self.current_token = Token('LPAREN', '(')
-                self.position += 1
-            elif char == ')':
-                self.current_token = Token('RPAREN', ')')
-                self.position += 1
-            elif char == ',':
-                self.current_token = Token('COMMA', ',')
-                self.position += 1
-            elif char == ';':
-                self.current_token = Token('SEMICOLON', ';')
-                self.position += 1
-            elif char == '=':
-                self.current_token = Token('ASSIGN', '=')
-                self.position += 1
-            elif char.isdigit():  # Reconhece números
-                number = ''
-                while self.position < len(self.source) and self.source[self.position].isdigit():
-                    number += self.source[self.position]
-                    self.position += 1
-                self.current_token = Token('NUMBER', int(number))
-
-            elif char == '"':  # Reconhece strings
-                self.position += 1
-                string_literal = ''
-                while self.position < len(self.source) and self.source[self.position] != '"':
-                    string_literal += self.source[self.position]
-                    self.position += 1
-                if self.position >= len(self.source):
-                    raise Exception("Erro de sintaxe: String não terminada.")
-                self.position += 1  # Avança após a última aspas
-                self.current_token = Token('STRING_LITERAL', string_literal)
+    @staticmethod
+    def tokenize(source):
+        pairs = TOKEN_REGEX.findall(source)
+        # Descarta os pares finais sem token (espaços/comentários no fim do código)
+        while pairs and not pairs[-1][1]:
+            pairs.pop()
+        texts = [text for _, text in pairs]
+
+        # Cada texto distinto é classificado uma única vez; o resto é feito em C por map()
+        classified = {}
+        for text in set(texts):
+            try:
+                classified[text] = classify_token(text)
+            except Exception:
+                # Reporta o primeiro erro na ordem do código-fonte
+                for earlier in texts:
+                    classify_token(earlier)
+                raise
+        codes = {text: entry[0] for text, entry in classified.items()}
+        values = {text: entry[1] for text, entry in classified.items()}
+
+        types = array('B', map(codes.__getitem__, texts))
+        types.append(EOF_CODE)
+        token_values = list(map(values.__getitem__, texts))
+        token_values.append(None)
+        # Posição de cada token = soma dos comprimentos de tudo o que veio antes (espaços + tokens)
+        offsets = array('q', islice(accumulate(map(len, chain.from_iterable(pairs)), initial=0), 1, None, 2))
+        offsets.append(len(source))
+        return TokenArrays(types, token_values, offsets)
+
+class ArrayTokenizer:
+    # Percorre um TokenArrays com a mesma interface (current_token/select_next) do Tokenizer
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.index = -1
+        self.current_token = None
+        self._types = arrays.types
+        self._values = arrays.values
+        self._last = len(arrays) - 1
+        self.select_next()
 
-            else:
-                raise Exception(f"Token desconhecido: {char}")
+    def select_next(self):
+        if self.index < self._last:
+            self.index += 1
+        code = self._types[self.index]
+        self.current_token = SHARED_TOKENS[code] or Token(TOKEN_TYPES[code], self._values[self.index])
+
+class StreamTokenizer(Tokenizer):
+    # Tokenizer sobre um arquivo lido em blocos: só mantém em memória o trecho ainda não consumido. O cache
+    # de tokens fica só com palavras-chave e símbolos; literais e nomes cresceriam com o tamanho do arquivo.
+    cache_literals = False
+
+    def __init__(self, file, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self._eof = False
+        super().__init__('')
+
+    def _refill(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+        self.source = self.source[self.position:] + chunk
+        self.position = 0
+
+    def select_next(self):
+        while not self._eof:
+            match = self._match(self.source, self.position)
+            text = match.group(2)
+            # Um token, string ou comentário que encosta no fim do bloco pode continuar no próximo
+            if match.end() < len(self.source) and text not in ('"', '/*'):
+                break
+            self._refill()
+        super().select_next()
+
+def normalize_type(var_type):
+    # Normaliza os tipos para 'int' e 'char*'
+    return 'int' if var_type == 'INT_TYPE' else 'char*' if var_type == 'STRING_TYPE' else var_type
 
 class SymbolTable:
+    # Tabelas de chamadas encadeadas pelo escopo dinâmico podem formar cadeias muito longas (recursão
+    # profunda), então as buscas percorrem a cadeia com laços, sem recursão do Python
+    __slots__ = ('variables', 'functions', 'parent')
+
     def __init__(self, parent=None):
         self.variables = {}  # Armazena variáveis
         self.functions = {}   # Armazena funções
         self.parent = parent
 
     def get_variable(self, name):
-        if name in self.variables:
-            return self.variables[name]
-        elif self.parent:
-            return self.parent.get_variable(name)
-        else:
-            raise ValueError(f"Variável '{name}' não definida.")
+        table = self
+        while name not in table.variables:
+            table = table.parent
+            if table is None:
+                raise ValueError(f"Variável '{name}' não definida.")
+        return table.variables[name]
 
     def set_variable(self, name, value, var_type, is_declaration=False):
-        # Normaliza os tipos para 'int' e 'char*'
-        normalized_type = 'int' if var_type == 'INT_TYPE' else 'char*' if var_type == 'STRING_TYPE' else var_type
+        normalized_type = normalize_type(var_type)
 
         # Depuração para verificar o registro da variável e seu tipo
         #print(f"Registrando variável '{name}' com valor '{value}' e tipo '{normalized_type}'.")
@@ -112,12 +266,12 @@ class SymbolTable:
                 raise ValueError(f"Erro de semântica: Variável '{name}' já foi declarada.")
             self.variables[name] = (value, normalized_type)
         else:
-            if name in self.variables:
-                self.variables[name] = (value, normalized_type)
-            elif self.parent:
-                self.parent.set_variable(name, value, normalized_type)
-            else:
-                raise ValueError(f"Erro de semântica: Variável '{name}' não declarada antes da atribuição.")
+            table = self
+            while name not in table.variables:
+                table = table.parent
+                if table is None:
+                    raise ValueError(f"Erro de semântica: Variável '{name}' não declarada antes da atribuição.")
+            table.variables[name] = (value, normalized_type)
 
     # Método para definir uma função
     def set_function(self, name, func_node):
@@ -128,13 +282,13 @@ class SymbolTable:
 
     # Método para obter uma função
     def get_function(self, name):
-        if name in self.functions:
-            #print(f"Obtendo definição da função '{name}'.")
-            return self.functions[name]
-        elif self.parent:
-            return self.parent.get_function(name)
-        else:
-            raise ValueError(f"Função '{name}' não definida.")
+        table = self
+        while name not in table.functions:
+            table = table.parent
+            if table is None:
+                raise ValueError(f"Função '{name}' não definida.")
+        #print(f"Obtendo definição da função '{name}'.")
+        return table.functions[name]
 
 class PrePro:
     @staticmethod
@@ -149,6 +303,12 @@ class Node:
         self.value = value
         self.children = children or []
 
+def node_class(node):
+    # Classe deste módulo da qual o nó deriva; nós especializados (ex.: optimizer.py) têm a mesma semântica da base
+    for cls in type(node).__mro__:
+        if cls.__module__ == Node.__module__:
+            return cls
+
 class BinOp(Node):
     def __init__(self, value, left, right):
         super().__init__(value, [left, right])
@@ -157,8 +317,12 @@ class BinOp(Node):
         # Chama evaluate em children sem global_table
         left_value, left_type = self.children[0].evaluate(symbol_table)
         right_value, right_type = self.children[1].evaluate(symbol_table)
+        return BinOp.apply(self.value, left_value, left_type, right_value, right_type)
 
-        if self.value == '+':
+    @staticmethod
+    def apply(operator, left_value, left_type, right_value, right_type):
+        # Regras de tipo dos operadores aritméticos, compartilhadas com os backends compilados
+        if operator == '+':
             if left_type == 'char*' and right_type == 'char*':
                 return left_value + right_value, 'char*'
             elif left_type == 'char*' and right_type == 'int':
@@ -173,16 +337,16 @@ class BinOp(Node):
         # Outros operadores permanecem inalterados
 
         # Permitir somente inteiros para -, *, e /
-        elif self.value == '-' and left_type == 'int' and right_type == 'int':
+        elif operator == '-' and left_type == 'int' and right_type == 'int':
             return left_value - right_value, 'int'
-        elif self.value == '*' and left_type == 'int' and right_type == 'int':
+        elif operator == '*' and left_type == 'int' and right_type == 'int':
             return left_value * right_value, 'int'
-        elif self.value == '/' and left_type == 'int' and right_type == 'int':
+        elif operator == '/' and left_type == 'int' and right_type == 'int':
             if right_value == 0:
                 raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
             return left_value // right_value, 'int'
         else:
-            raise TypeError(f"Erro de semântica: Operação '{self.value}' não permitida entre {left_type} e {right_type}")
+            raise TypeError(f"Erro de semântica: Operação '{operator}' não permitida entre {left_type} e {right_type}")
 
 class UnOp(Node):
     def __init__(self, value, child):
@@ -190,15 +354,18 @@ class UnOp(Node):
 
     def evaluate(self, symbol_table, global_table=None):
         child_value, child_type = self.children[0].evaluate(symbol_table, global_table=global_table)
+        return UnOp.apply(self.value, child_value, child_type)
 
-        if self.value == '!':
+    @staticmethod
+    def apply(operator, child_value, child_type):
+        if operator == '!':
             # Verifica se o tipo é válido para a operação de negação
             if child_type != 'int':
                 raise TypeError(f"Erro de semântica: Operação de negação '!' só é permitida para inteiros.")
             return 0 if child_value else 1, 'int'
-        elif self.value == '+':
+        elif operator == '+':
             return +child_value, 'int'
-        elif self.value == '-':
+        elif operator == '-':
             return -child_value, 'int'
 
 
@@ -237,35 +404,38 @@ class RelOp(Node):
     def evaluate(self, symbol_table, global_table=None):
         left_value, left_type = self.children[0].evaluate(symbol_table, global_table=global_table)
         right_value, right_type = self.children[1].evaluate(symbol_table, global_table=global_table)
+        return RelOp.apply(self.value, left_value, left_type, right_value, right_type)
 
+    @staticmethod
+    def apply(operator, left_value, left_type, right_value, right_type):
         # Permite apenas comparações entre tipos compatíveis (ambos `int` ou ambos `char*`)
         if left_type != right_type:
             raise TypeError(f"Erro de semântica: Comparação não permitida entre {left_type} e {right_type}")
 
         # Comparações para strings
         if left_type == 'char*' and right_type == 'char*':
-            if self.value == '==':
+            if operator == '==':
                 return (1 if left_value == right_value else 0), 'int'
-            elif self.value == '!=':
+            elif operator == '!=':
                 return (1 if left_value != right_value else 0), 'int'
-            elif self.value == '<':
+            elif operator == '<':
                 return (1 if left_value < right_value else 0), 'int'
-            elif self.value == '>':
+            elif operator == '>':
                 return (1 if left_value > right_value else 0), 'int'
         
         # Comparações para inteiros
         elif left_type == 'int' and right_type == 'int':
-            if self.value == '==':
+            if operator == '==':
                 return (1 if left_value == right_value else 0), 'int'
-            elif self.value == '!=':
+            elif operator == '!=':
                 return (1 if left_value != right_value else 0), 'int'
-            elif self.value == '<':
+            elif operator == '<':
                 return (1 if left_value < right_value else 0), 'int'
-            elif self.value == '>':
+            elif operator == '>':
                 return (1 if left_value > right_value else 0), 'int'
-            elif self.value == '<=':
+            elif operator == '<=':
                 return (1 if left_value <= right_value else 0), 'int'
-            elif self.value == '>=':
+            elif operator == '>=':
                 return (1 if left_value >= right_value else 0), 'int'
 
         else:
@@ -324,6 +494,7 @@ class VarNode(Node):
                     return value
                 except ValueError:
                     pass
+            STITCHES.flush()
             print(f"Erro ao acessar '{self.identifier}': {e}")
             raise
 
@@ -370,16 +541,66 @@ class WhileNode(Node):
         condition_value, condition_type = self.children[0].evaluate(symbol_table)
         if condition_type != 'int':
             raise TypeError("Erro de semântica: Condição do 'while' deve ser do tipo 'int'")
+        if condition_value and run_vectorized(self, symbol_table):
+            return
         while condition_value:
             self.children[1].evaluate(symbol_table, global_table=global_table)
             condition_value, condition_type = self.children[0].evaluate(symbol_table)
 
+class ForNode(Node):
+    # for (contador = início; condição; atualização) { ... }: o contador é declarado como int no escopo
+    # atual na primeira execução e reiniciado nas seguintes
+    def __init__(self, counter, start, condition, update, block):
+        super().__init__('for', [start, condition, update, block])
+        self.counter = counter
+
+    def evaluate(self, symbol_table, global_table=None):
+        start, start_type = self.children[0].evaluate(symbol_table)
+        if start_type != 'int':
+            raise TypeError("Erro de semântica: Valor inicial do 'for' deve ser do tipo 'int'")
+        try:
+            symbol_table.set_variable(self.counter, start, 'int', is_declaration=True)
+        except ValueError:
+            symbol_table.set_variable(self.counter, start, 'int')
+
+        condition_value, condition_type = self.children[1].evaluate(symbol_table)
+        if condition_type != 'int':
+            raise TypeError("Erro de semântica: Condição do 'for' deve ser do tipo 'int'")
+        if condition_value and run_vectorized(self, symbol_table):
+            return
+        while condition_value:
+            self.children[3].evaluate(symbol_table, global_table=global_table)
+            self.children[2].evaluate(symbol_table)
+            condition_value, _ = self.children[1].evaluate(symbol_table)
+
+class RepeatNode(Node):
+    # repeat (n) { ... }: n é avaliado uma única vez
+    def __init__(self, count, block):
+        super().__init__('repeat', [count, block])
+
+    def evaluate(self, symbol_table, global_table=None):
+        count, count_type = self.children[0].evaluate(symbol_table)
+        if count_type != 'int':
+            raise TypeError("Erro de semântica: Número de repetições do 'repeat' deve ser do tipo 'int'")
+        if count > 0 and run_vectorized(self, symbol_table, count):
+            return
+        for _ in range(count):
+            self.children[1].evaluate(symbol_table, global_table=global_table)
+
+def run_vectorized(loop, symbol_table, count=None):
+    # True se o laço inteiro foi executado pelo caminho rápido; False se ele deve ser interpretado
+    if not VECTORIZE_LOOPS:
+        return False
+    from loops import vectorize_loop
+    return vectorize_loop(loop, symbol_table, count)
+
 
 class ScanNode(Node):
     def __init__(self):
         super().__init__('scan')
 
     def evaluate(self, symbol_table, global_table=None):
+        STITCHES.flush()  # Mostra os comandos pendentes antes de esperar a entrada
         user_input = input("")  # Lê a entrada do usuário
 
         # Tenta converter a entrada para `int`; se falhar, gera um erro
@@ -459,7 +680,7 @@ class PrintNode(Node):
 
     def evaluate(self, symbol_table, global_table=None):
         value, var_type = self.children[0].evaluate(symbol_table, global_table=global_table)
-        print(value) if var_type == 'int' else print(value)
+        STITCHES.print_value(value)
         return value, var_type
 
 class SetupNode(Node):
@@ -469,7 +690,7 @@ class SetupNode(Node):
     def evaluate(self, symbol_table):
         frame_size, _ = self.children[0].evaluate(symbol_table)
         thread_color, _ = self.children[1].evaluate(symbol_table)
-        print(f"Configuração: frameSize={frame_size}, threadColor={thread_color}")
+        STITCHES.setup(frame_size, thread_color)
 
 
 class DrawLineNode(Node):
@@ -481,16 +702,34 @@ class DrawLineNode(Node):
         y1, _ = self.children[1].evaluate(symbol_table)
         x2, _ = self.children[2].evaluate(symbol_table)
         y2, _ = self.children[3].evaluate(symbol_table)
-        print(f"Desenhando linha de ({x1}, {y1}) para ({x2}, {y2})")
+        STITCHES.draw_line(x1, y1, x2, y2)
 
 
+class TransformNode(Node):
+    # translate(dx, dy), rotate(graus[, cx, cy]) ou mirror("x" | "y"[, c]) seguido de um bloco: o corpo é
+    # executado uma vez e os comandos dele saem transformados (transforms.py). Com repeat (n) antes, saem n
+    # cópias, a k-ésima com a transformação aplicada k vezes (a primeira é o próprio corpo).
+    def __init__(self, operation, arguments, block, count=None):
+        super().__init__(operation, [IntVal(1) if count is None else count] + arguments + [block])
+        self.repeated = count is not None
+
+    def evaluate(self, symbol_table, global_table=None):
+        count, count_type = self.children[0].evaluate(symbol_table)
+        if count_type != 'int':
+            raise TypeError("Erro de semântica: Número de repetições do 'repeat' deve ser do tipo 'int'")
+        arguments = [child.evaluate(symbol_table) for child in self.children[1:-1]]
+        block = self.children[-1]
+        from transforms import replicate
+        replicate(self.value, arguments, count if self.repeated else None,
+                  lambda: block.evaluate(symbol_table, global_table=global_table))
+
 class ChangeThreadNode(Node):
     def __init__(self, color):
         super().__init__('changeThread', [color])
 
     def evaluate(self, symbol_table):
         color, _ = self.children[0].evaluate(symbol_table)
-        print(f"Mudando cor do fio para {color}")
+        STITCHES.change_thread(color)
 
 class Parser:
     def __init__(self, tokenizer):
@@ -548,6 +787,47 @@ class Parser:
             else:
                 raise Exception("Erro de sintaxe: '(' esperado após 'if'")
 
+        elif self.tokenizer.current_token.type == 'WHILE':
+            self.tokenizer.select_next()
+            condition = self.parse_condition('while')
+            if self.tokenizer.current_token.type != 'LBRACE':
+                raise Exception("Erro de sintaxe: '{' esperado após a condição do while")
+            return WhileNode(condition, self.parse_block())
+
+        elif self.tokenizer.current_token.type == 'REPEAT':
+            self.tokenizer.select_next()
+            count = self.parse_condition('repeat')
+            if self.tokenizer.current_token.type in TRANSFORMS:
+                return self.parse_transform(count)
+            if self.tokenizer.current_token.type != 'LBRACE':
+                raise Exception("Erro de sintaxe: '{' esperado após o número de repetições do repeat")
+            return RepeatNode(count, self.parse_block())
+
+        elif self.tokenizer.current_token.type in TRANSFORMS:
+            return self.parse_transform()
+
+        elif self.tokenizer.current_token.type == 'FOR':
+            self.tokenizer.select_next()
+            if self.tokenizer.current_token.type != 'LPAREN':
+                raise Exception("Erro de sintaxe: '(' esperado após 'for'")
+            self.tokenizer.select_next()
+            counter, start = self.parse_loop_assignment()
+            if self.tokenizer.current_token.type != 'SEMICOLON':
+                raise Exception("Erro de sintaxe: ';' esperado após o valor inicial do for")
+            self.tokenizer.select_next()
+            condition = self.parse_expression()
+            if self.tokenizer.current_token.type != 'SEMICOLON':
+                raise Exception("Erro de sintaxe: ';' esperado após a condição do for")
+            self.tokenizer.select_next()
+            identifier, expression = self.parse_loop_assignment()
+            if self.tokenizer.current_token.type != 'RPAREN':
+                raise Exception("Erro de sintaxe: ')' esperado após a atualização do for")
+            self.tokenizer.select_next()
+            if self.tokenizer.current_token.type != 'LBRACE':
+                raise Exception("Erro de sintaxe: '{' esperado após ')' do for")
+            update = AssignNode(identifier, expression, None, is_declaration=False)
+            return ForNode(counter, start, condition, update, self.parse_block())
+
         elif self.tokenizer.current_token.type == 'IDENTIFIER':
             #print(f"Parsing identifier: {self.tokenizer.current_token.value}")  # Depuração
             identifier = self.tokenizer.current_token.value
@@ -654,6 +934,49 @@ class Parser:
         #print(f"Finalizando parse_block, token atual: {self.tokenizer.current_token.type}")  # Depuração
         return BlockNode(statements)
 
+    def parse_condition(self, keyword):
+        # '(' expressão ')' depois de while/repeat
+        if self.tokenizer.current_token.type != 'LPAREN':
+            raise Exception(f"Erro de sintaxe: '(' esperado após '{keyword}'")
+        self.tokenizer.select_next()
+        expression = self.parse_expression()
+        if self.tokenizer.current_token.type != 'RPAREN':
+            raise Exception(f"Erro de sintaxe: ')' esperado após a expressão do {keyword}")
+        self.tokenizer.select_next()
+        return expression
+
+    def parse_transform(self, count=None):
+        # translate/rotate/mirror '(' argumentos ')' bloco, com o número de cópias do repeat que vem antes
+        operation, counts = TRANSFORMS[self.tokenizer.current_token.type]
+        self.tokenizer.select_next()
+        if self.tokenizer.current_token.type != 'LPAREN':
+            raise Exception(f"Erro de sintaxe: '(' esperado após '{operation}'")
+        self.tokenizer.select_next()
+        arguments = [self.parse_expression()]
+        while self.tokenizer.current_token.type == 'COMMA':
+            self.tokenizer.select_next()
+            arguments.append(self.parse_expression())
+        if self.tokenizer.current_token.type != 'RPAREN':
+            raise Exception(f"Erro de sintaxe: ')' esperado após os argumentos de {operation}")
+        if len(arguments) not in counts:
+            expected = ' ou '.join(str(count) for count in counts)
+            raise Exception(f"Erro de sintaxe: {operation} espera {expected} argumentos, mas recebeu {len(arguments)}")
+        self.tokenizer.select_next()
+        if self.tokenizer.current_token.type != 'LBRACE':
+            raise Exception(f"Erro de sintaxe: '{{' esperado após os argumentos de {operation}")
+        return TransformNode(operation, arguments, self.parse_block(), count)
+
+    def parse_loop_assignment(self):
+        # identificador = expressão, sem ';' (partes do for)
+        if self.tokenizer.current_token.type != 'IDENTIFIER':
+            raise Exception("Erro de sintaxe: Identificador esperado no for")
+        identifier = self.tokenizer.current_token.value
+        self.tokenizer.select_next()
+        if self.tokenizer.current_token.type != 'ASSIGN':
+            raise Exception("Erro de sintaxe: '=' esperado após o identificador")
+        self.tokenizer.select_next()
+        return identifier, self.parse_expression()
+
     def parse_assignment(self, expected_identifier):
         if self.tokenizer.current_token.type != expected_identifier:
             raise Exception(f"Erro de sintaxe: Esperado '{expected_identifier}', mas encontrado '{self.tokenizer.current_token.type}'")
@@ -723,17 +1046,17 @@ class Parser:
 
         elif self.tokenizer.current_token.type == 'SCANF':
             self.tokenizer.select_next()
-            if self.tokenizer.current_token.type == '(':
+            if self.tokenizer.current_token.type == 'LPAREN':
                 self.tokenizer.select_next()
-                if self.tokenizer.current_token.type != ')':
+                if self.tokenizer.current_token.type != 'RPAREN':
                     raise Exception("Erro de sintaxe: ')' esperado após 'scanf'")
                 self.tokenizer.select_next()
                 return ScanNode()
 
-        elif self.tokenizer.current_token.type == '(':
+        elif self.tokenizer.current_token.type == 'LPAREN':
             self.tokenizer.select_next()
             result = self.parse_expression()
-            if self.tokenizer.current_token.type != ')':
+            if self.tokenizer.current_token.type != 'RPAREN':
                 raise Exception("Erro de sintaxe: ')' esperado após a expressão")
             self.tokenizer.select_next()
             return result
@@ -761,14 +1084,14 @@ class Parser:
             self.tokenizer.select_next()
             
             # Verificação para chamadas de função
-            if self.tokenizer.current_token.type == '(':
+            if self.tokenizer.current_token.type == 'LPAREN':
                 args = []
                 self.tokenizer.select_next()
-                while self.tokenizer.current_token.type != ')':
+                while self.tokenizer.current_token.type != 'RPAREN':
                     args.append(self.parse_expression())
-                    if self.tokenizer.current_token.type == ',':
+                    if self.tokenizer.current_token.type == 'COMMA':
                         self.tokenizer.select_next()
-                if self.tokenizer.current_token.type != ')':
+                if self.tokenizer.current_token.type != 'RPAREN':
                     raise Exception("Erro de sintaxe: ')' esperado após os argumentos da função")
                 self.tokenizer.select_next()  # Avança após ')'
                 return FuncCall(identifier, args)  # Retorna chamada de função como um fator
@@ -781,11 +1104,11 @@ class Parser:
 
     @staticmethod
     def run(code):
-        if code.strip() == "":
+        if code == "" or code.isspace():
             raise Exception("Erro de sintaxe: A expressão não pode ser vazia ou consistir apenas de espaços em branco.")
 
-        code = PrePro.filter(code)
-        tokenizer = Tokenizer(code)
+        # Comentários são descartados pelo próprio Tokenizer, sem cópia prévia do código (PrePro.filter)
+        tokenizer = ArrayTokenizer(TokenArrays.tokenize(code))
         parser = Parser(tokenizer)
         statements = []
         while tokenizer.current_token.type != 'EOF':
@@ -798,27 +1121,27 @@ class Parser:
 
         return ast
 
-def main():
-    if len(sys.argv) != 2:
-        print("Uso: python nome_do_arquivo.py arquivo.pattern", file=sys.stderr)
-        sys.exit(1)
-
-    filename = sys.argv[1]
-    if not filename.endswith('.pattern'):
-        print("Erro: O arquivo deve ter a extensão .pattern", file=sys.stderr)
-        sys.exit(1)
-
-    try:
-        with open(filename, 'r') as file:
-            code = file.read()
+    @staticmethod
+    def run_stream(file, symbol_table, interpreter=None):
+        # Analisa e executa uma declaração de topo por vez, sem montar o BlockNode do programa inteiro;
+        # cada declaração executada é devolvida e pode ser descartada pelo chamador
+        interpreter = interpreter or Interpreter()
+        tokenizer = StreamTokenizer(file)
+        if tokenizer.current_token.type == 'EOF':
+            raise Exception("Erro de sintaxe: A expressão não pode ser vazia ou consistir apenas de espaços em branco.")
 
-        # Inicializa o AST e a tabela de símbolos
-        ast = Parser.run(code)
-        symbol_table = SymbolTable()
+        parser = Parser(tokenizer)
+        while tokenizer.current_token.type != 'EOF':
+            statement = parser.parse_statement()
+            interpreter.execute(statement, symbol_table)
+            yield statement
 
-        # Executa o bloco global de instruções
-        ast.evaluate(symbol_table)
+class Interpreter:
+    # Backend padrão: percorre a árvore chamando evaluate() em cada nó
+    def execute(self, node, symbol_table):
+        return node.evaluate(symbol_table)
 
+    def call_main(self, symbol_table):
         # Tenta encontrar e executar a função `main` se ela estiver definida
         try:
             main_function = symbol_table.get_function("main")
@@ -828,13 +1151,436 @@ def main():
             # Se `main` não for encontrada, apenas continue com o restante
             pass
 
+def create_interpreter(backend):
+    if backend == 'closure':
+        from closure_compiler import ClosureCompiler
+        return ClosureCompiler()
+    if backend == 'vm':
+        from vm import VirtualMachine
+        return VirtualMachine()
+    if backend == 'frames':
+        from resolver import FrameInterpreter
+        return FrameInterpreter()
+    return Interpreter()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Interpretador da linguagem PatternScript.")
+    arg_parser.add_argument('filename', nargs='+',
+                            help="arquivo .pattern a ser executado (com --batch, vários arquivos, diretórios ou padrões glob)")
+    arg_parser.add_argument('--stream', action='store_true',
+                            help="lê, analisa e executa uma declaração de topo por vez (memória limitada)")
+    arg_parser.add_argument('--backend', choices=['tree', 'closure', 'vm', 'frames'], default='tree',
+                            help="tree: percorre o AST (padrão); closure: compila o AST em closures especializadas; "
+                                 "vm: compila para bytecode e executa na máquina virtual de pilha; "
+                                 "frames: resolve cada variável para um endereço (profundidade, slot) e executa sobre quadros de tamanho fixo")
+    arg_parser.add_argument('--disassemble', action='store_true',
+                            help="mostra o bytecode do programa (e das funções declaradas) em vez de executá-lo")
+    arg_parser.add_argument('--optimize', action='store_true',
+                            help="verifica tipos e dobra constantes antes de executar; erros de tipo abortam a execução")
+    arg_parser.add_argument('--output', choices=['text', 'jsonl', 'binary'], default='text',
+                            help="formato dos comandos de bordado: text (padrão, legível), jsonl (um objeto JSON "
+                                 "por comando) ou binary (dump das colunas do buffer de pontos)")
+    arg_parser.add_argument('--output-file', help="grava os comandos neste arquivo em vez da saída padrão")
+    arg_parser.add_argument('--render', metavar='IMAGEM',
+                            help="desenha as linhas executadas numa imagem .png ou .ppm do tamanho de frameSize (requer numpy)")
+    arg_parser.add_argument('--scale', type=int, default=1, help="fator de escala da imagem de --render (padrão 1)")
+    arg_parser.add_argument('--antialias', action='store_true', help="suaviza as linhas desenhadas por --render")
+    arg_parser.add_argument('--render-workers', type=int, metavar='N',
+                            help="rasteriza a imagem de --render em blocos, com N processos em paralelo")
+    arg_parser.add_argument('--tile-size', type=int, default=256,
+                            help="lado em pixels dos blocos de --render-workers (padrão 256)")
+    arg_parser.add_argument('--dst', metavar='ARQUIVO', help="exporta os pontos para um arquivo Tajima DST de máquina de bordado")
+    arg_parser.add_argument('--dst-scale', type=int, default=1,
+                            help="unidades DST (0,1 mm) por unidade de coordenada em --dst (padrão 1)")
+    arg_parser.add_argument('--stitches', metavar='ARQUIVO',
+                            help="converte cada drawLine nos pontos de agulha e grava x, y, cor e flags de cada ponto "
+                                 "num arquivo .npz (requer numpy)")
+    arg_parser.add_argument('--stitch-mode', choices=['running', 'triple', 'satin'], default='running',
+                            help="running: ponto corrido (padrão); triple: cada ponto vai, volta e vai de novo; "
+                                 "satin: zigue-zague entre pares de drawLine seguidos da mesma cor")
+    arg_parser.add_argument('--stitch-length', type=float, default=30,
+                            help="distância máxima entre dois pontos em --stitches (padrão 30)")
+    arg_parser.add_argument('--satin-spacing', type=float, default=4,
+                            help="distância entre as colunas do zigue-zague de --stitch-mode satin (padrão 4)")
+    arg_parser.add_argument('--no-memoize', action='store_true',
+                            help="não guarda os resultados das funções puras (backend tree, sem --stream)")
+    arg_parser.add_argument('--memo-size', type=int, default=4096,
+                            help="entradas do cache LRU das funções puras (padrão 4096)")
+    arg_parser.add_argument('--stats', action='store_true',
+                            help="mostra na saída de erro os acertos, faltas e descartes do cache de funções puras "
+                                 "e o uso do cache do AST")
+    arg_parser.add_argument('--no-vectorize', action='store_true',
+                            help="interpreta cada iteração dos laços que só desenham, sem o caminho rápido com NumPy")
+    arg_parser.add_argument('--optimize-path', action='store_true',
+                            help="agrupa os drawLine por cor e reordena os trechos para encurtar os saltos da agulha")
+    arg_parser.add_argument('--clean', action='store_true',
+                            help="corta as linhas no bastidor e remove linhas repetidas ou sobrepostas")
+    arg_parser.add_argument('--region', metavar='X1,Y1,X2,Y2',
+                            help="informa quantas linhas desenhadas passam por este retângulo")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="analisa o arquivo de novo em vez de usar o AST guardado em disco")
+    arg_parser.add_argument('--cache-dir', metavar='DIRETÓRIO',
+                            help="diretório do cache do AST (padrão: __patterncache__ ao lado do arquivo)")
+    arg_parser.add_argument('--cache-size', type=int, default=64,
+                            help="tamanho máximo do cache do AST em MB (padrão 64)")
+    arg_parser.add_argument('--watch', action='store_true',
+                            help="executa de novo a cada gravação do arquivo, a partir da primeira declaração de topo alterada")
+    arg_parser.add_argument('--watch-interval', type=float, default=0.2,
+                            help="segundos entre as verificações do arquivo em --watch (padrão 0.2)")
+    arg_parser.add_argument('--batch', action='store_true',
+                            help="executa todos os arquivos dados em paralelo e mostra um resumo por arquivo")
+    arg_parser.add_argument('--jobs', type=int, help="processos usados por --batch (padrão: número de núcleos)")
+    arg_parser.add_argument('--timeout', type=float, default=60.0,
+                            help="segundos por arquivo em --batch antes de interrompê-lo (padrão 60)")
+    arg_parser.add_argument('--batch-output', metavar='DIRETÓRIO',
+                            help="grava a saída de cada arquivo de --batch neste diretório (padrão: só conta os comandos)")
+    arg_parser.add_argument('--input', metavar='ARQUIVO',
+                            help="entrada do scanf para os arquivos de --batch e as variantes de --sweep (padrão: nenhuma entrada)")
+    arg_parser.add_argument('--summary', metavar='ARQUIVO',
+                            help="grava o resumo de --batch ou de --sweep em JSON")
+    arg_parser.add_argument('--sweep', metavar='NOME=VALORES', action='append',
+                            help="executa o programa uma vez para cada combinação dos valores dos parâmetros, que viram "
+                                 "variáveis globais já declaradas; VALORES é uma lista (1,2,5), um intervalo com o fim "
+                                 "incluído (10:100 ou 10:100:5) ou strings; pode ser repetido")
+    arg_parser.add_argument('--sweep-file', metavar='ARQUIVO',
+                            help="variantes de --sweep num arquivo JSON: uma lista de objetos {nome: valor}")
+    arg_parser.add_argument('--sweep-output', metavar='DIRETÓRIO',
+                            help="grava a saída de cada variante de --sweep neste diretório (padrão: todas na saída padrão)")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="mede execuções e tempo de cada nó, função e fase e mostra os mais custosos na saída de erro")
+    arg_parser.add_argument('--profile-stacks', metavar='ARQUIVO',
+                            help="grava as pilhas medidas no formato collapsed (flamegraph.pl, speedscope); implica --profile")
+    arg_parser.add_argument('--compact-ast', action='store_true',
+                            help="guarda o AST numa tabela de arrays (tipos, operandos e literais sem repetição) em vez "
+                                 "de um objeto por nó: menos memória e análise mais rápida em programas enormes")
+    args = arg_parser.parse_args()
+    if args.optimize and args.stream:
+        arg_parser.error("--optimize analisa o programa inteiro e não pode ser usado com --stream")
+    if args.region:
+        try:
+            region = [int(value) for value in args.region.split(',')]
+        except ValueError:
+            region = []
+        if len(region) != 4:
+            arg_parser.error("--region espera quatro inteiros: X1,Y1,X2,Y2")
+        region = (min(region[0], region[2]), min(region[1], region[3]),
+                  max(region[0], region[2]), max(region[1], region[3]))
+
+    if args.memo_size < 1:
+        arg_parser.error("--memo-size deve ser um inteiro positivo")
+    if args.cache_size < 1:
+        arg_parser.error("--cache-size deve ser um inteiro positivo")
+    if args.dst_scale < 1:
+        arg_parser.error("--dst-scale deve ser um inteiro positivo")
+    if args.stitch_length <= 0 or args.satin_spacing <= 0:
+        arg_parser.error("--stitch-length e --satin-spacing devem ser positivos")
+    if len(args.filename) > 1 and not args.batch:
+        arg_parser.error("vários arquivos só podem ser executados com --batch")
+    if args.batch:
+        incompatible = [option for option, used in (
+            ('--stream', args.stream), ('--optimize', args.optimize), ('--disassemble', args.disassemble),
+            ('--output-file', args.output_file), ('--render', args.render), ('--dst', args.dst),
+            ('--stitches', args.stitches), ('--optimize-path', args.optimize_path), ('--clean', args.clean),
+            ('--region', args.region), ('--watch', args.watch), ('--stats', args.stats)) if used]
+        if incompatible:
+            arg_parser.error(f"--batch não pode ser usado com {', '.join(incompatible)}")
+        if args.jobs is not None and args.jobs < 1:
+            arg_parser.error("--jobs deve ser um inteiro positivo")
+        if args.timeout <= 0:
+            arg_parser.error("--timeout deve ser positivo")
+    if args.watch:
+        incompatible = [option for option, used in (
+            ('--stream', args.stream), ('--optimize', args.optimize), ('--disassemble', args.disassemble),
+            ('--dst', args.dst), ('--stitches', args.stitches), ('--optimize-path', args.optimize_path),
+            ('--clean', args.clean), ('--region', args.region), ('--backend frames', args.backend == 'frames'),
+            ('--output binary', args.output == 'binary')) if used]
+        if incompatible:
+            arg_parser.error(f"--watch não pode ser usado com {', '.join(incompatible)}")
+        if args.watch_interval <= 0:
+            arg_parser.error("--watch-interval deve ser positivo")
+        if args.render and args.scale < 1:
+            arg_parser.error("--scale deve ser um inteiro positivo")
+        if args.render and (args.render_workers is not None and args.render_workers < 1 or args.tile_size < 1):
+            arg_parser.error("--render-workers e --tile-size devem ser inteiros positivos")
+
+    sweep = args.sweep or args.sweep_file
+    if sweep:
+        incompatible = [option for option, used in (
+            ('--stream', args.stream), ('--optimize', args.optimize), ('--disassemble', args.disassemble),
+            ('--output-file', args.output_file), ('--render', args.render), ('--dst', args.dst),
+            ('--stitches', args.stitches), ('--optimize-path', args.optimize_path), ('--clean', args.clean),
+            ('--region', args.region), ('--watch', args.watch), ('--batch', args.batch), ('--stats', args.stats),
+            (f'--backend {args.backend}', args.backend != 'tree')) if used]
+        if incompatible:
+            arg_parser.error(f"--sweep não pode ser usado com {', '.join(incompatible)}")
+        if args.output == 'binary' and not args.sweep_output:
+            arg_parser.error("--sweep com --output binary requer --sweep-output")
+
+    profile = args.profile or args.profile_stacks
+    if profile:
+        incompatible = [option for option, used in (
+            ('--stream', args.stream), ('--disassemble', args.disassemble), ('--watch', args.watch),
+            ('--batch', args.batch), ('--sweep', sweep), (f'--backend {args.backend}', args.backend != 'tree')) if used]
+        if incompatible:
+            arg_parser.error(f"--profile não pode ser usado com {', '.join(incompatible)}")
+    if args.compact_ast:
+        incompatible = [option for option, used in (
+            ('--stream', args.stream), ('--optimize', args.optimize), ('--disassemble', args.disassemble),
+            ('--watch', args.watch), ('--batch', args.batch), ('--sweep', sweep), ('--profile', profile),
+            (f'--backend {args.backend}', args.backend != 'tree')) if used]
+        if incompatible:
+            arg_parser.error(f"--compact-ast não pode ser usado com {', '.join(incompatible)}")
+
+    if args.no_vectorize:
+        global VECTORIZE_LOOPS
+        VECTORIZE_LOOPS = False
+
+    input_text = ''
+    if args.input:
+        try:
+            with open(args.input, 'r') as file:
+                input_text = file.read()
+        except OSError as e:
+            print(f"Erro: Não foi possível abrir {args.input}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.batch:
+        from batch import run_batch
+        settings = {
+            'backend': args.backend, 'output': args.output, 'vectorize': VECTORIZE_LOOPS, 'input': input_text,
+            'memoize': not args.no_memoize, 'memo_size': args.memo_size, 'no_cache': args.no_cache,
+            'cache_dir': args.cache_dir, 'cache_size': args.cache_size * 2 ** 20,
+        }
+        if not run_batch(args.filename, settings, args.jobs, args.timeout, args.batch_output, args.summary):
+            sys.exit(1)
+        return
+
+    filename = args.filename[0]
+    if not filename.endswith('.pattern'):
+        print("Erro: O arquivo deve ter a extensão .pattern", file=sys.stderr)
+        sys.exit(1)
+
+    if sweep:
+        # Analisa uma vez e executa as variantes juntas (requer numpy)
+        try:
+            from sweep import run_sweep
+        except ImportError:
+            print("Erro: --sweep requer o pacote numpy.", file=sys.stderr)
+            sys.exit(1)
+        settings = {
+            'output': args.output, 'input': input_text, 'no_cache': args.no_cache, 'cache_dir': args.cache_dir,
+            'cache_size': args.cache_size * 2 ** 20,
+        }
+        try:
+            succeeded = run_sweep(filename, args.sweep, args.sweep_file, settings, args.sweep_output, args.summary)
+        except FileNotFoundError as e:
+            print(f"Erro: O arquivo {e.filename} não foi encontrado.", file=sys.stderr)
+            sys.exit(1)
+        except Exception as e:
+            print(f"Erro inesperado: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not succeeded:
+            sys.exit(1)
+        return
+
+    if args.watch:
+        # Guarda a saída inteira em memória para refazer só o trecho alterado; não usa o cache do AST
+        from watch import watch, raster_renderer
+        render = None
+        if args.render:
+            try:
+                render = raster_renderer(args.render, args.scale, args.antialias, args.render_workers, args.tile_size)
+            except ImportError:
+                print("Erro: --render requer o pacote numpy.", file=sys.stderr)
+                sys.exit(1)
+        watch(filename, args.backend, args.output, args.output_file, render, args.watch_interval)
+        return
+
+    binary = args.output == 'binary'
+    if args.output_file:
+        try:
+            output_file = open(args.output_file, 'wb') if binary else open(args.output_file, 'w', encoding='utf-8')
+        except OSError as e:
+            print(f"Erro: Não foi possível abrir {args.output_file}: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        output_file = sys.stdout.buffer if binary else sys.stdout if args.output == 'jsonl' else None
+    STITCHES.sink = create_sink(args.output, output_file)
+    if args.render:
+        if args.scale < 1:
+            arg_parser.error("--scale deve ser um inteiro positivo")
+        if args.render_workers is not None and args.render_workers < 1 or args.tile_size < 1:
+            arg_parser.error("--render-workers e --tile-size devem ser inteiros positivos")
+        try:
+            from renderer import RasterSink, save_image
+        except ImportError:
+            print("Erro: --render requer o pacote numpy.", file=sys.stderr)
+            sys.exit(1)
+        raster = RasterSink()
+        STITCHES.sink = TeeSink(STITCHES.sink, raster)
+    if args.dst:
+        from dst import DstSink, default_label
+        try:
+            dst_file = open(args.dst, 'wb')
+        except OSError as e:
+            print(f"Erro: Não foi possível abrir {args.dst}: {e}", file=sys.stderr)
+            sys.exit(1)
+        dst = DstSink(dst_file, args.dst_scale, default_label(filename))
+        STITCHES.sink = TeeSink(STITCHES.sink, dst)
+    if args.stitches:
+        try:
+            from stitch_engine import StitchSink
+        except ImportError:
+            print("Erro: --stitches requer o pacote numpy.", file=sys.stderr)
+            sys.exit(1)
+        try:
+            stitch_file = open(args.stitches, 'wb')
+        except OSError as e:
+            print(f"Erro: Não foi possível abrir {args.stitches}: {e}", file=sys.stderr)
+            sys.exit(1)
+        stitch_sink = StitchSink(args.stitch_mode, args.stitch_length, args.satin_spacing)
+        STITCHES.sink = TeeSink(STITCHES.sink, stitch_sink)
+    if args.optimize_path:
+        # Fica antes de todas as saídas: guarda o desenho inteiro e só o entrega reordenado no fim
+        from path_optimizer import PathOptimizerSink
+        path = PathOptimizerSink(STITCHES.sink)
+        STITCHES.sink = path
+    if args.clean or args.region:
+        # Primeiro da cadeia: tudo que vem depois (inclusive --optimize-path) já recebe o desenho limpo
+        from spatial import SegmentCleaner, SegmentIndex
+        cleaner = SegmentCleaner(STITCHES.sink, clip=args.clean, dedupe=args.clean,
+                                 index=SegmentIndex() if args.region else None)
+        STITCHES.sink = cleaner
+
+    memoizer = None
+    cache = None
+    profiler = None
+    if profile:
+        # Só o programa analisado nesta execução é instrumentado; sem --profile nenhum nó muda
+        from profiler import Profiler, ProfilingInterpreter
+        profiler = Profiler(filename)
+    if args.compact_ast:
+        from compact import CompactParser, CompactInterpreter
+    try:
+        symbol_table = SymbolTable()
+        if profiler is not None:
+            interpreter = ProfilingInterpreter(profiler)
+        elif args.compact_ast:
+            interpreter = CompactInterpreter()
+        else:
+            interpreter = create_interpreter(args.backend)
+
+        if args.stream:
+            with open(filename, 'r', buffering=STREAM_CHUNK_SIZE) as file:
+                for _ in Parser.run_stream(file, symbol_table, interpreter):
+                    pass
+        else:
+            with open(filename, 'r') as file:
+                code = file.read()
+
+            # Inicializa o AST (do cache em disco, quando o mesmo código já foi analisado) e executa o bloco
+            # global de instruções. Com --optimize, o cache guarda o AST otimizado junto com o relatório;
+            # com --compact-ast, a tabela compacta.
+            options = ('optimize',) if args.optimize else ('compact',) if args.compact_ast else ()
+            cached = None
+            if not args.no_cache and profiler is None:
+                from ast_cache import ASTCache, default_directory
+                cache = ASTCache(args.cache_dir or default_directory(filename), args.cache_size * 2 ** 20)
+                cached = cache.load(code, options)
+            if cached is not None:
+                ast, optimizer_report, optimizer_errors = cached
+            else:
+                # Com --profile, a tokenização e a análise são medidas (e o AST não vem do cache)
+                if profiler is not None:
+                    ast = profiler.parse(code)
+                elif args.compact_ast:
+                    ast = CompactParser.run(code)
+                else:
+                    ast = Parser.run(code)
+                optimizer_report, optimizer_errors = None, []
+                if args.optimize:
+                    from optimizer import Optimizer
+                    optimizer = Optimizer()
+                    ast = optimizer.optimize(ast)
+                    optimizer_report, optimizer_errors = optimizer.report(), optimizer.errors
+                if cache is not None:
+                    cache.store(code, (ast, optimizer_report, optimizer_errors), options)
+            if args.optimize:
+                print(optimizer_report, file=sys.stderr)
+                if optimizer_errors:
+                    for message in optimizer_errors:
+                        print(message, file=sys.stderr)
+                    sys.exit(1)
+            if args.backend == 'tree' and not args.no_memoize and not args.compact_ast:
+                # Os backends compilados tratam MemoFuncCall como uma chamada comum; só o tree aproveita o cache.
+                # A tabela compacta não tem nós para trocar (e o parser não gera declarações de função).
+                from memoize import Memoizer
+                memoizer = Memoizer(args.memo_size)
+                ast = memoizer.memoize(ast)
+            if args.disassemble:
+                from vm import BytecodeCompiler, disassemble
+                compiler = BytecodeCompiler()
+                print(disassemble(compiler.compile(ast), compiler))
+                return
+            interpreter.execute(ast, symbol_table)
+
+        interpreter.call_main(symbol_table)
+        STITCHES.flush()
+        if args.clean or args.region:
+            cleaner.close()
+            if args.clean:
+                print(cleaner.report(), file=sys.stderr)
+            if args.region:
+                found = cleaner.index.query(*region)
+                print(f"Região ({region[0]}, {region[1]})-({region[2]}, {region[3]}): {len(found)} linhas", file=sys.stderr)
+        if args.optimize_path:
+            path.close()
+            print(path.report(), file=sys.stderr)
+        if args.stitches:
+            stitch_sink.close()
+            print(stitch_sink.report(), file=sys.stderr)
+        if args.stats:
+            print(memoizer.report() if memoizer is not None else "Memoização: desligada", file=sys.stderr)
+            if cache is not None:
+                print(cache.report(), file=sys.stderr)
+        if args.render:
+            save_image(raster.render(args.scale, args.antialias, args.render_workers, args.tile_size), args.render)
+        if profiler is not None:
+            profiler.finish(args.profile_stacks)
 
     except FileNotFoundError:
         print(f"Erro: O arquivo {filename} não foi encontrado.", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
+        # Os comandos executados antes do erro continuam aparecendo antes da mensagem
+        try:
+            STITCHES.flush()
+            if args.clean or args.region:
+                cleaner.close()
+            if args.optimize_path:
+                path.close()
+        except Exception:
+            # Um sink que já falhou (ex.: coordenada não inteira em --dst) falha de novo aqui; vale o erro original
+            pass
+        if profiler is not None and profiler.records:
+            # O perfil até o erro também ajuda a achar o trecho lento
+            profiler.finish(args.profile_stacks)
         print(f"Erro inesperado: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if args.output_file:
+            output_file.close()
+        if args.dst:
+            # Grava o registro de fim e o cabeçalho com as contagens do que foi executado
+            dst.close()
+            dst_file.close()
+        if args.stitches:
+            # Como no --dst, os pontos gerados até um erro também são gravados
+            stitch_sink.close()
+            stitch_sink.points.save(stitch_file, stitch_sink.color_table)
+            stitch_file.close()
 
 if __name__ == "__main__":
-    main()
+    # Executa pelo módulo `main` (e não `__main__`) para que os backends que importam `main` usem as mesmas classes
+    import main as patternscript
+    patternscript.main()
@@ -0,0 +1,227 @@
+# Memoização de funções puras. Uma função é pura quando o resultado depende só dos argumentos: o corpo
+# não desenha, não troca a linha, não imprime, não lê com scanf, não declara funções e só lê ou escreve
+# os próprios parâmetros e as variáveis declaradas no nível de cima do corpo antes do uso (com escopo
+# dinâmico, qualquer outro nome seria uma variável de quem chamou). Ela também só chama funções puras,
+# e todas as funções envolvidas são declaradas uma única vez no programa, para que o nome identifique a
+# declaração. As chamadas a funções puras viram MemoFuncCall, que guarda o resultado num cache LRU
+# limitado, com a chave (nome, valores dos argumentos).
+import copy
+from collections import OrderedDict
+
+from main import (
+    node_class, SymbolTable, AssignNode, VarNode, ForNode, ScanNode, ReturnNode, FuncDec, FuncCall, PrintNode,
+    SetupNode, DrawLineNode, ChangeThreadNode, TransformNode
+)
+
+MEMO_CAPACITY = 4096
+# Uma função que já faltou MEMO_PROBE_MISSES vezes com menos de 1 acerto a cada MEMO_MIN_HIT_RATIO faltas
+# (argumentos que nunca se repetem) deixa de passar pelo cache
+MEMO_PROBE_MISSES = 1024
+MEMO_MIN_HIT_RATIO = 20
+MISSING = object()
+
+IMPURE_NODES = (DrawLineNode, ChangeThreadNode, SetupNode, PrintNode, ScanNode, FuncDec, TransformNode)
+
+class LRUCache:
+    def __init__(self, capacity=MEMO_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.functions = {}     # nome -> [acertos, faltas]
+        self.bypassed = set()   # funções que deixaram de usar o cache
+
+    def lookup(self, name, key):
+        counters = self.functions.get(name)
+        if counters is None:
+            counters = self.functions[name] = [0, 0]
+        entries = self.entries
+        value = entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            counters[1] += 1
+            if counters[1] >= MEMO_PROBE_MISSES and counters[0] * MEMO_MIN_HIT_RATIO < counters[1]:
+                self.bypassed.add(name)
+            return MISSING
+        entries.move_to_end(key)
+        self.hits += 1
+        counters[0] += 1
+        return value
+
+    def store(self, key, value):
+        entries = self.entries
+        entries[key] = value
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'size': len(self.entries), 'capacity': self.capacity, 'bypassed': sorted(self.bypassed),
+            'functions': {name: {'hits': hits, 'misses': misses} for name, (hits, misses) in self.functions.items()},
+        }
+
+    def report(self):
+        calls = self.hits + self.misses
+        rate = 100 * self.hits / calls if calls else 0.0
+        lines = [f"Memoização: {self.hits} acertos, {self.misses} faltas, {self.evictions} descartes, "
+                 f"{len(self.entries)}/{self.capacity} entradas ({rate:.1f}% de acerto)"]
+        for name, (hits, misses) in sorted(self.functions.items()):
+            bypassed = " (sem cache: argumentos não se repetem)" if name in self.bypassed else ""
+            lines.append(f"  {name}: {hits} acertos, {misses} faltas{bypassed}")
+        return '\n'.join(lines)
+
+class MemoFuncCall(FuncCall):
+    # Chamada de uma função pura: mesmas verificações de FuncCall, e o corpo só roda na falta do cache
+    def __init__(self, name, args, cache):
+        super().__init__(name, args)
+        self.cache = cache
+
+    def evaluate(self, symbol_table, global_table=None):
+        function_scope = global_table if global_table else symbol_table
+        func_dec = function_scope.get_function(self.name)
+
+        if len(self.children) != len(func_dec.params):
+            raise ValueError(f"Erro: Função '{self.name}' esperava {len(func_dec.params)} argumentos, mas {len(self.children)} foram fornecidos.")
+
+        arguments = []
+        for (param_name, param_type), arg_node in zip(func_dec.params, self.children):
+            arg_value, arg_type = arg_node.evaluate(symbol_table)
+            if arg_type != param_type:
+                raise TypeError(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+            arguments.append(arg_value)
+
+        # Os tipos dos argumentos são os dos parâmetros, então os valores bastam na chave
+        cache = self.cache
+        cached = self.name not in cache.bypassed
+        if cached:
+            key = (self.name, tuple(arguments))
+            result = cache.lookup(self.name, key)
+            if result is not MISSING:
+                return result
+
+        local_table = SymbolTable(parent=function_scope)
+        for (param_name, param_type), arg_value in zip(func_dec.params, arguments):
+            local_table.set_variable(param_name, arg_value, param_type, is_declaration=True)
+
+        result = None
+        for statement in func_dec.children[0].children:
+            result = statement.evaluate(local_table)
+            if isinstance(statement, ReturnNode):
+                break
+
+        if func_dec.func_type == 'void':
+            result = None
+        elif func_dec.func_type == 'int' and result is None:
+            result = (0, 'int')
+        elif result is not None and result[1] != func_dec.func_type:
+            raise TypeError(f"Erro de tipo: Função '{self.name}' esperava retornar '{func_dec.func_type}' mas retornou '{result[1]}'")
+        if cached:
+            cache.store(key, result)
+        return result
+
+def function_declarations(node, found=None):
+    # nome -> lista de FuncDec, em todo o programa (inclusive declarações aninhadas)
+    found = {} if found is None else found
+    if node is None:
+        return found
+    if node_class(node) is FuncDec:
+        found.setdefault(node.name, []).append(node)
+    for child in node.children:
+        function_declarations(child, found)
+    return found
+
+def check_body(func_dec):
+    # (corpo puro isoladamente?, nomes de funções chamadas)
+    params = [param_name for param_name, _ in func_dec.params]
+    if len(set(params)) != len(params):
+        return False, set()
+    declared = set(params)
+    calls = set()
+
+    def check(node, top_level):
+        node_type = node_class(node)
+        if node_type in IMPURE_NODES:
+            return False
+        if node_type is VarNode:
+            return node.identifier in declared
+        if node_type is AssignNode:
+            if node.is_declaration:
+                if not top_level or node.identifier in declared:
+                    return False
+                declared.add(node.identifier)
+                return True
+            if node.identifier not in declared:
+                return False
+        elif node_type is ForNode:
+            if not check(node.children[0], False):
+                return False
+            if top_level:
+                declared.add(node.counter)
+            elif node.counter not in declared:
+                return False
+            return all(check(child, False) for child in node.children[1:])
+        elif node_type is FuncCall:
+            calls.add(node.name)
+        return all(check(child, False) for child in node.children if child is not None)
+
+    for statement in func_dec.children[0].children:
+        if not check(statement, True):
+            return False, calls
+    return True, calls
+
+def pure_functions(ast):
+    # Nomes das funções puras do programa, por ponto fixo: começa com as de corpo puro e retira as que
+    # chamam alguma função fora do conjunto
+    declarations = function_declarations(ast)
+    candidates = {}
+    for name, decs in declarations.items():
+        if len(decs) == 1:
+            pure, calls = check_body(decs[0])
+            if pure:
+                candidates[name] = calls
+    changed = True
+    while changed:
+        changed = False
+        for name, calls in list(candidates.items()):
+            if not calls <= candidates.keys():
+                del candidates[name]
+                changed = True
+    return set(candidates)
+
+class Memoizer:
+    def __init__(self, capacity=MEMO_CAPACITY):
+        self.cache = LRUCache(capacity)
+        self.pure = set()
+
+    def memoize(self, ast):
+        # AST com as chamadas a funções puras trocadas por MemoFuncCall; o original não é alterado
+        self.pure = pure_functions(ast)
+        if not self.pure:
+            return ast
+        return self.transform(ast)
+
+    def transform(self, node):
+        if node is None:
+            return None
+        if node_class(node) is FuncCall and node.name in self.pure:
+            return MemoFuncCall(node.name, [self.transform(child) for child in node.children], self.cache)
+        if not node.children:
+            return node
+        transformed = copy.copy(node)
+        transformed.children = [self.transform(child) for child in node.children]
+        return transformed
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['pure_functions'] = sorted(self.pure)
+        return stats
+
+    def report(self):
+        pure = ', '.join(sorted(self.pure)) or 'nenhuma'
+        return f"Funções puras: {pure}\n{self.cache.report()}"
@@ -0,0 +1,402 @@
+# Passo de otimização sobre o AST de Parser.run: infere tipos, dobra subexpressões constantes, remove
+# ramos mortos de `if`/`while` com condição constante e troca nós cujos tipos já foram provados por
+# versões que não repetem as verificações de tipo em execução. Erros de tipo detectados estaticamente
+# são acumulados em `errors` antes de qualquer execução.
+import copy
+import operator as py_operator
+
+from main import (
+    normalize_type, BinOp, UnOp, IntVal, NoOp, BoolOp, RelOp, StringVal, AssignNode, VarNode, BlockNode,
+    IfNode, WhileNode, ScanNode, ReturnNode, FuncDec, FuncCall, PrintNode, SetupNode, DrawLineNode,
+    ChangeThreadNode, ForNode, RepeatNode, TransformNode, SymbolTable, run_vectorized
+)
+
+INT_ARITHMETIC = {'+': py_operator.add, '-': py_operator.sub, '*': py_operator.mul}
+COMPARISONS = {
+    '==': py_operator.eq, '!=': py_operator.ne, '<': py_operator.lt,
+    '>': py_operator.gt, '<=': py_operator.le, '>=': py_operator.ge,
+}
+# Comparações entre strings aceitas por RelOp.apply (as demais devolvem None)
+STRING_COMPARISONS = ('==', '!=', '<', '>')
+
+class IntBinOp(BinOp):
+    # Operação aritmética entre dois `int` já provados pelo otimizador
+    def __init__(self, value, left, right):
+        super().__init__(value, left, right)
+        self.operation = INT_ARITHMETIC.get(value)
+
+    def evaluate(self, symbol_table, global_table=None):
+        left_value, _ = self.children[0].evaluate(symbol_table)
+        right_value, _ = self.children[1].evaluate(symbol_table)
+        if self.operation is None:
+            if right_value == 0:
+                raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
+            return left_value // right_value, 'int'
+        return self.operation(left_value, right_value), 'int'
+
+class StringConcat(BinOp):
+    # Concatenação em que pelo menos um dos lados é `char*` e o outro é `int` ou `char*`
+    def evaluate(self, symbol_table, global_table=None):
+        left_value, _ = self.children[0].evaluate(symbol_table)
+        right_value, _ = self.children[1].evaluate(symbol_table)
+        return str(left_value) + str(right_value), 'char*'
+
+class TypedRelOp(RelOp):
+    # Comparação entre operandos de mesmo tipo, já verificada pelo otimizador
+    def __init__(self, value, left, right):
+        super().__init__(value, left, right)
+        self.operation = COMPARISONS[value]
+
+    def evaluate(self, symbol_table, global_table=None):
+        left_value, _ = self.children[0].evaluate(symbol_table, global_table=global_table)
+        right_value, _ = self.children[1].evaluate(symbol_table, global_table=global_table)
+        return (1 if self.operation(left_value, right_value) else 0), 'int'
+
+class IntIfNode(IfNode):
+    # `if` cuja condição é sabidamente `int`
+    def evaluate(self, symbol_table, global_table=None):
+        condition_value, _ = self.children[0].evaluate(symbol_table)
+        if condition_value:
+            self.children[1].evaluate(symbol_table, global_table=global_table)
+        elif len(self.children) > 2:
+            self.children[2].evaluate(symbol_table, global_table=global_table)
+
+class IntWhileNode(WhileNode):
+    # `while` cuja condição é sabidamente `int`
+    def evaluate(self, symbol_table, global_table=None):
+        condition = self.children[0]
+        block = self.children[1]
+        if condition.evaluate(symbol_table)[0]:
+            if run_vectorized(self, symbol_table):
+                return
+            block.evaluate(symbol_table, global_table=global_table)
+        while condition.evaluate(symbol_table)[0]:
+            block.evaluate(symbol_table, global_table=global_table)
+
+class TypedFuncCall(FuncCall):
+    # Chamada cujos argumentos já têm o tipo dos parâmetros: dispensa a verificação por argumento
+    def evaluate(self, symbol_table, global_table=None):
+        function_scope = global_table if global_table else symbol_table
+        func_dec = function_scope.get_function(self.name)
+
+        if len(self.children) != len(func_dec.params):
+            raise ValueError(f"Erro: Função '{self.name}' esperava {len(func_dec.params)} argumentos, mas {len(self.children)} foram fornecidos.")
+
+        local_table = SymbolTable(parent=function_scope)
+        for (param_name, param_type), arg_node in zip(func_dec.params, self.children):
+            arg_value, _ = arg_node.evaluate(symbol_table)
+            local_table.set_variable(param_name, arg_value, param_type, is_declaration=True)
+
+        result = None
+        for statement in func_dec.children[0].children:
+            result = statement.evaluate(local_table)
+            if isinstance(statement, ReturnNode):
+                break
+
+        if func_dec.func_type == 'void':
+            return None
+        elif func_dec.func_type == 'int' and result is None:
+            result = (0, 'int')
+        elif result is not None and result[1] != func_dec.func_type:
+            raise TypeError(f"Erro de tipo: Função '{self.name}' esperava retornar '{func_dec.func_type}' mas retornou '{result[1]}'")
+        return result
+
+def count_nodes(node):
+    if node is None:
+        return 0
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+def constant(value, value_type):
+    return IntVal(value) if value_type == 'int' else StringVal(value)
+
+def is_constant(node):
+    return type(node) is IntVal or type(node) is StringVal
+
+def constant_type(node):
+    return 'int' if type(node) is IntVal else 'char*'
+
+class Optimizer:
+    def __init__(self):
+        self.errors = []        # erros de tipo encontrados antes da execução
+        self.nodes_before = 0
+        self.nodes_after = 0
+        self.folded = 0         # subexpressões constantes dobradas
+        self.pruned = 0         # ramos de if/while eliminados
+        self.specialized = 0    # nós trocados por versões sem verificação de tipo
+        self.var_types = {}
+        self.functions = {}
+        self.all_functions = None   # nomes de todas as funções do programa (só com whole_program)
+
+    def optimize(self, ast, whole_program=True):
+        # Com whole_program=False (ex.: uma declaração de topo por vez) nada é assumido sobre
+        # variáveis e funções declaradas fora do nó
+        self.nodes_before += count_nodes(ast)
+        if whole_program:
+            self.analyze(ast)
+        optimized = self.transform(ast)
+        self.nodes_after += count_nodes(optimized)
+        return optimized
+
+    def report(self):
+        return (f"Otimização: {self.nodes_before} -> {self.nodes_after} nós "
+                f"({self.folded} constantes dobradas, {self.pruned} ramos eliminados, "
+                f"{self.specialized} nós sem verificação de tipo)")
+
+    # Análise do programa inteiro
+
+    def analyze(self, ast):
+        declared = {}      # nome -> tipos declarados (declarações e parâmetros)
+        assignments = {}   # nome -> expressões atribuídas
+        functions = {}
+
+        def collect(node):
+            if node is None:
+                return
+            if type(node) is AssignNode:
+                if node.is_declaration:
+                    declared.setdefault(node.identifier, set()).add(normalize_type(node.var_type))
+                else:
+                    assignments.setdefault(node.identifier, []).append(node.children[0])
+            elif type(node) is ForNode:
+                declared.setdefault(node.counter, set()).add('int')
+            elif type(node) is FuncDec:
+                functions.setdefault(node.name, []).append(node)
+                for param_name, param_type in node.params:
+                    declared.setdefault(param_name, set()).add(normalize_type(param_type))
+            for child in node.children:
+                collect(child)
+        collect(ast)
+
+        # Só funções declaradas uma única vez têm assinatura conhecida (a resolução é dinâmica)
+        self.functions = {name: decs[0] for name, decs in functions.items() if len(decs) == 1}
+        self.all_functions = set(functions)
+
+        # Uma variável tem tipo conhecido se todas as declarações usam o mesmo tipo e todas as
+        # atribuições produzem esse tipo; iterado até estabilizar, pois as expressões dependem das variáveis
+        self.var_types = {name: next(iter(types)) for name, types in declared.items()
+                          if len(types) == 1 and next(iter(types)) in ('int', 'char*')}
+        changed = True
+        while changed:
+            changed = False
+            for name in list(self.var_types):
+                expected = self.var_types[name]
+                if any(self.infer(expression) != expected for expression in assignments.get(name, [])):
+                    del self.var_types[name]
+                    changed = True
+
+    def infer(self, node):
+        # Tipo estático de uma expressão, ou None se só for conhecido em execução
+        node_type = type(node)
+        if node_type is IntVal or node_type is ScanNode:
+            return 'int'
+        if node_type is StringVal:
+            return 'char*'
+        if node_type is VarNode:
+            return self.var_types.get(node.identifier)
+        if isinstance(node, BinOp):
+            left = self.infer(node.children[0])
+            right = self.infer(node.children[1])
+            if left is None or right is None:
+                return None
+            if node.value == '+' and 'char*' in (left, right):
+                return 'char*'
+            if left == 'int' and right == 'int' and node.value in ('+', '-', '*', '/'):
+                return 'int'
+            return None
+        if isinstance(node, RelOp):
+            left = self.infer(node.children[0])
+            right = self.infer(node.children[1])
+            if left is not None and left == right and (left == 'int' or node.value in STRING_COMPARISONS):
+                return 'int'
+            return None
+        if node_type is BoolOp and len(node.children) == 2:
+            return 'int'
+        if node_type is UnOp:
+            return 'int' if self.infer(node.children[0]) == 'int' else None
+        if isinstance(node, FuncCall):
+            func_dec = self.functions.get(node.name)
+            return 'int' if func_dec is not None and func_dec.func_type == 'int' else None
+        if node_type is PrintNode:
+            return self.infer(node.children[0])
+        return None
+
+    def error(self, message):
+        if message not in self.errors:
+            self.errors.append(message)
+
+    # Transformação
+
+    def transform(self, node, function_body=False):
+        if node is None:
+            return None
+        node_type = type(node)
+        if node_type is BlockNode:
+            statements = [self.transform(child) for child in node.children]
+            if not function_body:
+                # Fora do corpo de funções um NoOp não tem efeito nenhum
+                statements = [statement for statement in statements if type(statement) is not NoOp]
+            return BlockNode(statements)
+        if node_type is FuncDec:
+            # Cópias rasas: o AST original não é alterado
+            optimized = copy.copy(node)
+            optimized.children = [self.transform(node.children[0], function_body=True)]
+            return optimized
+        if node_type is IfNode:
+            return self.transform_if(node)
+        if node_type is WhileNode:
+            return self.transform_while(node)
+        if node_type is BinOp:
+            return self.transform_bin_op(node)
+        if node_type is RelOp:
+            return self.transform_rel_op(node)
+        if node_type is UnOp:
+            return self.transform_un_op(node)
+        if node_type is BoolOp:
+            return self.transform_bool_op(node)
+        if node_type is FuncCall:
+            return self.transform_call(node)
+        if node_type in (AssignNode, ReturnNode, PrintNode, SetupNode, DrawLineNode, ChangeThreadNode, ForNode, RepeatNode,
+                         TransformNode):
+            optimized = copy.copy(node)
+            optimized.children = [self.transform(child) for child in node.children]
+            return optimized
+        return node
+
+    def transform_bin_op(self, node):
+        left = self.transform(node.children[0])
+        right = self.transform(node.children[1])
+        if is_constant(left) and is_constant(right):
+            try:
+                value, value_type = BinOp.apply(node.value, left.value, constant_type(left),
+                                                right.value, constant_type(right))
+            except TypeError as e:
+                self.error(str(e))
+            except ZeroDivisionError:
+                # Erro de execução, não de tipo: só acontece se a conta for executada
+                pass
+            else:
+                self.folded += 1
+                return constant(value, value_type)
+
+        left_type = self.infer(left)
+        right_type = self.infer(right)
+        if left_type is not None and right_type is not None:
+            if node.value == '+' and 'char*' in (left_type, right_type):
+                self.specialized += 1
+                return StringConcat(node.value, left, right)
+            if left_type == 'int' and right_type == 'int' and node.value in ('+', '-', '*', '/'):
+                self.specialized += 1
+                return IntBinOp(node.value, left, right)
+            self.error(f"Erro de semântica: Operação '{node.value}' não permitida entre {left_type} e {right_type}")
+        return BinOp(node.value, left, right)
+
+    def transform_rel_op(self, node):
+        left = self.transform(node.children[0])
+        right = self.transform(node.children[1])
+        if is_constant(left) and is_constant(right):
+            try:
+                result = RelOp.apply(node.value, left.value, constant_type(left), right.value, constant_type(right))
+            except TypeError as e:
+                self.error(str(e))
+            else:
+                if result is not None:
+                    self.folded += 1
+                    return IntVal(result[0])
+
+        left_type = self.infer(left)
+        right_type = self.infer(right)
+        if left_type is not None and right_type is not None:
+            if left_type != right_type:
+                self.error(f"Erro de semântica: Comparação não permitida entre {left_type} e {right_type}")
+            elif left_type == 'int' or node.value in STRING_COMPARISONS:
+                self.specialized += 1
+                return TypedRelOp(node.value, left, right)
+            else:
+                self.error(f"Erro de semântica: Comparação '{node.value}' não permitida para tipo {left_type}")
+        return RelOp(node.value, left, right)
+
+    def transform_un_op(self, node):
+        child = self.transform(node.children[0])
+        if is_constant(child):
+            try:
+                result = UnOp.apply(node.value, child.value, constant_type(child))
+            except TypeError as e:
+                self.error(str(e))
+            else:
+                if result is not None:
+                    self.folded += 1
+                    return constant(*result)
+        elif node.value == '!' and self.infer(child) == 'char*':
+            self.error("Erro de semântica: Operação de negação '!' só é permitida para inteiros.")
+        return UnOp(node.value, child)
+
+    def transform_bool_op(self, node):
+        children = [self.transform(child) for child in node.children]
+        if len(children) == 2 and all(is_constant(child) for child in children):
+            left, right = children[0].value, children[1].value
+            if node.value == '&&':
+                self.folded += 1
+                return IntVal(1 if left and right else 0)
+            elif node.value == '||':
+                self.folded += 1
+                return IntVal(1 if left or right else 0)
+        return BoolOp(node.value, *children)
+
+    def transform_condition(self, node, kind):
+        condition = self.transform(node)
+        condition_type = self.infer(condition)
+        if condition_type == 'char*':
+            self.error(f"Erro de semântica: Condição do '{kind}' deve ser do tipo 'int'")
+        return condition, condition_type
+
+    def transform_if(self, node):
+        condition, condition_type = self.transform_condition(node.children[0], 'if')
+        if type(condition) is IntVal:
+            # if (1) / if (0): só o ramo escolhido sobrevive, e só ele é analisado (o outro nunca executa)
+            self.pruned += 1
+            if condition.value:
+                return self.transform(node.children[1])
+            return self.transform(node.children[2]) if len(node.children) > 2 else NoOp()
+        true_block = self.transform(node.children[1])
+        false_block = self.transform(node.children[2]) if len(node.children) > 2 else None
+
+        if condition_type == 'int':
+            self.specialized += 1
+            return IntIfNode(condition, true_block, false_block)
+        return IfNode(condition, true_block, false_block)
+
+    def transform_while(self, node):
+        condition, condition_type = self.transform_condition(node.children[0], 'while')
+        if type(condition) is IntVal and not condition.value:
+            self.pruned += 1
+            return NoOp()
+        block = self.transform(node.children[1])
+        if condition_type == 'int':
+            self.specialized += 1
+            return IntWhileNode(condition, block)
+        return WhileNode(condition, block)
+
+    def transform_call(self, node):
+        arguments = [self.transform(child) for child in node.children]
+        func_dec = self.functions.get(node.name)
+        if func_dec is None:
+            if self.all_functions is not None and node.name not in self.all_functions:
+                self.error(f"Função '{node.name}' não definida.")
+            return FuncCall(node.name, arguments)
+
+        if len(arguments) != len(func_dec.params):
+            self.error(f"Erro: Função '{node.name}' esperava {len(func_dec.params)} argumentos, mas {len(arguments)} foram fornecidos.")
+            return FuncCall(node.name, arguments)
+
+        all_checked = True
+        for (param_name, param_type), argument in zip(func_dec.params, arguments):
+            arg_type = self.infer(argument)
+            if arg_type is None:
+                all_checked = False
+            elif arg_type != param_type:
+                self.error(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+                all_checked = False
+        if all_checked:
+            self.specialized += 1
+            return TypedFuncCall(node.name, arguments)
+        return FuncCall(node.name, arguments)
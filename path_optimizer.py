@@ -0,0 +1,242 @@
+# Otimização do caminho da agulha depois da execução: agrupa os drawLine por cor de linha e, dentro de
+# cada cor, reordena e inverte os trechos para encurtar os saltos. Trechos já contínuos no programa
+# (cada linha começando onde a anterior terminou) formam uma cadeia que não é quebrada. As cadeias são
+# encadeadas pelo vizinho mais próximo, buscado numa grade espacial (sem comparar todos os pares), e
+# depois refinadas com 2-opt numa janela deslizante.
+from math import hypot, sqrt
+
+from stitches import StitchBuffer, SETUP, DRAW_LINE, CHANGE_THREAD, NO_COLOR
+
+TWO_OPT_WINDOW = 12
+TWO_OPT_PASSES = 3
+
+def path_metrics(segments):
+    # (distância total de saltos, trocas de cor) percorrendo (x1, y1, x2, y2, cor) na ordem dada
+    jump = 0.0
+    changes = 0
+    previous = None
+    for x1, y1, x2, y2, color in segments:
+        if previous is not None:
+            jump += hypot(x1 - previous[0], y1 - previous[1])
+            if color != previous[2]:
+                changes += 1
+        previous = (x2, y2, color)
+    return jump, changes
+
+def build_chains(segments):
+    # Sequências de segmentos contíguos: [x inicial, y inicial, x final, y final, índices]
+    chains = []
+    for index, (x1, y1, x2, y2) in segments:
+        if chains and chains[-1][2] == x1 and chains[-1][3] == y1:
+            chain = chains[-1]
+            chain[2], chain[3] = x2, y2
+            chain[4].append(index)
+        else:
+            chains.append([x1, y1, x2, y2, [index]])
+    return chains
+
+class EndpointGrid:
+    # Grade uniforme com as duas pontas de cada cadeia; entradas de cadeias já usadas são descartadas
+    # ao passar pela célula
+    def __init__(self, chains, remaining):
+        xs = [value for chain_id in remaining for value in (chains[chain_id][0], chains[chain_id][2])]
+        ys = [value for chain_id in remaining for value in (chains[chain_id][1], chains[chain_id][3])]
+        self.min_x, self.min_y = min(xs), min(ys)
+        width = max(xs) - self.min_x + 1
+        height = max(ys) - self.min_y + 1
+        # Em média cerca de duas pontas por célula
+        self.cell = max(sqrt(width * height / max(len(remaining), 1)), 1.0)
+        self.columns = int(width / self.cell) + 1
+        self.rows = int(height / self.cell) + 1
+        self.cells = {}
+        for chain_id in remaining:
+            chain = chains[chain_id]
+            self.cells.setdefault(self.key(chain[0], chain[1]), []).append((chain_id, False))
+            self.cells.setdefault(self.key(chain[2], chain[3]), []).append((chain_id, True))
+
+    def key(self, x, y):
+        return int((x - self.min_x) / self.cell), int((y - self.min_y) / self.cell)
+
+    def ring(self, column, row, radius):
+        # Células a exatamente `radius` células de distância (borda do quadrado)
+        if radius == 0:
+            yield column, row
+            return
+        for cell_column in range(column - radius, column + radius + 1):
+            yield cell_column, row - radius
+            yield cell_column, row + radius
+        for cell_row in range(row - radius + 1, row + radius):
+            yield column - radius, cell_row
+            yield column + radius, cell_row
+
+    def nearest(self, x, y, chains, used):
+        # (cadeia, invertida) da ponta livre mais próxima de (x, y), em anéis crescentes de células;
+        # depois do anel r, qualquer célula não visitada está a pelo menos r células de distância
+        column, row = self.key(x, y)
+        limit = max(abs(column), abs(self.columns - column), abs(row), abs(self.rows - row)) + 1
+        cells = self.cells
+        best = None
+        best_distance = float('inf')
+        for radius in range(limit + 1):
+            for cell in self.ring(column, row, radius):
+                entries = cells.get(cell)
+                if not entries:
+                    continue
+                live = [entry for entry in entries if not used[entry[0]]]
+                if len(live) != len(entries):
+                    if live:
+                        cells[cell] = live
+                    else:
+                        del cells[cell]
+                for chain_id, reverse in live:
+                    chain = chains[chain_id]
+                    distance = hypot(chain[2] - x, chain[3] - y) if reverse else hypot(chain[0] - x, chain[1] - y)
+                    if distance < best_distance:
+                        best_distance = distance
+                        best = (chain_id, reverse)
+            if best_distance <= radius * self.cell:
+                break
+        return best
+
+def nearest_neighbour_order(chains):
+    # Começa pela primeira cadeia do programa e segue sempre para a ponta livre mais próxima
+    count = len(chains)
+    used = [False] * count
+    used[0] = True
+    order = [(0, False)]
+    remaining = count - 1
+    grid = EndpointGrid(chains, range(1, count)) if remaining else None
+    grid_size = remaining
+    x, y = chains[0][2], chains[0][3]
+    while remaining:
+        if remaining * 4 < grid_size:
+            # Com poucas cadeias livres a grade fina vira anéis vazios: reconstrói com células maiores
+            grid = EndpointGrid(chains, [chain_id for chain_id in range(count) if not used[chain_id]])
+            grid_size = remaining
+        chain_id, reverse = grid.nearest(x, y, chains, used)
+        used[chain_id] = True
+        order.append((chain_id, reverse))
+        remaining -= 1
+        chain = chains[chain_id]
+        x, y = (chain[0], chain[1]) if reverse else (chain[2], chain[3])
+    return order
+
+def two_opt(order, chains, window=TWO_OPT_WINDOW, passes=TWO_OPT_PASSES):
+    # Inverter o bloco order[i..j] troca os saltos (i-1 -> i) e (j -> j+1) por (i-1 -> fim de j) e
+    # (início de i -> j+1); os saltos internos mantêm o comprimento
+    starts = []
+    ends = []
+    for chain_id, reverse in order:
+        chain = chains[chain_id]
+        start, end = ((chain[0], chain[1]), (chain[2], chain[3]))
+        if reverse:
+            start, end = end, start
+        starts.append(start)
+        ends.append(end)
+    count = len(order)
+    for _ in range(passes):
+        improved = False
+        for i in range(1, count - 1):
+            before = ends[i - 1]
+            start_i = starts[i]
+            current = hypot(start_i[0] - before[0], start_i[1] - before[1])
+            if current == 0:
+                continue
+            for j in range(i + 1, min(i + window, count)):
+                end_j = ends[j]
+                if j + 1 < count:
+                    after = starts[j + 1]
+                    old = current + hypot(after[0] - end_j[0], after[1] - end_j[1])
+                    new = hypot(end_j[0] - before[0], end_j[1] - before[1]) + hypot(after[0] - start_i[0], after[1] - start_i[1])
+                else:
+                    old = current
+                    new = hypot(end_j[0] - before[0], end_j[1] - before[1])
+                if new < old - 1e-9:
+                    order[i:j + 1] = [(chain_id, not reverse) for chain_id, reverse in reversed(order[i:j + 1])]
+                    block_starts = starts[i:j + 1]
+                    starts[i:j + 1] = ends[i:j + 1][::-1]
+                    ends[i:j + 1] = block_starts[::-1]
+                    improved = True
+                    break
+        if not improved:
+            break
+    return order
+
+def optimize_segments(segments):
+    # segments: lista de (índice, (x1, y1, x2, y2)) de uma mesma cor. Devolve [(índice, invertido)].
+    if not segments:
+        return []
+    chains = build_chains(segments)
+    order = two_opt(nearest_neighbour_order(chains), chains)
+    result = []
+    for chain_id, reverse in order:
+        indices = chains[chain_id][4]
+        if reverse:
+            result.extend((index, True) for index in reversed(indices))
+        else:
+            result.extend((index, False) for index in indices)
+    return result
+
+class PathOptimizerSink:
+    # Fica entre a execução e a saída: guarda os blocos do StitchBuffer e, em close(), entrega ao sink
+    # seguinte o desenho reordenado (setup e print primeiro, depois cada cor na ordem em que apareceu)
+    def __init__(self, downstream):
+        self.downstream = downstream
+        self.segments = []       # (x1, y1, x2, y2, id da cor)
+        self.irregular = []      # drawLine com coordenadas não inteiras, mantidos na ordem original
+        self.preamble = []       # ('setup', frameSize, cor) e ('print', valor)
+        self.color_table = []
+        self.before = None
+        self.after = None
+
+    def write(self, buffer):
+        self.color_table = buffer.color_table
+        for row, (kind, x1, y1, x2, y2, color) in enumerate(buffer.rows()):
+            if kind == DRAW_LINE:
+                if type(x1) is int and type(y1) is int and type(x2) is int and type(y2) is int:
+                    self.segments.append((x1, y1, x2, y2, color))
+                else:
+                    self.irregular.append((x1, y1, x2, y2, color))
+            elif kind == SETUP:
+                self.preamble.append(('setup', x1, buffer.color_table[color]))
+            elif kind != CHANGE_THREAD:
+                self.preamble.append(('print', buffer.objects[row]))
+
+    def close(self):
+        if self.before is not None:
+            # Já entregue: depois de um sink que falhou no meio da entrega, o tratamento de erro chama de novo
+            return
+        self.before = path_metrics(self.segments)
+        groups = {}
+        for index, (x1, y1, x2, y2, color) in enumerate(self.segments):
+            groups.setdefault(color, []).append((index, (x1, y1, x2, y2)))
+        for x1, y1, x2, y2, color in self.irregular:
+            groups.setdefault(color, [])
+
+        output = StitchBuffer(self.downstream)
+        for command in self.preamble:
+            if command[0] == 'setup':
+                output.setup(command[1], command[2])
+            else:
+                output.print_value(command[1])
+        ordered = []
+        for color, members in groups.items():
+            # A cor ativa é a do último setup do preâmbulo (ou da troca anterior), na tabela de `output`
+            if color != NO_COLOR and output.color_ids.get(self.color_table[color]) != output.current_color:
+                output.change_thread(self.color_table[color])
+            for index, reverse in optimize_segments(members):
+                x1, y1, x2, y2, _ = self.segments[index]
+                if reverse:
+                    x1, y1, x2, y2 = x2, y2, x1, y1
+                output.draw_line(x1, y1, x2, y2)
+                ordered.append((x1, y1, x2, y2, color))
+            for x1, y1, x2, y2, irregular_color in self.irregular:
+                if irregular_color == color:
+                    output.draw_line(x1, y1, x2, y2)
+        output.flush()
+        self.after = path_metrics(ordered)
+
+    def report(self):
+        (jump_before, changes_before), (jump_after, changes_after) = self.before, self.after
+        return (f"Caminho: saltos {jump_before:.1f} -> {jump_after:.1f}, "
+                f"trocas de cor {changes_before} -> {changes_after}, {len(self.segments)} linhas")
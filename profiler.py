@@ -0,0 +1,275 @@
+# Perfil de execução (--profile): conta as execuções e mede o tempo inclusivo (com os filhos) e exclusivo
+# (só o próprio nó) de cada nó do AST, com a linha do código-fonte, e o de cada função chamada, além do
+# tempo das fases de tokenização, análise e execução. Nada disso existe fora do --profile: a medição é
+# instalada só nos nós do programa analisado, trocando o `evaluate` de cada instância por uma versão que
+# mede o original. O relatório sai ordenado pelos nós, linhas e funções mais custosos, e as pilhas
+# (bloco > laço > chamada > ...) podem ser gravadas no formato "collapsed" lido por flamegraph.pl,
+# speedscope e afins. Os tempos incluem o custo da própria medição.
+import contextlib
+import gc
+import os
+import re
+import sys
+import time
+from bisect import bisect_right
+
+from main import (
+    node_class, Parser, ArrayTokenizer, TokenArrays, Interpreter, BinOp, UnOp, IntVal, NoOp, BoolOp, RelOp,
+    StringVal, VarNode, BlockNode, FuncCall, TransformNode
+)
+
+PROFILE_TOP = 20
+# Expressões não abrem um quadro próprio nas pilhas: o tempo delas aparece no comando que as contém
+EXPRESSION_NODES = (BinOp, UnOp, IntVal, NoOp, BoolOp, RelOp, StringVal, VarNode)
+
+class NodeRecord:
+    __slots__ = ('label', 'line', 'calls', 'inclusive', 'exclusive', 'active')
+
+    def __init__(self, label, line):
+        self.label = label
+        self.line = line
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.active = 0  # ativações em andamento: com recursão, só a mais externa soma o tempo inclusivo
+
+class LineParser(Parser):
+    # Parser que anota em cada nó (atributo `line`) a linha do token em que ele começa
+    def __init__(self, tokenizer, source):
+        super().__init__(tokenizer)
+        self.offsets = tokenizer.arrays.offsets
+        self.newlines = [match.start() for match in re.finditer('\n', source)]
+
+    def mark(self, start, node):
+        # Um nó devolvido por mais de um nível (ex.: fator entre parênteses) fica com a linha do mais interno
+        if node is not None and 'line' not in vars(node):
+            node.line = bisect_right(self.newlines, self.offsets[start]) + 1
+        return node
+
+    def parse_statement(self):
+        return self.mark(self.tokenizer.index, super().parse_statement())
+
+    def parse_block(self):
+        return self.mark(self.tokenizer.index, super().parse_block())
+
+    def parse_expression(self):
+        return self.mark(self.tokenizer.index, super().parse_expression())
+
+    def parse_term(self):
+        return self.mark(self.tokenizer.index, super().parse_term())
+
+    def parse_factor(self):
+        return self.mark(self.tokenizer.index, super().parse_factor())
+
+def node_label(node):
+    label = type(node).__name__
+    cls = node_class(node)
+    if cls is FuncCall:
+        return f"{label} {node.name}"
+    if cls in (IntVal, StringVal):
+        detail = repr(node.value)
+        return f"{label} {detail if len(detail) <= 20 else detail[:17] + '...'}"
+    if cls in (BinOp, UnOp, BoolOp, RelOp, TransformNode):
+        return f"{label} {node.value}"
+    for attribute in ('identifier', 'counter', 'name'):
+        if hasattr(node, attribute):
+            return f"{label} {getattr(node, attribute)}"
+    return label
+
+class Profiler:
+    def __init__(self, filename):
+        self.started = time.perf_counter()
+        self.name = os.path.basename(filename)
+        self.phases = []      # (fase, segundos), na ordem em que terminaram
+        self.records = []     # um NodeRecord por nó instrumentado
+        self.functions = {}   # nome -> NodeRecord (linha 0: a declaração não tem nó próprio)
+        # Árvore das pilhas: caminho -> (caminho pai, quadro); o caminho 0 é o programa
+        self.paths = {}
+        self.frames = [(None, self.name)]
+        self.totals = [0.0]   # tempo exclusivo por caminho
+        self.stack = [[0, 0.0]]   # [caminho, tempo dos filhos] dos nós em execução
+        self.calls = [[0.0]]      # [tempo das chamadas aninhadas] das funções em execução
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def parse(self, code):
+        # Mesmo caminho de Parser.run, com a tokenização e a análise medidas separadamente
+        if code == "" or code.isspace():
+            raise Exception("Erro de sintaxe: A expressão não pode ser vazia ou consistir apenas de espaços em branco.")
+        with self.phase('tokenização'):
+            arrays = TokenArrays.tokenize(code)
+        with self.phase('análise'):
+            tokenizer = ArrayTokenizer(arrays)
+            parser = LineParser(tokenizer, code)
+            statements = []
+            start = tokenizer.index
+            while tokenizer.current_token.type != 'EOF':
+                statements.append(parser.parse_statement())
+            ast = parser.mark(start, BlockNode(statements))
+        return ast
+
+    def path(self, parent, frame):
+        key = (parent, frame)
+        path = self.paths.get(key)
+        if path is None:
+            path = self.paths[key] = len(self.frames)
+            self.frames.append(key)
+            self.totals.append(0.0)
+        return path
+
+    def instrument(self, node, line=0):
+        # Instala a medição em todos os nós da árvore; nós sem linha (criados pelo otimizador ou pelo
+        # memoizador) ficam com a do pai
+        if node is None or 'evaluate' in vars(node):
+            return node
+        line = vars(node).get('line', line)
+        record = NodeRecord(node_label(node), line)
+        self.records.append(record)
+        cls = node_class(node)
+        function = None
+        if cls is FuncCall:
+            function = self.functions.get(node.name)
+            if function is None:
+                function = self.functions[node.name] = NodeRecord(node.name, 0)
+            frame = f"{node.name}()"
+        elif cls in EXPRESSION_NODES:
+            frame = None
+        else:
+            frame = f"{record.label}:{line}" if line else record.label
+        self.wrap(node, record, frame, function)
+        for child in node.children:
+            self.instrument(child, line)
+        return node
+
+    def wrap(self, node, record, frame, function):
+        original = node.evaluate
+        stack = self.stack
+        calls = self.calls
+        totals = self.totals
+        clock = time.perf_counter
+        profiler = self
+
+        def evaluate(*args, **kwargs):
+            path = stack[-1][0]
+            if frame is not None:
+                path = profiler.path(path, frame)
+            entry = [path, 0.0]
+            stack.append(entry)
+            if function is not None:
+                nested = [0.0]
+                calls.append(nested)
+                function.active += 1
+            record.active += 1
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                stack[-1][1] += elapsed
+                record.calls += 1
+                record.active -= 1
+                if not record.active:
+                    record.inclusive += elapsed
+                record.exclusive += elapsed - entry[1]
+                totals[path] += elapsed - entry[1]
+                if function is not None:
+                    calls.pop()
+                    calls[-1][0] += elapsed
+                    function.calls += 1
+                    function.active -= 1
+                    if not function.active:
+                        function.inclusive += elapsed
+                    function.exclusive += elapsed - nested[0]
+
+        node.evaluate = evaluate
+
+    def collapsed(self):
+        # Uma linha "quadro;quadro;... microssegundos" por pilha com tempo próprio
+        names = {}
+        lines = []
+        for path, (parent, frame) in enumerate(self.frames):
+            names[path] = frame if parent is None else f"{names[parent]};{frame}"
+            microseconds = round(self.totals[path] * 1e6)
+            if microseconds > 0:
+                lines.append(f"{names[path]} {microseconds}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        lines = [f"Perfil de {self.name}: {1000 * total:.3f} ms"]
+        measured = 0.0
+        for name, seconds in self.phases:
+            measured += seconds
+            lines.append(f"  {name:<28} {1000 * seconds:12.3f} ms {100 * seconds / total:6.1f}%")
+        rest = max(total - measured, 0.0)
+        lines.append(f"  {'outros (leitura, opções...)':<28} {1000 * rest:12.3f} ms {100 * rest / total:6.1f}%")
+
+        executed = [record for record in self.records if record.calls]
+        spent = sum(record.exclusive for record in executed) or 1.0
+        if self.functions:
+            lines.append("Funções (por tempo inclusivo):")
+            lines.append(f"  {'função':<24} {'chamadas':>10} {'inclusivo ms':>13} {'exclusivo ms':>13}")
+            for record in sorted(self.functions.values(), key=lambda record: record.inclusive, reverse=True):
+                lines.append(f"  {record.label:<24} {record.calls:>10} {1000 * record.inclusive:13.3f} "
+                             f"{1000 * record.exclusive:13.3f}")
+
+        by_line = {}
+        for record in executed:
+            by_line[record.line] = by_line.get(record.line, 0.0) + record.exclusive
+        hottest = sorted(by_line.items(), key=lambda item: item[1], reverse=True)[:PROFILE_TOP]
+        lines.append(f"Linhas mais custosas (tempo exclusivo dos nós da linha, {len(hottest)} de {len(by_line)}):")
+        for line, seconds in hottest:
+            lines.append(f"  linha {line or '-':<6} {1000 * seconds:12.3f} ms {100 * seconds / spent:6.1f}%")
+
+        executed.sort(key=lambda record: record.exclusive, reverse=True)
+        lines.append(f"Nós mais custosos (por tempo exclusivo, {min(PROFILE_TOP, len(executed))} de "
+                     f"{len(executed)} executados):")
+        lines.append(f"  {'linha':>6} {'nó':<28} {'execuções':>10} {'inclusivo ms':>13} {'exclusivo ms':>13} {'%':>6}")
+        for record in executed[:PROFILE_TOP]:
+            lines.append(f"  {record.line or '-':>6} {record.label:<28} {record.calls:>10} "
+                         f"{1000 * record.inclusive:13.3f} {1000 * record.exclusive:13.3f} "
+                         f"{100 * record.exclusive / spent:6.1f}")
+        return '\n'.join(lines)
+
+    def finish(self, stacks_file=None):
+        print(self.report(), file=sys.stderr)
+        if stacks_file:
+            try:
+                with open(stacks_file, 'w', encoding='utf-8') as file:
+                    file.write(self.collapsed())
+            except OSError as e:
+                print(f"Erro: Não foi possível gravar {stacks_file}: {e}", file=sys.stderr)
+
+class ProfilingInterpreter(Interpreter):
+    # Backend tree que instala a medição no AST antes de executá-lo; a chamada de `main` também é medida
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def execute(self, node, symbol_table):
+        # Sem o coletor de ciclos durante a instalação: ele percorreria os milhares de nós várias vezes
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with self.profiler.phase('instrumentação'):
+                self.profiler.instrument(node)
+        finally:
+            if collecting:
+                gc.enable()
+        with self.profiler.phase('execução'):
+            return node.evaluate(symbol_table)
+
+    def call_main(self, symbol_table):
+        with self.profiler.phase('chamada de main'):
+            try:
+                symbol_table.get_function("main")
+                main_call = self.profiler.instrument(FuncCall("main", []))
+                main_call.evaluate(symbol_table, global_table=symbol_table)
+            except ValueError:
+                pass
@@ -0,0 +1,201 @@
+# Rasterização dos drawLine gravados no StitchBuffer, em lote com NumPy: cada segmento é amostrado em
+# max(|dx|, |dy|) + 1 pontos (equivalente ao Bresenham/DDA) e todos os pontos de um lote são calculados
+# e pintados de uma vez, sem laço Python por pixel. A tela tem frameSize x frameSize pixels vezes a escala.
+# Grava PPM (P6) ou PNG (zlib + struct, sem dependências além do NumPy).
+import struct
+import zlib
+
+import numpy as np
+
+from stitches import SETUP, DRAW_LINE, NO_COLOR
+
+BACKGROUND = (255, 255, 255)
+SAMPLES_PER_BATCH = 1 << 22   # pontos amostrados por lote (limita a memória em desenhos enormes)
+
+NAMED_COLORS = {
+    'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (220, 20, 60), 'green': (34, 139, 34),
+    'blue': (30, 80, 200), 'yellow': (240, 200, 0), 'orange': (255, 140, 0), 'purple': (128, 0, 128),
+    'pink': (255, 105, 180), 'brown': (139, 69, 19), 'gray': (128, 128, 128), 'grey': (128, 128, 128),
+    'cyan': (0, 170, 200), 'magenta': (200, 0, 200), 'gold': (212, 175, 55), 'silver': (192, 192, 192),
+    'navy': (0, 0, 128),
+}
+DEFAULT_COLOR = (0, 0, 0)
+
+def color_rgb(color):
+    # Nome conhecido, '#rrggbb' ou, para qualquer outro valor, uma cor estável derivada do texto
+    if color is None:
+        return DEFAULT_COLOR
+    text = str(color).strip().lower()
+    if text in NAMED_COLORS:
+        return NAMED_COLORS[text]
+    if text.startswith('#') and len(text) == 7:
+        try:
+            return tuple(int(text[i:i + 2], 16) for i in (1, 3, 5))
+        except ValueError:
+            pass
+    digest = zlib.crc32(text.encode('utf-8'))
+    return (digest & 0xFF, (digest >> 8) & 0xFF, (digest >> 16) & 0xFF)
+
+class RasterSink:
+    # Sink que guarda os drawLine de cada bloco (colunas NumPy) e o último frameSize para render()
+    def __init__(self):
+        self.blocks = []
+        self.frame_size = None
+        self.color_table = []
+
+    def write(self, buffer):
+        kinds = np.frombuffer(buffer.kinds, dtype=np.uint8)
+        self.color_table = buffer.color_table
+        setups = np.flatnonzero(kinds == SETUP)
+        if len(setups):
+            frame_size = buffer.objects.get(int(setups[-1]), (buffer.x1[int(setups[-1])],))[0]
+            if type(frame_size) is int:
+                self.frame_size = frame_size
+
+        lines = kinds == DRAW_LINE
+        # Linhas com coordenadas não inteiras não são desenháveis
+        for row in buffer.objects:
+            lines[row] = False
+        if not lines.any():
+            return
+        columns = [np.frombuffer(column, dtype=np.int64)[lines]
+                   for column in (buffer.x1, buffer.y1, buffer.x2, buffer.y2)]
+        colors = np.frombuffer(buffer.colors, dtype=np.int32)[lines]
+        self.blocks.append((np.stack(columns), colors))
+
+    def segments(self):
+        # (coordenadas 4 x n, ids de cor n) de todos os blocos
+        if not self.blocks:
+            return np.zeros((4, 0), dtype=np.int64), np.zeros(0, dtype=np.int32)
+        return (np.concatenate([block[0] for block in self.blocks], axis=1),
+                np.concatenate([block[1] for block in self.blocks]))
+
+    def render(self, scale=1, antialias=False, workers=None, tile_size=None):
+        # Com `workers`, a imagem é rasterizada em blocos por vários processos (tiles.py)
+        coordinates, colors = self.segments()
+        if workers is None:
+            return render_segments(coordinates, colors, self.color_table, self.frame_size, scale, antialias)
+        from tiles import TILE_SIZE, render_tiled
+        return render_tiled(coordinates, colors, self.color_table, self.frame_size, scale, antialias, workers,
+                            tile_size or TILE_SIZE)
+
+def palette_array(color_table):
+    # Linha extra no fim para NO_COLOR (índice -1)
+    return np.array([color_rgb(color) for color in color_table] + [DEFAULT_COLOR], dtype=np.float32)
+
+def prepare(coordinates, colors, color_table, frame_size, scale):
+    # (pontos em pixels 4 x n, pontos amostrados por segmento, índices na paleta, paleta, lado da imagem)
+    coordinates = np.asarray(coordinates, dtype=np.int64)
+    if frame_size is None or frame_size <= 0:
+        frame_size = int(coordinates.max()) + 1 if coordinates.size else 1
+    palette = palette_array(color_table)
+    colors = np.where(np.asarray(colors) == NO_COLOR, len(palette) - 1, colors)
+    points = coordinates.astype(np.float64) * scale
+    lengths = np.maximum(np.abs(points[2] - points[0]), np.abs(points[3] - points[1])).astype(np.int64) + 1
+    return points, lengths, colors, palette, frame_size * scale
+
+def batch_ranges(lengths):
+    # Lotes [início, fim) com no máximo SAMPLES_PER_BATCH pontos (sempre pelo menos um segmento)
+    cumulative = np.cumsum(lengths)
+    start = 0
+    count = len(lengths)
+    while start < count:
+        done = int(cumulative[start - 1]) if start else 0
+        end = max(int(np.searchsorted(cumulative, done + SAMPLES_PER_BATCH, side='right')), start + 1)
+        yield start, end
+        start = end
+
+def render_segments(coordinates, colors, color_table, frame_size=None, scale=1, antialias=False):
+    points, lengths, colors, palette, size = prepare(coordinates, colors, color_table, frame_size, scale)
+    window = (0, 0, size, size)
+
+    # Cor do último segmento que passou por cada pixel e cobertura (1 sem antialias)
+    pixel_color = np.full(size * size, -1, dtype=np.int64)
+    coverage = np.zeros(size * size, dtype=np.float32)
+    for start, end in batch_ranges(lengths):
+        draw_batch(points[:, start:end], lengths[start:end], colors[start:end], window,
+                   pixel_color, coverage, antialias)
+    return compose(pixel_color, coverage, palette).reshape(size, size, 3)
+
+def compose(pixel_color, coverage, palette):
+    # Pixels RGB (n x 3) sobre o fundo
+    canvas = np.empty((len(pixel_color), 3), dtype=np.float32)
+    canvas[:] = BACKGROUND
+    painted = pixel_color >= 0
+    alpha = coverage[painted, None]
+    canvas[painted] = canvas[painted] * (1 - alpha) + palette[pixel_color[painted]] * alpha
+    return np.rint(canvas).astype(np.uint8)
+
+def draw_batch(points, lengths, colors, window, pixel_color, coverage, antialias, first=None, samples=None):
+    # window = (x0, y0, largura, altura): o trecho da imagem guardado em pixel_color e coverage. Sem
+    # `samples`, cada segmento é amostrado inteiro; com ele, só os pontos first .. first + samples - 1
+    if samples is None:
+        samples = lengths
+    total = int(samples.sum())
+    segment = np.repeat(np.arange(len(lengths)), samples)
+    # Posição de cada ponto dentro do seu segmento: 0 .. n-1
+    offsets = np.arange(total) - np.repeat(np.cumsum(samples) - samples, samples)
+    if first is not None:
+        offsets += first[segment]
+    steps = np.maximum(lengths - 1, 1)[segment]
+    t = offsets / steps
+    x1, y1, x2, y2 = points[:, segment]
+    x = x1 + (x2 - x1) * t
+    y = y1 + (y2 - y1) * t
+    point_colors = colors[segment]
+
+    if not antialias:
+        plot(np.rint(x).astype(np.int64), np.rint(y).astype(np.int64), point_colors, None, window, pixel_color,
+             coverage)
+        return
+
+    # Antialias estilo Wu: o eixo secundário fica entre dois pixels, pesados pela parte fracionária
+    steep = np.abs(y2 - y1) > np.abs(x2 - x1)
+    minor = np.where(steep, x, y)
+    major = np.rint(np.where(steep, y, x)).astype(np.int64)
+    low = np.floor(minor)
+    fraction = (minor - low).astype(np.float32)
+    low = low.astype(np.int64)
+    for minor_pixel, weight in ((low, 1 - fraction), (low + 1, fraction)):
+        px = np.where(steep, minor_pixel, major)
+        py = np.where(steep, major, minor_pixel)
+        plot(px, py, point_colors, weight, window, pixel_color, coverage)
+
+def plot(x, y, point_colors, weight, window, pixel_color, coverage):
+    # Sem `weight` (sem antialias) cada ponto cobre o pixel inteiro
+    x0, y0, width, height = window
+    inside = (x >= x0) & (x < x0 + width) & (y >= y0) & (y < y0 + height)
+    if weight is not None:
+        inside &= weight > 0
+    index = (y[inside] - y0) * width + (x[inside] - x0)
+    # Atribuição com índices repetidos: o último ponto (segmento mais recente) vence
+    pixel_color[index] = point_colors[inside]
+    if weight is None:
+        coverage[index] = 1
+    else:
+        np.maximum.at(coverage, index, weight[inside])
+
+def write_ppm(image, file):
+    height, width, _ = image.shape
+    file.write(f"P6\n{width} {height}\n255\n".encode('ascii'))
+    file.write(np.ascontiguousarray(image).tobytes())
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def write_png(image, file):
+    height, width, _ = image.shape
+    # Cada linha começa com o byte do filtro 0 (nenhum)
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, width * 3)
+    file.write(b'\x89PNG\r\n\x1a\n')
+    file.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+    file.write(png_chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+    file.write(png_chunk(b'IEND', b''))
+
+def save_image(image, filename):
+    with open(filename, 'wb') as file:
+        if filename.lower().endswith('.png'):
+            write_png(image, file)
+        else:
+            write_ppm(image, file)
@@ -0,0 +1,334 @@
+# Resolução de variáveis por endereço (profundidade, slot) e execução do AST sobre quadros de tamanho fixo.
+# Cada função (e o programa) ganha um FrameLayout com um slot por parâmetro/variável declarada; uma chamada
+# aloca um único Frame com uma lista de slots, e VarNode/AssignNode viram acessos indexados.
+#
+# A PatternScript tem escopo dinâmico (o quadro de uma função tem como pai o quadro de quem a chamou),
+# então a distância até o quadro que define uma variável livre não é fixa. Os endereços são:
+#   profundidade 0    -> slot no quadro atual (parâmetros e variáveis declaradas na própria função)
+#   profundidade 1    -> slot no quadro global, para nomes que nenhuma função declara (nenhum quadro
+#                        intermediário pode contê-los)
+#   profundidade None -> busca por nome na cadeia de quadros, como na SymbolTable
+# Um slot ainda não declarado (None) também cai na busca por nome, preservando a ordem de declaração.
+import copy
+
+from main import (
+    STITCHES, Interpreter, normalize_type, node_class, AssignNode, VarNode, ScanNode, ReturnNode, FuncDec, FuncCall, ForNode
+)
+
+LOCAL = 0
+GLOBAL = 1
+
+class FrameLayout:
+    # Nomes e slots de um quadro, definidos durante a resolução
+    __slots__ = ('names', 'slots')
+
+    def __init__(self):
+        self.names = []
+        self.slots = {}
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+    def __len__(self):
+        return len(self.names)
+
+class Frame:
+    # Quadro de ativação: valores (tuplas (valor, tipo)) em slots fixos, None enquanto não declarados.
+    # Os métodos por nome têm a mesma interface da SymbolTable e são usados nos endereços dinâmicos.
+    __slots__ = ('values', 'layout', 'parent', 'root', 'functions')
+
+    def __init__(self, layout, parent=None, root=None):
+        self.values = [None] * len(layout.names)
+        self.layout = layout
+        self.parent = parent
+        self.root = self if root is None else root
+        self.functions = None
+
+    def get_variable(self, name):
+        frame = self
+        while isinstance(frame, Frame):
+            slot = frame.layout.slots.get(name)
+            if slot is not None and frame.values[slot] is not None:
+                return frame.values[slot]
+            frame = frame.parent
+        if frame is None:
+            raise ValueError(f"Variável '{name}' não definida.")
+        return frame.get_variable(name)
+
+    def set_variable(self, name, value, var_type, is_declaration=False):
+        normalized_type = normalize_type(var_type)
+        if is_declaration:
+            slot = self.layout.slots[name]
+            if self.values[slot] is not None:
+                raise ValueError(f"Erro de semântica: Variável '{name}' já foi declarada.")
+            self.values[slot] = (value, normalized_type)
+            return
+        frame = self
+        while isinstance(frame, Frame):
+            slot = frame.layout.slots.get(name)
+            if slot is not None and frame.values[slot] is not None:
+                frame.values[slot] = (value, normalized_type)
+                return
+            frame = frame.parent
+        if frame is None:
+            raise ValueError(f"Erro de semântica: Variável '{name}' não declarada antes da atribuição.")
+        frame.set_variable(name, value, normalized_type)
+
+    def set_function(self, name, func_node):
+        if self.functions is None:
+            self.functions = {}
+        if name in self.functions:
+            raise ValueError(f"Erro de semântica: Função '{name}' já foi declarada.")
+        self.functions[name] = func_node
+
+    def get_function(self, name):
+        frame = self
+        while isinstance(frame, Frame):
+            if frame.functions is not None and name in frame.functions:
+                return frame.functions[name]
+            frame = frame.parent
+        if frame is None:
+            raise ValueError(f"Função '{name}' não definida.")
+        return frame.get_function(name)
+
+class ResolvedVarNode(VarNode):
+    def __init__(self, identifier, depth, slot):
+        super().__init__(identifier)
+        self.depth = depth
+        self.slot = slot
+
+    def evaluate(self, frame, global_table=None):
+        depth = self.depth
+        if depth == 0:
+            value = frame.values[self.slot]
+        elif depth == 1:
+            value = frame.root.values[self.slot]
+        else:
+            value = None
+        if value is None:
+            try:
+                return frame.get_variable(self.identifier)
+            except ValueError as e:
+                STITCHES.flush()
+                print(f"Erro ao acessar '{self.identifier}': {e}")
+                raise
+        return value
+
+class ResolvedAssignNode(AssignNode):
+    def __init__(self, identifier, expression, var_type, is_declaration, depth, slot):
+        super().__init__(identifier, expression, var_type, is_declaration)
+        self.depth = depth
+        self.slot = slot
+        if is_declaration:
+            self.default_value = 0 if var_type == 'int' else ""
+            self.declared = (self.default_value, normalize_type(var_type))
+        else:
+            self.is_scan = isinstance(expression, ScanNode)
+
+    def evaluate(self, frame, global_table=None):
+        if self.is_declaration:
+            values = frame.values
+            if values[self.slot] is not None:
+                raise ValueError(f"Erro de semântica: Variável '{self.identifier}' já foi declarada.")
+            values[self.slot] = self.declared
+            return self.default_value, self.var_type
+
+        value, expression_type = self.children[0].evaluate(frame, global_table=global_table)
+
+        if self.is_scan and frame.get_variable(self.identifier)[1] != 'int':
+            raise TypeError(f"Erro de tipo: `scanf` só pode ser atribuído a variáveis do tipo `int`, mas '{self.identifier}' é do tipo '{self.var_type}'.")
+
+        # Os nós só produzem tipos já normalizados ('int'/'char*')
+        depth = self.depth
+        if depth == 0:
+            values = frame.values
+        elif depth == 1:
+            values = frame.root.values
+        else:
+            values = None
+        if values is not None and values[self.slot] is not None:
+            values[self.slot] = (value, expression_type)
+        else:
+            frame.set_variable(self.identifier, value, expression_type)
+        return value, expression_type
+
+class ResolvedFuncCall(FuncCall):
+    def __init__(self, name, args, global_only):
+        super().__init__(name, args)
+        # Sem declarações aninhadas com esse nome, a função só pode estar no quadro global
+        self.global_only = global_only
+
+    def evaluate(self, frame, global_table=None):
+        function_scope = global_table if global_table else frame
+        func_dec = None
+        if self.global_only:
+            functions = function_scope.root.functions
+            if functions is not None:
+                func_dec = functions.get(self.name)
+        if func_dec is None:
+            func_dec = function_scope.get_function(self.name)
+
+        if len(self.children) != len(func_dec.params):
+            raise ValueError(f"Erro: Função '{self.name}' esperava {len(func_dec.params)} argumentos, mas {len(self.children)} foram fornecidos.")
+
+        local_frame = Frame(func_dec.layout, function_scope, function_scope.root)
+        values = local_frame.values
+        for (param_name, param_type, slot), arg_node in zip(func_dec.param_slots, self.children):
+            arg_value, arg_type = arg_node.evaluate(frame)
+            if arg_type != param_type:
+                raise TypeError(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+            if values[slot] is not None:
+                raise ValueError(f"Erro de semântica: Variável '{param_name}' já foi declarada.")
+            # arg_type == param_type, que portanto já está normalizado
+            values[slot] = (arg_value, arg_type)
+
+        result = None
+        for statement in func_dec.children[0].children:
+            result = statement.evaluate(local_frame)
+            if isinstance(statement, ReturnNode):
+                break
+
+        if func_dec.func_type == 'void':
+            return None
+        elif func_dec.func_type == 'int' and result is None:
+            result = (0, 'int')
+        elif result is not None and result[1] != func_dec.func_type:
+            raise TypeError(f"Erro de tipo: Função '{self.name}' esperava retornar '{func_dec.func_type}' mas retornou '{result[1]}'")
+        return result
+
+class Resolver:
+    def __init__(self):
+        self.globals = FrameLayout()
+        self.function_locals = set()     # nomes declarados (ou parâmetros) em alguma função
+        self.nested_functions = set()    # funções declaradas dentro do corpo de outra função
+        # Nós já resolvidos que supõem "nenhuma função declara este nome"; no modo --stream uma função
+        # analisada depois pode invalidar a suposição, e eles voltam para a busca por nome
+        self.global_references = {}
+        self.global_calls = {}
+
+    def resolve(self, node):
+        self.collect(node, in_function=False)
+        return self.transform(node, self.globals, in_function=False)
+
+    def collect(self, node, in_function):
+        if node is None:
+            return
+        node_type = node_class(node)
+        if node_type is FuncDec:
+            if in_function:
+                self.add_nested_function(node.name)
+            for param_name, _ in node.params:
+                self.add_function_local(param_name)
+            self.collect(node.children[0], in_function=True)
+            return
+        if node_type is AssignNode and node.is_declaration and in_function:
+            self.add_function_local(node.identifier)
+        if node_type is ForNode and in_function:
+            self.add_function_local(node.counter)
+        for child in node.children:
+            self.collect(child, in_function)
+
+    def add_function_local(self, name):
+        if name not in self.function_locals:
+            self.function_locals.add(name)
+            for reference in self.global_references.pop(name, ()):
+                reference.depth = None
+
+    def add_nested_function(self, name):
+        if name not in self.nested_functions:
+            self.nested_functions.add(name)
+            for call in self.global_calls.pop(name, ()):
+                call.global_only = False
+
+    def address(self, name, layout, in_function):
+        if not in_function or name in layout.slots:
+            return LOCAL, layout.slot(name)
+        if name in self.function_locals:
+            return None, None
+        return GLOBAL, self.globals.slot(name)
+
+    def declarations(self, node, layout):
+        # Reserva slots para as declarações do corpo (sem entrar em funções aninhadas)
+        if node is None or node_class(node) is FuncDec:
+            return
+        if node_class(node) is AssignNode and node.is_declaration:
+            layout.slot(node.identifier)
+        if node_class(node) is ForNode:
+            layout.slot(node.counter)
+        for child in node.children:
+            self.declarations(child, layout)
+
+    def transform(self, node, layout, in_function):
+        if node is None:
+            return None
+        node_type = node_class(node)
+        if node_type is VarNode:
+            depth, slot = self.address(node.identifier, layout, in_function)
+            resolved = ResolvedVarNode(node.identifier, depth, slot)
+            if depth == GLOBAL:
+                self.global_references.setdefault(node.identifier, []).append(resolved)
+            return resolved
+        if node_type is AssignNode:
+            expression = self.transform(node.children[0], layout, in_function) if node.children else None
+            if node.is_declaration:
+                depth, slot = LOCAL, layout.slot(node.identifier)
+            else:
+                depth, slot = self.address(node.identifier, layout, in_function)
+            resolved = ResolvedAssignNode(node.identifier, expression, node.var_type, node.is_declaration, depth, slot)
+            if depth == GLOBAL:
+                self.global_references.setdefault(node.identifier, []).append(resolved)
+            return resolved
+        if node_type is FuncCall:
+            arguments = [self.transform(child, layout, in_function) for child in node.children]
+            resolved = ResolvedFuncCall(node.name, arguments, node.name not in self.nested_functions)
+            if resolved.global_only:
+                self.global_calls.setdefault(node.name, []).append(resolved)
+            return resolved
+        if node_type is FuncDec:
+            function_layout = FrameLayout()
+            resolved = copy.copy(node)
+            resolved.param_slots = [(param_name, param_type, function_layout.slot(param_name))
+                                    for param_name, param_type in node.params]
+            self.declarations(node.children[0], function_layout)
+            resolved.layout = function_layout
+            resolved.children = [self.transform(node.children[0], function_layout, in_function=True)]
+            return resolved
+        if node_type is ForNode:
+            # O for declara o contador por nome (Frame.set_variable), que precisa de um slot no quadro atual
+            layout.slot(node.counter)
+        # Demais nós: cópia rasa com os filhos resolvidos
+        resolved = copy.copy(node)
+        resolved.children = [self.transform(child, layout, in_function) for child in node.children]
+        return resolved
+
+class FrameInterpreter(Interpreter):
+    # Backend que resolve os endereços antes de executar o AST sobre quadros Frame
+    def __init__(self):
+        self.resolver = Resolver()
+        self.root = None
+
+    def root_frame(self, symbol_table):
+        # O quadro global fica acima da SymbolTable recebida, que continua servindo de último recurso
+        if self.root is None or self.root.parent is not symbol_table:
+            self.root = Frame(self.resolver.globals, parent=symbol_table)
+        missing = len(self.resolver.globals) - len(self.root.values)
+        if missing:
+            self.root.values.extend([None] * missing)
+        return self.root
+
+    def execute(self, node, symbol_table):
+        resolved = self.resolver.resolve(node)
+        return resolved.evaluate(self.root_frame(symbol_table))
+
+    def call_main(self, symbol_table):
+        main_call = self.resolver.resolve(FuncCall("main", []))
+        root = self.root_frame(symbol_table)
+        try:
+            root.get_function("main")
+            main_call.evaluate(root, global_table=root)
+        except ValueError:
+            pass
@@ -0,0 +1,421 @@
+# Serviço local de execução: um servidor HTTP com asyncio (em TCP ou num socket Unix) que recebe código
+# PatternScript (ou o caminho de um .pattern) e devolve os comandos emitidos em JSON, sem pagar a
+# inicialização do Python e a análise a cada pedido. Os programas analisados ficam num cache LRU com a
+# chave igual ao hash do código: na falta, um processo do conjunto analisa e executa o código e devolve o
+# AST em pickle, que o serviço guarda; nos acertos, o pickle vai junto com o pedido e o processo só o lê
+# (cada processo também mantém os últimos ASTs lidos). Os processos formam um conjunto limitado; pedidos
+# além do limite da fila são recusados, e um programa que passa do tempo limite tem o processo encerrado
+# e substituído. GET /stats mostra a fila, o acerto do cache e os percentis de latência.
+# Uso: python service.py [--port 8765 | --socket CAMINHO] [--workers N] [--cache-size N] [--timeout S]
+import argparse
+import asyncio
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict, deque
+
+import main
+from main import STITCHES, Parser, SymbolTable, create_interpreter
+
+SERVICE_PORT = 8765
+SERVICE_TIMEOUT = 30.0          # segundos por programa
+SERVICE_CACHE_SIZE = 256        # programas analisados guardados pelo serviço
+WORKER_CACHE_SIZE = 64          # ASTs já lidos guardados em cada processo
+SERVICE_MAX_QUEUE = 1024        # pedidos esperando um processo livre antes de recusar novos
+LATENCY_WINDOW = 10000          # últimos pedidos usados nos percentis
+MAX_REQUEST_BYTES = 64 * 2 ** 20
+BACKENDS = ('tree', 'closure', 'vm', 'frames')
+
+COMMAND_FIELDS = {
+    # Mesmas chaves de --output jsonl
+    'setup': ('kind', 'frameSize', 'threadColor'),
+    'drawLine': ('kind', 'x1', 'y1', 'x2', 'y2'),
+    'changeThread': ('kind', 'color'),
+    'print': ('kind', 'value'),
+}
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+# Processos do conjunto
+
+worker_asts = OrderedDict()     # chave -> AST, em cada processo
+
+def worker_ast(key, source, data):
+    # (AST, pickle novo ou None): do cache do processo, do pickle enviado ou analisando o código
+    ast = worker_asts.get(key)
+    if ast is not None:
+        worker_asts.move_to_end(key)
+        return ast, None
+    created = None
+    # Sem o coletor de ciclos, como no cache em disco: ele percorreria os nós recém-criados várias vezes
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        if data is not None:
+            ast = pickle.loads(data)
+        else:
+            ast = Parser.run(source)
+            try:
+                created = pickle.dumps(ast, protocol=pickle.HIGHEST_PROTOCOL)
+            except (RecursionError, pickle.PicklingError):
+                created = None
+    finally:
+        if collecting:
+            gc.enable()
+    worker_asts[key] = ast
+    if len(worker_asts) > WORKER_CACHE_SIZE:
+        worker_asts.popitem(last=False)
+    return ast, created
+
+def execute(job):
+    # Executa um pedido no processo atual: (resposta, pickle do AST quando ele foi analisado aqui)
+    key, source, data, backend, input_text = job
+    start = time.perf_counter()
+    created = None
+    error = None
+    STITCHES.reset()
+    try:
+        ast, created = worker_ast(key, source, data)
+        symbol_table = SymbolTable()
+        interpreter = create_interpreter(backend)
+        sys.stdin = io.StringIO(input_text)
+        with contextlib.redirect_stdout(io.StringIO()):
+            interpreter.execute(ast, symbol_table)
+            interpreter.call_main(symbol_table)
+    except EOFError:
+        error = "Erro: `scanf` sem entrada disponível (campo \"input\" do pedido)."
+    except Exception as e:
+        error = str(e)
+    commands = [dict(zip(COMMAND_FIELDS[command[0]], command)) for command in STITCHES.commands()]
+    response = {'status': 'ok' if error is None else 'erro', 'error': error, 'commands': commands,
+                'seconds': time.perf_counter() - start}
+    return response, created
+
+def worker(connection, vectorize):
+    # Laço de um processo: todos os comandos ficam no buffer até o fim do pedido
+    main.VECTORIZE_LOOPS = vectorize
+    STITCHES.sink = None
+    STITCHES.flush_rows = sys.maxsize
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        connection.send(execute(job))
+
+class WorkerPool:
+    # Processos ligados por Pipe; o laço do asyncio espera a resposta pelo descritor da conexão
+    def __init__(self, size, timeout=SERVICE_TIMEOUT, vectorize=True):
+        self.size = size
+        self.timeout = timeout
+        self.vectorize = vectorize
+        self.context = multiprocessing.get_context()
+        self.idle = None
+        self.waiting = 0    # pedidos na fila, à espera de um processo livre
+        self.running = 0
+        self.replaced = 0   # processos substituídos depois de tempo esgotado ou de uma falha
+
+    def start(self):
+        self.idle = asyncio.Queue()
+        for _ in range(self.size):
+            self.idle.put_nowait(self.start_worker())
+
+    def start_worker(self):
+        connection, child = self.context.Pipe()
+        process = self.context.Process(target=worker, args=(child, self.vectorize), daemon=True)
+        process.start()
+        child.close()
+        return process, connection
+
+    def stop_worker(self, process, connection):
+        if process.is_alive():
+            process.kill()
+        process.join()
+        connection.close()
+
+    async def run(self, job):
+        # (resposta, pickle novo) do processo, ou None se o tempo acabou; nesse caso, ou se o processo
+        # morreu, ele é substituído
+        self.waiting += 1
+        try:
+            process, connection = await self.idle.get()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        descriptor = connection.fileno()
+
+        def readable():
+            loop.remove_reader(descriptor)
+            if not ready.done():
+                ready.set_result(None)
+        try:
+            connection.send(job)
+            loop.add_reader(descriptor, readable)
+            try:
+                await asyncio.wait_for(ready, self.timeout)
+                result = connection.recv()
+            except (asyncio.TimeoutError, EOFError, OSError) as e:
+                loop.remove_reader(descriptor)
+                self.stop_worker(process, connection)
+                self.idle.put_nowait(self.start_worker())
+                self.replaced += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    return None
+                # O processo morreu no meio do pedido (ex.: falta de memória)
+                return {'status': 'erro', 'error': f"Erro: o processo terminou com código {process.exitcode}.",
+                        'commands': [], 'seconds': 0.0}, None
+            self.idle.put_nowait((process, connection))
+            return result
+        finally:
+            self.running -= 1
+
+    def close(self):
+        while self.idle is not None and not self.idle.empty():
+            process, connection = self.idle.get_nowait()
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            process.join(1)
+            self.stop_worker(process, connection)
+
+class ProgramCache:
+    # Pickle do AST por hash do código, dos usados há mais tempo para os mais recentes
+    def __init__(self, capacity=SERVICE_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def store(self, key, data):
+        self.entries[key] = data
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes': sum(len(data) for data in self.entries.values())}
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+class RenderService:
+    def __init__(self, workers=None, cache_size=SERVICE_CACHE_SIZE, timeout=SERVICE_TIMEOUT,
+                 max_queue=SERVICE_MAX_QUEUE, root=None, vectorize=True):
+        self.pool = WorkerPool(workers or os.cpu_count() or 1, timeout, vectorize)
+        self.cache = ProgramCache(cache_size)
+        self.max_queue = max_queue
+        self.root = os.path.realpath(root or os.getcwd())
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.started = time.time()
+        self.server = None
+        self.connections = {}   # tarefa de cada conexão aberta -> writer
+
+    def read_program(self, request):
+        # Código do pedido: campo "source" ou "file" (caminho dentro do diretório raiz do serviço)
+        if isinstance(request.get('source'), str):
+            return request['source']
+        filename = request.get('file')
+        if not isinstance(filename, str):
+            raise ValueError("Erro: o pedido precisa do campo \"source\" ou \"file\".")
+        path = os.path.realpath(os.path.join(self.root, filename))
+        if os.path.commonpath([self.root, path]) != self.root or not path.endswith('.pattern'):
+            raise ValueError(f"Erro: {filename} não é um arquivo .pattern do diretório do serviço.")
+        try:
+            with open(path, 'r') as file:
+                return file.read()
+        except OSError:
+            raise ValueError(f"Erro: O arquivo {filename} não foi encontrado.")
+
+    async def render(self, request):
+        # (código HTTP, resposta) para um pedido já decodificado
+        try:
+            source = self.read_program(request)
+            backend = request.get('backend', 'tree')
+            if backend not in BACKENDS:
+                raise ValueError(f"Erro: backend desconhecido: {backend}")
+            input_text = request.get('input', '')
+            if not isinstance(input_text, str):
+                raise ValueError("Erro: o campo \"input\" deve ser um texto.")
+        except ValueError as e:
+            return 400, {'status': 'erro', 'error': str(e)}
+        if self.pool.waiting >= self.max_queue:
+            self.rejected += 1
+            return 503, {'status': 'erro', 'error': "Erro: fila cheia, tente de novo."}
+
+        start = time.perf_counter()
+        key = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        data = self.cache.get(key)
+        result = await self.pool.run((key, source, data, backend, input_text))
+        self.requests += 1
+        if result is None:
+            self.timeouts += 1
+            return 504, {'status': 'erro', 'error': f"Erro: tempo limite de {self.pool.timeout:g}s esgotado."}
+        response, created = result
+        if created is not None:
+            self.cache.store(key, created)
+        response['cached'] = data is not None
+        self.latencies.append(time.perf_counter() - start)
+        return 200, response
+
+    def stats(self):
+        ordered = sorted(self.latencies)
+        return {
+            'requests': self.requests, 'rejected': self.rejected, 'timeouts': self.timeouts,
+            'queue_depth': self.pool.waiting, 'running': self.pool.running, 'workers': self.pool.size,
+            'workers_replaced': self.pool.replaced, 'uptime': time.time() - self.started,
+            'cache': self.cache.stats(),
+            'latency_ms': {name: 1000 * percentile(ordered, fraction)
+                           for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))},
+        }
+
+    async def respond(self, method, path, body):
+        if path == '/run':
+            if method != 'POST':
+                return 405, {'status': 'erro', 'error': "Erro: use POST em /run."}
+            try:
+                request = json.loads(body)
+            except ValueError:
+                return 400, {'status': 'erro', 'error': "Erro: o corpo do pedido não é JSON válido."}
+            if not isinstance(request, dict):
+                return 400, {'status': 'erro', 'error': "Erro: o corpo do pedido deve ser um objeto JSON."}
+            return await self.render(request)
+        if path == '/stats' and method == 'GET':
+            return 200, self.stats()
+        return 404, {'status': 'erro', 'error': f"Erro: caminho desconhecido: {method} {path}"}
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 mínimo, com conexões persistentes
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                if len(parts) != 3 or length > MAX_REQUEST_BYTES:
+                    status, response = (413, {'status': 'erro', 'error': "Erro: pedido grande demais."}) \
+                        if len(parts) == 3 else (400, {'status': 'erro', 'error': "Erro: pedido HTTP inválido."})
+                    self.write(writer, status, response, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, response = await self.respond(parts[0], parts[1], body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.write(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    def write(self, writer, status, response, keep_alive):
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                     .encode('latin-1') + body)
+
+    async def start(self, host='127.0.0.1', port=SERVICE_PORT, socket_path=None):
+        self.pool.start()
+        if socket_path:
+            self.server = await asyncio.start_unix_server(self.handle, socket_path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            # Fecha as conexões paradas à espera do próximo pedido, para que as tarefas terminem sozinhas
+            for writer in self.connections.values():
+                writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        self.pool.close()
+
+async def serve(service, host, port, socket_path):
+    server = await service.start(host, port, socket_path)
+    if socket_path:
+        address = socket_path
+    else:
+        host, port = server.sockets[0].getsockname()[:2]
+        address = f"{host}:{port}"
+    print(f"Serviço PatternScript em {address} ({service.pool.size} processos)", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+def main_service():
+    arg_parser = argparse.ArgumentParser(description="Serviço local de execução de programas PatternScript.")
+    arg_parser.add_argument('--host', default='127.0.0.1', help="endereço TCP (padrão 127.0.0.1)")
+    arg_parser.add_argument('--port', type=int, default=SERVICE_PORT, help=f"porta TCP (padrão {SERVICE_PORT})")
+    arg_parser.add_argument('--socket', metavar='CAMINHO', help="escuta neste socket Unix em vez de TCP")
+    arg_parser.add_argument('--workers', type=int, help="processos de execução (padrão: número de núcleos)")
+    arg_parser.add_argument('--cache-size', type=int, default=SERVICE_CACHE_SIZE,
+                            help=f"programas analisados guardados (padrão {SERVICE_CACHE_SIZE})")
+    arg_parser.add_argument('--timeout', type=float, default=SERVICE_TIMEOUT,
+                            help=f"segundos por programa antes de interrompê-lo (padrão {SERVICE_TIMEOUT:g})")
+    arg_parser.add_argument('--max-queue', type=int, default=SERVICE_MAX_QUEUE,
+                            help=f"pedidos à espera antes de recusar novos (padrão {SERVICE_MAX_QUEUE})")
+    arg_parser.add_argument('--root', metavar='DIRETÓRIO',
+                            help="diretório dos arquivos pedidos pelo campo \"file\" (padrão: diretório atual)")
+    arg_parser.add_argument('--no-vectorize', action='store_true',
+                            help="interpreta cada iteração dos laços que só desenham, sem o caminho rápido com NumPy")
+    args = arg_parser.parse_args()
+    for name in ('workers', 'cache_size', 'max_queue'):
+        value = getattr(args, name)
+        if value is not None and value < 1:
+            arg_parser.error(f"--{name.replace('_', '-')} deve ser um inteiro positivo")
+    if args.timeout <= 0:
+        arg_parser.error("--timeout deve ser positivo")
+
+    service = RenderService(args.workers, args.cache_size, args.timeout, args.max_queue, args.root,
+                            not args.no_vectorize)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main_service()
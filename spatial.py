@@ -0,0 +1,234 @@
+# Índice espacial dos drawLine e limpeza do desenho. SegmentIndex é uma grade uniforme: cada segmento é
+# registrado só nas células que ele atravessa, e uma consulta por retângulo visita apenas as células do
+# retângulo. SegmentCleaner é um sink do StitchBuffer que, durante a execução, corta as linhas na área do
+# bastidor (0..frameSize, definida pelo último setup) e descarta pontos repetidos: linhas idênticas (em
+# qualquer sentido) e trechos colineares já bordados com a mesma cor de linha.
+from bisect import bisect_left
+from fractions import Fraction
+from math import gcd, hypot
+
+from stitches import StitchBuffer, SETUP, DRAW_LINE, CHANGE_THREAD
+
+INDEX_CELL_SIZE = 16
+
+def clip_segment(x1, y1, x2, y2, x_min, y_min, x_max, y_max):
+    # Liang-Barsky com frações exatas: trecho dentro do retângulo (bordas incluídas) ou None
+    if x_min <= min(x1, x2) and max(x1, x2) <= x_max and y_min <= min(y1, y2) and max(y1, y2) <= y_max:
+        return x1, y1, x2, y2
+    dx = x2 - x1
+    dy = y2 - y1
+    low, high = Fraction(0), Fraction(1)
+    for p, q in ((-dx, x1 - x_min), (dx, x_max - x1), (-dy, y1 - y_min), (dy, y_max - y1)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = Fraction(q, p)
+        if p < 0:
+            if t > high:
+                return None
+            if t > low:
+                low = t
+        else:
+            if t < low:
+                return None
+            if t < high:
+                high = t
+    return x1 + dx * low, y1 + dy * low, x1 + dx * high, y1 + dy * high
+
+def segment_length(x1, y1, x2, y2):
+    return hypot(x2 - x1, y2 - y1)
+
+class SegmentIndex:
+    # Grade uniforme de células cell x cell: (coluna, linha) -> ids dos segmentos que passam pela célula
+    def __init__(self, cell_size=INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.segments = []
+
+    def __len__(self):
+        return len(self.segments)
+
+    def cells_of(self, x1, y1, x2, y2):
+        # Células atravessadas pelo segmento, faixa de colunas por faixa de colunas
+        cell = self.cell_size
+        if x1 > x2:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        first_column, last_column = int(x1 // cell), int(x2 // cell)
+        if first_column == last_column:
+            first_row, last_row = sorted((int(y1 // cell), int(y2 // cell)))
+            for row in range(first_row, last_row + 1):
+                yield first_column, row
+            return
+        slope = (y2 - y1) / (x2 - x1)
+        for column in range(first_column, last_column + 1):
+            # Trecho do segmento dentro da faixa vertical da coluna
+            strip_start = max(x1, column * cell)
+            strip_end = min(x2, (column + 1) * cell)
+            first_row, last_row = sorted((int((y1 + (strip_start - x1) * slope) // cell),
+                                          int((y1 + (strip_end - x1) * slope) // cell)))
+            for row in range(first_row, last_row + 1):
+                yield column, row
+
+    def insert(self, x1, y1, x2, y2):
+        segment_id = len(self.segments)
+        self.segments.append((x1, y1, x2, y2))
+        cells = self.cells
+        cell = self.cell_size
+        column, row = int(x1 // cell), int(y1 // cell)
+        if column == int(x2 // cell) and row == int(y2 // cell):
+            # Caso comum dos pontos curtos: uma célula só
+            entries = cells.get((column, row))
+            if entries is None:
+                cells[column, row] = [segment_id]
+            else:
+                entries.append(segment_id)
+            return segment_id
+        for key in self.cells_of(x1, y1, x2, y2):
+            entries = cells.get(key)
+            if entries is None:
+                cells[key] = [segment_id]
+            else:
+                entries.append(segment_id)
+        return segment_id
+
+    def query(self, x_min, y_min, x_max, y_max):
+        # Ids (em ordem de inserção) dos segmentos que tocam o retângulo
+        cell = self.cell_size
+        cells = self.cells
+        candidates = set()
+        for column in range(int(x_min // cell), int(x_max // cell) + 1):
+            for row in range(int(y_min // cell), int(y_max // cell) + 1):
+                entries = cells.get((column, row))
+                if entries:
+                    candidates.update(entries)
+        segments = self.segments
+        return sorted(segment_id for segment_id in candidates
+                      if clip_segment(*segments[segment_id], x_min, y_min, x_max, y_max) is not None)
+
+class CollinearCoverage:
+    # Trechos já bordados de cada reta, como intervalos disjuntos do parâmetro t = x*dx + y*dy, onde (dx, dy)
+    # é a direção reduzida da reta; pontos inteiros da reta ficam a múltiplos de dx² + dy² em t
+    def __init__(self):
+        self.lines = {}
+
+    def add(self, x1, y1, x2, y2, color):
+        # Devolve os pedaços de (x1, y1)-(x2, y2) ainda não cobertos, no sentido original, e os marca
+        dx, dy = x2 - x1, y2 - y1
+        divisor = gcd(dx, dy)
+        dx, dy = dx // divisor, dy // divisor
+        if dx < 0 or (dx == 0 and dy < 0):
+            dx, dy = -dx, -dy
+        key = (color, dx, dy, dx * y1 - dy * x1)
+        line = self.lines.get(key)
+        if line is None:
+            line = self.lines[key] = (x1, y1, x1 * dx + y1 * dy, [], [])
+        origin_x, origin_y, origin_t, starts, ends = line
+        start_t, end_t = x1 * dx + y1 * dy, x2 * dx + y2 * dy
+        low, high = min(start_t, end_t), max(start_t, end_t)
+
+        first = bisect_left(ends, low)
+        last = first
+        pieces = []
+        cursor = low
+        while last < len(starts) and starts[last] <= high:
+            if starts[last] > cursor:
+                pieces.append((cursor, starts[last]))
+            cursor = max(cursor, ends[last])
+            last += 1
+        if cursor < high:
+            pieces.append((cursor, high))
+        if first < last:
+            starts[first:last] = [min(low, starts[first])]
+            ends[first:last] = [max(high, ends[last - 1])]
+        else:
+            starts.insert(first, low)
+            ends.insert(first, high)
+
+        if len(pieces) == 1 and pieces[0] == (low, high):
+            return [(x1, y1, x2, y2)]
+        norm = dx * dx + dy * dy
+        points = [((origin_x + (t - origin_t) // norm * dx, origin_y + (t - origin_t) // norm * dy),
+                   (origin_x + (u - origin_t) // norm * dx, origin_y + (u - origin_t) // norm * dy))
+                  for t, u in pieces]
+        if start_t > end_t:
+            return [(b[0], b[1], a[0], a[1]) for a, b in reversed(points)]
+        return [(a[0], a[1], b[0], b[1]) for a, b in points]
+
+class SegmentCleaner:
+    # Sink entre a execução e as saídas: repassa os comandos ao sink seguinte já com as linhas cortadas no
+    # bastidor e sem repetições. Com `index`, as linhas que sobram também são registradas nele.
+    def __init__(self, downstream, clip=True, dedupe=True, index=None):
+        self.output = StitchBuffer(downstream)
+        self.clip = clip
+        self.dedupe = dedupe
+        self.index = index
+        self.frame_size = None
+        self.seen = set()
+        self.coverage = CollinearCoverage()
+        self.lines = 0
+        self.outside = 0
+        self.clipped = 0
+        self.duplicates = 0
+        self.overlaps = 0
+        self.trimmed = 0
+        self.length_before = 0.0
+        self.length_after = 0.0
+
+    def write(self, buffer):
+        output = self.output
+        color_table = buffer.color_table
+        for row, (kind, x1, y1, x2, y2, color) in enumerate(buffer.rows()):
+            if kind == DRAW_LINE:
+                if type(x1) is int and type(y1) is int and type(x2) is int and type(y2) is int:
+                    self.draw_line(x1, y1, x2, y2, color)
+                else:
+                    output.draw_line(x1, y1, x2, y2)
+            elif kind == CHANGE_THREAD:
+                output.change_thread(color_table[color])
+            elif kind == SETUP:
+                self.frame_size = x1 if type(x1) is int else None
+                output.setup(x1, color_table[color])
+            else:
+                output.print_value(buffer.objects[row])
+        output.flush()
+
+    def draw_line(self, x1, y1, x2, y2, color):
+        self.lines += 1
+        self.length_before += segment_length(x1, y1, x2, y2)
+        if self.clip and self.frame_size is not None:
+            clipped = clip_segment(x1, y1, x2, y2, 0, 0, self.frame_size, self.frame_size)
+            if clipped is None:
+                self.outside += 1
+                return
+            if clipped != (x1, y1, x2, y2):
+                self.clipped += 1
+                x1, y1, x2, y2 = (round(value) for value in clipped)
+        pieces = [(x1, y1, x2, y2)]
+        if self.dedupe:
+            key = (color, x1, y1, x2, y2) if (x1, y1) <= (x2, y2) else (color, x2, y2, x1, y1)
+            if key in self.seen:
+                self.duplicates += 1
+                return
+            self.seen.add(key)
+            if (x1, y1) != (x2, y2):
+                pieces = self.coverage.add(x1, y1, x2, y2, color)
+                if not pieces:
+                    self.overlaps += 1
+                    return
+                if len(pieces) > 1 or pieces[0] != (x1, y1, x2, y2):
+                    self.trimmed += 1
+        output = self.output
+        for piece in pieces:
+            output.draw_line(*piece)
+            self.length_after += segment_length(*piece)
+            if self.index is not None:
+                self.index.insert(*piece)
+
+    def close(self):
+        self.output.flush()
+
+    def report(self):
+        return (f"Limpeza: {self.lines} linhas, {self.outside} fora do bastidor, {self.clipped} cortadas, "
+                f"{self.duplicates} repetidas, {self.overlaps} cobertas por outras, {self.trimmed} aparadas; "
+                f"comprimento {self.length_before:.1f} -> {self.length_after:.1f}")
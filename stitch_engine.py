@@ -0,0 +1,198 @@
+# Pontos de agulha (--stitches): cada drawLine vira as perfurações que a máquina faz, com no máximo
+# `length` unidades entre dois pontos (o segmento é dividido em partes iguais). Modos: running (ponto
+# corrido), triple (cada ponto vai, volta e vai de novo, para uma linha mais grossa) e satin (zigue-zague
+# entre dois drawLine seguidos da mesma cor, desenhados no mesmo sentido, com `spacing` unidades entre as
+# colunas; uma linha sem par fica em ponto corrido). Todos os pontos de um bloco do StitchBuffer são
+# calculados de uma vez com NumPy: os segmentos viram itens, e um único np.repeat dá a cada ponto o item e a
+# posição dentro dele, como um linspace de todos os segmentos juntos. O resultado é um buffer colunar de
+# pontos inteiros (x, y, id da cor, flags); o primeiro ponto de um item que não começa onde a agulha está
+# é um salto (JUMP), e o primeiro ponto depois de uma troca de cor leva COLOR_CHANGE.
+import json
+
+import numpy as np
+
+from stitches import DRAW_LINE
+
+STITCH_MODES = ('running', 'triple', 'satin')
+STITCH_LENGTH = 30     # unidades (0,1 mm no DST com escala 1)
+SATIN_SPACING = 4
+JUMP = 1
+COLOR_CHANGE = 2
+POINT_LIMIT = 2 ** 31 - 1
+
+def expand(counts):
+    # Item e posição dentro do item (0 .. count - 1) de cada ponto de todos os itens
+    item = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(len(item)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return item, local
+
+def divisions(x1, y1, x2, y2, length):
+    # Partes iguais de no máximo `length` em cada segmento (pelo menos uma)
+    return np.maximum(np.ceil(np.hypot(x2 - x1, y2 - y1) / length), 1).astype(np.int64)
+
+def item_points(a, b, paired, mode, length, spacing):
+    # a, b: coordenadas (4 x itens) do segmento e do par (igual a `a` sem par). Devolve o item de cada
+    # ponto e as posições em float, na ordem de costura
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+    single = divisions(ax1, ay1, ax2, ay2, length)
+    if mode == 'satin':
+        wide = np.maximum(divisions(ax1, ay1, ax2, ay2, spacing), divisions(bx1, by1, bx2, by2, spacing))
+        steps = np.where(paired, wide, single)
+        # Com par: A0, B0, A1, B1, ..., An, Bn; sem par: ponto corrido
+        item, local = expand(np.where(paired, 2 * (steps + 1), steps + 1))
+        pair = paired[item]
+        k = np.where(pair, local // 2, local)
+        rail = pair & (local % 2 == 1)
+    else:
+        steps = single
+        if mode == 'triple':
+            # Depois do primeiro ponto, cada passo k vira k, k - 1, k
+            item, local = expand(3 * steps + 1)
+            k = np.where(local == 0, 0, (local - 1) // 3 + 1 - ((local - 1) % 3 == 1))
+        else:
+            item, local = expand(steps + 1)
+            k = local
+        rail = None
+    t = k / steps[item]
+    x = ax1[item] + (ax2 - ax1)[item] * t
+    y = ay1[item] + (ay2 - ay1)[item] * t
+    if rail is not None:
+        x = np.where(rail, bx1[item] + (bx2 - bx1)[item] * t, x)
+        y = np.where(rail, by1[item] + (by2 - by1)[item] * t, y)
+    return item, local, x, y
+
+class StitchPoints:
+    # Buffer colunar dos pontos: blocos de arrays NumPy, juntados sob demanda
+    def __init__(self):
+        self.blocks = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, x, y, colors, flags):
+        self.blocks.append((x, y, colors, flags))
+        self.count += len(x)
+
+    def arrays(self):
+        # (x, y, cores, flags) de todos os pontos
+        if not self.blocks:
+            return (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32),
+                    np.zeros(0, dtype=np.uint8))
+        if len(self.blocks) > 1:
+            self.blocks = [tuple(np.concatenate(column) for column in zip(*self.blocks))]
+        return self.blocks[0]
+
+    def save(self, file, color_table):
+        x, y, colors, flags = self.arrays()
+        np.savez(file, x=x, y=y, colors=colors, flags=flags,
+                 color_table=np.array([json.dumps(color_table, ensure_ascii=False)]))
+
+def load_points(file):
+    # (x, y, cores, flags, tabela de cores) gravados por StitchPoints.save
+    with np.load(file) as data:
+        return (data['x'], data['y'], data['colors'], data['flags'], json.loads(str(data['color_table'][0])))
+
+class StitchSink:
+    # Sink do StitchBuffer: converte os drawLine de cada bloco em pontos, sem guardar os segmentos
+    def __init__(self, mode='running', length=STITCH_LENGTH, spacing=SATIN_SPACING):
+        self.mode = mode
+        self.length = length
+        self.spacing = spacing
+        self.points = StitchPoints()
+        self.color_table = []
+        self.position = None         # última posição da agulha
+        self.color = None            # cor do último ponto
+        self.pending = None          # no satin, última linha do bloco anterior, ainda sem par
+
+    def write(self, buffer):
+        self.color_table = buffer.color_table
+        kinds = np.frombuffer(buffer.kinds, dtype=np.uint8)
+        lines = kinds == DRAW_LINE
+        invalid = min((row for row in buffer.objects if lines[row]), default=None)
+        if invalid is not None:
+            # As linhas antes da primeira inválida viram pontos, para o .npz guardar o desenho até o erro
+            lines[invalid:] = False
+        if lines.any():
+            self.stitch_lines(buffer, lines)
+        if invalid is not None:
+            value = buffer.objects[invalid]
+            raise TypeError(f"Erro: drawLine{tuple(value)} não tem coordenadas inteiras e não pode virar pontos de bordado.")
+
+    def stitch_lines(self, buffer, lines):
+        segments = np.stack([np.frombuffer(column, dtype=np.int64)[lines]
+                             for column in (buffer.x1, buffer.y1, buffer.x2, buffer.y2)])
+        colors = np.frombuffer(buffer.colors, dtype=np.int32)[lines]
+        if self.pending is not None:
+            segments = np.concatenate([self.pending[0], segments], axis=1)
+            colors = np.concatenate([self.pending[1], colors])
+            self.pending = None
+        self.stitch(segments, colors, final=False)
+
+    def close(self):
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            self.stitch(*pending, final=True)
+
+    def stitch(self, segments, colors, final):
+        count = segments.shape[1]
+        paired = np.zeros(count, dtype=bool)
+        if self.mode == 'satin':
+            # Pares de linhas seguidas da mesma cor: posições 0-1, 2-3, ... dentro de cada trecho de uma cor
+            starts = np.flatnonzero(np.concatenate([[True], colors[1:] != colors[:-1]]))
+            position = np.arange(count) - np.repeat(starts, np.diff(np.append(starts, count)))
+            same_next = np.append(colors[1:] == colors[:-1], False)
+            first = (position % 2 == 0)
+            if not final and first[-1]:
+                # A última linha pode ter o par no próximo bloco
+                self.pending = (segments[:, -1:], colors[-1:])
+                segments, colors = segments[:, :-1], colors[:-1]
+                first, same_next = first[:-1], same_next[:-1]
+                count -= 1
+                if not count:
+                    return
+            lead = np.flatnonzero(first)
+            paired = same_next[lead]
+            partner = np.where(paired, lead + 1, lead)
+            a, b, colors = segments[:, lead], segments[:, partner], colors[lead]
+        else:
+            a = b = segments
+        item, local, x, y = item_points(a.astype(np.float64), b.astype(np.float64), paired, self.mode,
+                                        self.length, self.spacing)
+        x = np.rint(x)
+        y = np.rint(y)
+        if len(x) and max(np.abs(x).max(), np.abs(y).max()) > POINT_LIMIT:
+            raise ValueError("Erro: coordenada grande demais para os pontos de bordado.")
+        x = x.astype(np.int32)
+        y = y.astype(np.int32)
+
+        # O primeiro ponto de um item é um salto se a agulha não estiver nele, e é descartado se estiver
+        first = np.flatnonzero(local == 0)
+        last = np.append(first[1:], len(x)) - 1
+        previous_x = np.concatenate([[np.int32(0)], x[last[:-1]]])
+        previous_y = np.concatenate([[np.int32(0)], y[last[:-1]]])
+        continues = (x[first] == previous_x) & (y[first] == previous_y)
+        continues[0] = self.position == (int(x[0]), int(y[0]))
+        keep = np.ones(len(x), dtype=bool)
+        keep[first[continues]] = False
+        flags = np.zeros(len(x), dtype=np.uint8)
+        flags[first[~continues]] = JUMP
+        self.position = (int(x[-1]), int(y[-1]))
+        x, y, point_colors, flags = x[keep], y[keep], colors[item][keep], flags[keep]
+
+        # A troca de cor fica no primeiro ponto com a cor nova (a cor do setup não conta como troca)
+        changed = point_colors != np.concatenate([[self.color], point_colors[:-1]])
+        if self.color is None:
+            changed[0] = False
+        flags[changed] |= COLOR_CHANGE
+        self.color = int(point_colors[-1])
+        self.points.append(x, y, point_colors.astype(np.int32), flags)
+
+    def report(self):
+        _, _, _, flags = self.points.arrays()
+        jumps = int(np.count_nonzero(flags & JUMP))
+        changes = int(np.count_nonzero(flags & COLOR_CHANGE))
+        detail = f"passo {self.length:g}" + (f", colunas a cada {self.spacing:g}" if self.mode == 'satin' else "")
+        return (f"Pontos de bordado ({self.mode}, {detail}): {len(self.points)} pontos, "
+                f"{len(self.points) - jumps} costurados, {jumps} saltos, {changes} trocas de cor")
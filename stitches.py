@@ -0,0 +1,264 @@
+# Buffer colunar dos comandos de bordado. Em vez de formatar e imprimir cada comando, os nós gravam
+# setup/drawLine/changeThread em colunas `array` (x1, y1, x2, y2, id da cor internada e tipo do comando);
+# a saída é produzida em blocos por um sink: texto legível, JSON Lines ou um dump binário das colunas.
+import json
+import struct
+import sys
+from array import array
+
+COMMAND_KINDS = ('setup', 'drawLine', 'changeThread', 'print')
+SETUP, DRAW_LINE, CHANGE_THREAD, PRINT = range(len(COMMAND_KINDS))
+
+NO_COLOR = -1
+STITCH_FLUSH_ROWS = 1 << 16   # linhas acumuladas antes de entregar o bloco ao sink
+
+# Bloco binário: cabeçalho, colunas (little-endian) e JSON com as cores novas e os valores não inteiros
+BINARY_MAGIC = b'PSTB'
+BINARY_HEADER = struct.Struct('<4sIII')   # magic, linhas, bytes da tabela de cores, bytes dos objetos
+COORDINATE_CODE = 'q'
+COLOR_CODE = 'i'
+
+class StitchBuffer:
+    def __init__(self, sink=None, flush_rows=STITCH_FLUSH_ROWS):
+        self.sink = sink
+        self.flush_rows = flush_rows
+        self.color_table = []     # id -> valor da cor
+        self.color_ids = {}
+        self.current_color = NO_COLOR
+        self.clear()
+
+    def clear(self):
+        # Descarta as linhas; a tabela de cores e a cor atual continuam valendo
+        self.kinds = array('B')
+        self.x1 = array(COORDINATE_CODE)
+        self.y1 = array(COORDINATE_CODE)
+        self.x2 = array(COORDINATE_CODE)
+        self.y2 = array(COORDINATE_CODE)
+        self.colors = array(COLOR_CODE)
+        # Linha -> valores que não cabem num inteiro de 64 bits (strings, inteiros enormes) e valores de print
+        self.objects = {}
+
+    def reset(self):
+        self.clear()
+        self.color_table = []
+        self.color_ids = {}
+        self.current_color = NO_COLOR
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def intern_color(self, color):
+        color_id = self.color_ids.get(color)
+        if color_id is None:
+            color_id = self.color_ids[color] = len(self.color_table)
+            self.color_table.append(color)
+        return color_id
+
+    # Gravação
+
+    def _append(self, kind, x1, y1, x2, y2):
+        row = len(self.kinds)
+        try:
+            self.x1.append(x1)
+            self.y1.append(y1)
+            self.x2.append(x2)
+            self.y2.append(y2)
+        except (TypeError, OverflowError):
+            for column in (self.x1, self.y1, self.x2, self.y2):
+                del column[row:]
+                column.append(0)
+            self.objects[row] = (x1, y1, x2, y2)
+        self.kinds.append(kind)
+        self.colors.append(self.current_color)
+        if row + 1 >= self.flush_rows:
+            self.flush()
+
+    def setup(self, frame_size, thread_color):
+        self.current_color = self.intern_color(thread_color)
+        self._append(SETUP, frame_size, 0, 0, 0)
+
+    def draw_line(self, x1, y1, x2, y2):
+        self._append(DRAW_LINE, x1, y1, x2, y2)
+
+    def draw_lines(self, x1, y1, x2, y2):
+        # Várias linhas de uma vez, com a cor atual; as coordenadas vêm em colunas int64 contíguas
+        # (ex.: arrays NumPy) e são copiadas em bloco, respeitando flush_rows
+        count = len(x1)
+        start = 0
+        while start < count:
+            end = min(count, start + max(self.flush_rows - len(self.kinds), 1))
+            rows = end - start
+            for column, values in ((self.x1, x1), (self.y1, y1), (self.x2, x2), (self.y2, y2)):
+                column.frombytes(values[start:end].tobytes())
+            self.kinds.frombytes(bytes((DRAW_LINE,)) * rows)
+            self.colors.extend(array(COLOR_CODE, (self.current_color,)) * rows)
+            start = end
+            if len(self.kinds) >= self.flush_rows:
+                self.flush()
+
+    def change_thread(self, color):
+        self.current_color = self.intern_color(color)
+        self._append(CHANGE_THREAD, 0, 0, 0, 0)
+
+    def print_value(self, value):
+        self.objects[len(self.kinds)] = value
+        self._append(PRINT, 0, 0, 0, 0)
+
+    def flush(self):
+        # Entrega as linhas acumuladas ao sink; sem sink elas ficam no buffer para consumo direto
+        # As linhas saem do buffer mesmo se o sink falhar: assim uma nova entrega não repete o mesmo bloco
+        if self.sink is not None and len(self.kinds):
+            try:
+                self.sink.write(self)
+            finally:
+                self.clear()
+
+    # Consumo
+
+    def rows(self):
+        # (tipo, x1, y1, x2, y2, id da cor) com os valores originais nas linhas que usam `objects`
+        columns = zip(self.kinds, self.x1, self.y1, self.x2, self.y2, self.colors)
+        objects = self.objects
+        if not objects:
+            yield from columns
+            return
+        for row, (kind, x1, y1, x2, y2, color) in enumerate(columns):
+            if row in objects and kind != PRINT:
+                x1, y1, x2, y2 = objects[row]
+            yield kind, x1, y1, x2, y2, color
+
+    def commands(self):
+        # Gerador preguiçoso: ('setup', frameSize, cor), ('drawLine', x1, y1, x2, y2),
+        # ('changeThread', cor) e ('print', valor)
+        color_table = self.color_table
+        for row, (kind, x1, y1, x2, y2, color) in enumerate(self.rows()):
+            if kind == DRAW_LINE:
+                yield 'drawLine', x1, y1, x2, y2
+            elif kind == CHANGE_THREAD:
+                yield 'changeThread', color_table[color]
+            elif kind == SETUP:
+                yield 'setup', x1, color_table[color]
+            else:
+                yield 'print', self.objects[row]
+
+    def segments(self):
+        # Apenas os drawLine, com a cor ativa no momento: (x1, y1, x2, y2, cor ou None)
+        color_table = self.color_table
+        for kind, x1, y1, x2, y2, color in self.rows():
+            if kind == DRAW_LINE:
+                yield x1, y1, x2, y2, (color_table[color] if color != NO_COLOR else None)
+
+    @staticmethod
+    def load(file):
+        # Lê todos os blocos gravados por BinarySink num único buffer
+        buffer = StitchBuffer()
+        while True:
+            header = file.read(BINARY_HEADER.size)
+            if not header:
+                return buffer
+            magic, rows, table_size, objects_size = BINARY_HEADER.unpack(header)
+            if magic != BINARY_MAGIC:
+                raise ValueError("Erro: arquivo binário de pontos inválido.")
+            offset = len(buffer)
+            buffer.kinds.frombytes(file.read(rows))
+            for column in (buffer.x1, buffer.y1, buffer.x2, buffer.y2, buffer.colors):
+                block = array(column.typecode)
+                block.frombytes(file.read(rows * block.itemsize))
+                if sys.byteorder == 'big':
+                    block.byteswap()
+                column.extend(block)
+            for color in json.loads(file.read(table_size)):
+                buffer.intern_color(color)
+            for row, value in json.loads(file.read(objects_size)).items():
+                buffer.objects[offset + int(row)] = tuple(value) if isinstance(value, list) else value
+
+class TextSink:
+    # Mesmo texto que os comandos imprimiam, escrito em blocos grandes. Sem arquivo, usa o sys.stdout atual.
+    def __init__(self, file=None, chunk_lines=4096):
+        self.file = file
+        self.chunk_lines = chunk_lines
+
+    def write(self, buffer):
+        file = self.file if self.file is not None else sys.stdout
+        color_table = buffer.color_table
+        lines = []
+        for row, (kind, x1, y1, x2, y2, color) in enumerate(buffer.rows()):
+            if kind == DRAW_LINE:
+                lines.append(f"Desenhando linha de ({x1}, {y1}) para ({x2}, {y2})")
+            elif kind == CHANGE_THREAD:
+                lines.append(f"Mudando cor do fio para {color_table[color]}")
+            elif kind == SETUP:
+                lines.append(f"Configuração: frameSize={x1}, threadColor={color_table[color]}")
+            else:
+                lines.append(str(buffer.objects[row]))
+            if len(lines) >= self.chunk_lines:
+                lines.append('')
+                file.write('\n'.join(lines))
+                lines = []
+        if lines:
+            lines.append('')
+            file.write('\n'.join(lines))
+
+class JsonLinesSink:
+    # Um objeto JSON por comando, com as chaves da própria linguagem
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, buffer):
+        # Linhas só com inteiros são formatadas direto; cores e valores arbitrários passam por json.dumps
+        objects = buffer.objects
+        colors = [json.dumps(color, ensure_ascii=False) for color in buffer.color_table]
+        lines = []
+        for row, (kind, x1, y1, x2, y2, color) in enumerate(buffer.rows()):
+            if kind == DRAW_LINE:
+                if row in objects:
+                    x1, y1, x2, y2 = [json.dumps(value, ensure_ascii=False) for value in objects[row]]
+                lines.append(f'{{"kind": "drawLine", "x1": {x1}, "y1": {y1}, "x2": {x2}, "y2": {y2}}}')
+            elif kind == CHANGE_THREAD:
+                lines.append(f'{{"kind": "changeThread", "color": {colors[color]}}}')
+            elif kind == SETUP:
+                frame_size = json.dumps(x1, ensure_ascii=False) if row in objects else x1
+                lines.append(f'{{"kind": "setup", "frameSize": {frame_size}, "threadColor": {colors[color]}}}')
+            else:
+                lines.append(f'{{"kind": "print", "value": {json.dumps(objects[row], ensure_ascii=False)}}}')
+        lines.append('')
+        self.file.write('\n'.join(lines))
+
+class BinarySink:
+    # Dump das colunas, um bloco por flush; StitchBuffer.load lê o arquivo de volta
+    def __init__(self, file):
+        self.file = file
+        self.colors_written = 0
+
+    def write(self, buffer):
+        new_colors = buffer.color_table[self.colors_written:]
+        self.colors_written = len(buffer.color_table)
+        table = json.dumps(new_colors, ensure_ascii=False).encode('utf-8')
+        objects = json.dumps({str(row): value for row, value in buffer.objects.items()},
+                             ensure_ascii=False).encode('utf-8')
+
+        self.file.write(BINARY_HEADER.pack(BINARY_MAGIC, len(buffer), len(table), len(objects)))
+        self.file.write(buffer.kinds.tobytes())
+        for column in (buffer.x1, buffer.y1, buffer.x2, buffer.y2, buffer.colors):
+            if sys.byteorder == 'big':
+                column = array(column.typecode, column)
+                column.byteswap()
+            self.file.write(column.tobytes())
+        self.file.write(table)
+        self.file.write(objects)
+
+class TeeSink:
+    # Entrega cada bloco a vários sinks (ex.: texto na saída padrão e o rasterizador)
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, buffer):
+        for sink in self.sinks:
+            sink.write(buffer)
+
+def create_sink(output, file):
+    if output == 'jsonl':
+        return JsonLinesSink(file)
+    if output == 'binary':
+        return BinarySink(file)
+    return TextSink(file)
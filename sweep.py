@@ -0,0 +1,831 @@
+# Varredura de parâmetros (--sweep): executa o mesmo programa para muitas variantes, cada uma com valores
+# próprios para parâmetros nomeados, que entram como variáveis globais já declaradas. O programa é analisado
+# uma vez e as variantes são executadas juntas, em grupo: cada valor é um escalar (igual em todas) ou um
+# array NumPy com um elemento por variante, e as expressões inteiras são avaliadas sobre os arrays. Quando
+# uma condição dá resultados diferentes entre as variantes, cada ramo roda só com as variantes que o
+# seguem (as escritas das outras são preservadas) e cada laço termina para cada variante na sua vez. O que
+# não dá para seguir junto (um erro em só parte das variantes, uma variável declarada ou com tipo trocado em
+# só parte delas, scanf num ramo) desfaz a declaração de topo em andamento e divide o grupo, que continua
+# dali em grupos menores, até uma variante por grupo. Cada variante termina com o seu próprio StitchBuffer.
+import io
+import itertools
+import json
+import operator
+import os
+import re
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from main import (
+    STITCHES, KEYWORDS, SymbolTable, Interpreter, normalize_type, node_class, IntVal, NoOp, BinOp, UnOp, BoolOp,
+    RelOp, StringVal, AssignNode, VarNode, BlockNode, IfNode, WhileNode, ForNode, RepeatNode, ScanNode, ReturnNode,
+    FuncDec, FuncCall, PrintNode, SetupNode, DrawLineNode, ChangeThreadNode, TransformNode
+)
+from stitches import NO_COLOR, SETUP, DRAW_LINE, CHANGE_THREAD, PRINT, StitchBuffer, create_sink
+from watch import Journal, JournaledDict, buffer_mark, buffer_truncate
+
+SAFE_LIMIT = 1 << 62            # arrays int64 só até aqui; acima, inteiros do Python (sem limite) em arrays de objetos
+INT64_LIMIT = 1 << 63
+SWEEP_FLUSH_ENTRIES = 1 << 20   # linhas pendentes (somadas por variante) antes de copiá-las para os buffers
+OUTPUT_SUFFIXES = {'text': '.txt', 'jsonl': '.jsonl', 'binary': '.bin'}
+
+PARAMETER_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.floordiv}
+COMPARISONS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '>': operator.gt,
+               '<=': operator.le, '>=': operator.ge}
+STRING_COMPARISONS = ('==', '!=', '<', '>')
+
+class Diverged(Exception):
+    # As variantes `ids` não podem seguir junto com o resto do grupo
+    def __init__(self, ids):
+        super().__init__()
+        self.ids = ids
+
+# Valores por variante
+
+def vector(value):
+    return isinstance(value, np.ndarray)
+
+def magnitude(value):
+    if vector(value):
+        return max(-value.min(), value.max()) if value.dtype == object else max(-int(value.min()), int(value.max()))
+    return abs(value)
+
+def wide(value):
+    # Inteiro que precisa de objetos do Python em vez de int64
+    return value.dtype == object if vector(value) else not -SAFE_LIMIT < value < SAFE_LIMIT
+
+def narrow(values):
+    # int64 enquanto todos os valores couberem com folga; senão, objetos
+    large = magnitude(values) >= SAFE_LIMIT
+    if values.dtype == object:
+        return values if large else values.astype(np.int64)
+    return values.astype(object) if large else values
+
+def compact(value):
+    # Um array com todos os elementos iguais vira escalar
+    if vector(value):
+        first = value[:1].tolist()[0]
+        if (value == first).all():
+            return first
+    return value
+
+def column(values, var_type):
+    # Valores de um parâmetro (uma lista na ordem das variantes do grupo)
+    if all(value == values[0] for value in values):
+        return values[0]
+    array = np.array(values, dtype=object)
+    return narrow(array) if var_type == 'int' else array
+
+def truth(value):
+    if not vector(value):
+        return bool(value)
+    if value.dtype == object:
+        return np.array([bool(item) for item in value.tolist()], dtype=bool)
+    return value != 0
+
+def strings(value):
+    if vector(value):
+        return np.array([str(item) for item in value.tolist()], dtype=object)
+    return str(value)
+
+def arithmetic(symbol, left, right):
+    # Operação inteira com pelo menos um array; o divisor já não tem zeros
+    operation = ARITHMETIC[symbol]
+    if not wide(left) and not wide(right):
+        if symbol in '+-':
+            return narrow(operation(left, right))
+        if symbol == '/' or magnitude(left) * magnitude(right) < SAFE_LIMIT:
+            return operation(left, right)
+    objects = [value.astype(object) if vector(value) else value for value in (left, right)]
+    return narrow(operation(*objects))
+
+def parameter_type(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"Erro: o valor {value!r} de um parâmetro deve ser um inteiro ou uma string.")
+    return 'int' if isinstance(value, int) else 'char*'
+
+class LaneTable(SymbolTable):
+    # Tabela de símbolos de um grupo; `depth` é a profundidade dos ramos em que ela foi criada. Escritas numa
+    # tabela criada fora do ramo atual só valem para as variantes que seguem o ramo.
+    __slots__ = ('depth',)
+
+    def __init__(self, parent=None, depth=0):
+        super().__init__(parent)
+        self.depth = depth
+
+class SweepOutput:
+    # Comandos das variantes. As linhas emitidas por um grupo ficam pendentes, cada uma com os ids das variantes
+    # que a emitiram, e são copiadas em bloco para o StitchBuffer de cada variante. As cores ganham um código
+    # comum a todas; cada buffer interna as suas na ordem em que aparecem nas próprias linhas.
+    def __init__(self, count):
+        self.buffers = [StitchBuffer() for _ in range(count)]
+        self.color_values = []
+        self.color_codes = {}
+        self.rows = []
+        self.entries = 0
+        self.position = None    # início das linhas da declaração de topo em andamento
+        self.marked = 0
+        self.group = None
+        self.saved = None       # marcas dos buffers do grupo, se houve flush durante a declaração
+
+    def color_code(self, color):
+        if vector(color):
+            return compact(np.array([self.color_code(item) for item in color.tolist()], dtype=np.int64))
+        code = self.color_codes.get(color)
+        if code is None:
+            code = self.color_codes[color] = len(self.color_values)
+            self.color_values.append(color)
+        return code
+
+    def add(self, ids, kind, x1, y1, x2, y2, color, value=None):
+        plain = kind != PRINT and all(
+            item.dtype != object if vector(item) else type(item) is int and -INT64_LIMIT <= item < INT64_LIMIT
+            for item in (x1, y1, x2, y2))
+        self.rows.append((ids, kind, x1, y1, x2, y2, color, value, plain))
+        self.entries += len(ids)
+        if self.entries >= SWEEP_FLUSH_ENTRIES:
+            self.flush()
+
+    def mark(self, ids):
+        self.position = len(self.rows)
+        self.marked = self.entries
+        self.group = ids
+        self.saved = None
+
+    def release(self):
+        self.position = None
+
+    def undo(self):
+        # Descarta as linhas emitidas desde a marca
+        if self.saved is not None:
+            for variant, mark in zip(self.group.tolist(), self.saved):
+                buffer_truncate(self.buffers[variant], mark)
+            self.rows = []
+            self.entries = 0
+        else:
+            del self.rows[self.position:]
+            self.entries = self.marked
+        self.position = None
+
+    def flush(self):
+        if self.position is not None and self.saved is None:
+            # As linhas de antes da marca vão primeiro, para que os buffers do grupo possam voltar a ela
+            self.write(self.rows[:self.position])
+            self.saved = [buffer_mark(self.buffers[variant]) for variant in self.group.tolist()]
+            self.write(self.rows[self.position:])
+            self.position = 0
+        else:
+            self.write(self.rows)
+        self.rows = []
+        self.entries = 0
+        self.marked = 0
+
+    def write(self, rows):
+        run = []
+        for row in rows:
+            if row[8]:
+                run.append(row)
+            else:
+                self.write_run(run)
+                self.write_objects(row)
+                run = []
+        self.write_run(run)
+
+    def write_run(self, run):
+        # Linhas só com inteiros de 64 bits: ordenadas por variante (mantendo a ordem de emissão) e copiadas
+        # em bloco para as colunas de cada buffer
+        if not run:
+            return
+        sizes = [len(row[0]) for row in run]
+        order = np.argsort(np.concatenate([row[0] for row in run]), kind='stable')
+        ids = np.concatenate([row[0] for row in run])[order]
+        kinds = np.repeat(np.array([row[1] for row in run], dtype=np.uint8), sizes)[order]
+        columns = []
+        for index in (2, 3, 4, 5, 6):
+            parts = [row[index] if vector(row[index]) else np.full(size, row[index], dtype=np.int64)
+                     for row, size in zip(run, sizes)]
+            columns.append(np.concatenate(parts)[order])
+        variants, starts = np.unique(ids, return_index=True)
+        ends = np.append(starts[1:], len(ids))
+        for variant, start, end in zip(variants.tolist(), starts.tolist(), ends.tolist()):
+            buffer = self.buffers[variant]
+            buffer.kinds.frombytes(kinds[start:end].tobytes())
+            for target, values in zip((buffer.x1, buffer.y1, buffer.x2, buffer.y2), columns):
+                target.frombytes(values[start:end].tobytes())
+            buffer.colors.frombytes(self.buffer_colors(buffer, columns[4][start:end]).tobytes())
+
+    def buffer_colors(self, buffer, codes):
+        # Códigos comuns -> ids das cores no buffer, internadas na ordem em que aparecem
+        unique, first = np.unique(codes, return_index=True)
+        table = np.empty(len(unique), dtype=np.intc)
+        for position in np.argsort(first).tolist():
+            code = int(unique[position])
+            table[position] = NO_COLOR if code < 0 else buffer.intern_color(self.color_values[code])
+        colors = table[np.searchsorted(unique, codes)] if len(unique) > 1 else np.full(len(codes), table[0], dtype=np.intc)
+        buffer.current_color = int(colors[-1])
+        return colors
+
+    def write_objects(self, row):
+        # Linha com valores que não cabem nas colunas (print, strings, inteiros enormes): variante por variante
+        ids, kind, x1, y1, x2, y2, color, value, _ = row
+        count = len(ids)
+        lanes = [item.tolist() if vector(item) else [item] * count for item in (x1, y1, x2, y2, color, value)]
+        for variant, x1, y1, x2, y2, code, value in zip(ids.tolist(), *lanes):
+            buffer = self.buffers[variant]
+            color = self.color_values[code] if code >= 0 else None
+            if kind == SETUP:
+                buffer.setup(x1, color)
+                continue
+            buffer.current_color = NO_COLOR if code < 0 else buffer.intern_color(color)
+            if kind == DRAW_LINE:
+                buffer.draw_line(x1, y1, x2, y2)
+            elif kind == CHANGE_THREAD:
+                buffer.change_thread(color)
+            else:
+                buffer.print_value(value)
+
+class SweepGroup:
+    # Variantes executadas juntas. `ids` são os índices das variantes; todos os arrays do grupo têm um elemento
+    # por variante, nessa ordem. `active` marca as variantes que seguem o ramo atual (None: todas).
+    def __init__(self, ids, output, inputs, start=0, input_position=0):
+        self.ids = ids
+        self.output = output
+        self.inputs = inputs
+        self.start = start                  # declaração de topo onde o grupo começa
+        self.input_position = input_position
+        self.journal = Journal()
+        self.table = LaneTable()
+        self.table.variables = JournaledDict(self.journal)
+        self.table.functions = JournaledDict(self.journal)
+        self.color = NO_COLOR               # código da cor atual (escalar ou por variante)
+        self.active = None
+        self.active_ids = ids
+        self.depth = 0
+        self.handlers = {
+            IntVal: self.integer, StringVal: self.string, NoOp: self.no_op, VarNode: self.variable,
+            BinOp: self.binary, UnOp: self.unary, BoolOp: self.boolean, RelOp: self.relational,
+            AssignNode: self.assign, BlockNode: self.block, IfNode: self.branch, WhileNode: self.while_loop,
+            ForNode: self.for_loop, RepeatNode: self.repeat_loop, ScanNode: self.scan, ReturnNode: self.return_value,
+            FuncDec: self.function_declaration, FuncCall: self.call, PrintNode: self.print_value,
+            SetupNode: self.setup, DrawLineNode: self.draw_line, ChangeThreadNode: self.change_thread,
+            TransformNode: self.transform,
+        }
+        self.dispatch = {}
+
+    def subset(self, mask, start):
+        # Novo grupo com parte das variantes, a partir da declaração de topo `start`
+        group = SweepGroup(self.ids[mask], self.output, self.inputs, start, self.input_position)
+        for name, (value, var_type) in self.table.variables.items():
+            dict.__setitem__(group.table.variables, name, (compact(value[mask]) if vector(value) else value, var_type))
+        dict.update(group.table.functions, self.table.functions)
+        group.color = compact(self.color[mask]) if vector(self.color) else self.color
+        return group
+
+    # Variantes ativas
+
+    def lanes(self, value):
+        # Só os elementos das variantes ativas
+        return value[self.active] if vector(value) and self.active is not None else value
+
+    def narrow_mask(self, taken):
+        # None: todas as variantes ativas seguem; False: nenhuma; senão, a máscara das que seguem
+        if not vector(taken):
+            return None if taken else False
+        mask = taken if self.active is None else taken & self.active
+        count = np.count_nonzero(mask)
+        if count == 0:
+            return False
+        if count == (len(self.ids) if self.active is None else len(self.active_ids)):
+            return None
+        return mask
+
+    def set_active(self, mask):
+        self.active = mask
+        self.active_ids = self.ids if mask is None else self.ids[mask]
+
+    def run_narrowed(self, mask, function, *args):
+        # Executa só para as variantes de `mask`; um erro nelas não vale para as outras
+        saved_active, saved_depth = self.active, self.depth
+        self.set_active(mask)
+        self.depth += 1
+        try:
+            return function(*args)
+        except Diverged:
+            raise
+        except Exception as e:
+            raise Diverged(self.active_ids) from e
+        finally:
+            self.set_active(saved_active)
+            self.depth = saved_depth
+
+    def partial(self, table):
+        return self.active is not None and table.depth != self.depth
+
+    def blend(self, old, new, var_type):
+        # Valor novo nas variantes ativas, o antigo nas demais
+        if not vector(old) and not vector(new) and type(old) is type(new) and old == new:
+            return old
+        integer = var_type == 'int' and not wide(old) and not wide(new)
+        result = np.empty(len(self.ids), dtype=np.int64 if integer else object)
+        result[:] = old
+        result[self.active] = new[self.active] if vector(new) else new
+        return result
+
+    def declare(self, table, name, value, var_type):
+        if self.partial(table) and name not in table.variables:
+            raise Diverged(self.active_ids)
+        table.set_variable(name, value, var_type, is_declaration=True)
+
+    def store(self, table, name, value, var_type):
+        # Mesma busca de SymbolTable.set_variable, gravando só nas variantes ativas
+        var_type = normalize_type(var_type)
+        owner = table
+        while name not in owner.variables:
+            owner = owner.parent
+            if owner is None:
+                raise ValueError(f"Erro de semântica: Variável '{name}' não declarada antes da atribuição.")
+        if self.partial(owner):
+            old_value, old_type = owner.variables[name]
+            if old_type != var_type:
+                raise Diverged(self.active_ids)
+            value = self.blend(old_value, value, var_type)
+        owner.variables[name] = (value, var_type)
+
+    def emit(self, kind, x1=0, y1=0, x2=0, y2=0, value=None):
+        self.output.add(self.active_ids, kind, self.lanes(x1), self.lanes(y1), self.lanes(x2), self.lanes(y2),
+                        self.lanes(self.color), self.lanes(value))
+
+    def set_color(self, color):
+        code = self.output.color_code(color)
+        self.color = code if self.active is None else compact(self.blend(self.color, code, 'int'))
+
+    # Nós: mesmas regras (e mensagens de erro) do evaluate() de cada classe em main.py
+
+    def evaluate(self, node, table):
+        handler = self.dispatch.get(type(node))
+        if handler is None:
+            handler = self.dispatch[type(node)] = self.handlers[node_class(node)]
+        return handler(node, table)
+
+    def integer(self, node, table):
+        return node.value, 'int'
+
+    def string(self, node, table):
+        return node.value, 'char*'
+
+    def no_op(self, node, table):
+        return None
+
+    def variable(self, node, table):
+        return table.get_variable(node.identifier)
+
+    def binary(self, node, table):
+        left_value, left_type = self.evaluate(node.children[0], table)
+        right_value, right_type = self.evaluate(node.children[1], table)
+        symbol = node.value
+        if not vector(left_value) and not vector(right_value):
+            return BinOp.apply(symbol, left_value, left_type, right_value, right_type)
+        if symbol == '+' and left_type == 'char*' and right_type in ('char*', 'int'):
+            return left_value + (right_value if right_type == 'char*' else strings(right_value)), 'char*'
+        if symbol == '+' and left_type == 'int' and right_type == 'char*':
+            return strings(left_value) + right_value, 'char*'
+        if symbol in ARITHMETIC and left_type == 'int' and right_type == 'int':
+            if symbol == '/':
+                right_value = self.divisor(right_value)
+            return arithmetic(symbol, left_value, right_value), 'int'
+        if symbol == '+':
+            raise TypeError(f"Erro de semântica: Operação '+' não permitida entre {left_type} e {right_type}")
+        raise TypeError(f"Erro de semântica: Operação '{symbol}' não permitida entre {left_type} e {right_type}")
+
+    def divisor(self, value):
+        zero = value == 0
+        if not vector(zero):
+            if zero:
+                raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
+            return value
+        failing = self.lanes(zero)
+        if failing.any():
+            if failing.all():
+                raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
+            raise Diverged(self.active_ids[failing])
+        # Zeros só nas variantes fora do ramo, cujo resultado é descartado
+        return np.where(zero, 1, value)
+
+    def unary(self, node, table):
+        child_value, child_type = self.evaluate(node.children[0], table)
+        if not vector(child_value):
+            return UnOp.apply(node.value, child_value, child_type)
+        if node.value == '!':
+            if child_type != 'int':
+                raise TypeError("Erro de semântica: Operação de negação '!' só é permitida para inteiros.")
+            return (~truth(child_value)).astype(np.int64), 'int'
+        elif node.value == '+':
+            return +child_value, 'int'
+        elif node.value == '-':
+            return -child_value, 'int'
+
+    def boolean(self, node, table):
+        left_value, _ = self.evaluate(node.children[0], table)
+        right_value, _ = self.evaluate(node.children[1], table)
+        if node.value == '&&':
+            taken = truth(left_value) & truth(right_value)
+        elif node.value == '||':
+            taken = truth(left_value) | truth(right_value)
+        elif node.value == '!':
+            taken = truth(left_value)
+            taken = ~taken if vector(taken) else not taken
+        else:
+            return None
+        return (taken.astype(np.int64) if vector(taken) else int(taken)), 'int'
+
+    def relational(self, node, table):
+        left_value, left_type = self.evaluate(node.children[0], table)
+        right_value, right_type = self.evaluate(node.children[1], table)
+        if not vector(left_value) and not vector(right_value):
+            return RelOp.apply(node.value, left_value, left_type, right_value, right_type)
+        if left_type != right_type:
+            raise TypeError(f"Erro de semântica: Comparação não permitida entre {left_type} e {right_type}")
+        if left_type == 'char*':
+            if node.value not in STRING_COMPARISONS:
+                return None
+        elif left_type != 'int':
+            raise TypeError(f"Erro de semântica: Comparação não permitida para tipo {left_type}")
+        return np.asarray(COMPARISONS[node.value](left_value, right_value)).astype(np.int64), 'int'
+
+    def assign(self, node, table):
+        if node.is_declaration:
+            default_value = 0 if node.var_type == 'int' else ""
+            self.declare(table, node.identifier, default_value, node.var_type)
+            return default_value, node.var_type
+        value, expression_type = self.evaluate(node.children[0], table)
+        if isinstance(node.children[0], ScanNode) and table.get_variable(node.identifier)[1] != 'int':
+            raise TypeError(f"Erro de tipo: `scanf` só pode ser atribuído a variáveis do tipo `int`, mas '{node.identifier}' é do tipo '{node.var_type}'.")
+        self.store(table, node.identifier, value, expression_type)
+        return value, expression_type
+
+    def block(self, node, table):
+        for statement in node.children:
+            self.evaluate(statement, table)
+
+    def branch(self, node, table):
+        condition_value, condition_type = self.evaluate(node.children[0], table)
+        if condition_type != 'int':
+            raise TypeError("Erro de semântica: Condição do 'if' deve ser do tipo 'int'")
+        taken = truth(condition_value)
+        true_mask = self.narrow_mask(taken)
+        if true_mask is None:
+            self.evaluate(node.children[1], table)
+            return
+        if true_mask is not False:
+            self.run_narrowed(true_mask, self.evaluate, node.children[1], table)
+        if len(node.children) > 2:
+            false_mask = self.narrow_mask(~taken if vector(taken) else not taken)
+            if false_mask is None:
+                self.evaluate(node.children[2], table)
+            elif false_mask is not False:
+                self.run_narrowed(false_mask, self.evaluate, node.children[2], table)
+
+    def iterate(self, taken, step):
+        # Repete step() (que devolve a condição seguinte) enquanto alguma variante ativa continuar no laço;
+        # as que saem antes deixam de ser afetadas pelas iterações seguintes
+        mask = self.narrow_mask(taken)
+        while mask is None:
+            mask = self.narrow_mask(step())
+        if mask is not False:
+            self.run_narrowed(mask, self.iterate_narrowed, step)
+
+    def iterate_narrowed(self, step):
+        while True:
+            mask = self.narrow_mask(step())
+            if mask is False:
+                return
+            if mask is not None:
+                self.set_active(mask)
+
+    def while_loop(self, node, table):
+        condition_value, condition_type = self.evaluate(node.children[0], table)
+        if condition_type != 'int':
+            raise TypeError("Erro de semântica: Condição do 'while' deve ser do tipo 'int'")
+
+        def step():
+            self.evaluate(node.children[1], table)
+            condition_value, condition_type = self.evaluate(node.children[0], table)
+            return truth(condition_value)
+        self.iterate(truth(condition_value), step)
+
+    def for_loop(self, node, table):
+        start, start_type = self.evaluate(node.children[0], table)
+        if start_type != 'int':
+            raise TypeError("Erro de semântica: Valor inicial do 'for' deve ser do tipo 'int'")
+        try:
+            self.declare(table, node.counter, start, 'int')
+        except ValueError:
+            self.store(table, node.counter, start, 'int')
+
+        condition_value, condition_type = self.evaluate(node.children[1], table)
+        if condition_type != 'int':
+            raise TypeError("Erro de semântica: Condição do 'for' deve ser do tipo 'int'")
+
+        def step():
+            self.evaluate(node.children[3], table)
+            self.evaluate(node.children[2], table)
+            condition_value, _ = self.evaluate(node.children[1], table)
+            return truth(condition_value)
+        self.iterate(truth(condition_value), step)
+
+    def repeat_loop(self, node, table):
+        count, count_type = self.evaluate(node.children[0], table)
+        if count_type != 'int':
+            raise TypeError("Erro de semântica: Número de repetições do 'repeat' deve ser do tipo 'int'")
+        if not vector(count):
+            for _ in range(count):
+                self.evaluate(node.children[1], table)
+            return
+        done = [0]
+
+        def step():
+            self.evaluate(node.children[1], table)
+            done[0] += 1
+            return count > done[0]
+        self.iterate(count > 0, step)
+
+    def scan(self, node, table):
+        # Cada variante lê a mesma entrada; num ramo, as posições de leitura deixariam de ser iguais
+        if self.active is not None:
+            raise Diverged(self.active_ids)
+        if self.input_position >= len(self.inputs):
+            raise EOFError("EOF when reading a line")
+        user_input = self.inputs[self.input_position]
+        self.input_position += 1
+        try:
+            return int(user_input), 'int'
+        except ValueError:
+            raise TypeError("Erro de tipo: `scanf` esperava um valor `int`, mas recebeu uma string.")
+
+    def return_value(self, node, table):
+        return self.evaluate(node.children[0], table)
+
+    def function_declaration(self, node, table):
+        if self.partial(table):
+            raise Diverged(self.active_ids)
+        table.set_function(node.name, node)
+
+    def call(self, node, table):
+        func_dec = table.get_function(node.name)
+        if len(node.children) != len(func_dec.params):
+            raise ValueError(f"Erro: Função '{node.name}' esperava {len(func_dec.params)} argumentos, mas {len(node.children)} foram fornecidos.")
+
+        local_table = LaneTable(table, self.depth)
+        for (param_name, param_type), arg_node in zip(func_dec.params, node.children):
+            arg_value, arg_type = self.evaluate(arg_node, table)
+            if arg_type != param_type:
+                raise TypeError(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+            local_table.set_variable(param_name, arg_value, param_type, is_declaration=True)
+
+        result = None
+        for statement in func_dec.children[0].children:
+            result = self.evaluate(statement, local_table)
+            if isinstance(statement, ReturnNode):
+                break
+
+        if func_dec.func_type == 'void':
+            return None
+        elif func_dec.func_type == 'int' and result is None:
+            result = (0, 'int')
+        elif result is not None and result[1] != func_dec.func_type:
+            raise TypeError(f"Erro de tipo: Função '{node.name}' esperava retornar '{func_dec.func_type}' mas retornou '{result[1]}'")
+        return result
+
+    def call_main(self, table):
+        # Como Interpreter.call_main: sem `main`, ou com um ValueError dentro dela, segue em frente
+        try:
+            table.get_function("main")
+            self.call(FuncCall("main", []), table)
+        except ValueError:
+            pass
+
+    def print_value(self, node, table):
+        value, var_type = self.evaluate(node.children[0], table)
+        self.emit(PRINT, value=value)
+        return value, var_type
+
+    def setup(self, node, table):
+        frame_size, _ = self.evaluate(node.children[0], table)
+        thread_color, _ = self.evaluate(node.children[1], table)
+        self.set_color(thread_color)
+        self.emit(SETUP, frame_size)
+
+    def draw_line(self, node, table):
+        x1, _ = self.evaluate(node.children[0], table)
+        y1, _ = self.evaluate(node.children[1], table)
+        x2, _ = self.evaluate(node.children[2], table)
+        y2, _ = self.evaluate(node.children[3], table)
+        self.emit(DRAW_LINE, x1, y1, x2, y2)
+
+    def change_thread(self, node, table):
+        color, _ = self.evaluate(node.children[0], table)
+        self.set_color(color)
+        self.emit(CHANGE_THREAD)
+
+    def transform(self, node, table):
+        # As cópias de transforms.py são montadas sobre o STITCHES, não sobre as linhas do grupo
+        raise ValueError(f"Erro: o bloco '{node.value}' não é suportado com --sweep.")
+
+class Sweep:
+    # Executa o AST para cada conjunto de parâmetros de `variants` (dicionários nome -> int ou string)
+    def __init__(self, ast, variants, input_text=''):
+        self.statements = ast.children if node_class(ast) is BlockNode else [ast]
+        self.variants = variants
+        self.inputs = input_text.splitlines()
+        self.output = SweepOutput(len(variants))
+        self.errors = [None] * len(variants)
+        self.groups = 0     # grupos executados, inclusive os que depois se dividiram
+        self.splits = 0
+
+    def initial_groups(self):
+        # Um grupo por conjunto de nomes e tipos de parâmetros
+        signatures = {}
+        for index, parameters in enumerate(self.variants):
+            for name in parameters:
+                if not PARAMETER_NAME.match(name) or name in KEYWORDS:
+                    raise ValueError(f"Erro: '{name}' não é um nome válido de parâmetro.")
+            signature = tuple((name, parameter_type(value)) for name, value in parameters.items())
+            signatures.setdefault(signature, []).append(index)
+        groups = []
+        for signature, indices in signatures.items():
+            group = SweepGroup(np.array(indices, dtype=np.int64), self.output, self.inputs)
+            for name, var_type in signature:
+                values = [self.variants[index][name] for index in indices]
+                dict.__setitem__(group.table.variables, name, (column(values, var_type), var_type))
+            groups.append(group)
+        return groups
+
+    def run_group(self, group):
+        # Declarações de topo (e `main`) a partir de group.start; devolve os grupos em que ele se dividiu
+        statements = self.statements
+        table = group.table
+        for index in range(group.start, len(statements) + 1):
+            position = group.journal.mark()
+            self.output.mark(group.ids)
+            color, input_position = group.color, group.input_position
+            try:
+                if index < len(statements):
+                    group.evaluate(statements[index], table)
+                else:
+                    group.call_main(table)
+            except Diverged as e:
+                # Volta ao início da declaração e a executa de novo em dois grupos
+                group.journal.undo(position)
+                self.output.undo()
+                group.color, group.input_position = color, input_position
+                mask = np.isin(group.ids, e.ids)
+                self.splits += 1
+                return [group.subset(mask, index), group.subset(~mask, index)]
+            except Exception as e:
+                self.output.release()
+                for variant in group.ids.tolist():
+                    self.errors[variant] = str(e)
+                return []
+            self.output.release()
+        return []
+
+    def run(self):
+        # [{'parameters', 'buffer', 'error'}] na ordem das variantes
+        tasks = deque(self.initial_groups())
+        while tasks:
+            self.groups += 1
+            tasks.extend(self.run_group(tasks.popleft()))
+        self.output.flush()
+        return [{'parameters': parameters, 'buffer': buffer, 'error': error}
+                for parameters, buffer, error in zip(self.variants, self.output.buffers, self.errors)]
+
+def run_variant(ast, parameters, input_text=''):
+    # Uma variante pelo interpretador de árvore, como seria feito editando o programa: (buffer, erro)
+    STITCHES.sink = None
+    STITCHES.flush_rows = sys.maxsize
+    STITCHES.reset()
+    symbol_table = SymbolTable()
+    for name, value in parameters.items():
+        symbol_table.variables[name] = (value, parameter_type(value))
+    interpreter = Interpreter()
+    error = None
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = io.StringIO(input_text), io.StringIO()
+    try:
+        interpreter.execute(ast, symbol_table)
+        interpreter.call_main(symbol_table)
+    except Exception as e:
+        error = str(e)
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+    buffer = StitchBuffer()
+    for name in ('kinds', 'x1', 'y1', 'x2', 'y2', 'colors', 'objects', 'color_table', 'color_ids', 'current_color'):
+        setattr(buffer, name, getattr(STITCHES, name))
+    STITCHES.reset()
+    return buffer, error
+
+# Linha de comando
+
+def parse_values(text):
+    # "1,2,5", "10:100" ou "10:100:5" (intervalos incluem o fim); o que não for inteiro é string
+    values = []
+    for item in text.split(','):
+        item = item.strip()
+        bounds = item.split(':')
+        if len(bounds) in (2, 3) and all(re.fullmatch(r'[+-]?\d+', bound.strip()) for bound in bounds):
+            start, end = int(bounds[0]), int(bounds[1])
+            step = int(bounds[2]) if len(bounds) == 3 else 1
+            if step == 0:
+                raise ValueError(f"Erro: passo zero no intervalo '{item}'.")
+            values.extend(range(start, end + (1 if step > 0 else -1), step))
+        elif re.fullmatch(r'[+-]?\d+', item):
+            values.append(int(item))
+        else:
+            values.append(item)
+    return values
+
+def expand_parameters(specifications):
+    # ["nome=valores", ...] -> uma variante para cada combinação dos valores, na ordem dada
+    names, columns = [], []
+    for specification in specifications:
+        name, separator, text = specification.partition('=')
+        if not separator:
+            raise ValueError(f"Erro: --sweep espera NOME=VALORES, recebeu '{specification}'.")
+        names.append(name.strip())
+        columns.append(parse_values(text))
+    return [dict(zip(names, values)) for values in itertools.product(*columns)]
+
+def load_variants(filename):
+    # Arquivo JSON com uma lista de objetos {nome: valor}
+    with open(filename, 'r', encoding='utf-8') as file:
+        variants = json.load(file)
+    if not isinstance(variants, list) or not all(isinstance(variant, dict) for variant in variants):
+        raise ValueError(f"Erro: {filename} deve conter uma lista de objetos JSON com os parâmetros.")
+    return variants
+
+def describe(parameters):
+    return ', '.join(f"{name}={value}" for name, value in parameters.items())
+
+def write_results(results, output, output_directory=None):
+    # Um arquivo por variante em output_directory; sem diretório, todas na saída padrão, cada uma precedida
+    # por uma linha que a identifica
+    paths = []
+    for index, result in enumerate(results):
+        if output_directory is not None:
+            path = os.path.join(output_directory, f"variante{index:05}{OUTPUT_SUFFIXES[output]}")
+            with (open(path, 'wb') if output == 'binary' else open(path, 'w', encoding='utf-8')) as file:
+                create_sink(output, file).write(result['buffer'])
+            paths.append(path)
+            continue
+        if output == 'jsonl':
+            sys.stdout.write(json.dumps({'kind': 'variant', 'index': index, 'parameters': result['parameters']},
+                                        ensure_ascii=False) + '\n')
+        else:
+            sys.stdout.write(f"Variante {index}: {describe(result['parameters'])}\n")
+        create_sink(output, sys.stdout).write(result['buffer'])
+        paths.append(None)
+    sys.stdout.flush()
+    return paths
+
+def run_sweep(filename, specifications, variants_file, settings, output_directory=None, summary_file=None):
+    # Usado por main(): executa a varredura, grava as saídas e devolve False se alguma variante terminou com erro
+    from batch import load_ast
+    variants = load_variants(variants_file) if variants_file else []
+    if specifications:
+        variants.extend(expand_parameters(specifications))
+    if not variants:
+        print("Erro: nenhuma variante para executar.", file=sys.stderr)
+        return False
+    with open(filename, 'r') as file:
+        code = file.read()
+    ast = load_ast(code, filename, settings)
+    sweep = Sweep(ast, variants, settings['input'])
+    start = time.perf_counter()
+    results = sweep.run()
+    seconds = time.perf_counter() - start
+    if output_directory is not None:
+        os.makedirs(output_directory, exist_ok=True)
+    paths = write_results(results, settings['output'], output_directory)
+    failed = 0
+    for index, result in enumerate(results):
+        if result['error']:
+            failed += 1
+            print(f"Erro na variante {index} ({describe(result['parameters'])}): {result['error']}", file=sys.stderr)
+    commands = sum(len(result['buffer']) for result in results)
+    print(f"{len(results)} variantes ({failed} com erro), {commands} comandos em {seconds:.2f}s; "
+          f"{sweep.groups} grupos executados juntos ({sweep.splits} divisões)", file=sys.stderr)
+    if summary_file:
+        summary = {
+            'variants': len(results), 'seconds': seconds, 'commands': commands, 'groups': sweep.groups,
+            'splits': sweep.splits,
+            'results': [{'index': index, 'parameters': result['parameters'], 'commands': len(result['buffer']),
+                         'output': path, 'error': result['error']}
+                        for index, (result, path) in enumerate(zip(results, paths))],
+        }
+        with open(summary_file, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, ensure_ascii=False, indent=2)
+    return failed == 0
@@ -0,0 +1,158 @@
+# Renderização em blocos (--render-workers): a imagem é dividida em blocos de TILE_SIZE x TILE_SIZE pixels
+# e cada segmento entra na lista dos blocos que a sua caixa envolvente (com uma margem de 2 pixels, para o
+# arredondamento e o antialias) toca. Os blocos são rasterizados em paralelo por um conjunto de processos:
+# as entradas (pontos, cores, listas dos blocos) e a imagem final ficam em memória compartilhada
+# (multiprocessing.shared_memory), então cada tarefa é só o número de um bloco e cada processo escreve os
+# pixels do seu bloco direto na imagem, sem mandar pixels de volta. Dentro de um bloco, cada segmento é
+# amostrado só no trecho que passa por ele, com os mesmos pontos (mesma conta) de render_segments, e os
+# segmentos são desenhados na ordem e nos mesmos lotes da imagem inteira: a imagem sai igual byte a byte.
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from renderer import prepare, batch_ranges, draw_batch, compose
+
+TILE_SIZE = 256
+MARGIN = 2   # pixels além da caixa envolvente que um segmento ainda pode pintar
+
+# Arrays compartilhados abertos em cada processo (nome -> array) e os blocos de memória que os guardam
+SHARED = {}
+SEGMENTS = []
+
+def tile_grid(size, tile_size):
+    columns = -(-size // tile_size)
+    return columns, columns * columns
+
+def bin_segments(points, size, tile_size):
+    # Segmentos de cada bloco, em ordem crescente: (índices, início da lista de cada bloco)
+    columns, tiles = tile_grid(size, tile_size)
+    low_x = np.minimum(points[0], points[2]) - MARGIN
+    high_x = np.maximum(points[0], points[2]) + MARGIN
+    low_y = np.minimum(points[1], points[3]) - MARGIN
+    high_y = np.maximum(points[1], points[3]) + MARGIN
+    visible = np.flatnonzero((high_x >= 0) & (low_x < size) & (high_y >= 0) & (low_y < size))
+    first_column, last_column, first_row, last_row = (
+        np.clip(np.floor(values[visible] / tile_size), 0, columns - 1).astype(np.int64)
+        for values in (low_x, high_x, low_y, high_y))
+    widths = last_column - first_column + 1
+    counts = widths * (last_row - first_row + 1)
+    # Um par (segmento, bloco) para cada bloco da caixa de cada segmento
+    pair = np.repeat(np.arange(len(visible)), counts)
+    local = np.arange(len(pair)) - np.repeat(np.cumsum(counts) - counts, counts)
+    tile = (first_row[pair] + local // widths[pair]) * columns + first_column[pair] + local % widths[pair]
+    order = np.argsort(tile, kind='stable')
+    starts = np.searchsorted(tile[order], np.arange(tiles + 1))
+    return visible[pair[order]], starts
+
+def clip_samples(points, lengths, window):
+    # Primeiro ponto e número de pontos de cada segmento que podem cair na janela (com a margem)
+    x0, y0, width, height = window
+    steps = np.maximum(lengths - 1, 1).astype(np.float64)
+    first = np.zeros(len(lengths), dtype=np.float64)
+    last = (lengths - 1).astype(np.float64)
+    for start, end, low, high in ((points[0], points[2], x0, x0 + width), (points[1], points[3], y0, y0 + height)):
+        delta = end - start
+        moving = delta != 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = (low - MARGIN - start) * steps / delta
+            b = (high + MARGIN - start) * steps / delta
+            first = np.where(moving, np.maximum(first, np.ceil(np.minimum(a, b))), first)
+            last = np.where(moving, np.minimum(last, np.floor(np.maximum(a, b))), last)
+        # Parado neste eixo: todos os pontos ou nenhum
+        outside = ~moving & ((start < low - MARGIN) | (start >= high + MARGIN))
+        last = np.where(outside, -1, last)
+    first = np.minimum(first, lengths)
+    samples = np.maximum(last - first + 1, 0).astype(np.int64)
+    return first.astype(np.int64), samples
+
+def render_tile(tile):
+    # Rasteriza o bloco `tile` e grava os pixels dele na imagem compartilhada
+    points, lengths, colors, batches = SHARED['points'], SHARED['lengths'], SHARED['colors'], SHARED['batches']
+    segments, starts, palette, image = SHARED['segments'], SHARED['starts'], SHARED['palette'], SHARED['image']
+    size, tile_size, antialias = SHARED['settings']
+    columns, _ = tile_grid(size, tile_size)
+    row, column = divmod(tile, columns)
+    x0, y0 = column * tile_size, row * tile_size
+    window = (x0, y0, min(tile_size, size - x0), min(tile_size, size - y0))
+    pixel_color = np.full(window[2] * window[3], -1, dtype=np.int64)
+    coverage = np.zeros(window[2] * window[3], dtype=np.float32)
+
+    chosen = segments[starts[tile]:starts[tile + 1]]
+    if len(chosen):
+        first, samples = clip_samples(points[:, chosen], lengths[chosen], window)
+        keep = samples > 0
+        chosen, first, samples = chosen[keep], first[keep], samples[keep]
+        # Os segmentos do bloco estão em ordem; cada lote da imagem inteira vira um lote aqui
+        groups = np.flatnonzero(np.diff(batches[chosen])) + 1
+        for part in np.split(np.arange(len(chosen)), groups):
+            if not len(part):
+                continue
+            selected = chosen[part]
+            draw_batch(points[:, selected], lengths[selected], colors[selected], window, pixel_color, coverage,
+                       antialias, first[part], samples[part])
+    image[y0:y0 + window[3], x0:x0 + window[2]] = compose(pixel_color, coverage, palette).reshape(window[3], window[2], 3)
+    return tile
+
+def share(name, array):
+    # Copia `array` para um bloco novo de memória compartilhada e devolve a descrição para os processos
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    SEGMENTS.append(block)
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    SHARED[name] = shared
+    return name, block.name, array.shape, array.dtype.str
+
+def attach(descriptions, settings):
+    # Inicialização de cada processo: abre os arrays compartilhados pelo nome
+    for name, block_name, shape, dtype in descriptions:
+        block = shared_memory.SharedMemory(name=block_name)
+        SEGMENTS.append(block)
+        SHARED[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    SHARED['settings'] = settings
+
+def release():
+    SHARED.clear()
+    for block in SEGMENTS:
+        block.close()
+    SEGMENTS.clear()
+
+def render_tiled(coordinates, colors, color_table, frame_size=None, scale=1, antialias=False, workers=None,
+                 tile_size=TILE_SIZE):
+    # Mesma imagem de render_segments, rasterizada em blocos por `workers` processos (padrão: um por núcleo)
+    workers = workers or os.cpu_count() or 1
+    points, lengths, colors, palette, size = prepare(coordinates, colors, color_table, frame_size, scale)
+    batches = np.zeros(len(lengths), dtype=np.int64)
+    for number, (start, end) in enumerate(batch_ranges(lengths)):
+        batches[start:end] = number
+    segments, starts = bin_segments(points, size, tile_size)
+    _, tiles = tile_grid(size, tile_size)
+    # Blocos com mais pontos primeiro, para os processos terminarem juntos
+    work = np.concatenate([[0], np.cumsum(lengths[segments])])
+    order = np.argsort(work[starts[:-1]] - work[starts[1:]], kind='stable').tolist()
+
+    arrays = {
+        'points': np.ascontiguousarray(points), 'lengths': lengths, 'colors': np.asarray(colors, dtype=np.int64),
+        'batches': batches, 'segments': segments, 'starts': starts, 'palette': palette,
+        'image': np.empty((size, size, 3), dtype=np.uint8),
+    }
+    settings = (size, tile_size, antialias)
+    workers = min(workers, tiles)
+    try:
+        if workers == 1:
+            SHARED.update(arrays, settings=settings)
+            for tile in order:
+                render_tile(tile)
+        else:
+            descriptions = [share(name, array) for name, array in arrays.items()]
+            context = multiprocessing.get_context()
+            with context.Pool(workers, initializer=attach, initargs=(descriptions, settings)) as pool:
+                for _ in pool.imap_unordered(render_tile, order):
+                    pass
+        return SHARED['image'].copy()
+    finally:
+        blocks = list(SEGMENTS)
+        release()
+        for block in blocks:
+            block.unlink()
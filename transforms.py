@@ -0,0 +1,162 @@
+# Blocos de transformação: translate(dx, dy), rotate(graus[, cx, cy]) e mirror("x" | "y"[, c]), sozinhos ou
+# depois de repeat (n). O corpo do bloco é executado uma única vez com o sink do STITCHES desligado, e as
+# linhas que ele gravou são retiradas do buffer. Cada cópia é uma transformação afim
+# (x, y) -> (a x + b y + c, d x + e y + f), e as coordenadas de todos os drawLine capturados são
+# transformadas de uma vez com NumPy, numa conta em lote de cópias x linhas: em int64 quando os coeficientes
+# são inteiros (deslocamentos, espelhos e giros múltiplos de 90 graus) e em float64, arredondado para o
+# inteiro mais próximo, nos outros giros. Sem NumPy, ou com coordenadas que não cabem nessa conta, os mesmos
+# valores são calculados ponto a ponto com os números do Python. Os demais comandos do corpo (changeThread,
+# setup) são repetidos em cada cópia, na ordem original, como se o bloco tivesse sido escrito desenrolado.
+import math
+from itertools import chain
+
+from main import STITCHES
+from stitches import SETUP, DRAW_LINE, CHANGE_THREAD
+
+COORDINATE_LIMIT = 1 << 61   # |x|, |y|, |c| < 2^61 e |a|, |b| <= 1: a x + b y + c cabe em int64
+FLOAT_LIMIT = 1 << 51        # abaixo disso a conta em float64 é exata quando os coeficientes são inteiros
+QUARTER_TURNS = ((1, 0), (0, 1), (-1, 0), (0, -1))   # (cos, sen) de 0, 90, 180 e 270 graus
+IDENTITY = (1, 0, 0, 0, 1, 0)
+
+def check_arguments(operation, arguments):
+    # Valores dos argumentos (já avaliados como pares (valor, tipo)), com os tipos conferidos
+    values = [value for value, _ in arguments]
+    types = [value_type for _, value_type in arguments]
+    if operation == 'mirror':
+        if types[0] != 'char*' or values[0] not in ('x', 'y'):
+            raise TypeError("Erro de tipo: O eixo de 'mirror' deve ser \"x\" ou \"y\"")
+        types = types[1:]
+    if any(value_type != 'int' for value_type in types):
+        raise TypeError(f"Erro de tipo: Argumentos numéricos de '{operation}' devem ser do tipo 'int'")
+    return values
+
+def copy_matrix(operation, values, k):
+    # (a, b, c, d, e, f) da k-ésima cópia: a transformação aplicada k vezes
+    if operation == 'translate':
+        dx, dy = values
+        return 1, 0, k * dx, 0, 1, k * dy
+    if operation == 'mirror':
+        if k % 2 == 0:
+            return IDENTITY
+        axis, center = values[0], (values[1] if len(values) > 1 else 0)
+        # "x" inverte as coordenadas x em torno da reta x = c; "y", as coordenadas y em torno de y = c
+        return (-1, 0, 2 * center, 0, 1, 0) if axis == 'x' else (1, 0, 0, 0, -1, 2 * center)
+    degrees, center_x, center_y = values if len(values) == 3 else (values[0], 0, 0)
+    angle = k * degrees % 360
+    if angle % 90 == 0:
+        cos, sin = QUARTER_TURNS[angle // 90]
+    else:
+        radians = math.radians(angle)
+        cos, sin = math.cos(radians), math.sin(radians)
+    # Giro de x para y em torno de (cx, cy)
+    return (cos, -sin, center_x - cos * center_x + sin * center_y,
+            sin, cos, center_y - sin * center_x - cos * center_y)
+
+def transform_point(matrix, x, y):
+    # Mesma conta (e mesmo arredondamento) do caminho com NumPy, com os números do Python
+    a, b, c, d, e, f = matrix
+    new_x = a * x + b * y + c
+    new_y = d * x + e * y + f
+    if type(new_x) is float or type(new_y) is float:
+        return round(new_x), round(new_y)
+    return new_x, new_y
+
+def capture(body):
+    # Executa o corpo sem entregar nada ao sink e devolve as linhas que ele gravou:
+    # [(tipo, x1, y1, x2, y2, cor, valor ou None)], com o buffer e a cor atual de volta ao estado anterior
+    STITCHES.flush()
+    sink, STITCHES.sink = STITCHES.sink, None
+    start = len(STITCHES)
+    current_color = STITCHES.current_color
+    try:
+        body()
+        columns = (STITCHES.kinds, STITCHES.x1, STITCHES.y1, STITCHES.x2, STITCHES.y2, STITCHES.colors)
+        rows = [row + (STITCHES.objects.get(start + offset),)
+                for offset, row in enumerate(zip(*(column[start:] for column in columns)))]
+    finally:
+        for column in (STITCHES.kinds, STITCHES.x1, STITCHES.y1, STITCHES.x2, STITCHES.y2, STITCHES.colors):
+            del column[start:]
+        for row in [row for row in STITCHES.objects if row >= start]:
+            del STITCHES.objects[row]
+        STITCHES.current_color = current_color
+        STITCHES.sink = sink
+    return rows
+
+def split_runs(rows):
+    # Trechos seguidos de drawLine com coordenadas nas colunas -> ('lines', [x1], [y1], [x2], [y2]); cada
+    # outra linha fica sozinha, como ('row', linha)
+    items = []
+    for row in rows:
+        kind, x1, y1, x2, y2, _, value = row
+        if kind == DRAW_LINE and value is None:
+            if not items or items[-1][0] != 'lines':
+                items.append(('lines', [], [], [], []))
+            for column, coordinate in zip(items[-1][1:], (x1, y1, x2, y2)):
+                column.append(coordinate)
+        else:
+            items.append(('row', row))
+    return items
+
+def batch_lines(matrices, columns, np):
+    # Coordenadas das cópias de um trecho: quatro arrays int64 (cópias x linhas), ou None se a conta não
+    # for exata em int64 (coeficientes inteiros) ou em float64 (giros quebrados)
+    x1, y1, x2, y2 = columns = [np.array(column, dtype=np.int64) for column in columns]
+    coefficients = list(zip(*matrices))
+    exact = all(type(value) is int for value in chain(*coefficients))
+    limit = COORDINATE_LIMIT if exact else FLOAT_LIMIT
+    if (max(max(-int(column.min()), int(column.max())) for column in columns) >= limit
+            or any(abs(value) >= limit for value in coefficients[2] + coefficients[5])):
+        return None
+    if not exact:
+        x1, y1, x2, y2 = (column.astype(np.float64) for column in columns)
+    a, b, c, d, e, f = (np.array(values, dtype=np.int64 if exact else np.float64)[:, None] for values in coefficients)
+    result = []
+    for x, y in ((x1, y1), (x2, y2)):
+        result.append(a * x + b * y + c)
+        result.append(d * x + e * y + f)
+    if not exact:
+        result = [np.rint(column).astype(np.int64) for column in result]
+    return result
+
+def replay_row(row, matrix, operation):
+    kind, x1, y1, x2, y2, color, value = row
+    if kind == DRAW_LINE:
+        x1, y1, x2, y2 = value if value is not None else (x1, y1, x2, y2)
+        if not all(type(coordinate) is int for coordinate in (x1, y1, x2, y2)):
+            raise TypeError(f"Erro de tipo: drawLine{(x1, y1, x2, y2)} dentro de '{operation}' precisa de coordenadas inteiras")
+        STITCHES.draw_line(*transform_point(matrix, x1, y1), *transform_point(matrix, x2, y2))
+    elif kind == CHANGE_THREAD:
+        STITCHES.change_thread(STITCHES.color_table[color])
+    elif kind == SETUP:
+        STITCHES.setup(x1 if value is None else value[0], STITCHES.color_table[color])
+    else:
+        STITCHES.print_value(value)
+
+def replicate(operation, arguments, count, body):
+    # Executa o bloco: uma cópia transformada (count None) ou `count` cópias, a k-ésima transformada k vezes
+    values = check_arguments(operation, arguments)
+    copies = [1] if count is None else range(count)
+    if not copies:
+        return
+    matrices = [copy_matrix(operation, values, k) for k in copies]
+    items = split_runs(capture(body))
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    batches = [batch_lines(matrices, item[1:], np) if np is not None and item[0] == 'lines' else None
+               for item in items]
+
+    if len(items) == 1 and batches[0] is not None:
+        # Só drawLine na mesma cor: todas as cópias numa única gravação em bloco
+        STITCHES.draw_lines(*(column.ravel() for column in batches[0]))
+        return
+    for copy, matrix in enumerate(matrices):
+        for item, batch in zip(items, batches):
+            if batch is not None:
+                STITCHES.draw_lines(*(column[copy] for column in batch))
+            elif item[0] == 'lines':
+                for x1, y1, x2, y2 in zip(*item[1:]):
+                    STITCHES.draw_line(*transform_point(matrix, x1, y1), *transform_point(matrix, x2, y2))
+            else:
+                replay_row(item[1], matrix, operation)
@@ -0,0 +1,757 @@
+# Compilador de AST para bytecode e máquina virtual de pilha para a PatternScript.
+# O bytecode é um array de inteiros (opcode, argumento); a VM executa tudo num único laço, com pilha de
+# valores e pilha de quadros de chamada explícitas, então a profundidade de recursão da PatternScript
+# não depende da pilha do Python. Valores ficam crus na pilha: o tipo ('int'/'char*') vem do tipo Python.
+# Um `return f(...)` direto no corpo é uma chamada de cauda: o quadro de quem chama é descartado e só as
+# conversões de retorno pendentes (compostas numa tabela de tamanho fixo) ficam com o quadro novo.
+import operator as py_operator
+from array import array
+
+from main import (
+    STITCHES, Interpreter, SymbolTable, normalize_type, node_class, run_vectorized, BinOp, UnOp, IntVal, NoOp, BoolOp,
+    RelOp, StringVal, AssignNode, VarNode, BlockNode, IfNode, WhileNode, ForNode, RepeatNode, ScanNode, ReturnNode,
+    FuncDec, FuncCall, PrintNode, SetupNode, DrawLineNode, ChangeThreadNode
+)
+
+OPCODES = (
+    'LOAD_CONST', 'LOAD_VAR', 'STORE_VAR', 'DECLARE_VAR', 'POP', 'DUP',
+    'ADD', 'SUB', 'MUL', 'DIV', 'COMPARE', 'AND', 'OR', 'NOT', 'NEG', 'POS',
+    'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'CHECK_CONDITION', 'CHECK_SCAN',
+    'LOOKUP_FUNC', 'CALL', 'RETURN', 'STORE_RESULT', 'CLEAR_RESULT', 'DECLARE_FUNC',
+    'SETUP', 'DRAW_LINE', 'CHANGE_THREAD', 'PRINT', 'SCAN', 'EVAL', 'BINARY_VAR_CONST', 'BINARY_VAR_VAR',
+    'TAIL_CALL', 'CHECK_INT', 'SET_COUNTER', 'REPEAT_NEXT', 'VECTORIZE', 'VECTORIZE_REPEAT', 'CHECK_ARG'
+)
+(
+    LOAD_CONST, LOAD_VAR, STORE_VAR, DECLARE_VAR, POP, DUP,
+    ADD, SUB, MUL, DIV, COMPARE, AND, OR, NOT, NEG, POS,
+    JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, CHECK_CONDITION, CHECK_SCAN,
+    LOOKUP_FUNC, CALL, RETURN, STORE_RESULT, CLEAR_RESULT, DECLARE_FUNC,
+    SETUP, DRAW_LINE, CHANGE_THREAD, PRINT, SCAN, EVAL, BINARY_VAR_CONST, BINARY_VAR_VAR,
+    TAIL_CALL, CHECK_INT, SET_COUNTER, REPEAT_NEXT, VECTORIZE, VECTORIZE_REPEAT, CHECK_ARG
+) = range(len(OPCODES))
+
+# Opcodes cujo argumento é um endereço de desvio
+JUMP_OPCODES = {JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, REPEAT_NEXT}
+
+COMPARISONS = ('==', '!=', '<', '>', '<=', '>=')
+ARITHMETIC = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+UNARY = {'!': NOT, '-': NEG, '+': POS}
+
+TYPE_NAMES = {int: 'int', str: 'char*'}
+
+def type_name(value):
+    return TYPE_NAMES.get(type(value))
+
+def _int_div(left, right):
+    if right == 0:
+        raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
+    return left // right
+
+# Operações int x int das superinstruções BINARY_VAR_CONST/BINARY_VAR_VAR
+INT_OPERATIONS = {
+    '+': py_operator.add,
+    '-': py_operator.sub,
+    '*': py_operator.mul,
+    '/': _int_div,
+    '==': lambda left, right: 1 if left == right else 0,
+    '!=': lambda left, right: 1 if left != right else 0,
+    '<': lambda left, right: 1 if left < right else 0,
+    '>': lambda left, right: 1 if left > right else 0,
+    '<=': lambda left, right: 1 if left <= right else 0,
+    '>=': lambda left, right: 1 if left >= right else 0,
+}
+
+def _apply(operator, left, right):
+    # Operandos que não são int x int seguem as regras de tipo dos nós
+    rules = BinOp.apply if operator in ARITHMETIC else RelOp.apply
+    return rules(operator, left, type_name(left), right, type_name(right))[0]
+
+class CodeObject:
+    __slots__ = ('name', 'code', 'consts', 'names', 'bound', '_const_index', '_name_index', '_instructions')
+
+    def __init__(self, name):
+        self.name = name
+        self.code = array('l')  # pares (opcode, argumento); desvios apontam para o índice da instrução
+        self.consts = []
+        self.names = []
+        self.bound = frozenset()  # corpo de função: nomes locais antes de qualquer leitura (parâmetros e declarações iniciais)
+        self._const_index = {}
+        self._name_index = {}
+        self._instructions = None
+
+    def __len__(self):
+        return len(self.code) // 2
+
+    def instructions(self):
+        # Forma decodificada usada pela VM: lista de tuplas (opcode, argumento), montada uma única vez
+        if self._instructions is None:
+            self._instructions = list(zip(self.code[0::2], self.code[1::2]))
+        return self._instructions
+
+    def emit(self, opcode, argument=0):
+        self._instructions = None
+        self.code.append(opcode)
+        self.code.append(argument)
+        return len(self.code) // 2 - 1
+
+    def patch(self, index, target):
+        self._instructions = None
+        self.code[2 * index + 1] = target
+
+    def here(self):
+        return len(self.code) // 2
+
+    def add_const(self, value):
+        # Constantes são deduplicadas por (tipo, valor): 1 e '1' não se confundem
+        key = (type(value), value) if isinstance(value, (int, str, tuple)) else id(value)
+        index = self._const_index.get(key)
+        if index is None:
+            index = self._const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def add_name(self, identifier):
+        index = self._name_index.get(identifier)
+        if index is None:
+            index = self._name_index[identifier] = len(self.names)
+            self.names.append(identifier)
+        return index
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.functions = {}  # id(FuncDec) -> (FuncDec, CodeObject do corpo)
+        self.target = None   # CodeObject em construção
+
+    def compile(self, node, name='<programa>'):
+        saved = self.target
+        self.target = CodeObject(name)
+        self.statement(node)
+        self.target.emit(RETURN)
+        code_object, self.target = self.target, saved
+        return code_object
+
+    def compile_function(self, func_dec):
+        entry = self.functions.get(id(func_dec))
+        if entry is None:
+            saved = self.target
+            self.target = CodeObject(func_dec.name)
+            self.target.bound = bound_names(func_dec)
+            for statement in func_dec.children[0].children:
+                self.statement(statement, keep_result=True)
+                if isinstance(statement, ReturnNode):
+                    break
+            self.target.emit(RETURN)
+            entry = self.functions[id(func_dec)] = (func_dec, self.target)
+            self.target = saved
+        return entry[1]
+
+    # Comandos
+
+    def statement(self, node, keep_result=False):
+        # Com keep_result (corpo de função), cada comando deixa em `result` o mesmo valor que o seu
+        # evaluate() devolveria, pois é ele que FuncCall usa como retorno quando não há `return`
+        node_type = node_class(node)
+        if node_type is BlockNode:
+            for child in node.children:
+                self.statement(child)
+        elif node_type is NoOp:
+            pass
+        elif node_type is IfNode:
+            self.if_statement(node)
+        elif node_type is WhileNode:
+            self.while_statement(node)
+        elif node_type is ForNode:
+            self.for_statement(node)
+        elif node_type is RepeatNode:
+            self.repeat_statement(node)
+        elif node_type is AssignNode:
+            self.assignment(node, keep_result)
+            return
+        elif node_type is FuncDec:
+            self.target.emit(DECLARE_FUNC, self.target.add_const(node))
+            self.compile_function(node)
+        elif node_type is ReturnNode:
+            # Só um `return` direto no corpo define o resultado da função
+            if keep_result and node_class(node.children[0]) is FuncCall:
+                self.call(node.children[0], TAIL_CALL)
+                return
+            self.expression(node.children[0])
+            self.target.emit(STORE_RESULT if keep_result else POP)
+            return
+        elif node_type is SetupNode:
+            self.expression(node.children[0])
+            self.expression(node.children[1])
+            self.target.emit(SETUP)
+        elif node_type is DrawLineNode:
+            for child in node.children:
+                self.expression(child)
+            self.target.emit(DRAW_LINE)
+        elif node_type is ChangeThreadNode:
+            self.expression(node.children[0])
+            self.target.emit(CHANGE_THREAD)
+        elif node_type in (BinOp, UnOp, RelOp, BoolOp, IntVal, StringVal, VarNode, ScanNode, FuncCall, PrintNode):
+            self.expression(node)
+            self.target.emit(STORE_RESULT if keep_result else POP)
+            return
+        else:
+            # Nós sem tradução para bytecode continuam sendo interpretados
+            self.target.emit(EVAL, self.target.add_const(node))
+            self.target.emit(STORE_RESULT if keep_result else POP)
+            return
+        if keep_result:
+            self.target.emit(CLEAR_RESULT)
+
+    def if_statement(self, node):
+        self.condition(node.children[0], 'if')
+        jump_to_else = self.target.emit(JUMP_IF_FALSE)
+        self.statement(node.children[1])
+        if len(node.children) > 2:
+            jump_to_end = self.target.emit(JUMP)
+            self.target.patch(jump_to_else, self.target.here())
+            self.statement(node.children[2])
+            self.target.patch(jump_to_end, self.target.here())
+        else:
+            self.target.patch(jump_to_else, self.target.here())
+
+    def while_statement(self, node):
+        # O tipo da condição só é verificado na primeira avaliação, como em WhileNode.evaluate;
+        # as seguintes ficam no fim do laço e voltam ao início com um único desvio
+        self.condition(node.children[0], 'while')
+        jump_to_end = self.target.emit(JUMP_IF_FALSE)
+        self.target.emit(VECTORIZE, self.target.add_const(node))
+        jump_vectorized = self.target.emit(JUMP_IF_TRUE)
+        loop_start = self.target.here()
+        self.statement(node.children[1])
+        self.expression(node.children[0])
+        self.target.emit(JUMP_IF_TRUE, loop_start)
+        self.target.patch(jump_to_end, self.target.here())
+        self.target.patch(jump_vectorized, self.target.here())
+
+    def for_statement(self, node):
+        # Como ForNode.evaluate: o contador fica na tabela atual, declarado ou reiniciado
+        start, condition, update, block = node.children
+        self.expression(start)
+        self.target.emit(CHECK_INT, self.target.add_const("Erro de semântica: Valor inicial do 'for' deve ser do tipo 'int'"))
+        self.target.emit(SET_COUNTER, self.target.add_name(node.counter))
+        self.condition(condition, 'for')
+        jump_to_end = self.target.emit(JUMP_IF_FALSE)
+        self.target.emit(VECTORIZE, self.target.add_const(node))
+        jump_vectorized = self.target.emit(JUMP_IF_TRUE)
+        loop_start = self.target.here()
+        self.statement(block)
+        self.statement(update)
+        self.expression(condition)
+        self.target.emit(JUMP_IF_TRUE, loop_start)
+        self.target.patch(jump_to_end, self.target.here())
+        self.target.patch(jump_vectorized, self.target.here())
+
+    def repeat_statement(self, node):
+        # O número de repetições que faltam fica na pilha de valores durante o laço
+        self.expression(node.children[0])
+        self.target.emit(CHECK_INT, self.target.add_const("Erro de semântica: Número de repetições do 'repeat' deve ser do tipo 'int'"))
+        self.target.emit(VECTORIZE_REPEAT, self.target.add_const(node))
+        loop_start = self.target.emit(REPEAT_NEXT)
+        self.statement(node.children[1])
+        self.target.emit(JUMP, loop_start)
+        self.target.patch(loop_start, self.target.here())
+
+    def condition(self, node, kind):
+        self.expression(node)
+        if node_class(node) not in (IntVal, RelOp, BoolOp) and not (node_class(node) is UnOp and node.value == '!'):
+            self.target.emit(CHECK_CONDITION, self.target.add_const(kind))
+
+    def assignment(self, node, keep_result):
+        if node.is_declaration:
+            default_value = 0 if node.var_type == 'int' else ""
+            self.target.emit(DECLARE_VAR, self.target.add_const((node.identifier, node.var_type, default_value)))
+            if keep_result:
+                self.target.emit(LOAD_CONST, self.target.add_const(default_value))
+                self.target.emit(STORE_RESULT)
+            return
+        expression = node.children[0]
+        self.expression(expression)
+        if isinstance(expression, ScanNode):
+            # `scanf` só pode ser atribuído a variáveis `int`
+            self.target.emit(CHECK_SCAN, self.target.add_const((node.identifier, node.var_type)))
+        if keep_result:
+            self.target.emit(DUP)
+        self.target.emit(STORE_VAR, self.target.add_name(node.identifier))
+        if keep_result:
+            self.target.emit(STORE_RESULT)
+
+    # Expressões
+
+    def expression(self, node):
+        node_type = node_class(node)
+        if node_type is IntVal or node_type is StringVal:
+            self.target.emit(LOAD_CONST, self.target.add_const(node.value))
+        elif node_type is VarNode:
+            self.target.emit(LOAD_VAR, self.target.add_name(node.identifier))
+        elif (node_type is BinOp and node.value in ARITHMETIC) or (node_type is RelOp and node.value in COMPARISONS):
+            if not self.binary_superinstruction(node):
+                self.expression(node.children[0])
+                self.expression(node.children[1])
+                if node_type is BinOp:
+                    self.target.emit(ARITHMETIC[node.value])
+                else:
+                    self.target.emit(COMPARE, self.target.add_const(node.value))
+        elif node_type is BoolOp and len(node.children) == 2 and node.value in ('&&', '||'):
+            self.expression(node.children[0])
+            self.expression(node.children[1])
+            self.target.emit(AND if node.value == '&&' else OR)
+        elif node_type is UnOp and node.value in UNARY:
+            self.expression(node.children[0])
+            self.target.emit(UNARY[node.value])
+        elif node_type is FuncCall:
+            self.call(node, CALL)
+        elif node_type is ScanNode:
+            self.target.emit(SCAN)
+        elif node_type is PrintNode:
+            self.expression(node.children[0])
+            self.target.emit(DUP)
+            self.target.emit(PRINT)
+        else:
+            self.target.emit(EVAL, self.target.add_const(node))
+
+    def call(self, node, opcode):
+        self.target.emit(LOOKUP_FUNC, self.target.add_const((node.name, len(node.children))))
+        # Cada argumento é conferido logo depois de avaliado, como em FuncCall.evaluate: um argumento errado
+        # interrompe a chamada antes de os seguintes executarem
+        for position, argument in enumerate(node.children):
+            self.expression(argument)
+            self.target.emit(CHECK_ARG, position)
+        self.target.emit(opcode, len(node.children))
+
+    def binary_superinstruction(self, node):
+        # Variável op constante inteira e variável op variável viram uma única instrução
+        left, right = node.children
+        if type(left) is not VarNode:
+            return False
+        if type(right) is IntVal:
+            self.target.emit(BINARY_VAR_CONST, self.target.add_const((node.value, left.identifier, right.value)))
+            return True
+        if type(right) is VarNode:
+            self.target.emit(BINARY_VAR_VAR, self.target.add_const((node.value, left.identifier, right.identifier)))
+            return True
+        return False
+
+def bound_names(func_dec):
+    # Parâmetros e declarações do início do corpo: são criados na tabela da chamada antes de qualquer leitura
+    names = {param_name for param_name, _ in func_dec.params}
+    for statement in func_dec.children[0].children:
+        if node_class(statement) is not AssignNode or not statement.is_declaration:
+            break
+        names.add(statement.identifier)
+    return frozenset(names)
+
+class CallScope(SymbolTable):
+    # Tabela de uma chamada feita pela VM. Enquanto ela existe, as tabelas abaixo dela na cadeia estão com
+    # o código suspenso e não ganham nomes novos, então dá para lembrar onde cada nome de fora foi achado
+    # (`found`) e qual é a tabela mais próxima abaixo com funções declaradas (`outer`): com recursão
+    # profunda, as buscas não percorrem a cadeia inteira a cada acesso.
+    __slots__ = ('found', 'outer')
+
+    def __init__(self, parent):
+        self.variables = {}
+        self.functions = {}
+        self.parent = parent
+        self.found = None
+        self.outer = parent if parent.functions or type(parent) is not CallScope else parent.outer
+
+def _holder(scope, name):
+    # Tabela onde `name` está, vista de `scope`, ou None
+    table = scope
+    passed = []
+    while name not in table.variables:
+        found = table.found if type(table) is CallScope else None
+        if found is not None and name in found:
+            table = found[name]
+            break
+        passed.append(table)
+        table = table.parent
+        if table is None:
+            return None
+    if len(passed) > 1:
+        # Caminhos de uma tabela só não compensam o dicionário
+        for crossed in passed:
+            if type(crossed) is CallScope:
+                if crossed.found is None:
+                    crossed.found = {}
+                crossed.found[name] = table
+    return table
+
+def _lookup(scope, name):
+    table = _holder(scope, name)
+    if table is not None:
+        return table.variables[name][0]
+    error = ValueError(f"Variável '{name}' não definida.")
+    STITCHES.flush()
+    print(f"Erro ao acessar '{name}': {error}")
+    raise error
+
+def _lookup_function(scope, name):
+    table = scope
+    while name not in table.functions:
+        table = table.outer if type(table) is CallScope else table.parent
+        if table is None:
+            raise ValueError(f"Função '{name}' não definida.")
+    return table.functions[name]
+
+def _check_condition(value, kind):
+    if type(value) is not int:
+        raise TypeError(f"Erro de semântica: Condição do '{kind}' deve ser do tipo 'int'")
+
+def _check_int(value, message):
+    if type(value) is not int:
+        raise TypeError(message)
+
+def _check_scan(scope, identifier, var_type):
+    table = _holder(scope, identifier)
+    if table is None:
+        raise ValueError(f"Variável '{identifier}' não definida.")
+    if table.variables[identifier][1] != 'int':
+        raise TypeError(f"Erro de tipo: `scanf` só pode ser atribuído a variáveis do tipo `int`, mas '{identifier}' é do tipo '{var_type}'.")
+
+def _return_value(func_dec, result):
+    # Mesmas regras de retorno de FuncCall.evaluate
+    func_type = func_dec.func_type
+    if func_type == 'void':
+        return None
+    elif func_type == 'int' and result is None:
+        return 0
+    elif result is not None and type_name(result) != func_type:
+        raise TypeError(f"Erro de tipo: Função '{func_dec.name}' esperava retornar '{func_type}' mas retornou '{type_name(result)}'")
+    return result
+
+# Conversão de retorno como tabela: para um valor None, int ou string, o que sai — o próprio valor
+# (RETURN_KEEP), None, 0 ou um erro (função, tipo esperado, tipo recebido). Compor duas tabelas dá outra
+# tabela, então uma sequência de chamadas de cauda guarda só uma.
+RETURN_KEEP, RETURN_NONE, RETURN_ZERO = 'keep', 'none', 'zero'
+_conversions = {}
+
+def return_conversion(func_dec):
+    key = (func_dec.name, func_dec.func_type)
+    conversion = _conversions.get(key)
+    if conversion is None:
+        name, func_type = key
+        if func_type == 'void':
+            conversion = (RETURN_NONE, RETURN_NONE, RETURN_NONE)
+        elif func_type == 'int':
+            conversion = (RETURN_ZERO, RETURN_KEEP, (name, func_type, 'char*'))
+        else:
+            conversion = (RETURN_KEEP, (name, func_type, 'int'), RETURN_KEEP)
+        _conversions[key] = conversion
+    return conversion
+
+def compose_conversions(first, then):
+    # Tabela equivalente a aplicar `first` e depois `then`
+    key = (first, then)
+    composed = _conversions.get(key)
+    if composed is None:
+        outcomes = []
+        for category, outcome in enumerate(first):
+            if outcome == RETURN_KEEP:
+                outcomes.append(then[category])
+            elif outcome == RETURN_NONE:
+                outcomes.append(RETURN_NONE if then[0] == RETURN_KEEP else then[0])
+            elif outcome == RETURN_ZERO:
+                outcomes.append(RETURN_ZERO if then[1] == RETURN_KEEP else then[1])
+            else:
+                outcomes.append(outcome)
+        composed = tuple(outcomes)
+        _conversions[key] = composed
+    return composed
+
+def apply_conversion(conversion, value):
+    outcome = conversion[0 if value is None else 1 if type(value) is int else 2]
+    if outcome == RETURN_KEEP:
+        return value
+    if outcome == RETURN_NONE:
+        return None
+    if outcome == RETURN_ZERO:
+        return 0
+    name, func_type, received = outcome
+    raise TypeError(f"Erro de tipo: Função '{name}' esperava retornar '{func_type}' mas retornou '{received}'")
+
+class VirtualMachine(Interpreter):
+    def __init__(self, compiler=None):
+        self.compiler = compiler or BytecodeCompiler()
+        self.executed = 0  # instruções executadas na última chamada de run()
+
+    def execute(self, node, symbol_table):
+        self.run(self.compiler.compile(node), symbol_table)
+
+    def call_main(self, symbol_table):
+        try:
+            symbol_table.get_function("main")
+            self.run(self.compiler.compile(FuncCall("main", []), '<main>'), symbol_table)
+        except ValueError:
+            pass
+
+    def run(self, code_object, symbol_table):
+        functions = self.compiler.functions
+        compile_function = self.compiler.compile_function
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        draw_line = STITCHES.draw_line
+        # Quadros suspensos: (instruções, constantes, nomes, pc, tabela, resultado, FuncDec, conversão pendente)
+        frames = []
+        type_names = TYPE_NAMES
+
+        code = code_object.instructions()
+        consts = code_object.consts
+        names = code_object.names
+        scope = symbol_table
+        result = None
+        func_dec = None
+        pending = None  # conversão de retorno das chamadas de cauda que levaram a este quadro
+        pc = 0
+        executed = 0
+
+        while True:
+            opcode, argument = code[pc]
+            pc += 1
+            executed += 1
+
+            if opcode == LOAD_VAR:
+                name = names[argument]
+                entry = scope.variables.get(name)
+                push(entry[0] if entry is not None else _lookup(scope, name))
+            elif opcode == BINARY_VAR_CONST:
+                operator, name, right = consts[argument]
+                entry = scope.variables.get(name)
+                left = entry[0] if entry is not None else _lookup(scope, name)
+                push(INT_OPERATIONS[operator](left, right) if type(left) is int else _apply(operator, left, right))
+            elif opcode == BINARY_VAR_VAR:
+                operator, left_name, right_name = consts[argument]
+                entry = scope.variables.get(left_name)
+                left = entry[0] if entry is not None else _lookup(scope, left_name)
+                entry = scope.variables.get(right_name)
+                right = entry[0] if entry is not None else _lookup(scope, right_name)
+                if type(left) is int and type(right) is int:
+                    push(INT_OPERATIONS[operator](left, right))
+                else:
+                    push(_apply(operator, left, right))
+            elif opcode == STORE_VAR:
+                value = pop()
+                name = names[argument]
+                variables = scope.variables
+                if name not in variables:
+                    table = _holder(scope, name)
+                    if table is None:
+                        raise ValueError(f"Erro de semântica: Variável '{name}' não declarada antes da atribuição.")
+                    variables = table.variables
+                variables[name] = (value, type_names.get(type(value)))
+            elif ADD <= opcode <= DIV:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    if opcode == ADD:
+                        stack[-1] = left + right
+                    elif opcode == SUB:
+                        stack[-1] = left - right
+                    elif opcode == MUL:
+                        stack[-1] = left * right
+                    else:
+                        if right == 0:
+                            raise ZeroDivisionError("Erro de semântica: Divisão por zero.")
+                        stack[-1] = left // right
+                else:
+                    operator = '+-*/'[opcode - ADD]
+                    stack[-1] = BinOp.apply(operator, left, type_name(left), right, type_name(right))[0]
+            elif opcode == COMPARE:
+                right = pop()
+                left = stack[-1]
+                operator = consts[argument]
+                if type(left) is int and type(right) is int:
+                    if operator == '<':
+                        stack[-1] = 1 if left < right else 0
+                    elif operator == '>':
+                        stack[-1] = 1 if left > right else 0
+                    elif operator == '==':
+                        stack[-1] = 1 if left == right else 0
+                    elif operator == '!=':
+                        stack[-1] = 1 if left != right else 0
+                    elif operator == '<=':
+                        stack[-1] = 1 if left <= right else 0
+                    else:
+                        stack[-1] = 1 if left >= right else 0
+                else:
+                    stack[-1] = RelOp.apply(operator, left, type_name(left), right, type_name(right))[0]
+            elif opcode == LOAD_CONST:
+                push(consts[argument])
+            elif opcode == JUMP_IF_FALSE:
+                if not pop():
+                    pc = argument
+            elif opcode == JUMP_IF_TRUE:
+                if pop():
+                    pc = argument
+            elif opcode == JUMP:
+                pc = argument
+            elif opcode == LOOKUP_FUNC:
+                name, argument_count = consts[argument]
+                callee = scope.functions.get(name)
+                if callee is None:
+                    callee = _lookup_function(scope, name)
+                if argument_count != len(callee.params):
+                    raise ValueError(f"Erro: Função '{name}' esperava {len(callee.params)} argumentos, mas {argument_count} foram fornecidos.")
+                push(callee)
+            elif opcode == CALL or opcode == TAIL_CALL:
+                if argument:
+                    arguments = stack[-argument:]
+                    del stack[-argument:]
+                else:
+                    arguments = ()
+                callee = pop()
+                entry = functions.get(id(callee))
+                body = entry[1] if entry is not None else compile_function(callee)
+                parent = scope
+                if opcode == TAIL_CALL:
+                    # A tabela de quem chama só sai da cadeia se nada nela puder ser visto pela chamada nova:
+                    # sem funções e com todas as variáveis recriadas na tabela nova antes de qualquer leitura
+                    if type(scope) is CallScope and not scope.functions and scope.variables.keys() <= body.bound:
+                        parent = scope.parent
+                    conversion = return_conversion(func_dec)
+                    pending = conversion if pending is None else compose_conversions(conversion, pending)
+                local_table = CallScope(parent)
+                local_variables = local_table.variables
+                for (param_name, param_type), arg_value in zip(callee.params, arguments):
+                    if param_name in local_variables:
+                        local_table.set_variable(param_name, arg_value, param_type, is_declaration=True)
+                    local_variables[param_name] = (arg_value, normalize_type(param_type))
+
+                if opcode == CALL:
+                    frames.append((code, consts, names, pc, scope, result, func_dec, pending))
+                    pending = None
+                code = body.instructions()
+                consts = body.consts
+                names = body.names
+                scope = local_table
+                result = None
+                func_dec = callee
+                pc = 0
+            elif opcode == RETURN:
+                if not frames:
+                    break
+                if func_dec.func_type == 'int' and type(result) is int:
+                    value = result
+                else:
+                    value = _return_value(func_dec, result)
+                if pending is not None:
+                    value = apply_conversion(pending, value)
+                code, consts, names, pc, scope, result, func_dec, pending = frames.pop()
+                push(value)
+            elif opcode == POP:
+                pop()
+            elif opcode == DUP:
+                push(stack[-1])
+            elif opcode == DRAW_LINE:
+                y2 = pop()
+                x2 = pop()
+                y1 = pop()
+                x1 = pop()
+                draw_line(x1, y1, x2, y2)
+            elif opcode == STORE_RESULT:
+                result = pop()
+            elif opcode == CLEAR_RESULT:
+                result = None
+            elif opcode == CHECK_CONDITION:
+                _check_condition(stack[-1], consts[argument])
+            elif opcode == CHECK_SCAN:
+                _check_scan(scope, *consts[argument])
+            elif opcode == DECLARE_VAR:
+                name, var_type, default_value = consts[argument]
+                scope.set_variable(name, default_value, var_type, is_declaration=True)
+            elif opcode == AND:
+                right = pop()
+                stack[-1] = 1 if stack[-1] and right else 0
+            elif opcode == OR:
+                right = pop()
+                stack[-1] = 1 if stack[-1] or right else 0
+            elif opcode == NOT:
+                value = stack[-1]
+                stack[-1] = UnOp.apply('!', value, type_name(value))[0]
+            elif opcode == NEG:
+                stack[-1] = -stack[-1]
+            elif opcode == POS:
+                stack[-1] = +stack[-1]
+            elif opcode == CHANGE_THREAD:
+                STITCHES.change_thread(pop())
+            elif opcode == SETUP:
+                thread_color = pop()
+                frame_size = pop()
+                STITCHES.setup(frame_size, thread_color)
+            elif opcode == PRINT:
+                STITCHES.print_value(pop())
+            elif opcode == SCAN:
+                STITCHES.flush()
+                user_input = input("")
+                try:
+                    push(int(user_input))
+                except ValueError:
+                    raise TypeError("Erro de tipo: `scanf` esperava um valor `int`, mas recebeu uma string.")
+            elif opcode == DECLARE_FUNC:
+                function = consts[argument]
+                scope.set_function(function.name, function)
+            elif opcode == REPEAT_NEXT:
+                if stack[-1] > 0:
+                    stack[-1] -= 1
+                else:
+                    pop()
+                    pc = argument
+            elif opcode == SET_COUNTER:
+                scope.variables[names[argument]] = (pop(), 'int')
+            elif opcode == CHECK_INT:
+                _check_int(stack[-1], consts[argument])
+            elif opcode == CHECK_ARG:
+                # A função fica na pilha abaixo dos argumentos já avaliados
+                param_name, param_type = stack[-argument - 2].params[argument]
+                arg_type = type_name(stack[-1])
+                if arg_type != param_type:
+                    raise TypeError(f"Erro de tipo: Argumento '{param_name}' esperava '{param_type}' mas recebeu '{arg_type}'")
+            elif opcode == VECTORIZE:
+                push(1 if run_vectorized(consts[argument], scope) else 0)
+            elif opcode == VECTORIZE_REPEAT:
+                if stack[-1] > 0 and run_vectorized(consts[argument], scope, stack[-1]):
+                    stack[-1] = 0
+            elif opcode == EVAL:
+                evaluated = consts[argument].evaluate(scope)
+                push(evaluated[0] if evaluated is not None else None)
+            else:
+                raise RuntimeError(f"Opcode desconhecido: {opcode}")
+
+        self.executed = executed
+
+def disassemble(code_object, compiler=None):
+    # Listagem legível do bytecode; corpos de funções declaradas aparecem em seguida
+    lines = [f"Código de {code_object.name}:"]
+    functions = []
+    for position, (opcode, argument) in enumerate(code_object.instructions()):
+        name = OPCODES[opcode]
+        if opcode in (LOAD_VAR, STORE_VAR, SET_COUNTER):
+            detail = code_object.names[argument]
+        elif opcode in JUMP_OPCODES:
+            detail = f"-> {argument}"
+        elif opcode in (CALL, TAIL_CALL):
+            detail = f"{argument} argumento(s)"
+        elif opcode == CHECK_ARG:
+            detail = f"argumento {argument}"
+        elif opcode in (LOAD_CONST, COMPARE, CHECK_CONDITION, CHECK_SCAN, DECLARE_VAR, LOOKUP_FUNC, DECLARE_FUNC, EVAL,
+                        BINARY_VAR_CONST, BINARY_VAR_VAR, CHECK_INT, VECTORIZE, VECTORIZE_REPEAT):
+            value = code_object.consts[argument]
+            if opcode == DECLARE_FUNC:
+                functions.append(value)
+                detail = value.name
+            elif opcode in (EVAL, VECTORIZE, VECTORIZE_REPEAT):
+                detail = type(value).__name__
+            else:
+                detail = repr(value)
+        else:
+            detail = ''
+        lines.append(f"{position:>6}  {name:<16}{detail}")
+    if compiler is not None:
+        for function in functions:
+            lines.append('')
+            lines.append(disassemble(compiler.compile_function(function), compiler))
+    return '\n'.join(lines)
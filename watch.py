@@ -0,0 +1,310 @@
+# Modo de observação (--watch): executa o .pattern de novo a cada gravação, refazendo só o que mudou. As
+# declarações de topo são analisadas uma a uma, guardando onde cada uma começa e até onde o código foi lido
+# para decidir que ela acabou (o token seguinte e mais um caractere, que define onde esse token termina). Na
+# gravação seguinte, as declarações lidas só de código igual ao do começo anterior não são analisadas nem
+# executadas de novo; a análise recomeça depois delas e, ao chegar ao início de uma declaração do trecho final
+# que também não mudou, aproveita o AST do resto (essas declarações voltam a ser executadas, porque o estado
+# antes delas mudou). O estado é marcado antes de cada declaração de topo: as escritas nas tabelas globais
+# passam por um registro que permite desfazê-las, os comandos de bordado ficam num StitchBuffer sem sink,
+# truncado de volta à marca, e a saída formatada é guardada em pedaços por declaração, para regravar só o
+# final do arquivo de saída.
+import io
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+
+from main import STITCHES, Parser, SymbolTable, Tokenizer, create_interpreter
+from stitches import JsonLinesSink, TextSink, StitchBuffer
+
+WATCH_INTERVAL = 0.2    # segundos entre as verificações do arquivo
+MISSING = object()
+
+class WatchTokenizer(Tokenizer):
+    # Também guarda onde terminou o token anterior
+    def select_next(self):
+        self.token_end = self.position
+        super().select_next()
+
+    def token_start(self):
+        # Início do token atual, depois dos espaços e comentários
+        return self._match(self.source, self.token_end).end(1)
+
+class Journal:
+    # Valores anteriores das chaves escritas nas tabelas globais, para voltar a uma marca. Entre duas
+    # marcas, só a primeira escrita de cada chave é registrada.
+    def __init__(self):
+        self.entries = []
+        self.logged = set()
+
+    def mark(self):
+        self.logged.clear()
+        return len(self.entries)
+
+    def undo(self, position):
+        entries = self.entries
+        while len(entries) > position:
+            table, key, previous = entries.pop()
+            if previous is MISSING:
+                dict.__delitem__(table, key)
+            else:
+                dict.__setitem__(table, key, previous)
+        self.logged.clear()
+
+class JournaledDict(dict):
+    # Dicionário de variáveis ou funções da tabela global que registra as escritas num Journal
+    __slots__ = ('journal',)
+
+    def __init__(self, journal):
+        super().__init__()
+        self.journal = journal
+
+    def __setitem__(self, key, value):
+        logged = self.journal.logged
+        if (id(self), key) not in logged:
+            logged.add((id(self), key))
+            self.journal.entries.append((self, key, self.get(key, MISSING)))
+        dict.__setitem__(self, key, value)
+
+def buffer_mark(buffer):
+    return len(buffer), len(buffer.color_table), buffer.current_color
+
+def buffer_truncate(buffer, mark):
+    rows, colors, current_color = mark
+    for column in (buffer.kinds, buffer.x1, buffer.y1, buffer.x2, buffer.y2, buffer.colors):
+        del column[rows:]
+    for row in [row for row in buffer.objects if row >= rows]:
+        del buffer.objects[row]
+    for color in buffer.color_table[colors:]:
+        del buffer.color_ids[color]
+    del buffer.color_table[colors:]
+    buffer.current_color = current_color
+
+def buffer_slice(buffer, start, end, object_rows):
+    # Linhas [start, end) num buffer próprio com a mesma tabela de cores; object_rows são as chaves
+    # de buffer.objects em ordem
+    part = StitchBuffer()
+    part.color_table = buffer.color_table
+    for name in ('kinds', 'x1', 'y1', 'x2', 'y2', 'colors'):
+        setattr(part, name, getattr(buffer, name)[start:end])
+    for row in object_rows[bisect_left(object_rows, start):bisect_left(object_rows, end)]:
+        part.objects[row - start] = buffer.objects[row]
+    return part
+
+def common_prefix(old, new):
+    # Tamanho do maior começo comum, por busca binária (cada comparação é feita em C)
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if new.startswith(old[:middle]):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def common_suffix(old, new):
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if new.endswith(old[len(old) - middle:]):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+class WatchSession:
+    def __init__(self, backend='tree', output='text'):
+        self.backend = backend
+        self.sink_class = JsonLinesSink if output == 'jsonl' else TextSink
+        self.source = None
+        self.statements = []    # AST de cada declaração de topo
+        self.starts = []        # início do primeiro token de cada uma
+        self.ends = []          # até onde o código foi lido para analisá-la
+        self.executed = 0       # declarações executadas sem erro na última execução
+        self.checkpoints = []   # antes de cada declaração executada (e de main): (posição no registro, marca do buffer)
+        self.chunks = []        # saída formatada de cada declaração executada (o último inclui main)
+        self.offsets = [0]      # posição de cada pedaço na saída
+        self.journal = Journal()
+        self.symbol_table = SymbolTable()
+        self.symbol_table.variables = JournaledDict(self.journal)
+        self.symbol_table.functions = JournaledDict(self.journal)
+        self.error = None
+        # Os comandos ficam todos no buffer, que é truncado a cada nova execução
+        STITCHES.sink = None
+        STITCHES.flush_rows = sys.maxsize
+        STITCHES.reset()
+
+    def parse(self, source):
+        # (declarações, inícios, fins da leitura, quantas vieram do começo anterior, quantas tiveram o AST
+        # aproveitado do trecho final)
+        old = self.source
+        if old is None:
+            reused, first_suffix, delta = 0, 0, 0
+        else:
+            reused = bisect_right(self.ends, common_prefix(old, source))
+            first_suffix = max(bisect_left(self.starts, len(old) - common_suffix(old, source)), reused)
+            delta = len(source) - len(old)
+        statements = self.statements[:reused]
+        starts = self.starts[:reused]
+        ends = self.ends[:reused]
+        old_starts = self.starts if old is not None else []
+
+        # A declaração seguinte começa no token que encerrou a última aproveitada, lido de código igual
+        base = self.starts[reused] if reused else 0
+        tokenizer = WatchTokenizer(source[base:])
+        parser = Parser(tokenizer)
+        while tokenizer.current_token.type != 'EOF':
+            start = base + tokenizer.token_start()
+            index = bisect_left(old_starts, start - delta, first_suffix)
+            if index < len(old_starts) and old_starts[index] == start - delta:
+                # Daqui até o fim o código é o mesmo da análise anterior, só deslocado
+                statements.extend(self.statements[index:])
+                starts.extend(position + delta for position in self.starts[index:])
+                ends.extend(position + delta for position in self.ends[index:])
+                return statements, starts, ends, reused, len(old_starts) - index
+            statements.append(parser.parse_statement())
+            starts.append(start)
+            # O token seguinte mais um caractere: no fim do código, nada garante que ele não vá crescer
+            ends.append(base + tokenizer.position + 1)
+        return statements, starts, ends, reused, 0
+
+    def checkpoint(self):
+        self.checkpoints.append((self.journal.mark(), buffer_mark(STITCHES)))
+
+    def restore(self, index):
+        position, mark = self.checkpoints[index]
+        self.journal.undo(position)
+        buffer_truncate(STITCHES, mark)
+        del self.checkpoints[index + 1:]
+        del self.chunks[index:]
+        del self.offsets[index + 1:]
+
+    def update(self, source):
+        # Analisa e executa o código novo a partir da primeira declaração alterada e devolve um resumo
+        start_time = time.perf_counter()
+        if source == self.source and self.error is None:
+            return self.summary(len(self.statements), 0, len(self.chunks), start_time)
+        if source == "" or source.isspace():
+            self.error = "Erro de sintaxe: A expressão não pode ser vazia ou consistir apenas de espaços em branco."
+            return self.summary(0, 0, len(self.chunks), start_time)
+        try:
+            statements, starts, ends, reused, from_suffix = self.parse(source)
+        except Exception as e:
+            # Com erro de sintaxe, continuam valendo o AST e a saída da última execução
+            self.error = str(e)
+            return self.summary(0, 0, len(self.chunks), start_time)
+        self.source = source
+        self.statements, self.starts, self.ends = statements, starts, ends
+
+        resume = min(reused, self.executed)
+        if self.checkpoints:
+            self.restore(resume)
+        else:
+            self.checkpoint()
+        self.executed = resume
+        self.error = None
+        interpreter = create_interpreter(self.backend)
+        try:
+            for statement in statements[resume:]:
+                interpreter.execute(statement, self.symbol_table)
+                self.executed += 1
+                self.checkpoint()
+            interpreter.call_main(self.symbol_table)
+        except Exception as e:
+            self.error = str(e)
+        self.format_output(resume)
+        return self.summary(reused, from_suffix, resume, start_time)
+
+    def format_output(self, first):
+        # Pedaços de saída a partir da declaração `first`
+        object_rows = sorted(STITCHES.objects)
+        bounds = [mark[0] for _, mark in self.checkpoints[first:]] + [len(STITCHES)]
+        offset = self.offsets[-1]
+        for start, end in zip(bounds, bounds[1:]):
+            if end > start:
+                text = io.StringIO()
+                self.sink_class(text).write(buffer_slice(STITCHES, start, end, object_rows))
+                chunk = text.getvalue().encode('utf-8')
+                offset += len(chunk)
+            else:
+                chunk = b''
+            self.chunks.append(chunk)
+            self.offsets.append(offset)
+
+    def output(self, first=0):
+        return b''.join(self.chunks[first:])
+
+    def write_output(self, file, first=0):
+        # Regrava a saída a partir do pedaço `first`, que começa na mesma posição da gravação anterior
+        file.seek(self.offsets[first])
+        file.writelines(self.chunks[first:])
+        file.truncate()
+        file.flush()
+
+    def summary(self, reused, from_suffix, resumed_at, start_time):
+        return {
+            'statements': len(self.statements), 'reused': reused, 'ast_from_suffix': from_suffix,
+            'resumed_at': resumed_at, 'executed': max(self.executed - resumed_at, 0), 'ran': resumed_at < len(self.chunks),
+            'rows': len(STITCHES), 'error': self.error, 'seconds': time.perf_counter() - start_time,
+        }
+
+def report(summary):
+    if summary['ran']:
+        line = (f"[watch] {summary['statements']} declarações ({summary['reused']} sem nova análise, "
+                f"{summary['ast_from_suffix']} com o AST reaproveitado do fim); execução a partir da "
+                f"declaração {summary['resumed_at'] + 1}, {summary['rows']} comandos, {summary['seconds'] * 1000:.1f} ms")
+    else:
+        line = f"[watch] nada executado, a saída anterior continua valendo ({summary['seconds'] * 1000:.1f} ms)"
+    if summary['error']:
+        line += f"\nErro inesperado: {summary['error']}"
+    return line
+
+def raster_renderer(path, scale=1, antialias=False, workers=None, tile_size=None):
+    # Função que redesenha a imagem de --render a partir do buffer inteiro (requer numpy)
+    from renderer import RasterSink, save_image
+
+    def render(buffer):
+        raster = RasterSink()
+        raster.write(buffer)
+        save_image(raster.render(scale, antialias, workers, tile_size), path)
+    return render
+
+def watch(filename, backend='tree', output='text', output_file=None, render=None, interval=WATCH_INTERVAL):
+    # Executa a cada mudança da data de modificação ou do tamanho do arquivo, até Ctrl+C. Com output_file,
+    # o arquivo fica igual à saída de uma execução completa; sem ele, a saída padrão recebe só os comandos
+    # a partir da primeira declaração executada de novo. render recebe o buffer com todos os comandos.
+    session = WatchSession(backend, output)
+    signature = None
+    try:
+        while True:
+            try:
+                status = os.stat(filename)
+                current = (status.st_mtime_ns, status.st_size)
+            except OSError:
+                current = None
+            if current is not None and current != signature:
+                signature = current
+                try:
+                    with open(filename, 'r') as file:
+                        source = file.read()
+                except OSError as e:
+                    print(f"Erro: Não foi possível ler {filename}: {e}", file=sys.stderr)
+                    time.sleep(interval)
+                    continue
+                previous = len(session.chunks)
+                summary = session.update(source)
+                first = summary['resumed_at']
+                if summary['ran']:
+                    if output_file:
+                        rewrite = previous and os.path.exists(output_file)
+                        with open(output_file, 'r+b' if rewrite else 'wb') as file:
+                            session.write_output(file, first if rewrite else 0)
+                    else:
+                        sys.stdout.buffer.write(session.output(first))
+                        sys.stdout.flush()
+                    if render is not None:
+                        render(STITCHES)
+                print(report(summary), file=sys.stderr)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass